@@ -0,0 +1,5 @@
+"""
+Performance benchmarks.  The package holds a suite over deterministic synthetic IDD and IDF files (see generators and
+suite), run with ``python -m benchmarks`` from the project root and compared against another commit measured on the
+same machine or a baseline recorded on it.
+"""
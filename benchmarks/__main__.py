@@ -0,0 +1,89 @@
+"""
+Runs the benchmark suite and compares it against a baseline.  Run from the project root:
+
+    python -m benchmarks [--scale S] [--repeat N] [--threshold T] [--against COMMIT | --save-baseline]
+
+The exit code is 1 if any case regressed by more than the threshold, so the suite can gate CI.  Timings depend on the
+machine, so no baseline is kept in the repository.  With --against, the suite of another commit (such as the base
+branch of a pull request) is run first on the same machine and is the baseline.  Otherwise the results are compared
+against a baseline recorded earlier on this machine with --save-baseline.
+"""
+from argparse import ArgumentParser
+import json
+import os
+import sys
+
+from benchmarks.suite import compare_cases, compare_to_baseline, run_suite, run_suite_at_commit
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.realpath(__file__)), "baseline.json")
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog="python -m benchmarks", description="EnergyPlus IDD/IDF benchmark suite")
+    parser.add_argument('--scale', type=float, default=1.0, help="Factor applied to the synthetic input sizes")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs of each case; the fastest is reported")
+    parser.add_argument('--cases', nargs='+', metavar='CASE', help="Only run these cases")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the peak memory measurements")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="The baseline JSON file recorded on this machine")
+    parser.add_argument('--against', metavar='COMMIT',
+                        help="Run the suite of this git commit on this machine and use it as the baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed increase over the baseline, as a fraction (0.25 is 25%%)")
+    parser.add_argument('--save-baseline', action='store_true', help="Store the results as the new baseline")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    if args.against and args.save_baseline:
+        parser.error("--against and --save-baseline cannot be combined")
+
+    baseline = None
+    if args.against:
+        print("Running the benchmarks at {}".format(args.against))
+        try:
+            baseline = run_suite_at_commit(args.against, args.scale, args.repeat, not args.no_memory, args.cases)
+        except RuntimeError as e:
+            print(e)
+            return 2
+    current = run_suite(args.scale, args.repeat, not args.no_memory, args.cases, log=print)
+    for case_name, result in current['results'].items():
+        print("{:<22} {:>9.4f} s  {:>12.2f} {:<10} {}".format(
+            case_name, result['seconds'], result['throughput'], result['throughput_unit'],
+            "{:.2f} MB peak, {:.2f} MB retained".format(result['peak_memory_mb'], result['retained_memory_mb'])
+            if 'peak_memory_mb' in result else ""
+        ))
+    for row in compare_cases(current):
+        print("{}: {} {} {}, {} {}, saving {} ({:.0%})".format(
+            row['label'], row['metric'], row['reference_case'], row['reference'], row['case'], row['current'],
+            row['saved'], row['saved_fraction']
+        ))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+        print("Stored the baseline in {}".format(args.baseline))
+        return 0
+    if baseline is None:
+        if not os.path.exists(args.baseline):
+            print("No baseline at {}; record one with --save-baseline or compare with --against".format(args.baseline))
+            return 0
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    try:
+        rows = compare_to_baseline(current, baseline, args.threshold)
+    except ValueError as e:
+        print("Not compared: {}".format(e))
+        return 0
+    regressions = [row for row in rows if row['regression']]
+    for row in rows:
+        print("{:<22} {:<18} baseline {:>10} current {:>10} ratio {:>6.3f}{}".format(
+            row['case'], row['metric'], row['baseline'], row['current'], row['ratio'],
+            "  REGRESSION" if row['regression'] else ""
+        ))
+    print("{} of {} measurements regressed by more than {:.0%}".format(len(regressions), len(rows), args.threshold))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
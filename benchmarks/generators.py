@@ -0,0 +1,208 @@
+"""
+Deterministic generators of synthetic IDD and IDF text for the benchmarks.  The same parameters and seed always give
+the same text, so timings from different runs and machines measure the same input.
+"""
+import random
+
+SYNTHETIC_IDD_VERSION = "99.1.0"
+
+_WORDS = [
+    "Air", "Water", "Zone", "Coil", "Fan", "Pump", "Loop", "Node", "Heating", "Cooling", "Supply", "Return", "Outdoor",
+    "Inlet", "Outlet", "Schedule", "Curve", "Rated", "Design", "Minimum", "Maximum", "Flow", "Rate", "Temperature",
+    "Capacity", "Efficiency", "Fraction", "Control", "Type", "Setpoint", "Storage", "Tank", "Surface", "Thermal",
+]
+_CHOICE_KEYS = ["Yes", "No", "Continuous", "Cycling", "Autosize", "Summer", "Winter", "Constant", "Variable", "None"]
+_UNITS = ["m3/s", "W", "C", "kg/s", "Pa", "dimensionless", "m", "W/m2"]
+
+
+class FieldSpec:
+    """
+    One field of a synthetic IDD object.
+
+    :ivar str an_index: The A or N index of the field, such as A1 or N3
+    :ivar str name: The field name
+    :ivar str kind: One of alpha, real, integer or choice
+    :ivar list keys: The keys of a choice field
+    :ivar tuple bounds: The minimum and maximum of a numeric field
+    """
+
+    def __init__(self, an_index, name, kind, keys=None, bounds=None):
+        self.an_index = an_index
+        self.name = name
+        self.kind = kind
+        self.keys = keys or []
+        self.bounds = bounds
+
+
+class ObjectSpec:
+    """
+    One synthetic IDD object.
+
+    :ivar str name: The object type
+    :ivar str group: The IDD group of the object
+    :ivar list fields: The FieldSpec instances of the regular fields
+    :ivar list extensible: The FieldSpec instances of one extensible group, empty if the object is not extensible
+    """
+
+    def __init__(self, name, group, fields, extensible):
+        self.name = name
+        self.group = group
+        self.fields = fields
+        self.extensible = extensible
+
+
+class SyntheticModel:
+    """
+    A synthetic IDD, and IDF files that are valid against it.  The IDD has the usual EnergyPlus features the
+    processors deal with: groups, memos, notes, units, bounds, defaults, choice keys, references and extensible
+    groups.
+
+    Constructor parameters:
+
+    :param int num_idd_objects: The number of IDD objects, not counting Version
+    :param int fields_per_object: The number of regular fields of each object
+    :param float extensible_fraction: The fraction of objects that end with an extensible group
+    :param int extensible_group_size: The number of fields in an extensible group
+    :param int idd_extensible_groups: How many extensible groups the IDD lists, like the long lists in Energy+.idd
+    :param int notes_per_field: The number of note lines on each field, to make the IDD text realistically heavy
+    :param int seed: The seed of the random choices
+    """
+
+    def __init__(self, num_idd_objects=300, fields_per_object=12, extensible_fraction=0.2, extensible_group_size=3,
+                 idd_extensible_groups=20, notes_per_field=1, seed=1):
+        self.idd_extensible_groups = idd_extensible_groups
+        self.notes_per_field = notes_per_field
+        self.seed = seed
+        self.build_string = "synth{}".format(seed)
+        rng = random.Random(seed)
+        self.objects = []
+        used_names = set()
+        for object_index in range(num_idd_objects):
+            name = ":".join(rng.choice(_WORDS) + rng.choice(_WORDS) for _ in range(rng.randint(1, 3)))
+            name = "{}{}".format(name, object_index) if name in used_names else name
+            used_names.add(name)
+            counters = {'A': 1, 'N': 1}
+
+            def field(field_name, kind):
+                letter = 'A' if kind in ('alpha', 'choice') else 'N'
+                an_index = "{}{}".format(letter, counters[letter])
+                counters[letter] += 1
+                keys = rng.sample(_CHOICE_KEYS, 3) if kind == 'choice' else None
+                bounds = None
+                if kind == 'real':
+                    bounds = (0.0, float(rng.choice([1, 10, 100, 1000])))
+                elif kind == 'integer':
+                    bounds = (1, rng.choice([5, 10, 50]))
+                return FieldSpec(an_index, field_name, kind, keys, bounds)
+
+            fields = [field("Name", 'alpha')]
+            for _ in range(fields_per_object - 1):
+                kind = rng.choice(['alpha', 'real', 'real', 'integer', 'choice'])
+                fields.append(field(" ".join(rng.sample(_WORDS, 3)), kind))
+            extensible = []
+            if rng.random() < extensible_fraction:
+                extensible = [
+                    field("Vertex 1 {}-coordinate".format(axis), 'real') for axis in "XYZ"[:extensible_group_size]
+                ]
+                extensible.extend(field("Item 1 Value {}".format(i), 'real') for i in range(3, extensible_group_size))
+            self.objects.append(ObjectSpec(name, "Group {}".format(object_index // 25 + 1), fields, extensible))
+
+    def idd_text(self):
+        """
+        :return: The text of the synthetic IDD
+        """
+        lines = [
+            "!IDD_Version {}".format(SYNTHETIC_IDD_VERSION),
+            "!IDD_BUILD {}".format(self.build_string),
+            "",
+            "\\group Simulation Parameters",
+            "",
+            "Version,",
+            "  \\unique-object",
+            "  \\format singleLine",
+            "  A1 ; \\field Version Identifier",
+            "",
+        ]
+        group = None
+        for idd_object in self.objects:
+            if idd_object.group != group:
+                group = idd_object.group
+                lines.extend(["\\group {}".format(group), ""])
+            lines.append("{},".format(idd_object.name))
+            lines.append("  \\memo Synthetic object {} used for benchmarking".format(idd_object.name))
+            fields = list(idd_object.fields)
+            if idd_object.extensible:
+                lines.append("  \\extensible:{}".format(len(idd_object.extensible)))
+                lines.append("  \\min-fields {}".format(len(fields) + len(idd_object.extensible)))
+                # the IDD lists the first groups explicitly, renumbered like Vertex 1, Vertex 2, ...
+                counters = {'A': 0, 'N': 0}
+                for f in fields:
+                    counters[f.an_index[0]] = max(counters[f.an_index[0]], int(f.an_index[1:]))
+                for group_number in range(1, self.idd_extensible_groups + 1):
+                    for f in idd_object.extensible:
+                        letter = f.an_index[0]
+                        counters[letter] += 1
+                        fields.append(FieldSpec(
+                            "{}{}".format(letter, counters[letter]), f.name.replace(" 1 ", " {} ".format(group_number)),
+                            f.kind, f.keys, f.bounds
+                        ))
+            for index, f in enumerate(fields):
+                terminator = ";" if index == len(fields) - 1 else ","
+                lines.append("  {}{} \\field {}".format(f.an_index, terminator, f.name))
+                if idd_object.extensible and index == len(idd_object.fields):
+                    lines.append("      \\begin-extensible")
+                if index == 0:
+                    lines.append("      \\required-field")
+                    lines.append("      \\reference {}Names".format(idd_object.name.replace(":", "")))
+                for note_number in range(self.notes_per_field):
+                    lines.append("      \\note Note {} describing how {} is used".format(note_number + 1, f.name))
+                if f.kind == 'choice':
+                    lines.append("      \\type choice")
+                    lines.extend("      \\key {}".format(key) for key in f.keys)
+                    lines.append("      \\default {}".format(f.keys[0]))
+                elif f.kind in ('real', 'integer'):
+                    lines.append("      \\type {}".format(f.kind))
+                    lines.append("      \\units {}".format(_UNITS[len(f.name) % len(_UNITS)]))
+                    lines.append("      \\minimum {}".format(f.bounds[0]))
+                    lines.append("      \\maximum {}".format(f.bounds[1]))
+                elif index > 0:
+                    lines.append("      \\type alpha")
+            lines.append("")
+        return "\n".join(lines) + "\n"
+
+    def idf_text(self, num_objects=20000, extensible_groups=10, comment_density=0.05, seed=None):
+        """
+        Generates an IDF that is valid against the synthetic IDD, with a Version object followed by objects of
+        randomly chosen types.
+
+        :param int num_objects: The number of objects after the Version object
+        :param int extensible_groups: The number of extensible groups written for each extensible object
+        :param float comment_density: The fraction of objects preceded by a comment block
+        :param int seed: The seed of the random choices, by default the seed of the model
+        :return: The text of the IDF
+        """
+        rng = random.Random(self.seed if seed is None else seed)
+        parts = ["Version,{};\n".format(SYNTHETIC_IDD_VERSION.rsplit(".", 1)[0])]
+        for object_number in range(num_objects):
+            idd_object = rng.choice(self.objects)
+            if rng.random() < comment_density:
+                parts.append("! Comment block before object {}\n! describing the next object\n".format(object_number))
+            fields = list(idd_object.fields)
+            if idd_object.extensible:
+                fields.extend(idd_object.extensible * extensible_groups)
+            values = ["{} {}".format(idd_object.name.split(":")[0], object_number)]
+            for f in fields[1:]:
+                if f.kind == 'choice':
+                    values.append(rng.choice(f.keys))
+                elif f.kind == 'real':
+                    values.append(repr(round(rng.uniform(*f.bounds), 3)))
+                elif f.kind == 'integer':
+                    values.append(str(rng.randint(*f.bounds)))
+                else:
+                    values.append(rng.choice(_WORDS) + " Value")
+            lines = ["{},".format(idd_object.name)]
+            for index, (f, value) in enumerate(zip(fields, values)):
+                terminator = ";" if index == len(fields) - 1 else ","
+                lines.append("  {:<24} !- {}".format(value + terminator, f.name))
+            parts.append("\n".join(lines) + "\n\n")
+        return "".join(parts)
@@ -0,0 +1,367 @@
+"""
+The benchmark cases, and the comparison of their results against a baseline, either stored or measured at another
+commit on the same machine.
+"""
+import copyreg
+import gc
+import io
+import json
+import os
+import pickle
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from energyplus_iddidf import idd_processor
+from energyplus_iddidf.epjson import convert_epjson_to_idf, convert_idf_to_epjson
+from energyplus_iddidf.idd_objects import IDDStructure
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idf_objects import IDFStructure
+from energyplus_iddidf.idf_processor import IDFProcessor
+
+from benchmarks.generators import SYNTHETIC_IDD_VERSION, SyntheticModel
+
+BASELINE_FORMAT_VERSION = 1
+
+# the sizes of the synthetic inputs at scale 1
+DEFAULT_IDD_OBJECTS = 300
+DEFAULT_IDF_OBJECTS = 20000
+
+# the measurements compared against the baseline; for all of them lower is better
+COMPARED_METRICS = ['seconds', 'peak_memory_mb', 'retained_memory_mb']
+
+# pairs of cases doing the same work two ways, reported side by side as (label, reference case, case, metric)
+CASE_COMPARISONS = [
+    ("token interning", 'idf_process', 'idf_process_interned', 'retained_memory_mb'),
+    ("flat IDD pickling", 'idd_pickle_default', 'idd_pickle_round_trip', 'seconds'),
+    ("flat IDD pickling", 'idd_pickle_default', 'idd_pickle_round_trip', 'pickle_mb'),
+    ("flat IDF pickling", 'idf_pickle_default', 'idf_pickle_round_trip', 'seconds'),
+    ("flat IDF pickling", 'idf_pickle_default', 'idf_pickle_round_trip', 'pickle_mb'),
+]
+
+
+def _default_reduce(obj):
+    # what pickling does without the custom __reduce__ of the structures
+    return copyreg.__newobj__, (type(obj),), obj.__dict__
+
+
+# a dispatch table that pickles the structures the default way, to compare the flat pickling against
+DEFAULT_PICKLING_TABLE = copyreg.dispatch_table.copy()
+DEFAULT_PICKLING_TABLE[IDDStructure] = _default_reduce
+DEFAULT_PICKLING_TABLE[IDFStructure] = _default_reduce
+
+
+def pickle_bytes(obj, dispatch_table=None):
+    """
+    :param obj: The object to pickle, with the highest protocol
+    :param dict dispatch_table: An optional dispatch table, such as DEFAULT_PICKLING_TABLE
+    :return: The pickle of the object
+    """
+    if dispatch_table is None:
+        return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    output = io.BytesIO()
+    pickler = pickle.Pickler(output, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = dispatch_table
+    pickler.dump(obj)
+    return output.getvalue()
+
+
+class BenchmarkCase:
+    """
+    One timed operation.
+
+    :ivar str name: The name of the case, used as its key in results and baselines
+    :ivar setup: A callable returning the input of one run; its time is not measured
+    :ivar run: A callable taking the input from setup and doing the measured work
+    :ivar float work: The amount of work of one run, in work_unit
+    :ivar str work_unit: The unit throughput is reported in, such as MB or objects
+    :ivar dict metrics: Measurements known without running the case, such as the size of a pickle, which are added to
+                        the results as they are
+    """
+
+    def __init__(self, name, setup, run, work, work_unit, metrics=None):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.work = work
+        self.work_unit = work_unit
+        self.metrics = metrics or {}
+
+    def measure(self, repeat, measure_memory):
+        """
+        Runs the case repeat times and once more under tracemalloc if memory is measured.  Timing runs are not traced,
+        since tracing slows allocation down considerably.  The memory run keeps what the case returns, such as a
+        parsed structure, alive until after a garbage collection, so the memory still held by it is reported along
+        with the peak.
+
+        :return: A dictionary of the fastest and mean time, the throughput of the fastest run and the peak and retained
+                 memory
+        """
+        times = []
+        for _ in range(repeat):
+            data = self.setup()
+            start = time.perf_counter()
+            self.run(data)
+            times.append(time.perf_counter() - start)
+        result = {
+            'seconds': round(min(times), 4),
+            'mean_seconds': round(sum(times) / len(times), 4),
+            'throughput': round(self.work / min(times), 2),
+            'throughput_unit': "{}/s".format(self.work_unit),
+        }
+        result.update(self.metrics)
+        if measure_memory:
+            data = self.setup()
+            gc.collect()
+            tracemalloc.start()
+            try:
+                outputs = [self.run(data)]
+                gc.collect()
+                retained, peak = tracemalloc.get_traced_memory()
+                outputs.clear()
+                result['peak_memory_mb'] = round(peak / 1e6, 2)
+                result['retained_memory_mb'] = round(retained / 1e6, 2)
+            finally:
+                tracemalloc.stop()
+        return result
+
+
+def suite_parameters(scale=1.0):
+    """
+    :param float scale: A factor applied to the number of IDD and IDF objects
+    :return: The parameters of the synthetic inputs, which are stored with results so baselines are only compared
+             against runs on the same inputs
+    """
+    return {
+        'num_idd_objects': max(1, int(round(DEFAULT_IDD_OBJECTS * scale))),
+        'num_idf_objects': max(1, int(round(DEFAULT_IDF_OBJECTS * scale))),
+        'fields_per_object': 12,
+        'extensible_groups': 10,
+        'comment_density': 0.05,
+        'seed': 1,
+    }
+
+
+def build_cases(parameters, work_dir):
+    """
+    Generates the synthetic inputs into work_dir and returns the benchmark cases over them.
+
+    :param dict parameters: The parameters, see suite_parameters
+    :param str work_dir: A directory for the generated files
+    :return: A list of BenchmarkCase instances
+    """
+    model = SyntheticModel(
+        num_idd_objects=parameters['num_idd_objects'], fields_per_object=parameters['fields_per_object'],
+        seed=parameters['seed']
+    )
+    idd_path = os.path.join(work_dir, "synthetic.idd")
+    with open(idd_path, "w") as f:
+        f.write(model.idd_text())
+    idf_path = os.path.join(work_dir, "synthetic.idf")
+    with open(idf_path, "w") as f:
+        f.write(model.idf_text(
+            parameters['num_idf_objects'], parameters['extensible_groups'], parameters['comment_density']
+        ))
+    idd_cache_key = "{}__{}".format(SYNTHETIC_IDD_VERSION, model.build_string)
+
+    def fresh_idd():
+        # the processor keeps every IDD it reads by version and build, which would turn later runs into a lookup
+        idd_processor.IDD_CACHE.pop(idd_cache_key, None)
+        return idd_path
+
+    idd = IDDProcessor().process_file_given_file_path(fresh_idd())
+
+    def fresh_idf():
+        # the operations on a structure may cache or change data, so each run gets its own
+        return IDFProcessor().process_file_given_file_path(idf_path)
+
+    num_objects = len([o for o in fresh_idf().objects if not o.comment])
+    epjson_path = os.path.join(work_dir, "synthetic.epJSON")
+    convert_idf_to_epjson(idf_path, epjson_path, idd)
+    round_trip_path = os.path.join(work_dir, "round_trip.idf")
+    pickle_sizes = {}
+    for structure_name, structure in [('idd', idd), ('idf', fresh_idf())]:
+        for dispatch_table in [None, DEFAULT_PICKLING_TABLE]:
+            pickle_sizes[structure_name, dispatch_table is None] = len(pickle_bytes(structure, dispatch_table)) / 1e6
+
+    def pickle_case(name, setup, structure_name, dispatch_table=None):
+        # the work is the size of the flat pickle for both ways of pickling, so their throughputs compare directly
+        return BenchmarkCase(
+            name, setup, lambda structure: pickle.loads(pickle_bytes(structure, dispatch_table)),
+            pickle_sizes[structure_name, True], "MB",
+            {'pickle_mb': round(pickle_sizes[structure_name, dispatch_table is None], 2)}
+        )
+    swaps = {"Summer": "Winter", "Winter": "Summer", "Air Value": "Water Value", "Autosize": "Constant"}
+
+    def validate(idf):
+        issues = idf.validate(idd)
+        if issues:
+            raise RuntimeError("The synthetic IDF should be valid, but validation found {} issues".format(len(issues)))
+
+    return [
+        BenchmarkCase(
+            'idd_process', fresh_idd, lambda path: IDDProcessor().process_file_given_file_path(path),
+            os.path.getsize(idd_path) / 1e6, "MB"
+        ),
+        BenchmarkCase(
+            'idf_process', lambda: idf_path, lambda path: IDFProcessor().process_file_given_file_path(path),
+            os.path.getsize(idf_path) / 1e6, "MB"
+        ),
+        BenchmarkCase(
+            'idf_process_interned', lambda: idf_path,
+            lambda path: IDFProcessor(intern_tokens=True).process_file_given_file_path(path),
+            os.path.getsize(idf_path) / 1e6, "MB"
+        ),
+        BenchmarkCase('idf_validate', fresh_idf, validate, num_objects, "objects"),
+        BenchmarkCase('whole_idf_string', fresh_idf, lambda idf: idf.whole_idf_string(idd), num_objects, "objects"),
+        BenchmarkCase('global_swap', fresh_idf, lambda idf: idf.global_swap(swaps), num_objects, "objects"),
+        BenchmarkCase(
+            'idf_to_epjson', lambda: idf_path, lambda path: convert_idf_to_epjson(path, epjson_path, idd),
+            os.path.getsize(idf_path) / 1e6, "MB"
+        ),
+        BenchmarkCase(
+            'epjson_to_idf', lambda: epjson_path, lambda path: convert_epjson_to_idf(path, round_trip_path, idd),
+            num_objects, "objects"
+        ),
+        pickle_case('idd_pickle_round_trip', lambda: idd, 'idd'),
+        pickle_case('idd_pickle_default', lambda: idd, 'idd', DEFAULT_PICKLING_TABLE),
+        pickle_case('idf_pickle_round_trip', fresh_idf, 'idf'),
+        pickle_case('idf_pickle_default', fresh_idf, 'idf', DEFAULT_PICKLING_TABLE),
+    ]
+
+
+def run_suite(scale=1.0, repeat=3, measure_memory=True, case_names=None, log=None):
+    """
+    Generates the synthetic inputs and measures every case.
+
+    :param float scale: A factor applied to the number of IDD and IDF objects
+    :param int repeat: The number of timed runs of each case; the fastest is reported
+    :param bool measure_memory: If True, each case is run once more to measure its peak memory
+    :param case_names: An optional iterable of case names to limit the run to
+    :param log: An optional callable taking a progress message
+    :return: A results dictionary, in the form stored as a baseline
+    """
+    parameters = suite_parameters(scale)
+    work_dir = tempfile.mkdtemp(prefix="energyplus_iddidf_benchmarks_")
+    try:
+        results = {}
+        for case in build_cases(parameters, work_dir):
+            if case_names is not None and case.name not in case_names:
+                continue
+            if log is not None:
+                log("Running {}".format(case.name))
+            results[case.name] = case.measure(repeat, measure_memory)
+    finally:
+        shutil.rmtree(work_dir)
+    return {
+        'format_version': BASELINE_FORMAT_VERSION,
+        'parameters': parameters,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def run_suite_at_commit(commit, scale=1.0, repeat=3, measure_memory=True, case_names=None):
+    """
+    Runs the suite of another commit of this repository, checked out in a temporary git worktree, in a separate Python
+    process on this machine.  Comparing against it measures a change on the same hardware, unlike a stored baseline.
+
+    :param str commit: A git commit, branch or tag, such as origin/main
+    :param float scale: A factor applied to the number of IDD and IDF objects
+    :param int repeat: The number of timed runs of each case; the fastest is reported
+    :param bool measure_memory: If True, each case is run once more to measure its memory
+    :param case_names: An optional iterable of case names to limit the run to
+    :return: The results of run_suite at that commit
+    :raises RuntimeError: if the commit cannot be checked out or its suite does not produce results
+    """
+    repository = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+    temp_dir = tempfile.mkdtemp(prefix="energyplus_iddidf_benchmarks_")
+    worktree = os.path.join(temp_dir, "worktree")
+    results_path = os.path.join(temp_dir, "results.json")
+    checkout = subprocess.run(
+        ["git", "worktree", "add", "--detach", worktree, commit], cwd=repository, stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT, universal_newlines=True
+    )
+    if checkout.returncode != 0:
+        shutil.rmtree(temp_dir)
+        raise RuntimeError("Could not check out {}: {}".format(commit, checkout.stdout.strip()))
+    try:
+        # a baseline path that does not exist, so the other suite only measures
+        command = [
+            sys.executable, "-m", "benchmarks", "--scale", str(scale), "--repeat", str(repeat), "--output",
+            results_path, "--baseline", os.path.join(temp_dir, "no_baseline.json")
+        ]
+        if not measure_memory:
+            command.append("--no-memory")
+        if case_names is not None:
+            command.extend(["--cases"] + list(case_names))
+        run = subprocess.run(
+            command, cwd=worktree, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True
+        )
+        if not os.path.exists(results_path):
+            raise RuntimeError("The benchmarks at {} did not produce results: {}".format(commit, run.stdout.strip()))
+        with open(results_path) as f:
+            return json.load(f)
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=repository, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def compare_cases(results):
+    """
+    Puts the cases of CASE_COMPARISONS side by side, such as the memory kept by a plain and an interned parse.
+
+    :param dict results: The results of run_suite
+    :return: A list of dictionaries, one per comparison whose cases and metric are both in the results, holding the
+             label, both cases and values, the amount saved by the second case and the saved fraction
+    """
+    rows = []
+    for label, reference_case, case, metric in CASE_COMPARISONS:
+        reference = results['results'].get(reference_case, {}).get(metric)
+        current = results['results'].get(case, {}).get(metric)
+        if reference is None or current is None:
+            continue
+        rows.append({
+            'label': label, 'metric': metric, 'reference_case': reference_case, 'case': case,
+            'reference': reference, 'current': current, 'saved': round(reference - current, 2),
+            'saved_fraction': round((reference - current) / reference, 3) if reference else 0.0,
+        })
+    return rows
+
+
+def compare_to_baseline(current, baseline, threshold=0.25):
+    """
+    Compares results against a baseline.  A metric regresses when it is more than threshold (a fraction) above the
+    baseline value.
+
+    :param dict current: The results of run_suite
+    :param dict baseline: Results stored earlier, in the same form
+    :param float threshold: The allowed relative increase, such as 0.25 for 25%
+    :return: A list of dictionaries, one per case and metric present in both, holding the case, the metric, both
+             values, their ratio and whether it is a regression
+    :raises ValueError: if the baseline was recorded with another format or other suite parameters
+    """
+    if baseline.get('format_version') != BASELINE_FORMAT_VERSION:
+        raise ValueError("The baseline was written by another version of the benchmarks, record it again")
+    if baseline.get('parameters') != current['parameters']:
+        raise ValueError("The baseline was recorded with other parameters: {}".format(baseline.get('parameters')))
+    rows = []
+    for case_name, result in current['results'].items():
+        baseline_result = baseline['results'].get(case_name)
+        if baseline_result is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric not in result or not baseline_result.get(metric):
+                continue
+            ratio = result[metric] / baseline_result[metric]
+            rows.append({
+                'case': case_name, 'metric': metric, 'baseline': baseline_result[metric], 'current': result[metric],
+                'ratio': round(ratio, 3), 'regression': ratio > 1.0 + threshold,
+            })
+    return rows
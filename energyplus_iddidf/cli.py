@@ -1,26 +1,128 @@
 from argparse import ArgumentParser
-from fnmatch import fnmatch
 from json import dumps
-from functools import reduce
+import os
 from pathlib import Path
-from sys import exit
+from sys import exit, stdin, stdout
 from typing import Optional
 
+from energyplus_iddidf.cli_service import (  # noqa: F401 - Actions and the helpers are part of the CLI module API
+    Actions, CLIService, ExitCodes, expand_batch_inputs, idf_paths_from_argument, issue_summary, run_batch,
+    send_request, serve_stream, serve_unix_socket
+)
 from energyplus_iddidf.exceptions import ProcessingException
-from energyplus_iddidf.idd_objects import IDDObject
-from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idd_search import KIND_WEIGHTS
+from energyplus_iddidf.idd_shared import publish_idd
 
 
-class Actions:
-    IDDCheck = 'idd_check'
-    FindIDDObjectsMatching = 'find_idd_objects_matching'
-    SummarizeIDDObject = 'summarize_idd_object'
+def _absolute(path: Optional[str]) -> Optional[str]:
+    # a server runs in its own working directory, so paths are resolved before they are sent
+    return os.path.abspath(path) if path else path
 
 
-class ExitCodes:
-    OK = 0
-    ProcessingError = 1
-    BadArguments = 2
+def request_from_arguments(args) -> Optional[dict]:
+    request = {
+        'filename': _absolute(args.filename), 'idd': _absolute(args.idd), 'idd_dir': _absolute(args.idd_dir)
+    }
+    if args.validate_idf:
+        request['action'] = Actions.ValidateIDF
+    elif args.idf_stats:
+        request['action'] = Actions.IDFStats
+    elif args.export_csv:
+        request.update(action=Actions.ExportCSV, output_dir=_absolute(args.export_csv))
+    elif args.diff_idf:
+        request.update(action=Actions.DiffIDF, new_file=_absolute(args.diff_idf))
+    elif args.diff_idd:
+        request.update(action=Actions.DiffIDD, new_file=_absolute(args.diff_idd))
+    elif args.convert:
+        request.update(action=Actions.Convert, output_file=_absolute(args.convert))
+    elif args.idd_check:
+        request['action'] = Actions.IDDCheck
+    elif args.idd_obj_matches:
+        request.update(
+            action=Actions.FindIDDObjectsMatching, pattern=args.idd_obj_matches, index_dir=_absolute(args.index_dir)
+        )
+    elif args.idd_search:
+        request.update(
+            action=Actions.SearchIDD, query=args.idd_search, mode=args.search_mode, kinds=args.search_kinds,
+            limit=args.search_limit, index_dir=_absolute(args.index_dir)
+        )
+    elif args.summarize_idd_object:
+        request.update(action=Actions.SummarizeIDDObject, object_name=args.summarize_idd_object)
+    else:
+        return None
+    return request
+
+
+def batch_requests(args, request: dict) -> list:
+    """
+    Expands the batch inputs of the arguments into one request per file, each a copy of the given request.  For a
+    batch conversion the --convert argument names an output directory, and each file is converted into it under its
+    own name with the extension of the other format.
+    """
+    idd_actions = (
+        Actions.IDDCheck, Actions.FindIDDObjectsMatching, Actions.SummarizeIDDObject, Actions.DiffIDD, Actions.SearchIDD
+    )
+    entries = ([args.filename] if args.filename else []) + args.batch
+    paths = expand_batch_inputs(entries, '*.idd' if request['action'] in idd_actions else '*.idf')
+    requests = []
+    for path in paths:
+        file_request = dict(request, filename=path)
+        if request['action'] == Actions.Convert:
+            extension = '.epJSON' if path.lower().endswith('.idf') else '.idf'
+            file_request['output_file'] = os.path.join(request['output_file'], Path(path).stem + extension)
+        requests.append(file_request)
+    return requests
+
+
+def batch(args, request: dict) -> int:
+    if request['action'] == Actions.ExportCSV:
+        print(dumps({'message': "--export_csv already combines many IDF files, pass it a directory instead"}))
+        return ExitCodes.BadArguments
+    if args.client:
+        print(dumps({'message': "--batch runs its own worker pool and cannot be combined with --client"}))
+        return ExitCodes.BadArguments
+    try:
+        requests = batch_requests(args, request)
+    except OSError as e:
+        print(dumps({'message': f"Could not read batch inputs: {e}"}))
+        return ExitCodes.BadArguments
+    jobs = min(args.jobs or os.cpu_count() or 1, max(len(requests), 1))
+    if request['action'] == Actions.Convert:
+        os.makedirs(request['output_file'], exist_ok=True)
+    segments = []
+    try:
+        # the IDD is processed once here and shared with the workers, rather than processed by every worker
+        if jobs > 1 and request.get('idd') and not request.get('idd_dir'):
+            try:
+                segments.append(publish_idd(CLIService().idd_structure(request['idd'])))
+            except ProcessingException:
+                pass  # each request reports the problem itself
+        return run_batch(requests, stdout, jobs, [segment.name for segment in segments])
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+
+def serve(args) -> int:
+    service = CLIService()
+    # IDD files named on the command line are processed up front, so the first requests don't wait for them
+    for idd_path in [args.filename, args.idd]:
+        if idd_path and idd_path.lower().endswith('.idd'):
+            try:
+                service.idd_structure(idd_path)
+            except ProcessingException as e:
+                print(dumps({'message': f"Could not process IDD to serve: {e}"}, indent=2))
+                return ExitCodes.ProcessingError
+    if args.serve == '-':
+        serve_stream(service, stdin, stdout)
+        return ExitCodes.OK
+    try:
+        serve_unix_socket(service, args.serve)
+    except ProcessingException as e:
+        print(dumps({'message': f"Could not start server: {e}"}, indent=2))
+        return ExitCodes.ProcessingError
+    return ExitCodes.OK
 
 
 # Eventually this could become a more feature rich CLI
@@ -30,7 +132,7 @@ def main_cli() -> int:
         description="EnergyPlus IDD/IDF Utility Command Line",
         epilog="This CLI is in infancy and will probably have features added over time"
     )
-    parser.add_argument('filename', help="Path to IDD/IDF file to be operated upon")  # positional argument
+    parser.add_argument('filename', nargs='?', help="Path to IDD/IDF file to be operated upon")  # positional argument
     parser.add_argument(
         '--idd_check', action='store_const', const=Actions.IDDCheck,
         help="Process the given IDD file and report statistics and issues"
@@ -41,78 +143,100 @@ def main_cli() -> int:
     parser.add_argument(
         '--summarize_idd_object', type=str, help="Print a summary of a single IDD object by name"
     )
+    parser.add_argument(
+        '--idd_search', type=str, metavar='QUERY',
+        help="Search the object names, field names, memos, notes, reference classes and keys of the given IDD file, "
+             "printing the matches best first"
+    )
+    parser.add_argument(
+        '--search_mode', choices=['words', 'prefix', 'glob', 'regex'], default='words',
+        help="How --idd_search matches: whole words (the default), word prefixes, a glob pattern or a regular "
+             "expression"
+    )
+    parser.add_argument(
+        '--search_kinds', nargs='+', choices=list(KIND_WEIGHTS), metavar='KIND',
+        help="Limit --idd_search to some kinds of text: " + ", ".join(KIND_WEIGHTS)
+    )
+    parser.add_argument(
+        '--search_limit', type=int, default=20, metavar='N', help="The number of --idd_search matches to print"
+    )
+    parser.add_argument(
+        '--index_dir', type=str,
+        help="Directory to save IDD search indexes in, so later --idd_search and --idd_obj_matches runs on the same "
+             "IDD don't need to process it"
+    )
+    parser.add_argument(
+        '--diff_idd', type=str, metavar='NEW_IDD',
+        help="Compare the given IDD file against NEW_IDD, reporting added, removed and changed objects and fields"
+    )
+    parser.add_argument(
+        '--validate_idf', action='store_const', const=Actions.ValidateIDF,
+        help="Validate the given IDF file, or every IDF file in the given directory, against the IDD for its version"
+    )
+    parser.add_argument(
+        '--idf_stats', action='store_const', const=Actions.IDFStats,
+        help="Stream the given IDF file, or every IDF file in the given directory, once in constant memory and report "
+             "the version, object and field counts by type, comment blocks, the largest objects and the parse time; "
+             "with --idd or --idd_dir, objects are also counted by IDD group"
+    )
+    parser.add_argument(
+        '--export_csv', type=str, metavar='OUTPUT_DIR',
+        help="Stream the given IDF file, or every IDF file in the given directory, into one CSV file per object type "
+             "in OUTPUT_DIR; needs --idd"
+    )
+    parser.add_argument(
+        '--diff_idf', type=str, metavar='NEW_IDF',
+        help="Compare the given IDF file against NEW_IDF, reporting added, removed and changed objects; with --idd, "
+             "changed fields are reported with their IDD field names"
+    )
+    parser.add_argument(
+        '--convert', type=str, metavar='OUTPUT_FILE',
+        help="Convert the given IDF file to epJSON, or the given epJSON file to IDF, writing OUTPUT_FILE; needs --idd"
+    )
+    parser.add_argument(
+        '--idd', type=str, help="Path to the IDD file to use for IDF operations"
+    )
+    parser.add_argument(
+        '--idd_dir', type=str, help="Directory of IDD files; IDF operations use the IDD matching each IDF version"
+    )
+    parser.add_argument(
+        '--serve', type=str, nargs='?', const='-', metavar='SOCKET',
+        help="Run as a server that keeps IDDs loaded and answers JSON requests, one per line, on the Unix socket "
+             "SOCKET, or on stdin and stdout if SOCKET is left out; a given IDD file (or --idd) is loaded up front"
+    )
+    parser.add_argument(
+        '--client', type=str, metavar='SOCKET',
+        help="Send the operation to a server started with --serve SOCKET instead of running it in this process"
+    )
+    parser.add_argument(
+        '--batch', type=str, nargs='+', metavar='INPUT',
+        help="Run the operation on many files, given as paths, glob patterns, directories or @MANIFEST files listing "
+             "one input per line, and print each result as one JSON line as soon as it is ready, followed by a "
+             "summary line; with --convert, OUTPUT_FILE is the directory to convert into"
+    )
+    parser.add_argument(
+        '--jobs', type=int, metavar='N', help="The number of worker processes for --batch, by default one per CPU"
+    )
     args = parser.parse_args()
-    all_options = [
-        args.idd_check, args.idd_obj_matches, args.summarize_idd_object
-    ]
-    if all([x is None for x in all_options]):
+    if args.serve:
+        return serve(args)
+    request = request_from_arguments(args)
+    if request is None:
         print(dumps({'message': "Nothing to do...use command line switches to perform operations"}, indent=2))
         return ExitCodes.OK
-    p = Path(args.filename)
-    if not p.exists():
-        print(dumps({'message': "Supplied file does not appear to exist, check paths and retry!"}, indent=2))
-        return ExitCodes.BadArguments
-    # for now assume it's always the IDD, so we don't have to repeat this code
-    processor = IDDProcessor()
-    try:
-        processor.process_file_given_file_path(str(p))
-    except ProcessingException:
-        print("Issues occurred during processing")
-        return ExitCodes.ProcessingError
-    if args.idd_check:
-        num_groups = len(processor.idd.groups)
-        num_objects = reduce(
-            lambda x, y: x + y,
-            [len(g.objects) for g in processor.idd.groups],
-            0
-        )
-        print(dumps({
-            'message': 'Everything looks OK',
-            'content': {
-                'idd_version': processor.idd.version_string,
-                'idd_build_id': processor.idd.build_string,
-                'num_groups': num_groups,
-                'num_objects': num_objects
-            }
-        }, indent=2))
-    elif args.idd_obj_matches:
-        pattern = args.idd_obj_matches
-        matching_objects = []
-        for g in processor.idd.groups:
-            for o in g.objects:
-                obj_name = o.name
-                if fnmatch(obj_name, pattern):
-                    matching_objects.append(o)
-        print(dumps({
-            'message': 'Everything looks OK',
-            'content': {
-                'pattern': pattern,
-                'matching_objects': [
-                    o.name for o in matching_objects
-                ]
-            }
-        }, indent=2))
-    elif args.summarize_idd_object:
-        object_name = args.summarize_idd_object.upper()
-        matching_object: Optional[IDDObject] = None
-        for g in processor.idd.groups:
-            for o in g.objects:
-                obj_name = o.name.upper()
-                if fnmatch(obj_name, object_name):
-                    matching_object = o
-        if matching_object is None:
-            print(dumps({'message': f"Could not find matching object by name {object_name}"}, indent=2))
-            return ExitCodes.BadArguments
-        print(dumps({
-            'message': 'Everything looks OK',
-            'content': {
-                'searched_object_name': object_name,
-                'field': [
-                    f"{f.field_an_index} : {f.field_name}" for f in matching_object.fields
-                ]
-            }
-        }, indent=2))
-    return ExitCodes.OK
+    if args.batch:
+        return batch(args, request)
+    if args.client:
+        try:
+            result = send_request(args.client, request)
+        except ProcessingException as e:
+            print(dumps({'message': str(e)}, indent=2))
+            return ExitCodes.ProcessingError
+    else:
+        result = CLIService().handle(request)
+    exit_code = result.pop('exit_code')
+    print(dumps(result, indent=2))
+    return exit_code
 
 
 if __name__ == "__main__":  # pragma: no cover
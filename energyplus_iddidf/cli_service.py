@@ -0,0 +1,648 @@
+from fnmatch import fnmatch
+from glob import glob, has_magic
+from json import dumps, loads
+import logging
+from multiprocessing import Pool
+import os
+from pathlib import Path
+import socket
+import socketserver
+import threading
+import time
+from typing import Optional
+
+from energyplus_iddidf.epjson import convert_epjson_to_idf, convert_idf_to_epjson
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_diff import IDDDiffer
+from energyplus_iddidf.idd_objects import IDDObject, IDDStructure
+from energyplus_iddidf.idd_processor import IDD_CACHE, IDDProcessor
+from energyplus_iddidf.idd_registry import IDDRegistry
+from energyplus_iddidf.idd_search import IDDSearchIndex, IDDSearchIndexCache
+from energyplus_iddidf.idd_shared import attach_idd
+from energyplus_iddidf.idf_csv import export_idf_files_to_csv
+from energyplus_iddidf.idf_diff import IDFDiffer
+from energyplus_iddidf.idf_objects import ValidationIssue
+from energyplus_iddidf.idf_stats import IDFStatsCollector
+
+module_logger = logging.getLogger("eptransition.cli.service")
+
+
+class Actions:
+    IDDCheck = 'idd_check'
+    FindIDDObjectsMatching = 'find_idd_objects_matching'
+    SummarizeIDDObject = 'summarize_idd_object'
+    ValidateIDF = 'validate_idf'
+    ExportCSV = 'export_csv'
+    DiffIDF = 'diff_idf'
+    DiffIDD = 'diff_idd'
+    Convert = 'convert'
+    SearchIDD = 'search_idd'
+    IDFStats = 'idf_stats'
+    Ping = 'ping'
+    Shutdown = 'shutdown'
+
+
+class ExitCodes:
+    OK = 0
+    ProcessingError = 1
+    BadArguments = 2
+
+
+def issue_summary(issue: ValidationIssue) -> dict:
+    return {
+        'object_name': issue.object_name,
+        'field_name': issue.field_name,
+        'severity': ValidationIssue.severity_string(issue.severity),
+        'message': issue.message,
+    }
+
+
+def idf_paths_from_argument(idf_path: Path) -> list:
+    return sorted(str(x) for x in idf_path.glob('*.idf')) if idf_path.is_dir() else [str(idf_path)]
+
+
+def response(exit_code: int, message: str, content=None) -> dict:
+    result = {'exit_code': exit_code, 'message': message}
+    if content is not None:
+        result['content'] = content
+    return result
+
+
+class CLIService:
+    """
+    This class runs the command line actions on requests given as dictionaries, and returns each result as a
+    dictionary holding the exit code, a message, and usually the content.  The command line uses it for a single
+    request, and the server mode (see serve_stream and serve_unix_socket) keeps one instance alive for many requests,
+    so each IDD file is processed once and then answered from memory.
+
+    A request holds the action name (see Actions) and the arguments of the action: filename (the IDD or IDF file to
+    operate on), idd and idd_dir (for IDF actions), pattern (find_idd_objects_matching), object_name
+    (summarize_idd_object), output_dir (export_csv), new_file (diff_idf and diff_idd), output_file (convert), query,
+    mode, kinds and limit (search_idd), and num_largest (idf_stats).  The IDD search actions also take index_dir, a
+    directory where the search index of each IDD is saved (see IDDSearchIndexCache), so later searches don't need to
+    process the IDD.
+
+    handle runs one request at a time, even when called from several threads as serve_unix_socket does, since the
+    processed IDDs, the registries and their caches are shared by all requests and are not safe to use concurrently.
+
+    There are no constructor parameters.
+    """
+
+    def __init__(self):
+        self.shutdown_requested = False
+        self._idd_structures = {}
+        self._registries = {}
+        self._search_indexes = {}
+        self._lock = threading.Lock()
+        self._request_lock = threading.Lock()
+
+    def idd_structure(self, idd_path: str) -> IDDStructure:
+        """
+        Returns the processed IDD for a path, processing it only the first time or when the file has changed since.
+
+        :param str idd_path: The path to an IDD file
+        :return: The IDDStructure instance
+        :raises ProcessingException: if the file does not exist or cannot be processed
+        """
+        real_path = os.path.realpath(idd_path)
+        try:
+            modified_time = os.path.getmtime(real_path)
+        except OSError:
+            raise ProcessingException("IDD file not found=\"" + idd_path + "\"")
+        with self._lock:
+            cached = self._idd_structures.get(real_path)
+            if cached is None or cached[0] != modified_time:
+                cached = (modified_time, IDDProcessor().process_file_given_file_path(real_path))
+                self._idd_structures[real_path] = cached
+        return cached[1]
+
+    def search_index(self, idd_path: str, index_dir: Optional[str] = None) -> IDDSearchIndex:
+        """
+        Returns the search index of an IDD file, building it only the first time or when the file has changed since.
+
+        :param str idd_path: The path to an IDD file
+        :param str index_dir: An optional directory of saved indexes, used before processing the IDD
+        :return: The IDDSearchIndex instance
+        :raises ProcessingException: if the file does not exist or cannot be processed
+        """
+        real_path = os.path.realpath(idd_path)
+        try:
+            modified_time = os.path.getmtime(real_path)
+        except OSError:
+            raise ProcessingException("IDD file not found=\"" + idd_path + "\"")
+        with self._lock:
+            cached = self._search_indexes.get(real_path)
+        if cached is None or cached[0] != modified_time:
+            if index_dir:
+                index = IDDSearchIndexCache(index_dir).index_for_idd_file(real_path, self.idd_structure)
+            else:
+                index = IDDSearchIndex.from_idd(self.idd_structure(real_path))
+            cached = (modified_time, index)
+            with self._lock:
+                self._search_indexes[real_path] = cached
+        return cached[1]
+
+    def registry(self, idd_path: Optional[str], idd_dir: Optional[str]) -> IDDRegistry:
+        """
+        Returns the IDD registry for a combination of IDD file and IDD directory, registering them the first time.
+
+        :param str idd_path: An optional path to an IDD file
+        :param str idd_dir: An optional directory of IDD files
+        :return: The IDDRegistry instance
+        :raises ProcessingException: if the IDD files cannot be registered
+        """
+        key = (idd_path and os.path.realpath(idd_path), idd_dir and os.path.realpath(idd_dir))
+        with self._lock:
+            registry = self._registries.get(key)
+            if registry is None:
+                registry = IDDRegistry()
+                if idd_path:
+                    registry.add_idd_path(idd_path)
+                if idd_dir:
+                    registry.add_idd_directory(idd_dir)
+                self._registries[key] = registry
+        return registry
+
+    def handle(self, request: dict) -> dict:
+        """
+        Runs one request.
+
+        :param dict request: The request, see the class description
+        :return: The response dictionary, with exit_code, message and optionally content; errors are reported in the
+                 response rather than raised, so one bad request cannot stop a server
+        """
+        action = request.get('action')
+        if action == Actions.Ping:
+            # answered without waiting for a running request, so clients can check that the server is alive
+            with self._lock:
+                loaded_idd_files = sorted(self._idd_structures)
+            return response(ExitCodes.OK, 'Everything looks OK', {'loaded_idd_files': loaded_idd_files})
+        if action == Actions.Shutdown:
+            self.shutdown_requested = True
+            return response(ExitCodes.OK, 'Shutting down')
+        worker = {
+            Actions.IDDCheck: self._idd_check,
+            Actions.FindIDDObjectsMatching: self._find_idd_objects_matching,
+            Actions.SummarizeIDDObject: self._summarize_idd_object,
+            Actions.ValidateIDF: self._validate_idf,
+            Actions.ExportCSV: self._export_csv,
+            Actions.DiffIDF: self._diff_idf,
+            Actions.DiffIDD: self._diff_idd,
+            Actions.Convert: self._convert,
+            Actions.SearchIDD: self._search_idd,
+            Actions.IDFStats: self._idf_stats,
+        }.get(action)
+        if worker is None:
+            return response(ExitCodes.BadArguments, f"Unknown action: {action}")
+        with self._request_lock:
+            return self._run_worker(action, worker, request)
+
+    @staticmethod
+    def _run_worker(action, worker, request: dict) -> dict:
+        """
+        Internal worker that runs the worker of one request and turns its errors into responses.
+        """
+        try:
+            filename = request.get('filename')
+            if not filename or not Path(filename).exists():
+                return response(
+                    ExitCodes.BadArguments, "Supplied file does not appear to exist, check paths and retry!"
+                )
+            return worker(request)
+        except KeyError as e:
+            return response(ExitCodes.BadArguments, f"Request for {action} is missing {e}")
+        except Exception as e:
+            # a long running server must answer every request, so unexpected errors become error responses
+            module_logger.debug("Request for {} failed".format(action), exc_info=True)
+            return response(ExitCodes.ProcessingError, f"Request for {action} failed: {type(e).__name__}: {e}")
+
+    def handle_line(self, line: str) -> str:
+        """
+        Runs one request given as a line of JSON, as received by the server modes.  A request id, if present, is
+        copied to the response so clients can match responses to requests.
+
+        :param str line: The JSON encoded request
+        :return: The JSON encoded response, without a trailing newline
+        """
+        try:
+            request = loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            return dumps(response(ExitCodes.BadArguments, f"Could not decode request: {e}"))
+        result = self.handle(request)
+        if 'id' in request:
+            result['id'] = request['id']
+        return dumps(result)
+
+    def _idd_for_action(self, request):
+        try:
+            return self.idd_structure(request['filename'])
+        except ProcessingException:
+            return None
+
+    def _idd_check(self, request):
+        idd = self._idd_for_action(request)
+        if idd is None:
+            return response(ExitCodes.ProcessingError, "Issues occurred during processing")
+        return response(ExitCodes.OK, 'Everything looks OK', {
+            'idd_version': idd.version_string,
+            'idd_build_id': idd.build_string,
+            'num_groups': len(idd.groups),
+            'num_objects': sum(len(g.objects) for g in idd.groups),
+        })
+
+    def _index_for_action(self, request):
+        try:
+            return self.search_index(request['filename'], request.get('index_dir'))
+        except ProcessingException:
+            return None
+
+    def _find_idd_objects_matching(self, request):
+        index = self._index_for_action(request)
+        if index is None:
+            return response(ExitCodes.ProcessingError, "Issues occurred during processing")
+        pattern = request['pattern']
+        matching_objects = index.match_object_names(pattern)
+        return response(ExitCodes.OK, 'Everything looks OK', {'pattern': pattern, 'matching_objects': matching_objects})
+
+    def _search_idd(self, request):
+        index = self._index_for_action(request)
+        if index is None:
+            return response(ExitCodes.ProcessingError, "Issues occurred during processing")
+        query = request['query']
+        try:
+            hits = index.search(query, request.get('mode') or 'words', request.get('kinds'), request.get('limit'))
+        except ProcessingException as e:
+            return response(ExitCodes.BadArguments, str(e))
+        return response(ExitCodes.OK, 'Everything looks OK', {
+            'query': query, 'idd_version': index.version_string, 'hits': [hit.to_dict() for hit in hits]
+        })
+
+    def _summarize_idd_object(self, request):
+        idd = self._idd_for_action(request)
+        if idd is None:
+            return response(ExitCodes.ProcessingError, "Issues occurred during processing")
+        object_name = request['object_name'].upper()
+        matching_object: Optional[IDDObject] = idd.get_object_by_type(object_name)
+        if not isinstance(matching_object, IDDObject):
+            # not an exact name, so it is used as a pattern, and the first object in IDD order that matches is used
+            matching_object = next(
+                (o for g in idd.groups if g is not None for o in g.objects if fnmatch(o.name.upper(), object_name)),
+                None
+            )
+        if matching_object is None:
+            return response(ExitCodes.BadArguments, f"Could not find matching object by name {object_name}")
+        return response(ExitCodes.OK, 'Everything looks OK', {
+            'searched_object_name': object_name,
+            'field': [f"{f.field_an_index} : {f.field_name}" for f in matching_object.fields]
+        })
+
+    def _validate_idf(self, request):
+        try:
+            registry = self.registry(request.get('idd'), request.get('idd_dir'))
+        except ProcessingException as e:
+            return response(ExitCodes.BadArguments, f"Could not register IDD files: {e}")
+        if not registry.registered:
+            return response(ExitCodes.BadArguments, "IDF validation needs an IDD, use --idd or --idd_dir to supply one")
+        idf_paths = idf_paths_from_argument(Path(request['filename']))
+        results = []
+        any_errors = False
+        for file_path in idf_paths:
+            try:
+                for _, version_string, issues in registry.validate_idf_files([file_path]):
+                    results.append({
+                        'file': file_path,
+                        'version': version_string,
+                        'num_issues': len(issues),
+                        'issues': [issue_summary(i) for i in issues]
+                    })
+            except ProcessingException as e:
+                any_errors = True
+                results.append({'file': file_path, 'error': str(e)})
+        num_issues = sum(r.get('num_issues', 0) for r in results)
+        return response(
+            ExitCodes.ProcessingError if any_errors else ExitCodes.OK,
+            'Everything looks OK' if num_issues == 0 and not any_errors else 'Validation found problems',
+            {
+                'idd_versions': [e.version_string for e in registry.registered],
+                'num_files': len(idf_paths),
+                'num_issues': num_issues,
+                'files': results
+            }
+        )
+
+    def _idf_stats(self, request):
+        registry = None
+        if request.get('idd') or request.get('idd_dir'):
+            try:
+                registry = self.registry(request.get('idd'), request.get('idd_dir'))
+            except ProcessingException as e:
+                return response(ExitCodes.BadArguments, f"Could not register IDD files: {e}")
+        idf_paths = idf_paths_from_argument(Path(request['filename']))
+        results = []
+        any_errors = False
+        for file_path in idf_paths:
+            try:
+                idd = registry.get_idd_for_idf(file_path) if registry is not None else None
+                stats = IDFStatsCollector(idd, request.get('num_largest', 10)).collect_given_file_path(file_path)
+                results.append(stats.to_dict())
+            except ProcessingException as e:
+                any_errors = True
+                results.append({'file': file_path, 'error': str(e)})
+        return response(
+            ExitCodes.ProcessingError if any_errors else ExitCodes.OK,
+            'Issues occurred during processing' if any_errors else 'Everything looks OK',
+            {'num_files': len(idf_paths), 'files': results}
+        )
+
+    def _export_csv(self, request):
+        idd_path = request.get('idd')
+        if not idd_path:
+            return response(ExitCodes.BadArguments, "CSV export needs an IDD, use --idd to supply one")
+        idf_paths = idf_paths_from_argument(Path(request['filename']))
+        output_dir = request['output_dir']
+        try:
+            row_counts = export_idf_files_to_csv(idf_paths, output_dir, self.idd_structure(idd_path))
+        except ProcessingException as e:
+            return response(ExitCodes.ProcessingError, f"Issues occurred during CSV export: {e}")
+        return response(ExitCodes.OK, 'Everything looks OK', {
+            'output_dir': output_dir,
+            'num_files': len(idf_paths),
+            'num_rows': sum(row_counts.values()),
+            'rows_by_type': row_counts
+        })
+
+    def _diff_idf(self, request):
+        new_path = request['new_file']
+        if not Path(new_path).exists():
+            return response(ExitCodes.BadArguments,
+                            "IDF file to compare against does not appear to exist, check paths and retry!")
+        try:
+            idd_structure = self.idd_structure(request['idd']) if request.get('idd') else None
+            result = IDFDiffer(idd_structure).diff_files(request['filename'], new_path)
+        except ProcessingException as e:
+            return response(ExitCodes.ProcessingError, f"Issues occurred while comparing IDF files: {e}")
+        return response(
+            ExitCodes.OK, 'Files have the same content' if result.is_empty else 'Files differ',
+            dict(old_file=request['filename'], new_file=new_path, **result.to_dict())
+        )
+
+    def _diff_idd(self, request):
+        new_path = request['new_file']
+        if not Path(new_path).exists():
+            return response(ExitCodes.BadArguments,
+                            "IDD file to compare against does not appear to exist, check paths and retry!")
+        try:
+            result = IDDDiffer().diff(self.idd_structure(request['filename']), self.idd_structure(new_path))
+        except ProcessingException as e:
+            return response(ExitCodes.ProcessingError, f"Issues occurred while comparing IDD files: {e}")
+        return response(ExitCodes.OK, 'Everything looks OK', result.to_dict())
+
+    def _convert(self, request):
+        idd_path = request.get('idd')
+        if not idd_path:
+            return response(ExitCodes.BadArguments, "Conversion needs an IDD, use --idd to supply one")
+        input_path = request['filename']
+        output_path = request['output_file']
+        extension = os.path.splitext(input_path)[1].lower()
+        if extension == '.idf':
+            converter, output_format = convert_idf_to_epjson, 'epJSON'
+        elif extension == '.epjson':
+            converter, output_format = convert_epjson_to_idf, 'IDF'
+        else:
+            return response(ExitCodes.BadArguments, "Only .idf and .epJSON files can be converted")
+        try:
+            num_objects = converter(input_path, output_path, self.idd_structure(idd_path))
+        except (ProcessingException, OSError) as e:
+            return response(ExitCodes.ProcessingError, f"Issues occurred during conversion: {e}")
+        return response(ExitCodes.OK, 'Everything looks OK', {
+            'input_file': input_path, 'output_file': output_path, 'output_format': output_format,
+            'num_objects': num_objects
+        })
+
+
+def serve_stream(service: CLIService, input_stream, output_stream) -> None:
+    """
+    Answers requests read from a text stream, one JSON request per line, writing one JSON response line for each
+    request, until the input ends or a shutdown request arrives.  This is the server mode over stdin and stdout.
+
+    :param CLIService service: The service running the requests
+    :param input_stream: A text stream to read requests from
+    :param output_stream: A text stream to write responses to; it is flushed after each response
+    :return: None
+    """
+    for line in input_stream:
+        if not line.strip():
+            continue
+        output_stream.write(service.handle_line(line) + "\n")
+        output_stream.flush()
+        if service.shutdown_requested:
+            break
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        service = self.server.service
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            self.wfile.write((service.handle_line(line.decode("utf-8", "replace")) + "\n").encode("utf-8"))
+            self.wfile.flush()
+            if service.shutdown_requested:
+                # shutdown waits for serve_forever to return, so it can't be called from the serving thread
+                threading.Thread(target=self.server.shutdown).start()
+                break
+
+
+def serve_unix_socket(service: CLIService, socket_path: str) -> None:
+    """
+    Answers requests from clients connecting to a local Unix socket, using the same line protocol as serve_stream.
+    Each connection is handled in its own thread and may send any number of requests, but the service runs the
+    requests one at a time (see CLIService), so requests from several clients wait for each other rather than running
+    in parallel.  This returns once a shutdown request has been answered, and the socket file is removed.
+
+    :param CLIService service: The service running the requests
+    :param str socket_path: The path of the socket file to listen on
+    :return: None
+    :raises ProcessingException: if Unix sockets are not available, or another server is listening on the path
+    """
+    if not hasattr(socketserver, 'ThreadingUnixStreamServer'):
+        raise ProcessingException("Unix sockets are not available on this platform")
+    if os.path.exists(socket_path):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(socket_path)
+        except OSError:
+            os.remove(socket_path)  # left behind by a server that did not shut down cleanly
+        else:
+            raise ProcessingException("Another server is already listening on " + socket_path)
+    server = socketserver.ThreadingUnixStreamServer(socket_path, _RequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    module_logger.debug("Serving on {}".format(socket_path))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def send_request(socket_path: str, request: dict, timeout: Optional[float] = None) -> dict:
+    """
+    Sends one request to a server started with serve_unix_socket and waits for the response.
+
+    :param str socket_path: The path of the server's socket file
+    :param dict request: The request, see CLIService
+    :param float timeout: An optional timeout in seconds for connecting and waiting for the response
+    :return: The response dictionary
+    :raises ProcessingException: if the server cannot be reached or closes the connection without responding
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(timeout)
+            connection.connect(socket_path)
+            with connection.makefile("rwb") as stream:
+                stream.write((dumps(request) + "\n").encode("utf-8"))
+                stream.flush()
+                line = stream.readline()
+    except OSError as e:
+        raise ProcessingException(f"Could not reach server at {socket_path}: {e}")
+    if not line:
+        raise ProcessingException(f"Server at {socket_path} closed the connection without responding")
+    return loads(line.decode("utf-8"))
+
+
+def expand_batch_inputs(entries, directory_pattern: str = "*.idf") -> list:
+    """
+    Expands the inputs of a batch run into a list of file paths.  Each entry is a file path, a glob pattern (** matches
+    any number of directories), a directory, whose files matching directory_pattern are used, or @ followed by the path
+    of a manifest file.  A manifest lists one entry per line, relative to the manifest's own directory, with blank
+    lines and lines starting with # ignored.  Paths are kept in order, and each path is only used once.
+
+    :param entries: An iterable of input entries
+    :param str directory_pattern: The file name pattern used for directory entries
+    :return: A list of file paths; paths that do not exist are kept, so they are reported in the results
+    """
+    paths = []
+
+    def add(entry, base_dir):
+        if entry.startswith("@"):
+            manifest_path = os.path.join(base_dir, entry[1:])
+            with open(manifest_path) as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        add(line, os.path.dirname(os.path.abspath(manifest_path)))
+            return
+        entry = os.path.join(base_dir, entry)
+        if has_magic(entry):
+            paths.extend(sorted(glob(entry, recursive=True)))
+        elif os.path.isdir(entry):
+            paths.extend(sorted(str(p) for p in Path(entry).glob(directory_pattern)))
+        else:
+            paths.append(entry)
+
+    for batch_entry in entries:
+        add(batch_entry, "")
+    return list(dict.fromkeys(os.path.abspath(p) for p in paths))
+
+
+# the service of a batch worker process, or of the main process for batches run without a pool
+_batch_service = None
+
+
+def _initialize_batch_worker(shared_idd_names):
+    """
+    Internal worker that sets up the service of a batch worker.  IDDs the main process published in shared memory are
+    attached and placed in the IDD cache, so processing those IDD files in the worker only reads their headers.
+    """
+    global _batch_service
+    _batch_service = CLIService()
+    for name in shared_idd_names:
+        idd_structure = attach_idd(name)
+        IDD_CACHE["{}__{}".format(idd_structure.version_string, idd_structure.build_string)] = idd_structure
+
+
+def _run_batch_request(indexed_request):
+    """
+    Internal worker that runs one request of a batch.  Every failure is turned into a response, so one bad input
+    cannot abort the batch.
+    """
+    index, request = indexed_request
+    start = time.perf_counter()
+    try:
+        result = _batch_service.handle(request)
+    except Exception as e:
+        result = response(ExitCodes.ProcessingError, f"Request failed: {type(e).__name__}: {e}")
+    return dict(index=index, file=request.get('filename'), elapsed_seconds=time.perf_counter() - start, **result)
+
+
+def run_batch(requests, output_stream, jobs: int = 1, shared_idd_names=()) -> int:
+    """
+    Runs many requests, usually the same action on many files, writing each response as one JSON line as soon as it
+    is ready, followed by a summary line.  Responses also hold the index of their request, the input file and the
+    time taken, and with more than one job they arrive in the order they finish.  The summary holds the number of
+    requests and failures, the overall exit code (the highest of all responses), the wall clock time and statistics
+    of the per-request times.  A request that fails for any reason gets an error response, and the summary is always
+    written.
+
+    :param requests: A list of request dictionaries, see CLIService
+    :param output_stream: A text stream to write the JSON lines to; it is flushed after each line
+    :param int jobs: The number of worker processes; with 1 the requests are run in this process
+    :param shared_idd_names: Names of IDDs published with idd_shared.publish_idd for the workers to use
+    :return: The overall exit code
+    """
+    global _batch_service
+    start = time.perf_counter()
+    exit_code = ExitCodes.OK
+    num_failed = 0
+    file_times = []
+
+    written = set()
+
+    def write(record):
+        nonlocal exit_code, num_failed
+        exit_code = max(exit_code, record['exit_code'])
+        num_failed += 1 if record['exit_code'] != ExitCodes.OK else 0
+        file_times.append(record['elapsed_seconds'])
+        written.add(record['index'])
+        output_stream.write(dumps(record) + "\n")
+        output_stream.flush()
+
+    try:
+        if jobs <= 1:
+            if _batch_service is None:
+                _batch_service = CLIService()
+            for indexed_request in enumerate(requests):
+                write(_run_batch_request(indexed_request))
+        else:
+            with Pool(jobs, initializer=_initialize_batch_worker, initargs=(list(shared_idd_names),)) as pool:
+                for record in pool.imap_unordered(_run_batch_request, enumerate(requests)):
+                    write(record)
+    except Exception as e:
+        # the pool itself failed, so the requests without a response are reported as failed
+        module_logger.debug("Batch run failed", exc_info=True)
+        for index, request in enumerate(requests):
+            if index not in written:
+                write(dict(index=index, file=request.get('filename'), elapsed_seconds=0.0, **response(
+                    ExitCodes.ProcessingError, f"Batch run failed: {type(e).__name__}: {e}"
+                )))
+    output_stream.write(dumps({'summary': {
+        'action': requests[0].get('action') if requests else None,
+        'num_requests': len(requests),
+        'num_ok': len(requests) - num_failed,
+        'num_failed': num_failed,
+        'exit_code': exit_code,
+        'jobs': jobs,
+        'elapsed_seconds': time.perf_counter() - start,
+        'request_seconds': {
+            'total': sum(file_times),
+            'mean': sum(file_times) / len(file_times) if file_times else 0.0,
+            'max': max(file_times, default=0.0),
+        },
+    }}) + "\n")
+    output_stream.flush()
+    return exit_code
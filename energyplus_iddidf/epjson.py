@@ -0,0 +1,614 @@
+from io import StringIO
+import json
+from json import JSONDecodeError, JSONDecoder, dumps
+import os
+import re
+import tempfile
+
+from energyplus_iddidf import exceptions
+from energyplus_iddidf.idf_objects import AUTOCALCULATE, AUTOSIZE, IDFObject, IDFStructure, parse_numeric_field
+from energyplus_iddidf.idf_processor import IDFProcessor
+
+# the key used for the list of extensible groups in an epJSON object, as named for each object by the EnergyPlus epJSON
+# schema (the "extension" of the object's "legacy_idd" section in Energy+.schema.epJSON); the schema itself falls back
+# to "extensions" for objects it gives no name.  This covers the extensible objects of the IDDs this package is tested
+# with, newer IDDs may add objects, which is what the extension_names parameters and extension_names_from_schema are for
+EXTENSION_GROUP_NAMES = {
+    "SCHEDULE:DAY:INTERVAL": "data",
+    "SCHEDULE:WEEK:COMPACT": "data",
+    "SCHEDULE:COMPACT": "data",
+    "SCHEDULE:DAY:LIST": "values",
+    "FLUIDPROPERTIES:TEMPERATURES": "temperatures",
+    "WINDOWMATERIAL:GLAZINGGROUP:THERMOCHROMIC": "temperature_data",
+    "ZONELIST": "zones",
+    "SPACELIST": "spaces",
+    "BUILDINGSURFACE:DETAILED": "vertices",
+    "WALL:DETAILED": "vertices",
+    "ROOFCEILING:DETAILED": "vertices",
+    "FLOOR:DETAILED": "vertices",
+    "SHADING:SITE:DETAILED": "vertices",
+    "SHADING:BUILDING:DETAILED": "vertices",
+    "SHADING:ZONE:DETAILED": "vertices",
+    "SURFACEPROPERTY:HEATTRANSFERALGORITHM:SURFACELIST": "surface",
+    "SURFACEPROPERTY:EXTERIORNATURALVENTEDCAVITY": "surface",
+    "ZONEPROPERTY:USERVIEWFACTORS:BYSURFACENAME": "view_factors",
+    "ROOMAIR:TEMPERATUREPATTERN:NONDIMENSIONALHEIGHT": "pairs",
+    "ROOMAIR:TEMPERATUREPATTERN:SURFACEMAPPING": "surface_deltas",
+    "ROOMAIR:NODE:AIRFLOWNETWORK:ADJACENTSURFACELIST": "surfaces",
+    "ROOMAIR:NODE:AIRFLOWNETWORK:INTERNALGAINS": "gains",
+    "ROOMAIR:NODE:AIRFLOWNETWORK:HVACEQUIPMENT": "equipment",
+    "ROOMAIRSETTINGS:AIRFLOWNETWORK": "nodes",
+    "DAYLIGHTING:CONTROLS": "control_data",
+    "DAYLIGHTINGDEVICE:TUBULAR": "transition_lengths",
+    "ZONEHVAC:BASEBOARD:RADIANTCONVECTIVE:WATER": "surface_fractions",
+    "ZONEHVAC:BASEBOARD:RADIANTCONVECTIVE:STEAM": "surface_fractions",
+    "ZONEHVAC:BASEBOARD:RADIANTCONVECTIVE:ELECTRIC": "surface_fractions",
+    "ZONEHVAC:COOLINGPANEL:RADIANTCONVECTIVE:WATER": "surface_fractions",
+    "ZONEHVAC:LOWTEMPERATURERADIANT:SURFACEGROUP": "surface_fractions",
+    "ZONEHVAC:HIGHTEMPERATURERADIANT": "surface_fractions",
+    "ZONEHVAC:VENTILATEDSLAB:SLABGROUP": "data",
+    "ZONEHVAC:EQUIPMENTLIST": "equipment",
+    "UNITARYSYSTEMPERFORMANCE:MULTISPEED": "flow_ratios",
+    "AIRCONDITIONER:VARIABLEREFRIGERANTFLOW:FLUIDTEMPERATURECONTROL": "loading_indices",
+    "AIRCONDITIONER:VARIABLEREFRIGERANTFLOW:FLUIDTEMPERATURECONTROL:HR": "loading_indices",
+    "ZONETERMINALUNITLIST": "terminal_units",
+    "CONTROLLER:MECHANICALVENTILATION": "zone_specifications",
+    "AIRLOOPHVAC:ZONESPLITTER": "nodes",
+    "AIRLOOPHVAC:SUPPLYPLENUM": "nodes",
+    "AIRLOOPHVAC:SUPPLYPATH": "components",
+    "AIRLOOPHVAC:ZONEMIXER": "nodes",
+    "AIRLOOPHVAC:RETURNPLENUM": "nodes",
+    "AIRLOOPHVAC:RETURNPATH": "components",
+    "BRANCH": "components",
+    "BRANCHLIST": "branches",
+    "CONNECTOR:SPLITTER": "branches",
+    "CONNECTOR:MIXER": "branches",
+    "NODELIST": "nodes",
+    "OUTDOORAIR:NODELIST": "nodes",
+    "PIPINGSYSTEM:UNDERGROUND:DOMAIN": "pipe_circuits",
+    "PIPINGSYSTEM:UNDERGROUND:PIPECIRCUIT": "pipe_segments",
+    "SOLARCOLLECTOR:UNGLAZEDTRANSPIRED": "surfaces",
+    "SOLARCOLLECTOR:UNGLAZEDTRANSPIRED:MULTISYSTEM": "systems",
+    "ENERGYMANAGEMENTSYSTEM:PROGRAMCALLINGMANAGER": "programs",
+    "ENERGYMANAGEMENTSYSTEM:PROGRAM": "lines",
+    "ENERGYMANAGEMENTSYSTEM:SUBROUTINE": "lines",
+    "ENERGYMANAGEMENTSYSTEM:GLOBALVARIABLE": "variables",
+    "AVAILABILITYMANAGERASSIGNMENTLIST": "managers",
+    "REFRIGERATION:CASEANDWALKINLIST": "cases_and_walkins",
+    "REFRIGERATION:TRANSFERLOADLIST": "transfer_loads",
+    "REFRIGERATION:COMPRESSORLIST": "compressors",
+    "REFRIGERATION:WALKIN": "zone_data",
+    "ZONEHVAC:REFRIGERATIONCHILLERSET": "chillers",
+    "DEMANDMANAGERASSIGNMENTLIST": "manager_data",
+    "DEMANDMANAGER:EXTERIORLIGHTS": "lights",
+    "DEMANDMANAGER:LIGHTS": "lights",
+    "DEMANDMANAGER:ELECTRICEQUIPMENT": "equipment",
+    "DEMANDMANAGER:THERMOSTATS": "thermostats",
+    "DEMANDMANAGER:VENTILATION": "controllers",
+    "GENERATOR:FUELCELL:AIRSUPPLY": "constituents",
+    "ELECTRICLOADCENTER:GENERATORS": "generator_outputs",
+    "ELECTRICLOADCENTER:TRANSFORMER": "meters",
+    "WATERUSE:CONNECTIONS": "connections",
+    "WATERUSE:RAINCOLLECTOR": "surfaces",
+    "MATRIX:TWODIMENSION": "values",
+    "LIFECYCLECOST:USEPRICEESCALATION": "escalations",
+    "LIFECYCLECOST:USEADJUSTMENT": "multipliers",
+    "PARAMETRIC:SETVALUEFORRUN": "values",
+    "PARAMETRIC:LOGIC": "lines",
+    "PARAMETRIC:RUNCONTROL": "runs",
+    "PARAMETRIC:FILENAMESUFFIX": "suffixes",
+    "OUTPUT:TABLE:SUMMARYREPORTS": "reports",
+    "OUTPUT:TABLE:MONTHLY": "variable_details",
+    "OUTPUT:TABLE:ANNUAL": "variable_details",
+    "METER:CUSTOM": "variable_details",
+    "METER:CUSTOMDECREMENT": "variable_details",
+}
+DEFAULT_EXTENSION_GROUP_NAME = "extensions"
+
+
+def extension_names_from_schema(schema_path):
+    """
+    Reads the names of the extensible group lists from an EnergyPlus epJSON schema (Energy+.schema.epJSON), for use as
+    the extension_names parameter of the epJSON classes when the IDD has extensible objects EXTENSION_GROUP_NAMES does
+    not cover.
+
+    :param str schema_path: The path to the schema file shipped with EnergyPlus
+    :return: A dictionary of upper case object type to the name of its extensible group list
+    :raises ProcessingException: if the schema does not exist or is not an epJSON schema
+    """
+    if not os.path.exists(schema_path):
+        raise exceptions.ProcessingException("Input file not found=\"" + schema_path + "\"")
+    try:
+        with open(schema_path, "r") as f:
+            object_schemas = json.load(f)["properties"]
+        return {
+            object_type.upper(): object_schema["legacy_idd"]["extension"]
+            for object_type, object_schema in object_schemas.items()
+            if "extension" in object_schema.get("legacy_idd", {})
+        }
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise exceptions.ProcessingException(
+            "Could not read the extensible group names from the epJSON schema \"{}\": {}".format(schema_path, e))
+
+
+def epjson_field_name(idd_field_name):
+    """
+    Converts an IDD field name into the property name used for it in epJSON, which is lower case with every run of
+    other characters replaced by a single underscore; "Vertex 1 X-coordinate" becomes "vertex_1_x_coordinate".
+
+    :param str idd_field_name: The field name from the IDD
+    :return: The epJSON property name
+    """
+    return re.sub(r'[^a-z0-9]+', '_', (idd_field_name or "").lower()).strip('_')
+
+
+def epjson_extensible_field_name(idd_field_name):
+    """
+    Converts the IDD field name of a field in the first extensible group into the property name used inside each
+    extensible group in epJSON, which drops the group number; "Vertex 1 X-coordinate" becomes "vertex_x_coordinate".
+
+    :param str idd_field_name: The field name from the IDD
+    :return: The epJSON property name inside an extensible group
+    """
+    return epjson_field_name(re.sub(r'\b\d+\b', ' ', idd_field_name or "", count=1))
+
+
+class EpJSONObjectMapping:
+    """
+    The mapping between the ordered fields of one IDD object type and its epJSON properties.  The mapping is built once
+    per object type and then used to convert every instance of that type in either direction.
+
+    :ivar str object_type: The IDD object type
+    :ivar bool named: True if the first field is the instance name, which epJSON uses as the key of the object
+    :ivar [str] property_names: The epJSON property names of the non-extensible fields, in IDD order
+    :ivar str extension_name: The epJSON key holding the list of extensible groups, or None if not extensible
+    :ivar [str] extension_property_names: The epJSON property names of the fields in one extensible group
+
+    Constructor parameters:
+
+    :param IDDObject idd_object: The IDD object to map
+    :param dict extension_names: Optional names of extensible group lists by upper case object type, such as from
+                                 extension_names_from_schema, which take precedence over EXTENSION_GROUP_NAMES
+    """
+
+    def __init__(self, idd_object, extension_names=None):
+        self.object_type = idd_object.name
+        self.named = idd_object.has_name_field()
+        group_size = idd_object.extensible_group_size()
+        first_extensible = idd_object.first_extensible_field_index()
+        regular_fields = idd_object.fields if first_extensible is None else idd_object.fields[:first_extensible]
+        self.property_names = [epjson_field_name(f.field_name) for f in regular_fields]
+        self.numeric = [f.field_an_index[0] == "N" for f in regular_fields]
+        if group_size and first_extensible is not None:
+            group_fields = idd_object.fields[first_extensible:first_extensible + group_size]
+            upper_type = self.object_type.upper()
+            self.extension_name = (extension_names or {}).get(upper_type) or EXTENSION_GROUP_NAMES.get(
+                upper_type, DEFAULT_EXTENSION_GROUP_NAME)
+            self.extension_property_names = [epjson_extensible_field_name(f.field_name) for f in group_fields]
+            self.extension_numeric = [f.field_an_index[0] == "N" for f in group_fields]
+        else:
+            self.extension_name = None
+            self.extension_property_names = []
+            self.extension_numeric = []
+
+    @staticmethod
+    def _json_value(value, numeric):
+        if not numeric:
+            return value
+        typed = parse_numeric_field(value)
+        if typed is AUTOSIZE:
+            return "Autosize"
+        elif typed is AUTOCALCULATE:
+            return "Autocalculate"
+        elif isinstance(typed, float):
+            try:
+                return int(value)
+            except ValueError:
+                return typed
+        return value  # not a valid number, but keep what the user wrote
+
+    @staticmethod
+    def _idf_value(value):
+        if isinstance(value, str):
+            return value
+        elif isinstance(value, bool):
+            return "Yes" if value else "No"
+        elif isinstance(value, float):
+            return repr(value)
+        return str(value)
+
+    def to_epjson(self, fields):
+        """
+        Converts the fields of one IDF object into epJSON properties.  Blank fields are left out, as EnergyPlus does.
+
+        :param [str] fields: The fields of the IDF object, not including the object type
+        :return: A tuple of the instance name (None if the type is not named) and a dictionary of epJSON properties
+        :raises ProcessingException: if a non-extensible object has more non-blank fields than the IDD defines
+        """
+        properties = {}
+        num_regular = len(self.property_names)
+        for index, value in enumerate(fields[:num_regular]):
+            if index == 0 and self.named:
+                continue
+            if value != "":
+                properties[self.property_names[index]] = self._json_value(value, self.numeric[index])
+        extra_fields = fields[num_regular:]
+        if self.extension_name is not None:
+            group_size = len(self.extension_property_names)
+            groups = []
+            for start in range(0, len(extra_fields), group_size):
+                group = {}
+                for offset, value in enumerate(extra_fields[start:start + group_size]):
+                    if value != "":
+                        group[self.extension_property_names[offset]] = self._json_value(
+                            value, self.extension_numeric[offset])
+                groups.append(group)
+            while groups and not groups[-1]:
+                groups.pop()
+            if groups:
+                properties[self.extension_name] = groups
+        elif any(value != "" for value in extra_fields):
+            raise exceptions.ProcessingException(
+                "IDF object has more fields than the IDD defines", object_name=self.object_type)
+        name = (fields[0] if fields else "") if self.named else None
+        return name, properties
+
+    def to_idf_fields(self, name, properties):
+        """
+        Converts epJSON properties back into the ordered fields of an IDF object, with trailing blank fields removed.
+
+        :param str name: The key of the object in epJSON, used as the first field if the type is named
+        :param dict properties: The epJSON properties of the object
+        :return: A list of field strings, not including the object type
+        """
+        fields = []
+        for index, property_name in enumerate(self.property_names):
+            if index == 0 and self.named:
+                fields.append(name)
+            else:
+                value = properties.get(property_name)
+                fields.append("" if value is None else self._idf_value(value))
+        if self.extension_name is not None:
+            for group in properties.get(self.extension_name, []):
+                for property_name in self.extension_property_names:
+                    value = group.get(property_name)
+                    fields.append("" if value is None else self._idf_value(value))
+        while fields and fields[-1] == "":
+            fields.pop()
+        return fields
+
+
+class _EpJSONMappings:
+    """
+    Internal lazily filled cache of EpJSONObjectMapping instances for an IDD structure, keyed by upper case type.
+    """
+
+    def __init__(self, idd_structure, extension_names=None):
+        self.idd_structure = idd_structure
+        self.extension_names = extension_names
+        self.mappings = {}
+
+    def get(self, object_type):
+        upper_type = object_type.upper()
+        mapping = self.mappings.get(upper_type)
+        if mapping is None:
+            idd_object = self.idd_structure.get_object_by_type(object_type)
+            if idd_object is None or isinstance(idd_object, str):
+                raise exceptions.ProcessingException(
+                    "Object type not found in IDD, cannot map it to epJSON", object_name=object_type)
+            mapping = EpJSONObjectMapping(idd_object, self.extension_names)
+            self.mappings[upper_type] = mapping
+        return mapping
+
+
+class _JSONStreamReader:
+    """
+    Internal incremental reader for the outer two levels of an epJSON document.  Only one object body is decoded at a
+    time, so the whole document never has to be held in memory.
+    """
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = JSONDecoder()
+
+    def _read_more(self, size):
+        if self.eof:
+            return False
+        chunk = self.stream.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode('utf-8')
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def next_char(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_more(self.chunk_size):
+                raise exceptions.ProcessingException("Unexpected end of epJSON content")
+
+    def expect(self, char):
+        if self.next_char() != char:
+            raise exceptions.ProcessingException(
+                "Malformed epJSON content, expected \"{}\" but found \"{}\"".format(char, self.buffer[self.pos]))
+        self.pos += 1
+
+    def value(self):
+        self.next_char()
+        read_size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                self.pos = end
+                return value
+            except JSONDecodeError as e:
+                # the value may just be cut off at the end of the buffer, so read more and try again
+                if not self._read_more(read_size):
+                    raise exceptions.ProcessingException("Malformed epJSON content: " + str(e))
+                read_size *= 2
+
+    def objects(self):
+        self.expect("{")
+        if self.next_char() == "}":
+            return
+        while True:
+            object_type = self.value()
+            self.expect(":")
+            self.expect("{")
+            if self.next_char() == "}":
+                self.pos += 1
+            else:
+                while True:
+                    name = self.value()
+                    self.expect(":")
+                    properties = self.value()
+                    if not isinstance(object_type, str) or not isinstance(name, str) or \
+                            not isinstance(properties, dict):
+                        raise exceptions.ProcessingException("Malformed epJSON content, expected an object")
+                    yield object_type, name, properties
+                    separator = self.next_char()
+                    self.pos += 1
+                    if separator == "}":
+                        break
+                    elif separator != ",":
+                        raise exceptions.ProcessingException("Malformed epJSON content, expected \",\" or \"}\"")
+            separator = self.next_char()
+            self.pos += 1
+            if separator == "}":
+                return
+            elif separator != ",":
+                raise exceptions.ProcessingException("Malformed epJSON content, expected \",\" or \"}\"")
+
+
+class EpJSONProcessor:
+    """
+    The epJSON Processor class.  Given an epJSON document via stream or path, this class has workers to process it
+    into an IDFStructure instance, using an IDD structure to put the epJSON properties back into IDF field order.
+
+    Relevant "public" members are listed here:
+
+    :ivar IDFStructure idf: The resulting IDFStructure instance after processing the epJSON file/stream
+    :ivar str file_path: A file path for this epJSON, although it may be just a simple descriptor
+
+    Constructor parameters:
+
+    :param IDDStructure idd_structure: The IDD structure describing the object types found in the epJSON
+    :param int chunk_size: The number of characters read from the stream at a time when streaming
+    :param dict extension_names: Optional names of extensible group lists, see EpJSONObjectMapping
+    """
+
+    def __init__(self, idd_structure, chunk_size=1 << 16, extension_names=None):
+        self.idd_structure = idd_structure
+        self.chunk_size = chunk_size
+        self.idf = None
+        self.file_path = None
+        self._mappings = _EpJSONMappings(idd_structure, extension_names)
+
+    def process_file_given_file_path(self, file_path):
+        """
+        This worker allows processing of an epJSON file at a specific path on disk.
+
+        :param file_path: The path to an epJSON file on disk.
+        :return: An IDFStructure instance created from processing the epJSON file
+        :raises ProcessingException: if the specified file does not exist or cannot be processed
+        """
+        if not os.path.exists(file_path):
+            raise exceptions.ProcessingException("Input file not found=\"" + file_path + "\"")
+        with open(file_path, "r") as f:
+            return self._process(f, file_path)
+
+    def process_file_via_stream(self, epjson_file_stream):
+        """
+        This worker allows processing of an epJSON document via stream.
+
+        :param file-like-object epjson_file_stream: A stream that responds to read()
+        :return: An IDFStructure instance created from processing the epJSON document
+        """
+        return self._process(epjson_file_stream, "/streamed/epjson")
+
+    def process_file_via_string(self, epjson_string):
+        """
+        This worker allows processing of an epJSON document string.
+
+        :param str epjson_string: An epJSON document string
+        :return: An IDFStructure instance created from processing the epJSON string
+        """
+        return self._process(StringIO(epjson_string), "/string/epjson/snippet")
+
+    def iterate_objects_via_stream(self, epjson_file_stream):
+        """
+        This worker streams the objects of an epJSON document as IDF objects, one at a time, decoding only one object
+        body at a time so very large documents can be converted without being held in memory.
+
+        :param file-like-object epjson_file_stream: A stream that responds to read()
+        :return: A generator of IDFObject instances in document order
+        :raises ProcessingException: if the document is malformed or has object types the IDD doesn't define
+        """
+        reader = _JSONStreamReader(epjson_file_stream, self.chunk_size)
+        for object_type, name, properties in reader.objects():
+            mapping = self._mappings.get(object_type)
+            yield IDFObject([mapping.object_type] + mapping.to_idf_fields(name, properties))
+
+    def _process(self, stream, file_path):
+        self.file_path = file_path
+        self.idf = IDFStructure(file_path)
+        self.idf.objects = list(self.iterate_objects_via_stream(stream))
+        version_objects = self.idf.get_idf_objects_by_type("Version")
+        version_object = version_objects[0] if version_objects else None
+        self.idf.version_string, self.idf.version_float = IDFProcessor.version_from_object(version_object)
+        return self.idf
+
+
+class EpJSONWriter:
+    """
+    Writes IDF objects as an epJSON document, using an IDD structure for the property names and extensible groups.
+
+    epJSON groups all objects of a type together, so objects are encoded one at a time as they arrive and only the
+    encoded text is kept until the end, grouped by type.  The IDF objects themselves are never all held at once when
+    writing from a stream of objects.  Comment blocks are dropped since epJSON has no comments.
+
+    Constructor parameters:
+
+    :param IDDStructure idd_structure: The IDD structure describing the object types being written
+    :param dict extension_names: Optional names of extensible group lists, see EpJSONObjectMapping
+    """
+
+    def __init__(self, idd_structure, extension_names=None):
+        self.idd_structure = idd_structure
+        self._mappings = _EpJSONMappings(idd_structure, extension_names)
+
+    def write_objects(self, idf_objects, output_stream):
+        """
+        Writes a sequence of IDF objects as an epJSON document.
+
+        :param idf_objects: An iterable of IDFObject instances, such as IDFStructure.objects or the generator from
+                            IDFProcessor.iterate_objects_given_file_path
+        :param output_stream: A text stream to write the document to
+        :return: The number of objects written
+        :raises ProcessingException: for object types the IDD doesn't define or duplicate names within a type
+        """
+        encoded_by_type = {}
+        names_by_type = {}
+        num_objects = 0
+        for idf_object in idf_objects:
+            if idf_object.comment:
+                continue
+            mapping = self._mappings.get(idf_object.object_name)
+            name, properties = mapping.to_epjson(idf_object.fields)
+            encoded = encoded_by_type.setdefault(mapping.object_type, [])
+            names = names_by_type.setdefault(mapping.object_type, set())
+            if name is None:
+                name = "{} {}".format(mapping.object_type, len(encoded) + 1)
+            if name.upper() in names:
+                raise exceptions.ProcessingException(
+                    "Duplicate object name \"{}\" cannot be written to epJSON".format(name),
+                    object_name=mapping.object_type)
+            names.add(name.upper())
+            encoded.append("        {}: {}".format(dumps(name), dumps(properties)))
+            num_objects += 1
+        output_stream.write("{")
+        for type_index, (object_type, encoded) in enumerate(encoded_by_type.items()):
+            output_stream.write(",\n" if type_index > 0 else "\n")
+            output_stream.write("    {}: {{\n".format(dumps(object_type)))
+            output_stream.write(",\n".join(encoded))
+            output_stream.write("\n    }")
+        output_stream.write("\n}\n")
+        return num_objects
+
+    def epjson_string(self, idf_structure):
+        """
+        Returns the epJSON document for an entire IDF structure.
+
+        :param IDFStructure idf_structure: The IDF structure to convert
+        :return: The epJSON document as a string
+        """
+        output = StringIO()
+        self.write_objects(idf_structure.objects, output)
+        return output.getvalue()
+
+    def write_epjson(self, idf_structure, epjson_path):
+        """
+        Writes an entire IDF structure to an epJSON file.
+
+        :param IDFStructure idf_structure: The IDF structure to convert
+        :param str epjson_path: The path to the epJSON file to write
+        :return: The number of objects written
+        """
+        return _write_replacing(epjson_path, lambda f: self.write_objects(idf_structure.objects, f))
+
+
+def _write_replacing(output_path, write):
+    """
+    Internal worker that writes an output file through a temporary file in the same directory, which is moved into
+    place only once write has succeeded, so a failed conversion leaves any existing output untouched.
+
+    :param str output_path: The path of the file to write
+    :param write: A callable taking the open text stream and returning the number of objects written
+    :return: The return value of write
+    """
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix=".tmp")
+    try:
+        with os.fdopen(handle, "w") as f:
+            num_objects = write(f)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return num_objects
+
+
+def convert_idf_to_epjson(idf_path, epjson_path, idd_structure, extension_names=None):
+    """
+    Converts an IDF file to epJSON by streaming the IDF objects, without building an IDFStructure.  The epJSON file is
+    only replaced once the whole IDF has been converted.
+
+    :param str idf_path: The path to the IDF file to read
+    :param str epjson_path: The path to the epJSON file to write
+    :param IDDStructure idd_structure: The IDD structure matching the version of the IDF
+    :param dict extension_names: Optional names of extensible group lists, see EpJSONObjectMapping
+    :return: The number of objects written
+    :raises ProcessingException: if the IDF file does not exist or cannot be converted
+    """
+    if not os.path.exists(idf_path):
+        raise exceptions.ProcessingException("Input file not found=\"" + idf_path + "\"")
+    idf_objects = IDFProcessor(idd_structure=idd_structure).iterate_objects_given_file_path(idf_path)
+    writer = EpJSONWriter(idd_structure, extension_names)
+    return _write_replacing(epjson_path, lambda output_stream: writer.write_objects(idf_objects, output_stream))
+
+
+def convert_epjson_to_idf(epjson_path, idf_path, idd_structure, extension_names=None):
+    """
+    Converts an epJSON file to IDF by streaming one object at a time, without building an IDFStructure.  The IDF file
+    is only replaced once the whole epJSON document has been converted.
+
+    :param str epjson_path: The path to the epJSON file to read
+    :param str idf_path: The path to the IDF file to write
+    :param IDDStructure idd_structure: The IDD structure matching the version of the epJSON
+    :param dict extension_names: Optional names of extensible group lists, see EpJSONObjectMapping
+    :return: The number of objects written
+    :raises ProcessingException: if the epJSON file does not exist or cannot be processed
+    """
+    if not os.path.exists(epjson_path):
+        raise exceptions.ProcessingException("Input file not found=\"" + epjson_path + "\"")
+    processor = EpJSONProcessor(idd_structure, extension_names=extension_names)
+
+    def write(output_stream):
+        num_objects = 0
+        with open(epjson_path, "r") as input_stream:
+            for idf_object in processor.iterate_objects_via_stream(input_stream):
+                idd_object = idd_structure.get_object_by_type(idf_object.object_name)
+                output_stream.write(idf_object.object_string(idd_object) + "\n")
+                num_objects += 1
+        return num_objects
+
+    return _write_replacing(idf_path, write)
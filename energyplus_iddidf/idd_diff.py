@@ -0,0 +1,241 @@
+import hashlib
+import json
+
+from energyplus_iddidf.idd_processor import IDDProcessor
+
+
+def object_signature(idd_object, group_name=None):
+    """
+    Computes a hash of everything that describes an IDD object: its group, its metadata and the index, name and
+    metadata of every field.  Two objects with the same signature are identical, so comparing signatures lets a diff
+    skip the unchanged objects, which are usually almost all of them, without looking at their fields.
+
+    :param IDDObject idd_object: The IDD object
+    :param str group_name: The name of the group holding the object
+    :return: A hexadecimal digest string
+    """
+    fields = [[f.field_an_index, f.field_name, f.meta_data] for f in idd_object.fields]
+    content = [group_name, idd_object.meta_data, fields]
+    return hashlib.blake2b(json.dumps(content, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _meta_data_changes(old_meta_data, new_meta_data):
+    changes = {}
+    for key in sorted(set(old_meta_data) | set(new_meta_data)):
+        old_value = old_meta_data.get(key)
+        new_value = new_meta_data.get(key)
+        if old_value != new_value:
+            changes[key] = {'old': old_value, 'new': new_value}
+    return changes
+
+
+class IDDObjectDiff:
+    """
+    The differences in one IDD object found in both IDDs.
+
+    :ivar str name: The object type
+    :ivar dict meta_data_changes: Changed object metadata (plus "group" if the object moved to another group), keyed on
+                                  the metadata type with old and new values
+    :ivar list added_fields: The fields only in the new IDD, as dictionaries of index, an_index and field_name
+    :ivar list removed_fields: The fields only in the old IDD, as dictionaries of index, an_index and field_name
+    :ivar list renamed_fields: Fields matched by their A/N index whose names differ
+    :ivar list moved_fields: Fields matched by name that are at a different position, as happens when fields are
+                             inserted or removed ahead of them
+    :ivar list field_changes: Fields matched between the IDDs whose metadata differs, such as defaults, bounds or keys
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.meta_data_changes = {}
+        self.added_fields = []
+        self.removed_fields = []
+        self.renamed_fields = []
+        self.moved_fields = []
+        self.field_changes = []
+
+    def to_dict(self):
+        """
+        :return: A JSON serializable dictionary describing this object's differences
+        """
+        return {
+            'name': self.name,
+            'meta_data_changes': self.meta_data_changes,
+            'added_fields': self.added_fields,
+            'removed_fields': self.removed_fields,
+            'renamed_fields': self.renamed_fields,
+            'moved_fields': self.moved_fields,
+            'field_changes': self.field_changes,
+        }
+
+
+class IDDDiff:
+    """
+    The differences between two IDDs.
+
+    :ivar str old_version: The version string of the old IDD
+    :ivar str new_version: The version string of the new IDD
+    :ivar [str] added_objects: Object types only in the new IDD, including single line objects
+    :ivar [str] removed_objects: Object types only in the old IDD, including single line objects
+    :ivar [IDDObjectDiff] changed_objects: Objects found in both IDDs that differ
+    """
+
+    def __init__(self, old_version, new_version):
+        self.old_version = old_version
+        self.new_version = new_version
+        self.added_objects = []
+        self.removed_objects = []
+        self.changed_objects = []
+
+    def to_dict(self):
+        """
+        :return: A JSON serializable dictionary describing every difference, with a summary of counts
+        """
+        return {
+            'old_version': self.old_version,
+            'new_version': self.new_version,
+            'summary': {
+                'added_objects': len(self.added_objects),
+                'removed_objects': len(self.removed_objects),
+                'changed_objects': len(self.changed_objects),
+            },
+            'added_objects': self.added_objects,
+            'removed_objects': self.removed_objects,
+            'changed_objects': [o.to_dict() for o in self.changed_objects],
+        }
+
+
+def _field_summary(index, idd_field):
+    return {'index': index, 'an_index': idd_field.field_an_index, 'field_name': idd_field.field_name}
+
+
+def _objects_by_type(idd_structure):
+    objects = {}
+    for group in idd_structure.groups:
+        if group is None:
+            continue
+        for idd_object in group.objects:
+            objects.setdefault(idd_object.name.upper(), (group.name, idd_object))
+    for name in idd_structure.single_line_objects:
+        objects.setdefault(name.upper(), (None, name))
+    return objects
+
+
+def _fields_by_name(idd_object):
+    """
+    Keys the fields of an object on upper case field name and the occurrence of that name, so repeated names still
+    match in order.
+    """
+    keyed = {}
+    occurrences = {}
+    for index, idd_field in enumerate(idd_object.fields):
+        name = (idd_field.field_name or "").strip().upper()
+        occurrence = occurrences.get(name, 0)
+        occurrences[name] = occurrence + 1
+        keyed[(name, occurrence)] = index
+    return keyed
+
+
+class IDDDiffer:
+    """
+    This class compares two IDDs, such as those of consecutive EnergyPlus versions, to find what changed for transition
+    rules.  Objects are matched by type.  A hashed signature of each object (see object_signature) lets unchanged
+    objects be skipped after a single comparison.  Within a changed object, fields are matched by name first, and
+    fields left over on both sides are matched by their A/N index, which catches renamed fields.
+
+    There are no constructor parameters.
+    """
+
+    def diff(self, old_structure, new_structure):
+        """
+        This worker compares two IDD structures.
+
+        :param IDDStructure old_structure: The older IDD
+        :param IDDStructure new_structure: The newer IDD
+        :return: An IDDDiff describing the differences
+        """
+        result = IDDDiff(old_structure.version_string, new_structure.version_string)
+        old_objects = _objects_by_type(old_structure)
+        new_objects = _objects_by_type(new_structure)
+        for key, (new_group, new_object) in new_objects.items():
+            if key not in old_objects:
+                result.added_objects.append(new_object if isinstance(new_object, str) else new_object.name)
+        for key, (old_group, old_object) in old_objects.items():
+            if key not in new_objects:
+                result.removed_objects.append(old_object if isinstance(old_object, str) else old_object.name)
+                continue
+            new_group, new_object = new_objects[key]
+            if isinstance(old_object, str) or isinstance(new_object, str):
+                if isinstance(old_object, str) != isinstance(new_object, str):
+                    object_diff = IDDObjectDiff(new_object if isinstance(new_object, str) else new_object.name)
+                    object_diff.meta_data_changes['single-line'] = {
+                        'old': isinstance(old_object, str), 'new': isinstance(new_object, str)
+                    }
+                    result.changed_objects.append(object_diff)
+                continue
+            if object_signature(old_object, old_group) == object_signature(new_object, new_group):
+                continue
+            result.changed_objects.append(self._object_diff(old_group, old_object, new_group, new_object))
+        return result
+
+    def diff_files(self, old_path, new_path):
+        """
+        This worker processes and compares two IDD files.
+
+        :param str old_path: The path to the older IDD
+        :param str new_path: The path to the newer IDD
+        :return: An IDDDiff describing the differences
+        :raises ProcessingException: if either file does not exist or cannot be processed
+        """
+        old_structure = IDDProcessor().process_file_given_file_path(old_path)
+        new_structure = IDDProcessor().process_file_given_file_path(new_path)
+        return self.diff(old_structure, new_structure)
+
+    @staticmethod
+    def _object_diff(old_group, old_object, new_group, new_object):
+        """
+        Internal worker that compares one object found in both IDDs.
+        """
+        object_diff = IDDObjectDiff(new_object.name)
+        object_diff.meta_data_changes = _meta_data_changes(old_object.meta_data, new_object.meta_data)
+        if old_group != new_group:
+            object_diff.meta_data_changes['group'] = {'old': old_group, 'new': new_group}
+        old_by_name = _fields_by_name(old_object)
+        new_by_name = _fields_by_name(new_object)
+        pairs = []
+        unmatched_old = []
+        for key, old_index in old_by_name.items():
+            new_index = new_by_name.pop(key, None)
+            if new_index is None:
+                unmatched_old.append(old_index)
+            else:
+                pairs.append((old_index, new_index))
+        # whatever is left over on both sides is matched by A/N index, which is how renamed fields show up
+        new_by_an_index = {new_object.fields[i].field_an_index: i for i in new_by_name.values()}
+        for old_index in unmatched_old:
+            old_field = old_object.fields[old_index]
+            new_index = new_by_an_index.pop(old_field.field_an_index, None)
+            if new_index is None:
+                object_diff.removed_fields.append(_field_summary(old_index, old_field))
+                continue
+            pairs.append((old_index, new_index))
+            object_diff.renamed_fields.append({
+                'an_index': old_field.field_an_index,
+                'old_name': old_field.field_name,
+                'new_name': new_object.fields[new_index].field_name,
+            })
+        for new_index in sorted(new_by_an_index.values()):
+            object_diff.added_fields.append(_field_summary(new_index, new_object.fields[new_index]))
+        object_diff.removed_fields.sort(key=lambda f: f['index'])
+        for old_index, new_index in sorted(pairs, key=lambda p: p[1]):
+            old_field = old_object.fields[old_index]
+            new_field = new_object.fields[new_index]
+            if old_index != new_index:
+                object_diff.moved_fields.append({
+                    'field_name': new_field.field_name, 'old_index': old_index, 'new_index': new_index
+                })
+            changes = _meta_data_changes(old_field.meta_data, new_field.meta_data)
+            if old_field.field_an_index != new_field.field_an_index:
+                changes['an_index'] = {'old': old_field.field_an_index, 'new': new_field.field_an_index}
+            if changes:
+                object_diff.field_changes.append({'field_name': new_field.field_name, 'changes': changes})
+        return object_diff
@@ -1,4 +1,85 @@
-from typing import List, Optional
+from array import array
+import re
+from typing import Dict, FrozenSet, List, Optional, Union
+
+
+def normalize_field_name(field_name: str) -> str:
+    """
+    Normalizes a field name for lookups, by case folding it and turning every run of characters other than letters
+    and digits into a single underscore, so "Vertex 1 X-coordinate", "vertex 1 x coordinate" and
+    "VERTEX_1_X_COORDINATE" all become "vertex_1_x_coordinate".
+
+    :param str field_name: A field name
+    :return: The normalized field name
+    """
+    return re.sub(r"[^0-9a-z]+", "_", field_name.casefold()).strip("_")
+
+
+class RevisionList(list):
+    """
+    A list that counts its own modifications.  Any change made through the list methods bumps the revision number,
+    which lets the owner of the list know when data it has derived from the items, such as a lookup index, is stale.
+
+    :ivar int revision: A counter incremented on every modification of the list
+    """
+
+    __slots__ = ('revision',)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.revision = 0
+
+    def __reduce__(self):
+        # the default list pickling appends items before the revision slot is restored
+        return type(self), (list(self),)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.revision += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.revision += 1
+
+    def __iadd__(self, other):
+        self.revision += 1
+        return super().__iadd__(other)
+
+    def __imul__(self, other):
+        self.revision += 1
+        return super().__imul__(other)
+
+    def append(self, value):
+        super().append(value)
+        self.revision += 1
+
+    def extend(self, values):
+        super().extend(values)
+        self.revision += 1
+
+    def insert(self, index, value):
+        super().insert(index, value)
+        self.revision += 1
+
+    def pop(self, index=-1):
+        self.revision += 1
+        return super().pop(index)
+
+    def remove(self, value):
+        super().remove(value)
+        self.revision += 1
+
+    def clear(self):
+        super().clear()
+        self.revision += 1
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self.revision += 1
+
+    def reverse(self):
+        super().reverse()
+        self.revision += 1
 
 
 class IDDField:
@@ -21,10 +102,26 @@ class IDDField:
         self.field_an_index = an_index
         self.meta_data = {}
         self.field_name: Optional[str] = None
+        self._choice_keys: Optional[FrozenSet[str]] = None
+        self._choice_keys_compiled = False
 
     def __str__(self):
         return f"IDDField: {self.field_an_index} - {self.field_name}"
 
+    def choice_keys(self) -> Optional[FrozenSet[str]]:
+        """
+        Returns the allowed values of a \\type choice field as a frozenset of case-folded \\key values, so a value
+        can be checked with a single set lookup of value.strip().casefold().  The set is built the first time it is
+        requested and then reused for every object validated against this IDD.
+
+        :return: The frozenset of case-folded keys, or None if this is not a choice field
+        """
+        if not self._choice_keys_compiled:
+            if "choice" in self.meta_data.get("\\type", []):
+                self._choice_keys = frozenset(key.strip().casefold() for key in self.meta_data.get("\\key", []))
+            self._choice_keys_compiled = True
+        return self._choice_keys
+
 
 class IDDObject:
     """
@@ -46,10 +143,167 @@ class IDDObject:
         self.name = name
         self.meta_data = {}
         self.fields: List[IDDField] = []
+        self._extensible_layout = None
+        self._field_name_map = None
 
     def __str__(self):
         return f"IDDObject: {self.name} - {len(self.fields)} fields"
 
+    def extensible_group_size(self) -> int:
+        """
+        Returns the number of fields in the repeating group of an extensible object, from the \\extensible:<#> tag.
+
+        :return: The number of fields per extensible group, or 0 if the object is not extensible
+        """
+        if "\\extensible" not in self.meta_data:
+            return 0
+        data = self.meta_data["\\extensible"][0] or ""
+        digits = ""
+        for c in data.lstrip(":").strip():
+            if not c.isdigit():
+                break
+            digits += c
+        return int(digits) if digits else 0
+
+    def first_extensible_field_index(self) -> Optional[int]:
+        """
+        Returns the zero-based index of the first field of the first extensible group, which is the field marked with
+        \\begin-extensible.  Without that marker the start of the repeating group is not known, and the object is
+        treated as not extensible rather than guessing it.
+
+        :return: The index of the first extensible field, or None if the object is not extensible or no field is marked
+        """
+        if self.extensible_group_size() == 0:
+            return None
+        for index, field in enumerate(self.fields):
+            if "\\begin-extensible" in field.meta_data:
+                return index
+        return None
+
+    def _get_extensible_layout(self):
+        """
+        Internal worker that returns (number of listed fields, first extensible index, group size) for this object.
+        The layout is worked out once and only recomputed if fields have been added since, which happens while the
+        processor is still filling in the object.  A group size of 0 means there is no usable repeating group.
+        """
+        layout = self._extensible_layout
+        num_fields = len(self.fields)
+        if layout is None or layout[0] != num_fields:
+            group_size = self.extensible_group_size()
+            first_extensible = self.first_extensible_field_index()
+            if first_extensible is None or first_extensible + group_size > num_fields:
+                first_extensible, group_size = num_fields, 0
+            layout = (num_fields, first_extensible, group_size)
+            self._extensible_layout = layout
+        return layout
+
+    def field_for_index(self, index: int) -> Optional[IDDField]:
+        """
+        Returns the IDD field describing the field at any index of an IDF object of this type.  IDDs only list a
+        limited number of extensible groups, and real objects (vertices, schedule data) often have many more fields, so
+        indices past the listed fields are mapped onto the first extensible group, which serves as the template of the
+        repeating group.  This is constant time and does not build any per-object lists.
+
+        :param int index: The zero-based field index, not counting the object type
+        :return: The IDDField for the index, or None if the index is past the end of a non-extensible object
+        """
+        fields = self.fields
+        if index < len(fields):
+            return fields[index]
+        _, first_extensible, group_size = self._get_extensible_layout()
+        if group_size == 0:
+            return None
+        return fields[first_extensible + (index - first_extensible) % group_size]
+
+    def field_name_for_index(self, index: int) -> Optional[str]:
+        """
+        Returns the field name for any index of an IDF object of this type, see field_for_index.  For fields past the
+        ones listed in the IDD, the group number in the template name is replaced, so index 372 of
+        BuildingSurface:Detailed is named "Vertex 121 X-coordinate".
+
+        :param int index: The zero-based field index, not counting the object type
+        :return: The field name, or None if the field is unknown or has no name
+        """
+        idd_field = self.field_for_index(index)
+        if idd_field is None or index < len(self.fields) or not idd_field.field_name:
+            return None if idd_field is None else idd_field.field_name
+        _, first_extensible, group_size = self._get_extensible_layout()
+        group_number = (index - first_extensible) // group_size + 1
+        return re.sub(r"\b1\b", str(group_number), idd_field.field_name, count=1)
+
+    def _get_field_name_map(self):
+        """
+        Internal worker that returns (number of listed fields, dictionary of normalized name to index, extensible name
+        patterns, dictionary of names as spelled by callers to index).  Each pattern is a compiled regular expression
+        for a template field name of the first extensible group with its group number replaced by a digit group, paired
+        with the position of the field in the group.  Like the extensible layout, this is built once and only rebuilt
+        if fields have been added since.
+        """
+        name_map = self._field_name_map
+        num_fields = len(self.fields)
+        if name_map is None or name_map[0] != num_fields:
+            indices = {}
+            for index, idd_field in enumerate(self.fields):
+                if idd_field.field_name:
+                    indices.setdefault(normalize_field_name(idd_field.field_name), index)
+            patterns = []
+            _, first_extensible, group_size = self._get_extensible_layout()
+            for position in range(group_size):
+                template = normalize_field_name(self.fields[first_extensible + position].field_name or "")
+                pattern, count = re.subn(r"(^|_)1(_|$)", r"\g<1>([0-9]+)\g<2>", template, count=1)
+                if count:
+                    patterns.append((re.compile(pattern + "$"), position))
+            name_map = (num_fields, indices, patterns, {})
+            self._field_name_map = name_map
+        return name_map
+
+    def field_index(self, field_name: str) -> Optional[int]:
+        """
+        Returns the index of a field given its name, compared after normalize_field_name so case, spaces, dashes and
+        underscores do not matter.  Names of extensible fields past the ones listed in the IDD, such as
+        "Vertex 121 X-coordinate", are resolved from the first extensible group.  Resolved names are remembered as they
+        were spelled, so every lookup after the first one for a name is a single dictionary lookup.
+
+        :param str field_name: The field name
+        :return: The zero-based field index, not counting the object type, or None if there is no such field
+        """
+        _, indices, patterns, spelled = self._get_field_name_map()
+        index = spelled.get(field_name)
+        if index is not None:
+            return index
+        normalized = normalize_field_name(field_name)
+        index = indices.get(normalized)
+        if index is None and patterns:
+            _, first_extensible, group_size = self._get_extensible_layout()
+            for pattern, position in patterns:
+                match = pattern.match(normalized)
+                if match and int(match.group(1)) > 0:
+                    index = first_extensible + (int(match.group(1)) - 1) * group_size + position
+                    indices[normalized] = index
+                    break
+        if index is not None:
+            spelled[field_name] = index
+        return index
+
+    def has_name_field(self) -> bool:
+        """
+        Returns whether the first field of this object is the name of the object instance, meaning it is an alpha
+        field that is either referenced by other objects or is called Name.  A field called Name that picks from an
+        external list (such as the meter name of Output:Meter) is not an instance name, since it may repeat.
+
+        :return: True if the first field holds the object instance name
+        """
+        if not self.fields:
+            return False
+        first_field = self.fields[0]
+        if first_field.field_an_index[0] != "A":
+            return False
+        if "\\reference" in first_field.meta_data:
+            return True
+        if "external-list" in first_field.meta_data.get("\\type", []):
+            return False
+        return (first_field.field_name or "").upper() == "NAME"
+
 
 class IDDGroup:
     """
@@ -66,7 +320,15 @@ class IDDGroup:
 
     def __init__(self, name: str):
         self.name = name
-        self.objects: List[IDDObject] = []
+        self.objects = []
+
+    @property
+    def objects(self) -> List[IDDObject]:
+        return self._objects
+
+    @objects.setter
+    def objects(self, values):
+        self._objects = _replacement_list(getattr(self, '_objects', None), values)
 
     def __str__(self):
         return f"IDDGroup: {self.name} - {len(self.objects)} objects"
@@ -97,8 +359,52 @@ class IDDStructure:
         self.version_string: Optional[str] = None
         self.build_string: Optional[str] = None
         self.version_float: Optional[float] = None
-        self.single_line_objects: List[str] = []
-        self.groups: List[IDDGroup] = []
+        self.single_line_objects = []
+        self.groups = []
+        self._object_index: Dict[str, Union[IDDObject, str]] = {}
+        self._indexed_revision = None
+
+    @property
+    def groups(self) -> List[IDDGroup]:
+        return self._group_list
+
+    @groups.setter
+    def groups(self, values):
+        self._group_list = _replacement_list(getattr(self, '_group_list', None), values)
+
+    @property
+    def single_line_objects(self) -> List[str]:
+        return self._single_line_objects
+
+    @single_line_objects.setter
+    def single_line_objects(self, values):
+        self._single_line_objects = _replacement_list(getattr(self, '_single_line_objects', None), values)
+
+    def _get_object_index(self) -> Dict[str, Union[IDDObject, str]]:
+        """
+        Internal worker that returns a dictionary of upper-cased object type to IDD object (or single-line object
+        name).  The dictionary is built lazily and rebuilt whenever the groups, their object lists or the single-line
+        objects have been modified since it was last built, which keeps lookups valid while the processor is still
+        filling in the structure and after objects are added, removed or replaced.
+
+        :return: A dictionary keyed on upper case object type
+        """
+        groups = self._group_list
+        revision = (groups.revision, self._single_line_objects.revision,
+                    sum(g._objects.revision for g in groups if g is not None))
+        if revision != self._indexed_revision:
+            index = {}
+            for g in self.groups:
+                if g is None:
+                    continue
+                for o in g.objects:
+                    index.setdefault(o.name.upper(), o)
+            # single line objects are only found if there isn't a normal object of the same name
+            for o in self.single_line_objects:
+                index.setdefault(o.upper(), o)
+            self._object_index = index
+            self._indexed_revision = revision
+        return self._object_index
 
     def get_object_by_type(self, type_to_get):
         """
@@ -108,17 +414,33 @@ class IDDStructure:
         :return: If the object is a single-line object, simply the name; if the object is a full IDDObject instance,
                  that instance is returned.  If a match is not found, this returns None.
         """
-        # check the normal objects
-        for g in self.groups:
-            for o in g.objects:
-                if o.name.upper() == type_to_get.upper():
-                    return o
-        # check single line objects? Weird...but might be useful
-        for o in self.single_line_objects:
-            if o.upper() == type_to_get.upper():
-                return o
-        # if we haven't returned, fail
-        return None
+        return self._get_object_index().get(type_to_get.upper())
+
+    def get_canonical_object_name(self, type_to_get) -> Optional[str]:
+        """
+        Given a type name in any case, this returns the object type exactly as it is spelled in the IDD.  Since the
+        same string instance is returned for every lookup, this is useful for sharing (interning) object type names
+        across many IDF objects.
+
+        :param type_to_get: The name of the object to look up, case-insensitive
+        :return: The IDD spelling of the object type, or None if the type is not found in this IDD
+        """
+        match = self._get_object_index().get(type_to_get.upper())
+        if match is None:
+            return None
+        if isinstance(match, str):
+            return match
+        return match.name
+
+    def __reduce__(self):
+        """
+        Pickles this structure in a flat form instead of as a tree of objects and dictionaries.  Every distinct string
+        (names, metadata keys and values) is stored once in a string table, and the shape of the structure (groups,
+        objects, fields and metadata entries) is stored as one array of integers indexing into it, see
+        _flatten_idd_structure.  Cached lookup data is not pickled; it is rebuilt on demand.  Subclasses are restored
+        as a plain IDDStructure.
+        """
+        return _restore_idd_structure, _flatten_idd_structure(self)
 
     def get_objects_with_meta_data(self, meta_data):
         """
@@ -134,3 +456,108 @@ class IDDStructure:
                     objects.append(o)
         return objects
         # not going to look at single line objects for this
+
+
+def _replacement_list(current, values):
+    """
+    Internal worker that converts a list assigned to an IDD structure or group into a RevisionList.  The new list
+    continues the revision count of the list it replaces, so lookup data derived from the old list is seen as stale.
+    """
+    replacement = RevisionList(values)
+    if current is not None:
+        replacement.revision = current.revision + 1
+    return replacement
+
+
+def _flatten_idd_structure(idd_structure):
+    """
+    Internal worker that flattens an IDD structure into (file path, version string, build string, version float,
+    string table, integer array bytes, single line object string ids).  None is stored as string id -1.  The integer
+    array holds the number of groups, then for each group its name id and number of objects, for each object its name
+    id, its metadata and its number of fields, and for each field its A/N index id, name id and metadata.  Metadata is
+    stored as the number of keys, then for each key its id, the number of values and the value ids.
+    """
+    string_ids = {}
+    ints = array("i")
+
+    def string_id(value):
+        return -1 if value is None else string_ids.setdefault(value, len(string_ids))
+
+    def add_meta_data(meta_data):
+        ints.append(len(meta_data))
+        for key, values in meta_data.items():
+            ints.append(string_id(key))
+            ints.append(len(values))
+            ints.extend([string_id(v) for v in values])
+
+    ints.append(len(idd_structure.groups))
+    for group in idd_structure.groups:
+        if group is None:
+            ints.extend([-2, 0])
+            continue
+        ints.extend([string_id(group.name), len(group.objects)])
+        for idd_object in group.objects:
+            ints.append(string_id(idd_object.name))
+            add_meta_data(idd_object.meta_data)
+            ints.append(len(idd_object.fields))
+            for idd_field in idd_object.fields:
+                ints.extend([string_id(idd_field.field_an_index), string_id(idd_field.field_name)])
+                add_meta_data(idd_field.meta_data)
+    single_line_ids = [string_id(name) for name in idd_structure.single_line_objects]
+    return (idd_structure.file_path, idd_structure.version_string, idd_structure.build_string,
+            idd_structure.version_float, tuple(string_ids), ints.tobytes(), single_line_ids)
+
+
+def _restore_idd_structure(file_path, version_string, build_string, version_float, strings, int_bytes,
+                           single_line_ids):
+    """
+    Internal worker that rebuilds an IDD structure from the flat form of _flatten_idd_structure.
+    """
+    ints = array("i")
+    ints.frombytes(int_bytes)
+    ints = ints.tolist()
+    strings = list(strings) + [None]  # so that id -1 maps to None
+    position = 0
+
+    def read_meta_data():
+        nonlocal position
+        meta_data = {}
+        num_keys = ints[position]
+        position += 1
+        for _ in range(num_keys):
+            key = strings[ints[position]]
+            num_values = ints[position + 1]
+            position += 2
+            meta_data[key] = [strings[i] for i in ints[position:position + num_values]]
+            position += num_values
+        return meta_data
+
+    idd_structure = IDDStructure(file_path)
+    idd_structure.version_string = version_string
+    idd_structure.build_string = build_string
+    idd_structure.version_float = version_float
+    idd_structure.single_line_objects = [strings[i] for i in single_line_ids]
+    num_groups = ints[position]
+    position += 1
+    for _ in range(num_groups):
+        name_id, num_objects = ints[position], ints[position + 1]
+        position += 2
+        if name_id == -2:
+            idd_structure.groups.append(None)
+            continue
+        group = IDDGroup(strings[name_id])
+        for _ in range(num_objects):
+            idd_object = IDDObject(strings[ints[position]])
+            position += 1
+            idd_object.meta_data = read_meta_data()
+            num_fields = ints[position]
+            position += 1
+            for _ in range(num_fields):
+                idd_field = IDDField(strings[ints[position]])
+                idd_field.field_name = strings[ints[position + 1]]
+                position += 2
+                idd_field.meta_data = read_meta_data()
+                idd_object.fields.append(idd_field)
+            group.objects.append(idd_object)
+        idd_structure.groups.append(group)
+    return idd_structure
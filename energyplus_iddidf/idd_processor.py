@@ -32,6 +32,23 @@ class CurrentReadType:
 IDD_CACHE = {}
 
 
+def idd_version_float(version_string):
+    """
+    Converts an IDD version string into its floating point representation, using only the major and minor parts.
+
+    :param str version_string: The version string from the IDD header, such as 8.6.0
+    :return: The floating point representation of the version (for 8.6.0 it is 8.6)
+    :raises ProcessingException: if the version cannot be coerced into a floating point number
+    """
+    try:
+        version_tokens = version_string.split(".")
+        tmp_string = "{}.{}".format(version_tokens[0], version_tokens[1])
+        return float(tmp_string)
+    except (ValueError, IndexError):
+        raise exceptions.ProcessingException(
+            "Found IDD version, but could not coerce into floating point representation")
+
+
 class IDDProcessor:
     """
     The core IDD Processor class.  Given an IDD via stream or path, this class has workers to robustly process the IDD
@@ -65,9 +82,9 @@ class IDDProcessor:
         """
         if not os.path.exists(file_path):
             raise exceptions.ProcessingException("Input IDD file not found=\"" + file_path + "\"")  # pragma: no cover
-        self.idd_file_stream = open(file_path, "rb")
         self.file_path = file_path
-        return self.process_file()
+        with open(file_path, "rb") as self.idd_file_stream:
+            return self.process_file()
 
     def process_file_via_stream(self, idd_file_stream):
         """
@@ -94,6 +111,40 @@ class IDDProcessor:
         self.file_path = "/string/idd/snippet"
         return self.process_file()
 
+    @staticmethod
+    def peek_header(path_or_stream):
+        """
+        This worker reads only the header comment lines of an IDD to find its version and build strings, which is
+        much cheaper than processing the whole IDD.  Reading stops at the first line that isn't a comment or blank.
+
+        :param path_or_stream: Either the path to an IDD file on disk or a file-like object that can be iterated line by
+                               line (in text or binary mode); a stream is read from its current position and left open.
+        :return: A tuple of the version string and build string, either of which is None if it was not found
+        :raises ProcessingException: if the specified file does not exist
+        """
+        if isinstance(path_or_stream, (str, os.PathLike)):
+            if not os.path.exists(path_or_stream):
+                raise exceptions.ProcessingException("Input IDD file not found=\"" + str(path_or_stream) + "\"")
+            with open(path_or_stream, "rb") as f:
+                return IDDProcessor.peek_header(f)
+        version_string = None
+        build_string = None
+        for line in path_or_stream:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8', errors='replace')
+            line_text = line.strip()
+            if len(line_text) == 0:
+                continue
+            if not line_text.startswith("!"):
+                break
+            if "IDD_Version" in line_text:
+                version_string = line_text.split(" ")[1].strip()
+            elif "IDD_BUILD" in line_text:
+                build_string = line_text.split(" ")[1].strip()
+            if version_string is not None and build_string is not None:
+                break
+        return version_string, build_string
+
     def peek_one_char(self) -> str:
         """
         Internal worker function that reads a single character from the internal IDD stream but resets the stream to
@@ -465,13 +516,7 @@ class IDDProcessor:
                         read_status = CurrentReadType.ReadAnything
                     if "IDD_Version" in token_builder:
                         self.idd.version_string = token_builder.strip().split(" ")[1].strip()
-                        try:
-                            version_tokens = self.idd.version_string.split(".")
-                            tmp_string = "{}.{}".format(version_tokens[0], version_tokens[1])
-                            self.idd.version_float = float(tmp_string)
-                        except ValueError:
-                            raise exceptions.ProcessingException(
-                                "Found IDD version, but could not coerce into floating point representation")
+                        self.idd.version_float = idd_version_float(self.idd.version_string)
                     elif "IDD_BUILD" in token_builder:
                         self.idd.build_string = token_builder.strip().split(" ")[1].strip()
                         magic_cache_key = "{}__{}".format(self.idd.version_string, self.idd.build_string)
@@ -0,0 +1,183 @@
+from collections import OrderedDict
+import glob
+import logging
+import os
+from typing import Dict, List, Optional
+
+from energyplus_iddidf import exceptions
+from energyplus_iddidf import idd_processor
+from energyplus_iddidf.idd_objects import IDDStructure
+from energyplus_iddidf.idd_processor import IDDProcessor, idd_version_float
+from energyplus_iddidf.idf_processor import IDFProcessor
+
+module_logger = logging.getLogger("eptransition.idd.registry")
+
+
+def _version_key(version_string):
+    """
+    Internal worker that returns a sort key for a version string, comparing the numeric parts as numbers.
+    """
+    return tuple(int(part) if part.isdigit() else -1 for part in version_string.split(".")), version_string
+
+
+class RegisteredIDD:
+    """
+    A simple class holding the header information of one IDD file known to an IDDRegistry.
+
+    :ivar str file_path: The path to the IDD file on disk
+    :ivar str version_string: The version string from the IDD header, such as 8.6.0
+    :ivar str build_string: The build string from the IDD header
+    :ivar float version_float: The floating point representation of the version (for 8.6.0 it is 8.6)
+    """
+
+    def __init__(self, file_path: str, version_string: str, build_string: str):
+        self.file_path = file_path
+        self.version_string = version_string
+        self.build_string = build_string
+        self.version_float = idd_version_float(version_string)
+
+    def __str__(self):
+        return f"RegisteredIDD: {self.version_string} ({self.build_string}) at {self.file_path}"
+
+
+class IDDRegistry:
+    """
+    A registry of IDD files for several EnergyPlus versions.  IDD files are indexed by reading only their headers, and
+    each IDD is only processed when an IDF actually needs that version.  Processed IDDs are kept in a bounded, least
+    recently used cache, so validating a corpus with many versions does not keep every IDD in memory.
+
+    Constructor parameters:
+
+    :param int max_loaded: The maximum number of processed IDD structures to keep in memory at once
+    """
+
+    def __init__(self, max_loaded: int = 2):
+        if max_loaded < 1:
+            raise ValueError("IDDRegistry must be able to hold at least one processed IDD")
+        self.max_loaded = max_loaded
+        self._by_version_string: Dict[str, RegisteredIDD] = {}
+        self._by_version_float: Dict[float, RegisteredIDD] = {}
+        self._loaded = OrderedDict()
+
+    def add_idd_path(self, file_path: str) -> RegisteredIDD:
+        """
+        Registers a single IDD file by reading its header.  An IDD with the same version string and build as one
+        already registered is a copy of it, and the existing entry is kept.  When several IDDs share the major and
+        minor version (8.6.0 and 8.6.1), lookups by major and minor version use the highest patch version, whatever
+        order the files were registered in.
+
+        :param str file_path: The path to an IDD file on disk
+        :return: The RegisteredIDD entry for this version
+        :raises ProcessingException: if the file does not exist or does not have standard version headers, or if an
+                                     IDD with the same version string but a different build was already registered
+        """
+        version_string, build_string = IDDProcessor.peek_header(file_path)
+        if version_string is None or build_string is None:
+            raise exceptions.ProcessingException(
+                "IDD did not appear to include standard version headers: \"" + file_path + "\"")
+        existing = self._by_version_string.get(version_string)
+        if existing is not None:
+            if existing.build_string != build_string:
+                raise exceptions.ProcessingException(
+                    "IDDs with different builds are registered for version {}: \"{}\" ({}) and \"{}\" ({})".format(
+                        version_string, existing.file_path, existing.build_string, file_path, build_string))
+            module_logger.debug("IDD {} is a copy of the registered {}".format(file_path, existing.file_path))
+            return existing
+        entry = RegisteredIDD(file_path, version_string, build_string)
+        self._by_version_string[version_string] = entry
+        same_minor = self._by_version_float.get(entry.version_float)
+        if same_minor is None or _version_key(entry.version_string) > _version_key(same_minor.version_string):
+            self._by_version_float[entry.version_float] = entry
+        return entry
+
+    def add_idd_directory(self, directory: str, pattern: str = "*.idd") -> List[RegisteredIDD]:
+        """
+        Registers every IDD file in a directory whose name matches a glob pattern.
+
+        :param str directory: The directory to search, not recursively
+        :param str pattern: The glob pattern for IDD file names
+        :return: A list of RegisteredIDD entries, one per file registered
+        """
+        return [self.add_idd_path(p) for p in sorted(glob.glob(os.path.join(directory, pattern)))]
+
+    @property
+    def registered(self) -> List[RegisteredIDD]:
+        """
+        :return: A list of all registered IDDs, sorted by version
+        """
+        return sorted(self._by_version_string.values(), key=lambda e: (e.version_float, e.version_string))
+
+    @property
+    def loaded_versions(self) -> List[str]:
+        """
+        :return: The version strings of the processed IDDs currently held in memory, least recently used first
+        """
+        return list(self._loaded.keys())
+
+    def find(self, version) -> Optional[RegisteredIDD]:
+        """
+        Finds the registered IDD for a version.  An exact version string match is preferred, otherwise the IDD with the
+        same major and minor version is used, which is how IDF files usually refer to a version (22.2 for 22.2.0).  If
+        several registered IDDs share the major and minor version, the one with the highest patch version is used.
+
+        :param version: A version string, such as 22.2 or 22.2.0, or a floating point version such as 22.2
+        :return: The matching RegisteredIDD, or None if no registered IDD matches
+        """
+        if isinstance(version, str):
+            if version in self._by_version_string:
+                return self._by_version_string[version]
+            try:
+                version = idd_version_float(version if "." in version else version + ".0")
+            except exceptions.ProcessingException:
+                return None
+        return self._by_version_float.get(version)
+
+    def get_idd_for_version(self, version) -> IDDStructure:
+        """
+        Returns the processed IDD for a version, processing the IDD file if it is not already in memory.  If this
+        pushes the number of processed IDDs over the limit, the least recently used one is released.
+
+        :param version: A version string or floating point version, see find()
+        :return: The IDDStructure for the version
+        :raises ProcessingException: if no registered IDD matches the version
+        """
+        entry = self.find(version)
+        if entry is None:
+            raise exceptions.ProcessingException("No registered IDD matches version \"{}\"".format(version))
+        if entry.version_string in self._loaded:
+            self._loaded.move_to_end(entry.version_string)
+            return self._loaded[entry.version_string]
+        module_logger.debug("Processing IDD for version {} from {}".format(entry.version_string, entry.file_path))
+        idd_structure = IDDProcessor().process_file_given_file_path(entry.file_path)
+        self._loaded[entry.version_string] = idd_structure
+        while len(self._loaded) > self.max_loaded:
+            _, released = self._loaded.popitem(last=False)
+            # the processor keeps its own cache of every IDD it has read, which would defeat the bound here
+            idd_processor.IDD_CACHE.pop("{}__{}".format(released.version_string, released.build_string), None)
+        return idd_structure
+
+    def get_idd_for_idf(self, path_or_stream) -> IDDStructure:
+        """
+        Returns the processed IDD matching the Version object of an IDF, reading only the start of the IDF.
+
+        :param path_or_stream: The path to an IDF file, or a file-like object, see IDFProcessor.peek_version()
+        :return: The IDDStructure for the version of the IDF
+        :raises ProcessingException: if the IDF version cannot be read or no registered IDD matches it
+        """
+        version_string, _ = IDFProcessor.peek_version(path_or_stream)
+        return self.get_idd_for_version(version_string)
+
+    def validate_idf_files(self, file_paths):
+        """
+        Validates a set of IDF files, which may be for different versions, each against its matching IDD.  Files are
+        processed one at a time and the results are yielded as they become available.
+
+        :param file_paths: An iterable of paths to IDF files
+        :return: A generator of (file_path, version_string, issues) tuples, where issues is a list of ValidationIssue
+                 instances
+        :raises ProcessingException: if a file cannot be processed or no registered IDD matches its version
+        """
+        for file_path in file_paths:
+            idd_structure = self.get_idd_for_idf(file_path)
+            idf_structure = IDFProcessor(idd_structure=idd_structure).process_file_given_file_path(file_path)
+            yield file_path, idf_structure.version_string, idf_structure.validate(idd_structure)
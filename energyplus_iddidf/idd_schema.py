@@ -0,0 +1,298 @@
+from io import StringIO
+import json
+import os
+
+from energyplus_iddidf import exceptions
+from energyplus_iddidf.epjson import EpJSONObjectMapping, epjson_field_name, epjson_extensible_field_name
+from energyplus_iddidf.idd_objects import IDDField, IDDGroup, IDDObject, IDDStructure
+from energyplus_iddidf.idd_processor import idd_version_float
+
+# bumped whenever the legacy_idd layout changes in a way that older loaders would misread
+SCHEMA_FORMAT_VERSION = 1
+
+
+def _schema_number(value):
+    """
+    Internal worker that converts an IDD numeric metadata string, such as a default or a bound, into a JSON number if
+    it is one; anything else, such as a default of autosize, is kept as the string.
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return int(number) if number.is_integer() and "." not in value and "e" not in value.lower() else number
+
+
+def _field_schema(idd_field):
+    """
+    Internal worker that builds the epJSON-schema-style property description of a single IDD field.
+    """
+    meta_data = idd_field.meta_data
+    field_type = meta_data.get("\\type", [""])[0]
+    schema = {}
+    if idd_field.field_an_index[0] == "N":
+        schema["type"] = "integer" if field_type == "integer" else "number"
+        special_values = []
+        if "\\autosizable" in meta_data:
+            special_values.append("Autosize")
+        if "\\autocalculatable" in meta_data:
+            special_values.append("Autocalculate")
+        if special_values:
+            schema = {"anyOf": [schema, {"type": "string", "enum": special_values}]}
+        for flag, inclusive, exclusive in [("\\minimum", "minimum", "exclusiveMinimum"),
+                                           ("\\maximum", "maximum", "exclusiveMaximum")]:
+            if flag in meta_data:
+                bound = meta_data[flag][0]
+                if bound.startswith((">", "<")):
+                    schema[exclusive] = _schema_number(bound[1:].strip())
+                else:
+                    schema[inclusive] = _schema_number(bound)
+        if "\\default" in meta_data:
+            schema["default"] = _schema_number(meta_data["\\default"][0])
+    else:
+        schema["type"] = "string"
+        if "\\key" in meta_data:
+            schema["enum"] = list(meta_data["\\key"])
+        if "\\default" in meta_data:
+            schema["default"] = meta_data["\\default"][0]
+        if "\\retaincase" in meta_data:
+            schema["retaincase"] = True
+    if "\\object-list" in meta_data:
+        schema["data_type"] = "object_list"
+        schema["object_list"] = list(meta_data["\\object-list"])
+    elif "\\external-list" in meta_data:
+        schema["data_type"] = "external_list"
+        schema["external_list"] = list(meta_data["\\external-list"])
+    if "\\reference" in meta_data:
+        schema["reference"] = list(meta_data["\\reference"])
+    if "\\units" in meta_data:
+        schema["units"] = meta_data["\\units"][0]
+    if "\\ip-units" in meta_data:
+        schema["ip-units"] = meta_data["\\ip-units"][0]
+    if "\\note" in meta_data:
+        schema["note"] = " ".join(meta_data["\\note"])
+    return schema
+
+
+class IDDSchemaWriter:
+    """
+    This class exports an IDDStructure as an epJSON-schema-style JSON document.  Each IDD object type becomes an entry
+    in the top level "properties" with a description of its fields (types, bounds, defaults, choice keys, and the
+    reference and object-list classes), similar to the Energy+.schema.epJSON document that EnergyPlus ships.
+
+    Each object entry also carries a "legacy_idd" section holding the IDD fields in order along with their complete
+    metadata, which is what IDDSchemaProcessor reads to rebuild an equivalent IDDStructure without parsing the IDD.
+
+    There are no constructor parameters.
+    """
+
+    def schema(self, idd_structure):
+        """
+        This worker builds the schema document for an IDD structure.
+
+        :param IDDStructure idd_structure: The IDD structure to export
+        :return: The schema as a dictionary that can be passed to json.dump
+        :raises ProcessingException: if an object type appears more than once in the IDD
+        """
+        properties = {}
+        group_names = []
+        for group in idd_structure.groups:
+            if group is None:
+                group_names.append(None)
+                continue
+            group_names.append(group.name)
+            for idd_object in group.objects:
+                if idd_object.name in properties:
+                    raise exceptions.ProcessingException(
+                        "IDD object type is declared more than once", object_name=idd_object.name)
+                properties[idd_object.name] = self._object_schema(idd_object, group.name)
+        return {
+            "$schema": "http://json-schema.org/draft-04/schema#",
+            "epJSON_schema_version": idd_structure.version_string,
+            "epJSON_schema_build": idd_structure.build_string,
+            "properties": properties,
+            "legacy_idd": {
+                "format": SCHEMA_FORMAT_VERSION,
+                "groups": group_names,
+                "single_line_objects": list(idd_structure.single_line_objects),
+            },
+        }
+
+    def schema_string(self, idd_structure):
+        """
+        This worker builds the schema document for an IDD structure as a JSON string.
+
+        :param IDDStructure idd_structure: The IDD structure to export
+        :return: The schema as a JSON string
+        """
+        return json.dumps(self.schema(idd_structure))
+
+    def write_schema(self, idd_structure, file_path):
+        """
+        This worker writes the schema document for an IDD structure to a file.
+
+        :param IDDStructure idd_structure: The IDD structure to export
+        :param str file_path: The path of the schema file to write
+        :return: None
+        """
+        with open(file_path, "w") as f:
+            json.dump(self.schema(idd_structure), f)
+
+    @staticmethod
+    def _object_schema(idd_object, group_name):
+        """
+        Internal worker that builds the schema entry for a single IDD object.
+        """
+        mapping = EpJSONObjectMapping(idd_object)
+        num_regular = len(mapping.property_names)
+        required = []
+        field_properties = {}
+        object_schema = {}
+        for index, idd_field in enumerate(idd_object.fields[:num_regular]):
+            if index == 0 and mapping.named:
+                object_schema["name"] = _field_schema(idd_field)
+                object_schema["name"]["is_required"] = "\\required-field" in idd_field.meta_data
+                continue
+            field_properties[mapping.property_names[index]] = _field_schema(idd_field)
+            if "\\required-field" in idd_field.meta_data:
+                required.append(mapping.property_names[index])
+        if mapping.extension_name is not None:
+            group_fields = idd_object.fields[num_regular:num_regular + len(mapping.extension_property_names)]
+            field_properties[mapping.extension_name] = {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {n: _field_schema(f) for n, f in zip(mapping.extension_property_names, group_fields)}
+                }
+            }
+        instance_schema = {"type": "object", "properties": field_properties}
+        if required:
+            instance_schema["required"] = required
+        object_schema["patternProperties"] = {"^.*\\S.*$" if mapping.named else ".*": instance_schema}
+        object_schema["group"] = group_name
+        if "\\memo" in idd_object.meta_data:
+            object_schema["memo"] = " ".join(idd_object.meta_data["\\memo"])
+        if "\\min-fields" in idd_object.meta_data:
+            object_schema["min_fields"] = _schema_number(idd_object.meta_data["\\min-fields"][0])
+        if "\\unique-object" in idd_object.meta_data:
+            object_schema["maxProperties"] = 1
+        if "\\required-object" in idd_object.meta_data:
+            object_schema["minProperties"] = 1
+        legacy_idd = {
+            "fields": [epjson_field_name(f.field_name) for f in idd_object.fields],
+            "meta_data": idd_object.meta_data,
+            "idd_fields": [[f.field_an_index, f.field_name, f.meta_data] for f in idd_object.fields],
+        }
+        if mapping.extension_name is not None:
+            legacy_idd["extension"] = mapping.extension_name
+            legacy_idd["extensibles"] = [
+                epjson_extensible_field_name(f.field_name) for f in group_fields
+            ]
+        object_schema["legacy_idd"] = legacy_idd
+        return object_schema
+
+
+class IDDSchemaProcessor:
+    """
+    This class rebuilds an IDDStructure from a schema document written by IDDSchemaWriter.  Only the "legacy_idd"
+    sections are read, and these already hold the fields and metadata in their final form, so loading a schema is
+    mostly the cost of decoding the JSON, far less than processing the IDD text character by character.
+
+    The constructor takes no arguments but sets up instance variables. Relevant "public" members are listed here:
+
+    :ivar IDDStructure idd: The resulting IDDStructure instance after processing the schema
+    :ivar str file_path: A file path for this schema, although it may be just a simple descriptor
+    """
+
+    def __init__(self):
+        self.idd = None
+        self.file_path = None
+
+    def process_file_given_file_path(self, file_path):
+        """
+        This worker allows processing of a schema file at a specific path on disk.
+
+        :param file_path: The path to a schema file on disk.
+        :return: An IDDStructure instance created from the schema
+        :raises ProcessingException: if the specified file does not exist or is not a valid schema
+        """
+        if not os.path.exists(file_path):
+            raise exceptions.ProcessingException("Input IDD schema file not found=\"" + file_path + "\"")
+        self.file_path = file_path
+        with open(file_path) as f:
+            return self._process_stream(f)
+
+    def process_file_via_stream(self, schema_stream):
+        """
+        This worker allows processing of a schema via stream.
+
+        :param file-like-object schema_stream: A schema stream that responds to read()
+        :return: An IDDStructure instance created from the schema
+        :raises ProcessingException: if the stream is not a valid schema
+        """
+        self.file_path = "/streamed/idd_schema"
+        return self._process_stream(schema_stream)
+
+    def process_file_via_string(self, schema_string):
+        """
+        This worker allows processing of a schema string.
+
+        :param str schema_string: A schema JSON string
+        :return: An IDDStructure instance created from the schema
+        :raises ProcessingException: if the string is not a valid schema
+        """
+        self.file_path = "/string/idd_schema"
+        return self._process_stream(StringIO(schema_string))
+
+    def process_schema(self, schema):
+        """
+        This worker builds the IDDStructure from an already decoded schema document.
+
+        :param dict schema: The schema document, as returned from IDDSchemaWriter.schema(); the metadata dictionaries
+                            in it are used as they are, not copied
+        :return: An IDDStructure instance created from the schema
+        :raises ProcessingException: if the document is not a valid schema
+        """
+        if self.file_path is None:
+            self.file_path = "/dict/idd_schema"
+        try:
+            legacy_idd = schema["legacy_idd"]
+            if legacy_idd["format"] != SCHEMA_FORMAT_VERSION:
+                raise exceptions.ProcessingException(
+                    "Unsupported IDD schema format version {}".format(legacy_idd["format"]))
+            self.idd = IDDStructure(self.file_path)
+            self.idd.version_string = schema["epJSON_schema_version"]
+            self.idd.build_string = schema["epJSON_schema_build"]
+            self.idd.version_float = idd_version_float(self.idd.version_string)
+            self.idd.single_line_objects = list(legacy_idd["single_line_objects"])
+            groups_by_name = {}
+            for group_name in legacy_idd["groups"]:
+                if group_name is None:
+                    self.idd.groups.append(None)
+                    continue
+                group = IDDGroup(group_name)
+                groups_by_name.setdefault(group_name, group)
+                self.idd.groups.append(group)
+            for object_name, object_schema in schema["properties"].items():
+                legacy_object = object_schema["legacy_idd"]
+                idd_object = IDDObject(object_name)
+                idd_object.meta_data = legacy_object["meta_data"]
+                for an_index, field_name, meta_data in legacy_object["idd_fields"]:
+                    idd_field = IDDField(an_index)
+                    idd_field.field_name = field_name
+                    idd_field.meta_data = meta_data
+                    idd_object.fields.append(idd_field)
+                groups_by_name[object_schema["group"]].objects.append(idd_object)
+        except (KeyError, TypeError, ValueError) as e:
+            raise exceptions.ProcessingException("IDD schema is missing or has malformed data: {}".format(e))
+        return self.idd
+
+    def _process_stream(self, schema_stream):
+        """
+        Internal worker that decodes the schema JSON and builds the IDDStructure from it.
+        """
+        try:
+            schema = json.load(schema_stream)
+        except json.JSONDecodeError as e:
+            raise exceptions.ProcessingException("Could not decode IDD schema JSON: {}".format(e))
+        return self.process_schema(schema)
@@ -0,0 +1,498 @@
+from bisect import bisect_left
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+import tempfile
+import zlib
+
+from energyplus_iddidf import exceptions
+
+module_logger = logging.getLogger("eptransition.idd.search")
+
+SEARCH_INDEX_MAGIC = b"EPIDDIDX"
+# bumped whenever the layout changes; index files with another format version are rejected, and caches treat them as
+# misses so they are simply rewritten
+SEARCH_INDEX_FORMAT_VERSION = 1
+
+# magic, format version, length of the compressed JSON body
+_PREFIX = struct.Struct("<8sHI")
+
+_WORD_PATTERN = re.compile(r"[0-9A-Za-z]+")
+# the parts of a camel case word, keeping acronyms together: AirLoopHVACOutdoorAir gives Air, Loop, HVAC, Outdoor, Air
+_WORD_PART_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+
+class SearchKinds:
+    Object = 'object'
+    Memo = 'memo'
+    Field = 'field'
+    Note = 'note'
+    Reference = 'reference'
+    ObjectList = 'object_list'
+    Key = 'key'
+
+
+# the kinds in the order they are encoded, and how much a match of each kind counts when ranking
+KIND_WEIGHTS = {
+    SearchKinds.Object: 8.0,
+    SearchKinds.Memo: 2.0,
+    SearchKinds.Field: 5.0,
+    SearchKinds.Note: 1.0,
+    SearchKinds.Reference: 4.0,
+    SearchKinds.ObjectList: 3.0,
+    SearchKinds.Key: 3.0,
+}
+_KINDS = list(KIND_WEIGHTS)
+
+# field metadata indexed as a kind of its own, one entry per value
+_FIELD_META_DATA_KINDS = [
+    ("\\reference", SearchKinds.Reference),
+    ("\\reference-class-name", SearchKinds.Reference),
+    ("\\object-list", SearchKinds.ObjectList),
+    ("\\key", SearchKinds.Key),
+]
+
+
+def search_tokens(text):
+    """
+    Splits text into the tokens used by the search index: lower case runs of letters and digits, with camel case words
+    split into their parts, so "X-coordinate" gives x and coordinate, and "OutdoorAir:Node" gives outdoor, air and
+    node.
+
+    :param str text: The text to split
+    :return: A list of tokens
+    """
+    return [part.casefold() for word in _WORD_PATTERN.findall(text) for part in _WORD_PART_PATTERN.findall(word)]
+
+
+def _index_tokens(text):
+    """
+    Internal worker that returns the tokens a text is indexed under: its search tokens, plus each camel case word as a
+    whole, so a query for outdoorair also finds OutdoorAir.
+    """
+    tokens = set(search_tokens(text))
+    tokens.update(word.casefold() for word in _WORD_PATTERN.findall(text))
+    return tokens
+
+
+class SearchHit:
+    """
+    One match of a search over an IDD.
+
+    :ivar str object_name: The IDD object type the match belongs to
+    :ivar str field_name: The name of the field the match belongs to, or None for object level matches
+    :ivar str kind: What matched, one of the SearchKinds values
+    :ivar str text: The text that matched, such as the field name or the note
+    :ivar float score: The rank of the match; higher is better
+    """
+
+    __slots__ = ('object_name', 'field_name', 'kind', 'text', 'score')
+
+    def __init__(self, object_name, field_name, kind, text, score):
+        self.object_name = object_name
+        self.field_name = field_name
+        self.kind = kind
+        self.text = text
+        self.score = score
+
+    def to_dict(self):
+        """
+        :return: A JSON serializable dictionary describing this match
+        """
+        return {
+            'object': self.object_name, 'field': self.field_name, 'kind': self.kind, 'text': self.text,
+            'score': round(self.score, 4)
+        }
+
+
+class IDDSearchIndex:
+    """
+    A token index over the text of an IDD: object names, \\memo text, field names, \\note text, \\reference and
+    \\object-list class names, and \\key values.  Each of these is an entry; the distinct texts of the entries are
+    split into tokens (see search_tokens), and each token maps to the texts holding it, so word and prefix queries only
+    look at matching texts.  Extensible objects list the same fields over and over, so only the fields up to the end of
+    the first extensible group are indexed.
+
+    An index is built from an IDDStructure with from_idd, and can be saved and loaded without the IDD, so a saved index
+    (see IDDSearchIndexCache) answers queries without processing the IDD at all.
+
+    :ivar str version_string: The version of the indexed IDD
+    :ivar str build_string: The build of the indexed IDD
+    :ivar [str] object_names: The object types of the IDD, in IDD order
+
+    There are no constructor parameters; use from_idd or from_bytes.
+    """
+
+    def __init__(self):
+        self.version_string = None
+        self.build_string = None
+        self.object_names = []
+        self._field_names = []
+        self._texts = []
+        self._text_token_counts = []
+        # four integers per entry: object index, field index (-1 for object level entries), kind index, text index
+        self._entries = []
+        self._postings = {}
+        self._text_entries = None
+        self._vocabulary = None
+
+    @property
+    def num_entries(self):
+        """
+        :return: The number of indexed entries
+        """
+        return len(self._entries) // 4
+
+    @classmethod
+    def from_idd(cls, idd_structure):
+        """
+        Builds the index of an IDD.
+
+        :param IDDStructure idd_structure: The IDD to index
+        :return: An IDDSearchIndex instance
+        """
+        index = cls()
+        index.version_string = idd_structure.version_string
+        index.build_string = idd_structure.build_string
+        text_ids = {}
+
+        def add(object_index, field_index, kind, text):
+            text = text.strip()
+            if not text:
+                return
+            text_id = text_ids.get(text)
+            if text_id is None:
+                text_id = text_ids[text] = len(index._texts)
+                index._texts.append(text)
+                index._text_token_counts.append(len(search_tokens(text)))
+                for token in _index_tokens(text):
+                    index._postings.setdefault(token, []).append(text_id)
+            index._entries.extend((object_index, field_index, _KINDS.index(kind), text_id))
+
+        for group in idd_structure.groups:
+            if group is None:
+                continue
+            for idd_object in group.objects:
+                object_index = len(index.object_names)
+                index.object_names.append(idd_object.name)
+                add(object_index, -1, SearchKinds.Object, idd_object.name)
+                add(object_index, -1, SearchKinds.Memo, " ".join(idd_object.meta_data.get("\\memo", [])))
+                num_fields = len(idd_object.fields)
+                first_extensible = idd_object.first_extensible_field_index()
+                if first_extensible is not None:
+                    num_fields = min(num_fields, first_extensible + idd_object.extensible_group_size())
+                field_names = []
+                for field_index, idd_field in enumerate(idd_object.fields[:num_fields]):
+                    field_name = idd_field.field_name or idd_field.field_an_index
+                    field_names.append(field_name)
+                    add(object_index, field_index, SearchKinds.Field, field_name)
+                    add(object_index, field_index, SearchKinds.Note, " ".join(idd_field.meta_data.get("\\note", [])))
+                    for meta_data_key, kind in _FIELD_META_DATA_KINDS:
+                        for value in idd_field.meta_data.get(meta_data_key, []):
+                            add(object_index, field_index, kind, value)
+                index._field_names.append(field_names)
+        return index
+
+    def to_bytes(self):
+        """
+        :return: The index encoded as bytes, for from_bytes
+        """
+        body = json.dumps({
+            'version_string': self.version_string,
+            'build_string': self.build_string,
+            'object_names': self.object_names,
+            'field_names': self._field_names,
+            'texts': self._texts,
+            'entries': self._entries,
+            'postings': self._postings,
+        }, separators=(",", ":")).encode("utf-8")
+        body = zlib.compress(body, 6)
+        return _PREFIX.pack(SEARCH_INDEX_MAGIC, SEARCH_INDEX_FORMAT_VERSION, len(body)) + body
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Decodes an index encoded with to_bytes.
+
+        :param bytes data: The encoded index
+        :return: An IDDSearchIndex instance
+        :raises ProcessingException: if the data does not hold an index of a supported format
+        """
+        if len(data) < _PREFIX.size:
+            raise exceptions.ProcessingException("Data is too short to hold an IDD search index")
+        magic, format_version, body_length = _PREFIX.unpack_from(data, 0)
+        if magic != SEARCH_INDEX_MAGIC or format_version != SEARCH_INDEX_FORMAT_VERSION:
+            raise exceptions.ProcessingException("Data does not hold an IDD search index of a supported format")
+        try:
+            body = json.loads(zlib.decompress(data[_PREFIX.size:_PREFIX.size + body_length]).decode("utf-8"))
+        except (zlib.error, ValueError) as e:
+            raise exceptions.ProcessingException("IDD search index is corrupt: {}".format(e))
+        index = cls()
+        index.version_string = body['version_string']
+        index.build_string = body['build_string']
+        index.object_names = body['object_names']
+        index._field_names = body['field_names']
+        index._texts = body['texts']
+        index._text_token_counts = [len(search_tokens(text)) for text in index._texts]
+        index._entries = body['entries']
+        index._postings = body['postings']
+        return index
+
+    def save(self, file_path):
+        """
+        Writes the index to a file.
+
+        :param str file_path: The path of the file to write
+        :return: None
+        """
+        with open(file_path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Reads an index written with save.
+
+        :param str file_path: The path of the index file
+        :return: An IDDSearchIndex instance
+        :raises ProcessingException: if the file does not exist or does not hold a valid index
+        """
+        if not os.path.exists(file_path):
+            raise exceptions.ProcessingException("Input search index file not found=\"" + file_path + "\"")
+        with open(file_path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def field_names(self, object_name):
+        """
+        Returns the indexed field names of an object type.
+
+        :param str object_name: The object type, case-insensitive
+        :return: The list of field names, up to the end of the first extensible group, or None if the type is unknown
+        """
+        key = object_name.upper()
+        for object_index, name in enumerate(self.object_names):
+            if name.upper() == key:
+                return list(self._field_names[object_index])
+        return None
+
+    def match_object_names(self, pattern):
+        """
+        Returns the object types that match a pattern, in IDD order, like the --idd_obj_matches command line switch.
+
+        :param str pattern: An fnmatch style pattern, such as Zone*
+        :return: A list of object types
+        """
+        return fnmatch.filter(self.object_names, pattern)
+
+    def _entries_of_texts(self):
+        """
+        Internal worker that returns, per text, the ids of the entries holding it, building the lists the first time.
+        """
+        if self._text_entries is None:
+            text_entries = [[] for _ in self._texts]
+            entries = self._entries
+            for entry_id in range(len(entries) // 4):
+                text_entries[entries[entry_id * 4 + 3]].append(entry_id)
+            self._text_entries = text_entries
+        return self._text_entries
+
+    def _texts_with_prefix(self, prefix):
+        """
+        Internal worker that returns the ids of the texts holding a token starting with prefix.
+        """
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        text_ids = set()
+        position = bisect_left(vocabulary, prefix)
+        while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+            text_ids.update(self._postings[vocabulary[position]])
+            position += 1
+        return text_ids
+
+    def _matching_texts(self, query, mode):
+        """
+        Internal worker that returns a dictionary of matching text id to the fraction of the text covered by the match.
+        """
+        if mode in ("words", "prefix"):
+            tokens = list(dict.fromkeys(search_tokens(query)))
+            if not tokens:
+                return {}
+            text_ids = None
+            for token in tokens:
+                if mode == "words":
+                    token_texts = set(self._postings.get(token, []))
+                else:
+                    token_texts = self._texts_with_prefix(token)
+                text_ids = token_texts if text_ids is None else text_ids & token_texts
+                if not text_ids:
+                    return {}
+            exact = " ".join(tokens)
+            coverage = {}
+            for text_id in text_ids:
+                score = min(1.0, len(tokens) / max(self._text_token_counts[text_id], 1))
+                if mode == "words" and " ".join(search_tokens(self._texts[text_id])) == exact:
+                    score += 1.0
+                coverage[text_id] = score
+            return coverage
+        if mode == "glob":
+            # the literal characters of the pattern stand in for the matched words
+            matcher = re.compile(fnmatch.translate(query.casefold()))
+            literal_length = len(re.sub(r"[*?]|\[[^]]*\]", "", query))
+            return {
+                text_id: 1.0 + min(1.0, literal_length / len(text))
+                for text_id, text in enumerate(self._texts) if matcher.match(text.casefold())
+            }
+        if mode == "regex":
+            try:
+                matcher = re.compile(query, re.IGNORECASE)
+            except re.error as e:
+                raise exceptions.ProcessingException("Invalid search pattern: {}".format(e))
+            coverage = {}
+            for text_id, text in enumerate(self._texts):
+                match = matcher.search(text)
+                if match is not None:
+                    coverage[text_id] = (1.0 if match.group(0) == text else 0.0) + len(match.group(0)) / len(text)
+            return coverage
+        raise exceptions.ProcessingException("Unknown search mode {}, use words, prefix, glob or regex".format(mode))
+
+    def search(self, query, mode="words", kinds=None, limit=None):
+        """
+        Searches the index.  The modes are:
+
+        - words: every word of the query must appear as a whole word in the text
+        - prefix: every word of the query must start a word in the text, so "sched comp" finds Schedule:Compact
+        - glob: an fnmatch style pattern that must match the whole text
+        - regex: a regular expression that must match somewhere in the text
+
+        All modes ignore case.  Hits are ranked by the kind of text that matched (object names first, then field names,
+        class names and keys, then memos and notes; see KIND_WEIGHTS) and by how much of the text the query covers, so
+        an exact match ranks above a match inside a longer text.  Ties keep the IDD order.
+
+        :param str query: The query
+        :param str mode: One of words, prefix, glob or regex
+        :param kinds: An optional iterable of SearchKinds values to limit the search to
+        :param int limit: The maximum number of hits to return, or None for all of them
+        :return: A list of SearchHit instances, best first
+        :raises ProcessingException: if the mode or the kinds are unknown, or the regular expression is invalid
+        """
+        kind_filter = None
+        if kinds is not None:
+            unknown = [kind for kind in kinds if kind not in KIND_WEIGHTS]
+            if unknown:
+                raise exceptions.ProcessingException("Unknown search kinds: {}".format(", ".join(unknown)))
+            kind_filter = {_KINDS.index(kind) for kind in kinds}
+        coverage = self._matching_texts(query, mode)
+        text_entries = self._entries_of_texts()
+        entries = self._entries
+        ranked = []
+        for text_id, text_coverage in coverage.items():
+            for entry_id in text_entries[text_id]:
+                kind_index = entries[entry_id * 4 + 2]
+                if kind_filter is None or kind_index in kind_filter:
+                    ranked.append((-KIND_WEIGHTS[_KINDS[kind_index]] * text_coverage, entry_id))
+        ranked.sort()
+        if limit is not None:
+            ranked = ranked[:limit]
+        hits = []
+        for negative_score, entry_id in ranked:
+            object_index, field_index, kind_index, text_id = entries[entry_id * 4:entry_id * 4 + 4]
+            field_name = None if field_index < 0 else self._field_names[object_index][field_index]
+            hits.append(SearchHit(
+                self.object_names[object_index], field_name, _KINDS[kind_index], self._texts[text_id], -negative_score
+            ))
+        return hits
+
+
+class IDDSearchIndexCache:
+    """
+    A directory of saved search indexes keyed by the hash of the IDD file contents, so an IDD that has been indexed
+    before can be searched without processing it again, and editing the IDD changes its hash so a stale index is never
+    used.  It can share a directory with an IDFSnapshotCache.
+
+    Constructor parameters:
+
+    :param str cache_dir: The directory holding the index files; it is created if it does not exist
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key_for_bytes(data):
+        """
+        :param bytes data: The raw contents of an IDD file
+        :return: The cache key for these contents
+        """
+        return hashlib.sha256(data).hexdigest()
+
+    def path_for_key(self, key):
+        """
+        :param str key: A cache key, as returned from key_for_bytes()
+        :return: The path of the index file for this key
+        """
+        return os.path.join(self.cache_dir, key + ".iddidx")
+
+    def load(self, key):
+        """
+        Loads the cached index for a key.  An index that cannot be read, for example one written with an older format,
+        is treated as a miss.
+
+        :param str key: A cache key, as returned from key_for_bytes()
+        :return: The cached IDDSearchIndex, or None if there is no usable index for the key
+        """
+        try:
+            with open(self.path_for_key(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            return IDDSearchIndex.from_bytes(data)
+        except exceptions.ProcessingException as e:
+            module_logger.debug("Ignoring unusable IDD search index for key {}: {}".format(key, e))
+            return None
+
+    def store(self, key, index):
+        """
+        Stores an index under a key.  The index is written to a temporary file first and then moved into place, so
+        concurrent readers never see a partially written index.
+
+        :param str key: A cache key, as returned from key_for_bytes()
+        :param IDDSearchIndex index: The index to store
+        :return: None
+        """
+        data = index.to_bytes()
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.path_for_key(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def index_for_idd_file(self, idd_path, process_idd):
+        """
+        Returns the index of an IDD file, loading it from the cache when the file has been indexed before, and
+        otherwise building and storing it.
+
+        :param str idd_path: The path of the IDD file
+        :param process_idd: A callable taking the IDD path and returning its IDDStructure, only called on a miss
+        :return: An IDDSearchIndex instance
+        :raises ProcessingException: if the IDD file does not exist or cannot be processed
+        """
+        try:
+            with open(idd_path, "rb") as f:
+                key = self.key_for_bytes(f.read())
+        except OSError:
+            raise exceptions.ProcessingException("IDD file not found=\"" + idd_path + "\"")
+        index = self.load(key)
+        if index is None:
+            index = IDDSearchIndex.from_idd(process_idd(idd_path))
+            self.store(key, index)
+        return index
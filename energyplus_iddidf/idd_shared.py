@@ -0,0 +1,238 @@
+import json
+import logging
+import struct
+from multiprocessing import shared_memory
+
+from energyplus_iddidf import exceptions
+from energyplus_iddidf.idd_objects import IDDField, IDDGroup, IDDObject, IDDStructure
+from energyplus_iddidf.idd_processor import idd_version_float
+
+module_logger = logging.getLogger("eptransition.idd.shared")
+
+SHARED_IDD_MAGIC = b"EPIDDSHM"
+SHARED_IDD_FORMAT_VERSION = 1
+
+# magic, format version, length of the header JSON
+_PREFIX = struct.Struct("<8sHI")
+
+# shared memory segments attached in this process, keyed on segment name
+_ATTACHED = {}
+
+
+def encode_idd(idd_structure):
+    """
+    Encodes an IDD structure into a flat byte string.  The encoding starts with a small JSON header holding the
+    version data, the groups, the single line objects, and an index entry per object (name, group, and the position
+    and length of the object's record).  After the header come the object records, each the JSON encoding of one
+    object's metadata and fields, so a reader only has to decode the records of the objects it looks at.
+
+    :param IDDStructure idd_structure: The IDD structure to encode
+    :return: The encoded bytes
+    """
+    group_names = [None if g is None else g.name for g in idd_structure.groups]
+    entries = []
+    records = []
+    offset = 0
+    for group_index, group in enumerate(idd_structure.groups):
+        if group is None:
+            continue
+        for idd_object in group.objects:
+            fields = [[f.field_an_index, f.field_name, f.meta_data] for f in idd_object.fields]
+            record = json.dumps([idd_object.meta_data, fields], separators=(",", ":")).encode("utf-8")
+            entries.append([idd_object.name, group_index, offset, len(record), sorted(idd_object.meta_data)])
+            records.append(record)
+            offset += len(record)
+    header = json.dumps({
+        'file_path': idd_structure.file_path,
+        'version_string': idd_structure.version_string,
+        'build_string': idd_structure.build_string,
+        'groups': group_names,
+        'single_line_objects': idd_structure.single_line_objects,
+        'objects': entries,
+    }, separators=(",", ":")).encode("utf-8")
+    return b"".join([_PREFIX.pack(SHARED_IDD_MAGIC, SHARED_IDD_FORMAT_VERSION, len(header)), header] + records)
+
+
+class SharedIDDStructure(IDDStructure):
+    """
+    A read-only IDD structure backed by a buffer holding the encoding from encode_idd, usually a shared memory segment
+    attached with attach_idd.  Only the small header is decoded up front.  Each object is decoded from its record the
+    first time it is looked up and kept afterwards, so a worker only pays, in time and memory, for the object types it
+    actually uses, while the encoded IDD itself exists once for all processes.
+
+    Lookups by type, canonical names and object metadata queries work from the header.  Reading the groups decodes
+    every object, which is meant for code that walks the whole IDD.  Decoded objects are ordinary IDDObject instances
+    private to this process; changing them does not change the buffer or other processes.
+
+    Constructor parameters:
+
+    :param buffer: A bytes-like object holding an encoded IDD
+    :raises ProcessingException: if the buffer does not hold an encoded IDD of a supported format
+    """
+
+    def __init__(self, buffer):
+        if len(buffer) < _PREFIX.size:
+            raise exceptions.ProcessingException("Buffer is too short to hold a shared IDD")
+        magic, format_version, header_length = _PREFIX.unpack_from(buffer, 0)
+        if magic != SHARED_IDD_MAGIC or format_version != SHARED_IDD_FORMAT_VERSION:
+            raise exceptions.ProcessingException("Buffer does not hold a shared IDD of a supported format")
+        header = json.loads(bytes(buffer[_PREFIX.size:_PREFIX.size + header_length]).decode("utf-8"))
+        self._buffer = buffer
+        self._records_start = _PREFIX.size + header_length
+        self.file_path = header['file_path']
+        self.version_string = header['version_string']
+        self.build_string = header['build_string']
+        self.version_float = idd_version_float(self.version_string)
+        self.single_line_objects = header['single_line_objects']
+        self._group_names = header['groups']
+        self._entries = {}
+        for entry in header['objects']:
+            self._entries.setdefault(entry[0].upper(), entry)
+        self._single_line_index = {name.upper(): name for name in self.single_line_objects}
+        self._decoded = {}
+        self._groups = None
+
+    @property
+    def num_decoded_objects(self):
+        """
+        :return: The number of objects decoded so far by this view
+        """
+        return len(self._decoded)
+
+    def _decode(self, entry):
+        """
+        Internal worker that returns the object of an index entry, decoding its record the first time.
+        """
+        key = entry[0].upper()
+        idd_object = self._decoded.get(key)
+        if idd_object is None:
+            _, _, offset, length, _ = entry
+            start = self._records_start + offset
+            meta_data, fields = json.loads(bytes(self._buffer[start:start + length]).decode("utf-8"))
+            idd_object = IDDObject(entry[0])
+            idd_object.meta_data = meta_data
+            for an_index, field_name, field_meta_data in fields:
+                idd_field = IDDField(an_index)
+                idd_field.field_name = field_name
+                idd_field.meta_data = field_meta_data
+                idd_object.fields.append(idd_field)
+            self._decoded[key] = idd_object
+        return idd_object
+
+    @property
+    def groups(self):
+        """
+        :return: The list of IDDGroup instances, with every object decoded
+        """
+        if self._groups is None:
+            groups = [None if name is None else IDDGroup(name) for name in self._group_names]
+            for entry in self._entries.values():
+                groups[entry[1]].objects.append(self._decode(entry))
+            self._groups = groups
+        return self._groups
+
+    def get_object_by_type(self, type_to_get):
+        """
+        Given a type name, this returns the IDD object instance, decoding it if needed, or a single string if it is a
+        single-line object
+
+        :param type_to_get: The name of the object to get, case-insensitive
+        :return: The IDDObject instance, the name of a single-line object, or None if the type is not found
+        """
+        key = type_to_get.upper()
+        entry = self._entries.get(key)
+        if entry is not None:
+            return self._decode(entry)
+        return self._single_line_index.get(key)
+
+    def get_canonical_object_name(self, type_to_get):
+        """
+        Given a type name in any case, this returns the object type exactly as it is spelled in the IDD, without
+        decoding the object.
+
+        :param type_to_get: The name of the object to look up, case-insensitive
+        :return: The IDD spelling of the object type, or None if the type is not found in this IDD
+        """
+        key = type_to_get.upper()
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry[0]
+        return self._single_line_index.get(key)
+
+    def get_objects_with_meta_data(self, meta_data):
+        """
+        Given an object-level metadata string (\\required-object, e.g.), this returns objects that contain that
+        metadata, decoding only those objects
+
+        :param meta_data: An object-level metadata string, such as \\required-object
+        :return: A list of IDDObjects that contain this metadata
+        """
+        return [self._decode(entry) for entry in self._entries.values() if meta_data in entry[4]]
+
+
+def publish_idd(idd_structure, name=None):
+    """
+    Publishes an IDD structure into a new shared memory segment, for worker processes to attach to with attach_idd.
+    The caller owns the segment: it should be kept until the workers are done, then closed and unlinked.
+
+    :param IDDStructure idd_structure: The IDD structure to publish
+    :param str name: An optional name for the segment; by default the system picks a unique name
+    :return: The multiprocessing.shared_memory.SharedMemory instance; pass its name to the workers
+    """
+    data = encode_idd(idd_structure)
+    segment = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+    segment.buf[:len(data)] = data
+    module_logger.debug("Published IDD {} into shared memory {} ({} bytes)".format(
+        idd_structure.version_string, segment.name, len(data)))
+    return segment
+
+
+def _open_segment(name):
+    """
+    Internal worker that attaches to an existing segment.  Where the Python version allows it, the segment is not
+    registered with the resource tracker, since only the publisher should unlink it.  Older versions always register
+    it; processes started by the publisher, such as a multiprocessing pool, share its resource tracker, so that is
+    harmless there.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def attach_idd(name):
+    """
+    Attaches to an IDD published with publish_idd and returns a read-only view of it.  A process attaches to each
+    segment once; later calls with the same name return the same view, so this can be called from every task run by a
+    pool worker.
+
+    :param str name: The name of the shared memory segment
+    :return: A SharedIDDStructure instance
+    :raises FileNotFoundError: if there is no segment with that name
+    :raises ProcessingException: if the segment does not hold a shared IDD
+    """
+    attached = _ATTACHED.get(name)
+    if attached is None:
+        segment = _open_segment(name)
+        try:
+            attached = (segment, SharedIDDStructure(segment.buf))
+        except exceptions.ProcessingException:
+            segment.close()
+            raise
+        _ATTACHED[name] = attached
+    return attached[1]
+
+
+def detach_idd(name):
+    """
+    Drops this process's view of a published IDD and closes its handle on the segment.  Objects already decoded from
+    the view stay usable, but the view itself must not be used afterwards.
+
+    :param str name: The name of the shared memory segment
+    :return: None
+    """
+    attached = _ATTACHED.pop(name, None)
+    if attached is not None:
+        segment, view = attached
+        view._buffer = None
+        segment.close()
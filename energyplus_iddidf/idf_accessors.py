@@ -0,0 +1,346 @@
+import keyword
+import re
+
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_objects import IDDField, IDDObject, normalize_field_name
+from energyplus_iddidf.idf_objects import AUTOCALCULATE, AUTOSIZE, BLANK
+
+
+class IDFAccessor:
+    """
+    The base class of the generated accessor classes, see AccessorFactory.  An accessor wraps one IDFObject and reads
+    and writes the object's own field list, so wrapping copies nothing and changes made through either one are seen
+    by the other.  Each generated class adds one property per IDD field, named after the field in the form of
+    normalize_field_name, such as surface.vertex_1_x_coordinate.  Numeric (N) fields are returned as typed values from
+    the object's cached typed view (see IDFObject.typed_value), alpha fields as strings, and fields the object does
+    not have as BLANK or an empty string.
+
+    Assigning to a property writes the field, adding blank fields first if the object is shorter.  Numbers are
+    written with repr, and AUTOSIZE, AUTOCALCULATE and BLANK as Autosize, Autocalculate and a blank field.
+
+    :ivar str object_type: The IDD spelling of the object type of the class
+    :ivar tuple field_names: The property names of the class, in field order
+    :ivar frozenset numeric_indices: The indices of the fields with properties that are numeric
+    :ivar int first_extensible_index: The index of the first field of the first extensible group, or None
+    :ivar tuple extensible_numeric: One flag per field of an extensible group, True for numeric fields
+    :ivar IDDObject idd_object: The IDD object the typed values are read with.  Classes from AccessorFactory use the
+                                IDD object of their type, so accessors, validation and other readers of the same IDD
+                                share one cached typed view per IDF object.  Classes from a written module build an
+                                equivalent IDD object from the class attributes the first time it is needed.
+
+    Constructor parameters:
+
+    :param IDFObject idf_object: The IDF object to wrap, whose type must match the class
+    """
+
+    __slots__ = ('_object',)
+
+    object_type = None
+    field_names = ()
+    numeric_indices = frozenset()
+    first_extensible_index = None
+    extensible_numeric = ()
+    _idd_object = None
+
+    def __init__(self, idf_object):
+        # make sure a lazy object has been split, so the generated properties can read the field list directly
+        idf_object.fields
+        self._object = idf_object
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, self._object.instance_name)
+
+    @property
+    def idf_object(self):
+        """
+        :return: The wrapped IDFObject
+        """
+        return self._object
+
+    @property
+    def idd_object(self):
+        """
+        :return: The IDD object the typed values are read with
+        """
+        accessor_class = type(self)
+        idd_object = accessor_class._idd_object
+        if idd_object is None:
+            idd_object = _idd_object_from_class(accessor_class)
+            accessor_class._idd_object = idd_object
+        return idd_object
+
+    def _set(self, index, value):
+        """
+        Internal worker used by the generated property setters.
+        """
+        if value is AUTOSIZE:
+            value = "Autosize"
+        elif value is AUTOCALCULATE:
+            value = "Autocalculate"
+        elif value is BLANK or value is None:
+            value = ""
+        elif isinstance(value, float):
+            value = repr(value)
+        elif not isinstance(value, str):
+            value = str(value)
+        fields = self._object.fields
+        if index >= len(fields):
+            fields.extend([""] * (index + 1 - len(fields)))
+        fields[index] = value
+
+    def extensible_groups(self):
+        """
+        Returns the typed values of every extensible group of the object, including groups past those that have
+        properties.
+
+        :return: A list of tuples, one per extensible group, or an empty list if the type is not extensible
+        """
+        if self.first_extensible_index is None:
+            return []
+        typed = self._object.typed_fields(self.idd_object)
+        group_size = len(self.extensible_numeric)
+        return [typed[start:start + group_size] for start in range(self.first_extensible_index, len(typed), group_size)]
+
+
+_RESERVED_NAMES = {name for name in dir(IDFAccessor) if not name.startswith("__")}
+
+
+def _idd_object_from_class(accessor_class):
+    """
+    Internal worker that builds an IDD object with the field types and extensible group of an accessor class, for
+    classes from a written module, which are not tied to a processed IDD.
+    """
+    idd_object = IDDObject(accessor_class.object_type)
+    counts = {'A': 0, 'N': 0}
+    for index, field_name in enumerate(accessor_class.field_names):
+        letter = 'N' if index in accessor_class.numeric_indices else 'A'
+        counts[letter] += 1
+        idd_field = IDDField("{}{}".format(letter, counts[letter]))
+        idd_field.field_name = field_name
+        if index == accessor_class.first_extensible_index:
+            idd_field.meta_data["\\begin-extensible"] = [""]
+        idd_object.fields.append(idd_field)
+    if accessor_class.first_extensible_index is not None:
+        idd_object.meta_data["\\extensible"] = [":{}".format(len(accessor_class.extensible_numeric))]
+    return idd_object
+
+
+def accessor_class_name(object_type):
+    """
+    Converts an object type into a Python class name; BuildingSurface:Detailed becomes BuildingSurface_Detailed.
+
+    :param str object_type: The IDD object type
+    :return: The class name
+    """
+    class_name = re.sub(r"[^0-9A-Za-z]+", "_", object_type).strip("_")
+    if not class_name or class_name[0].isdigit():
+        class_name = "Object_" + class_name
+    return class_name
+
+
+def _attribute_names(idd_object, num_fields):
+    """
+    Internal worker that chooses a property name for each of the first num_fields fields of an IDD object, which must
+    be valid identifiers, must not hide the base class members, and must be unique within the class.
+    """
+    names = []
+    used = set()
+    for index in range(num_fields):
+        name = normalize_field_name(idd_object.field_name_for_index(index) or "")
+        if not name:
+            name = "field_{}".format(index + 1)
+        if name[0].isdigit() or keyword.iskeyword(name) or name in _RESERVED_NAMES:
+            name = "field_" + name
+        unique_name = name
+        occurrence = 1
+        while unique_name in used:
+            occurrence += 1
+            unique_name = "{}_{}".format(name, occurrence)
+        used.add(unique_name)
+        names.append(unique_name)
+    return names
+
+
+def accessor_class_source(idd_object, class_name=None, max_extensible_groups=4):
+    """
+    Generates the Python source of the accessor class of one IDD object.  Properties are generated for the regular
+    fields and the first max_extensible_groups extensible groups; IDDs list up to thousands of extensible fields
+    (Schedule:Compact), and the remaining groups are available through IDFAccessor.extensible_groups.
+
+    :param IDDObject idd_object: The IDD object
+    :param str class_name: The class name, by default from accessor_class_name
+    :param int max_extensible_groups: The number of extensible groups that get properties
+    :return: The source of the class, which needs IDFAccessor and BLANK in its namespace
+    """
+    class_name = class_name or accessor_class_name(idd_object.name)
+    first_extensible = idd_object.first_extensible_field_index()
+    group_size = idd_object.extensible_group_size()
+    if first_extensible is None or first_extensible + group_size > len(idd_object.fields):
+        first_extensible, group_size = None, 0
+        num_fields = len(idd_object.fields)
+    else:
+        num_fields = first_extensible + group_size * max_extensible_groups
+    names = _attribute_names(idd_object, num_fields)
+    numeric = [idd_object.field_for_index(i).field_an_index[0] == "N" for i in range(num_fields)]
+    lines = [
+        "class {}(IDFAccessor):".format(class_name),
+        "    __slots__ = ()",
+        "    object_type = {!r}".format(idd_object.name),
+        "    field_names = ({})".format("".join("{!r}, ".format(name) for name in names)),
+        "    numeric_indices = frozenset([{}])".format(", ".join(str(i) for i, n in enumerate(numeric) if n)),
+        "    first_extensible_index = {!r}".format(first_extensible),
+        "    extensible_numeric = ({})".format("".join(
+            "{!r}, ".format(numeric[first_extensible + i]) for i in range(group_size))),
+    ]
+    for index, name in enumerate(names):
+        if numeric[index]:
+            getter, missing = "self._object.typed_value({}, self.idd_object)".format(index), "BLANK"
+        else:
+            getter, missing = "self._object.fields[{}]".format(index), "\"\""
+        lines.extend([
+            "",
+            "    @property",
+            "    def {}(self):".format(name),
+            "        try:",
+            "            return {}".format(getter),
+            "        except IndexError:",
+            "            return {}".format(missing),
+            "",
+            "    @{}.setter".format(name),
+            "    def {}(self, value):".format(name),
+            "        self._set({}, value)".format(index),
+        ])
+    return "\n".join(lines) + "\n"
+
+
+def _full_objects(idd_structure, object_types):
+    if object_types is None:
+        return [o for g in idd_structure.groups if g is not None for o in g.objects]
+    idd_objects = []
+    for object_type in object_types:
+        idd_object = idd_structure.get_object_by_type(object_type)
+        if idd_object is None or isinstance(idd_object, str):
+            raise ProcessingException("No accessor can be generated for a type without IDD fields",
+                                      object_name=object_type)
+        idd_objects.append(idd_object)
+    return idd_objects
+
+
+def accessor_module_source(idd_structure, object_types=None, max_extensible_groups=4):
+    """
+    Generates the source of a Python module holding the accessor classes of an IDD, for projects that want to import
+    the classes of a specific IDD version rather than generating them at run time.  Besides the classes, the module
+    defines IDD_VERSION, ACCESSOR_CLASSES (upper case object type to class) and a wrap(idf_object) function.
+
+    :param IDDStructure idd_structure: The IDD structure
+    :param object_types: An optional iterable of object types to limit the module to
+    :param int max_extensible_groups: The number of extensible groups that get properties
+    :return: The source of the module
+    :raises ProcessingException: if one of the object types is not a full object in the IDD
+    """
+    parts = [
+        "\"\"\"",
+        "Accessor classes for IDD version {}, generated by energyplus_iddidf.idf_accessors.".format(
+            idd_structure.version_string),
+        "\"\"\"",
+        "from energyplus_iddidf.idf_accessors import IDFAccessor",
+        "from energyplus_iddidf.idf_objects import BLANK",
+        "",
+        "IDD_VERSION = {!r}".format(idd_structure.version_string),
+    ]
+    registry = {}
+    used_class_names = set()
+    for idd_object in _full_objects(idd_structure, object_types):
+        if idd_object.name.upper() in registry:
+            continue
+        class_name = accessor_class_name(idd_object.name)
+        while class_name in used_class_names:
+            class_name += "_"
+        used_class_names.add(class_name)
+        registry[idd_object.name.upper()] = class_name
+        parts.extend(["", "", accessor_class_source(idd_object, class_name, max_extensible_groups).rstrip("\n")])
+    parts.extend(["", "", "ACCESSOR_CLASSES = {"])
+    parts.extend("    {!r}: {},".format(key, class_name) for key, class_name in registry.items())
+    parts.extend([
+        "}",
+        "",
+        "",
+        "def wrap(idf_object):",
+        "    return ACCESSOR_CLASSES[idf_object.object_name.upper()](idf_object)",
+    ])
+    return "\n".join(parts) + "\n"
+
+
+def write_accessor_module(idd_structure, module_path, object_types=None, max_extensible_groups=4):
+    """
+    Writes the module generated by accessor_module_source to a file.
+
+    :param IDDStructure idd_structure: The IDD structure
+    :param str module_path: The path of the .py file to write
+    :param object_types: An optional iterable of object types to limit the module to
+    :param int max_extensible_groups: The number of extensible groups that get properties
+    :return: None
+    """
+    source = accessor_module_source(idd_structure, object_types, max_extensible_groups)
+    with open(module_path, "w") as f:
+        f.write(source)
+
+
+class AccessorFactory:
+    """
+    This class generates accessor classes (see IDFAccessor) at run time.  The class of a type is generated from the
+    same source as accessor_module_source writes, the first time the type is needed, and then reused, so only the types
+    a program actually touches are generated.
+
+    Constructor parameters:
+
+    :param IDDStructure idd_structure: The IDD structure describing the objects to wrap
+    :param int max_extensible_groups: The number of extensible groups that get properties
+    """
+
+    def __init__(self, idd_structure, max_extensible_groups=4):
+        self.idd_structure = idd_structure
+        self.max_extensible_groups = max_extensible_groups
+        self._classes = {}
+
+    def class_for_type(self, object_type):
+        """
+        Returns the accessor class of an object type, generating it if needed.
+
+        :param str object_type: The object type, case-insensitive
+        :return: A subclass of IDFAccessor
+        :raises ProcessingException: if the type is not a full object in the IDD
+        """
+        key = object_type.upper()
+        accessor_class = self._classes.get(key)
+        if accessor_class is None:
+            idd_object = _full_objects(self.idd_structure, [object_type])[0]
+            class_name = accessor_class_name(idd_object.name)
+            namespace = {'IDFAccessor': IDFAccessor, 'BLANK': BLANK}
+            exec(accessor_class_source(idd_object, class_name, self.max_extensible_groups), namespace)
+            accessor_class = namespace[class_name]
+            accessor_class._idd_object = idd_object
+            self._classes[key] = accessor_class
+        return accessor_class
+
+    def wrap(self, idf_object):
+        """
+        Wraps an IDF object in the accessor class of its type, without copying its fields.
+
+        :param IDFObject idf_object: The IDF object
+        :return: An IDFAccessor instance
+        :raises ProcessingException: if the type is not a full object in the IDD
+        """
+        return self.class_for_type(idf_object.object_name)(idf_object)
+
+    def wrap_objects(self, idf_objects):
+        """
+        Wraps IDF objects, skipping comment blocks.
+
+        :param idf_objects: An iterable of IDFObject instances, such as an IDFStructure's objects
+        :return: A generator of IDFAccessor instances
+        :raises ProcessingException: if a type is not a full object in the IDD
+        """
+        for idf_object in idf_objects:
+            if not idf_object.comment:
+                yield self.wrap(idf_object)
@@ -0,0 +1,178 @@
+from collections import OrderedDict
+import csv
+import logging
+import os
+import re
+
+from energyplus_iddidf import exceptions
+from energyplus_iddidf.idf_processor import IDFProcessor
+
+module_logger = logging.getLogger("eptransition.idf.csv")
+
+SOURCE_FILE_COLUMN = "source_file"
+
+
+def csv_file_name(object_type):
+    """
+    Converts an object type into a file system friendly CSV file name; BuildingSurface:Detailed becomes
+    BuildingSurface_Detailed.csv.
+
+    :param str object_type: The IDD object type
+    :return: The CSV file name, without a directory
+    """
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', object_type) + ".csv"
+
+
+class IDFCSVExporter:
+    """
+    This class writes the objects of one or many IDF files into one CSV file per object type, such as Material.csv
+    holding every Material object of every input file.  Each input file is streamed through the IDF object iterator, so
+    only one object is held in memory at a time regardless of the size of the files.
+
+    Each CSV file starts with a header of source_file followed by the IDD field names of the type, and each row holds
+    the path of the input file followed by the object fields.  Objects with more fields than the IDD lists, which
+    happens for extensible objects, simply have longer rows.  Types the IDD does not know get generic Field 1, Field 2,
+    ... headers sized from the first object found.  Comment blocks are not exported.
+
+    A model library can touch hundreds of object types, so at most max_open_files CSV files are kept open.  When another
+    file is needed the least recently used one is closed, and it is reopened for appending if it is needed again.  CSV
+    files from an earlier export into the same directory are overwritten the first time this exporter writes each type.
+
+    Constructor parameters:
+
+    :param str output_dir: The directory to write CSV files into; it is created if it does not exist
+    :param IDDStructure idd_structure: The IDD describing the input files, used for headers and type spellings
+    :param int max_open_files: The maximum number of CSV files to keep open at once
+    """
+
+    def __init__(self, output_dir, idd_structure, max_open_files=32):
+        if max_open_files < 1:
+            raise ValueError("IDFCSVExporter must be able to keep at least one file open")
+        self.output_dir = output_dir
+        self.idd_structure = idd_structure
+        self.max_open_files = max_open_files
+        self.row_counts = {}
+        self._open_files = OrderedDict()
+        self._file_paths = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Closes every CSV file that is still open.  The exporter can still be used afterwards, files are reopened for
+        appending as needed.
+
+        :return: None
+        """
+        while self._open_files:
+            _, (handle, _) = self._open_files.popitem(last=False)
+            handle.close()
+
+    @property
+    def file_paths(self):
+        """
+        :return: A dictionary of object type to the path of the CSV file written for it
+        """
+        return dict(self._file_paths)
+
+    def _header(self, object_type, num_fields):
+        """
+        Internal worker that builds the CSV header for an object type.
+        """
+        idd_object = self.idd_structure.get_object_by_type(object_type)
+        if idd_object is None or isinstance(idd_object, str):
+            field_names = ["Field {}".format(i + 1) for i in range(num_fields)]
+        else:
+            field_names = [f.field_name or f.field_an_index for f in idd_object.fields]
+        return [SOURCE_FILE_COLUMN] + field_names
+
+    def _writer_for_type(self, object_type, num_fields):
+        """
+        Internal worker that returns the CSV writer for an object type, opening (or reopening) its file if needed and
+        closing the least recently used file if too many are open.
+        """
+        if object_type in self._open_files:
+            self._open_files.move_to_end(object_type)
+            return self._open_files[object_type][1]
+        if object_type in self._file_paths:
+            handle = open(self._file_paths[object_type], "a", newline="")
+            writer = csv.writer(handle)
+        else:
+            file_path = os.path.join(self.output_dir, csv_file_name(object_type))
+            if file_path in self._file_paths.values():
+                raise exceptions.ProcessingException(
+                    "Two object types map to the same CSV file name", object_name=object_type)
+            self._file_paths[object_type] = file_path
+            handle = open(file_path, "w", newline="")
+            writer = csv.writer(handle)
+            writer.writerow(self._header(object_type, num_fields))
+        self._open_files[object_type] = (handle, writer)
+        while len(self._open_files) > self.max_open_files:
+            _, (released, _) = self._open_files.popitem(last=False)
+            released.close()
+        return writer
+
+    def export_objects(self, idf_objects, source_file):
+        """
+        Appends IDF objects to the CSV files of their types.
+
+        :param idf_objects: An iterable of IDFObject instances, such as the IDF object iterator of an IDFProcessor
+        :param str source_file: The value written in the source_file column of every row
+        :return: The number of rows written
+        """
+        num_rows = 0
+        for idf_object in idf_objects:
+            if idf_object.comment:
+                continue
+            fields = idf_object.fields
+            object_type = self.idd_structure.get_canonical_object_name(idf_object.object_name) or \
+                idf_object.object_name
+            self._writer_for_type(object_type, len(fields)).writerow([source_file] + list(fields))
+            self.row_counts[object_type] = self.row_counts.get(object_type, 0) + 1
+            num_rows += 1
+        return num_rows
+
+    def export_file(self, idf_path):
+        """
+        Streams one IDF file into the CSV files.
+
+        :param str idf_path: The path to an IDF file on disk
+        :return: The number of rows written
+        :raises ProcessingException: if the file does not exist or cannot be processed
+        """
+        processor = IDFProcessor(idd_structure=self.idd_structure)
+        return self.export_objects(processor.iterate_objects_given_file_path(idf_path), idf_path)
+
+    def export_files(self, idf_paths):
+        """
+        Streams several IDF files into the CSV files, one after the other.
+
+        :param idf_paths: An iterable of paths to IDF files
+        :return: The number of rows written
+        :raises ProcessingException: if a file does not exist or cannot be processed
+        """
+        num_rows = 0
+        for idf_path in idf_paths:
+            module_logger.debug("Exporting {} to CSV".format(idf_path))
+            num_rows += self.export_file(idf_path)
+        return num_rows
+
+
+def export_idf_files_to_csv(idf_paths, output_dir, idd_structure, max_open_files=32):
+    """
+    Streams IDF files into one CSV file per object type, see IDFCSVExporter.
+
+    :param idf_paths: An iterable of paths to IDF files
+    :param str output_dir: The directory to write CSV files into
+    :param IDDStructure idd_structure: The IDD describing the input files
+    :param int max_open_files: The maximum number of CSV files to keep open at once
+    :return: A dictionary of object type to the number of rows written for it
+    """
+    with IDFCSVExporter(output_dir, idd_structure, max_open_files) as exporter:
+        exporter.export_files(idf_paths)
+        return dict(exporter.row_counts)
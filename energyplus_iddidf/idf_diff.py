@@ -0,0 +1,201 @@
+from energyplus_iddidf.idf_processor import IDFProcessor
+
+
+class FieldChange:
+    """
+    A single changed field of an IDF object.
+
+    :ivar int index: The zero-based index of the field, not counting the object type
+    :ivar str field_name: The IDD field name, numbered for extensible groups past the fields listed in the IDD, or None
+                          if no IDD was used or the IDD does not describe the field
+    :ivar str old_value: The value in the old model, blank if the field was not present
+    :ivar str new_value: The value in the new model, blank if the field was not present
+    """
+
+    __slots__ = ('index', 'field_name', 'old_value', 'new_value')
+
+    def __init__(self, index, field_name, old_value, new_value):
+        self.index = index
+        self.field_name = field_name
+        self.old_value = old_value
+        self.new_value = new_value
+
+    def to_dict(self):
+        """
+        :return: A JSON serializable dictionary describing this change
+        """
+        return {'index': self.index, 'field_name': self.field_name, 'old': self.old_value, 'new': self.new_value}
+
+
+class ObjectChange:
+    """
+    An IDF object found in both models, matched by type and name, whose content differs.
+
+    :ivar str object_type: The object type, as spelled in the new model
+    :ivar str name: The object name (first field), or None for types that are not named
+    :ivar IDFObject old_object: The object in the old model
+    :ivar IDFObject new_object: The object in the new model
+    :ivar [FieldChange] field_changes: The changed fields, in field order
+    """
+
+    __slots__ = ('object_type', 'name', 'old_object', 'new_object', 'field_changes')
+
+    def __init__(self, object_type, name, old_object, new_object, field_changes):
+        self.object_type = object_type
+        self.name = name
+        self.old_object = old_object
+        self.new_object = new_object
+        self.field_changes = field_changes
+
+    def to_dict(self):
+        """
+        :return: A JSON serializable dictionary describing this change
+        """
+        return {
+            'type': self.object_type, 'name': self.name, 'fields': [c.to_dict() for c in self.field_changes]
+        }
+
+
+def _object_summary(idf_object):
+    return {'type': idf_object.object_name, 'fields': list(idf_object.fields)}
+
+
+class IDFDiff:
+    """
+    The structural differences between two IDF models.
+
+    :ivar [IDFObject] added: Objects only found in the new model
+    :ivar [IDFObject] removed: Objects only found in the old model
+    :ivar [ObjectChange] changed: Objects found in both models with different content
+    """
+
+    def __init__(self, added, removed, changed):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    @property
+    def is_empty(self):
+        """
+        :return: True if the two models have the same content
+        """
+        return not (self.added or self.removed or self.changed)
+
+    def to_dict(self):
+        """
+        :return: A JSON serializable dictionary describing every difference, with a summary of counts
+        """
+        return {
+            'summary': {'added': len(self.added), 'removed': len(self.removed), 'changed': len(self.changed)},
+            'added': [_object_summary(o) for o in self.added],
+            'removed': [_object_summary(o) for o in self.removed],
+            'changed': [c.to_dict() for c in self.changed],
+        }
+
+
+def _normalized_fields(idf_object):
+    values = [f.strip() for f in idf_object.fields]
+    while values and values[-1] == "":
+        values.pop()
+    return values
+
+
+class IDFDiffer:
+    """
+    This class compares two IDF models structurally.  Objects with identical content are paired off first using
+    their canonical hashes (see IDFObject.canonical_hash), so unchanged objects, however they are formatted or ordered,
+    cost one hash lookup each.  The remaining objects are matched by type and name (the first field) through a
+    dictionary, and matched pairs are compared field by field.  The whole comparison takes time roughly linear in the
+    size of the models.
+
+    Without an IDD every object is matched on its first field.  With an IDD, types whose first field is not a name
+    (such as Output:Variable) are matched by their order of appearance instead, and field changes report the IDD field
+    names.  Comment blocks are ignored.
+
+    Constructor parameters:
+
+    :param IDDStructure idd_structure: An optional IDD structure describing both models
+    """
+
+    def __init__(self, idd_structure=None):
+        self.idd_structure = idd_structure
+        self._named_types = {}
+
+    def _idd_object(self, object_type):
+        if self.idd_structure is None:
+            return None
+        idd_object = self.idd_structure.get_object_by_type(object_type)
+        return None if isinstance(idd_object, str) else idd_object
+
+    def _is_named(self, object_type):
+        upper_type = object_type.upper()
+        if upper_type not in self._named_types:
+            idd_object = self._idd_object(object_type)
+            self._named_types[upper_type] = True if self.idd_structure is None or idd_object is None else \
+                idd_object.has_name_field()
+        return self._named_types[upper_type]
+
+    def _keyed_objects(self, idf_objects):
+        """
+        Internal worker that keys objects on upper case type, upper case name (or None), and the occurrence count of
+        that type and name, so repeated objects are matched in order.
+        """
+        keyed = {}
+        occurrences = {}
+        for idf_object in idf_objects:
+            name = idf_object.instance_name.upper() if self._is_named(idf_object.object_name) else None
+            partial_key = (idf_object.object_name.upper(), name)
+            occurrence = occurrences.get(partial_key, 0)
+            occurrences[partial_key] = occurrence + 1
+            keyed[partial_key + (occurrence,)] = idf_object
+        return keyed
+
+    def _field_changes(self, old_object, new_object):
+        old_values = _normalized_fields(old_object)
+        new_values = _normalized_fields(new_object)
+        idd_object = self._idd_object(new_object.object_name)
+        changes = []
+        for index in range(max(len(old_values), len(new_values))):
+            old_value = old_values[index] if index < len(old_values) else ""
+            new_value = new_values[index] if index < len(new_values) else ""
+            if old_value != new_value:
+                field_name = None if idd_object is None else idd_object.field_name_for_index(index)
+                changes.append(FieldChange(index, field_name, old_value, new_value))
+        return changes
+
+    def diff(self, old_structure, new_structure):
+        """
+        This worker compares two IDF structures.
+
+        :param IDFStructure old_structure: The baseline model
+        :param IDFStructure new_structure: The modified model
+        :return: An IDFDiff describing the differences
+        """
+        removed_candidates, added_candidates = old_structure.hash_difference(new_structure)
+        old_keyed = self._keyed_objects(removed_candidates)
+        new_keyed = self._keyed_objects(added_candidates)
+        changed = []
+        removed = []
+        for key, old_object in old_keyed.items():
+            new_object = new_keyed.pop(key, None)
+            if new_object is None:
+                removed.append(old_object)
+            else:
+                changed.append(ObjectChange(
+                    new_object.object_name, new_object.instance_name if key[1] is not None else None,
+                    old_object, new_object, self._field_changes(old_object, new_object)
+                ))
+        return IDFDiff(list(new_keyed.values()), removed, changed)
+
+    def diff_files(self, old_path, new_path):
+        """
+        This worker processes and compares two IDF files.
+
+        :param str old_path: The path to the baseline IDF
+        :param str new_path: The path to the modified IDF
+        :return: An IDFDiff describing the differences
+        :raises ProcessingException: if either file does not exist or cannot be processed
+        """
+        old_structure = IDFProcessor(idd_structure=self.idd_structure).process_file_given_file_path(old_path)
+        new_structure = IDFProcessor(idd_structure=self.idd_structure).process_file_given_file_path(new_path)
+        return self.diff(old_structure, new_structure)
@@ -1,5 +1,10 @@
+from collections import Counter
+import hashlib
 import logging
 
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_objects import RevisionList
+
 module_logger = logging.getLogger("eptransition.idd.processor")
 
 
@@ -17,6 +22,8 @@ class ValidationIssue:
     WARNING = 1
     ERROR = 2
 
+    __slots__ = ('object_name', 'severity', 'message', 'field_name')
+
     def __init__(self, object_name, severity, message, field_name=None):
         self.object_name = object_name
         self.severity = severity
@@ -48,6 +55,62 @@ class ValidationIssue:
         return msg
 
 
+class NumericSentinel:
+    """
+    A marker value returned by the typed view of an IDF object for numeric fields that do not hold a number.  The
+    module level AUTOSIZE, AUTOCALCULATE and BLANK instances are the only ones that should exist, so they can be
+    compared by identity.
+
+    :param str name: A descriptive name for this sentinel, used when printing
+    """
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+AUTOSIZE = NumericSentinel("AUTOSIZE")
+AUTOCALCULATE = NumericSentinel("AUTOCALCULATE")
+BLANK = NumericSentinel("BLANK")
+
+
+def parse_numeric_field(value):
+    """
+    Converts a single IDF field string from a numeric (N) field into its typed value.
+
+    :param str value: The raw field string
+    :return: A float for a number, AUTOSIZE, AUTOCALCULATE or BLANK for those special values, or the original string
+             if the value cannot be interpreted as numeric
+    """
+    stripped = value.strip()
+    if not stripped:
+        return BLANK
+    try:
+        return float(stripped)
+    except ValueError:
+        upper_value = stripped.upper()
+        if upper_value == "AUTOSIZE":
+            return AUTOSIZE
+        elif upper_value == "AUTOCALCULATE":
+            return AUTOCALCULATE
+        return value
+
+
+class FieldList(RevisionList):
+    """
+    A list of IDF field strings that counts its own modifications.  Any change made through the list methods bumps
+    the revision number, which lets IDF objects know when values they have derived from the fields are stale.
+
+    :ivar int revision: A counter incremented on every modification of the list
+    """
+
+    __slots__ = ()
+
+
 class IDFObject(object):
     """
     This class defines a single IDF object.  An IDF object is either a comma/semicolon delimited list of actual
@@ -57,7 +120,11 @@ class IDFObject(object):
     Relevant members are listed here:
 
     :ivar str object_name: IDD Type, or name, of this object
-    :ivar [str] fields: A list of strings, one per field, found for this object in the IDF file
+    :ivar FieldList fields: A list of strings, one per field, found for this object in the IDF file; assigning a plain
+                            list converts it into a FieldList
+
+    Large models hold hundreds of thousands of these, so the class uses __slots__ rather than a per-instance
+    dictionary; arbitrary attributes cannot be attached to instances.
 
     Constructor parameters:
 
@@ -66,8 +133,12 @@ class IDFObject(object):
                               indicating it is meaningful IDF data.
     """
 
+    __slots__ = ('comment', 'object_name', '_fields', '_raw_text', '_typed_cache', '_hash_cache', '_idd_object')
+
     def __init__(self, tokens, comment_blob=False):
         self.comment = comment_blob
+        self._raw_text = None
+        self._idd_object = None
         if comment_blob:
             self.object_name = "COMMENT"
             self.fields = tokens
@@ -75,9 +146,195 @@ class IDFObject(object):
             self.object_name = tokens[0]
             self.fields = tokens[1:]
 
+    @staticmethod
+    def from_raw_text(object_name, raw_text):
+        """
+        This function creates a lazy IDF object, which keeps the raw text of the object and only splits it into fields
+        the first time the fields are accessed.  This keeps type based queries cheap on very large files.
+
+        :param str object_name: The object type, already stripped
+        :param str raw_text: The comment-free text of the object, starting with the object type and with fields
+                             separated by commas, but without the terminating semicolon
+        :return: An IDFObject instance
+        """
+        obj = IDFObject.__new__(IDFObject)
+        obj.comment = False
+        obj.object_name = object_name
+        obj._fields = None
+        obj._raw_text = raw_text
+        obj._typed_cache = None
+        obj._hash_cache = None
+        obj._idd_object = None
+        return obj
+
+    @property
+    def fields(self):
+        if self._fields is None:
+            self._fields = FieldList([t.strip() for t in self._raw_text.split(",")][1:])
+            self._raw_text = None
+        return self._fields
+
+    @fields.setter
+    def fields(self, values):
+        self._fields = values if isinstance(values, FieldList) else FieldList(values)
+        self._raw_text = None
+        self._typed_cache = None
+        self._hash_cache = None
+
+    @property
+    def is_split(self):
+        """
+        :return: False if this is a lazy object whose fields have not been accessed yet, otherwise True
+        """
+        return self._fields is not None
+
+    @property
+    def num_fields(self):
+        """
+        :return: The number of fields, or of lines for comment blocks; on a lazy object the fields are counted in the
+                 raw text, so the object is not split into fields
+        """
+        if self._fields is None:
+            return self._raw_text.count(",")
+        return len(self._fields)
+
+    @property
+    def instance_name(self):
+        """
+        The first field of the object, which by EnergyPlus convention holds the name of most object instances.  On a
+        lazy object this only looks at the start of the raw text, so the object is not split into fields.
+
+        :return: The first field value, an empty string if there are no fields, or None for comment blocks
+        """
+        if self.comment:
+            return None
+        if self._fields is None:
+            tokens = self._raw_text.split(",", 2)
+            return tokens[1].strip() if len(tokens) > 1 else ""
+        return self._fields[0] if self._fields else ""
+
     def __str__(self) -> str:
         return f"{self.object_name} : {len(self.fields)} fields"
 
+    def bind(self, idd_structure):
+        """
+        This function binds this object to the IDD object of its type, which lets fields be read and written by name
+        with get and set.  Binding costs one type lookup, and is kept until the object is bound again.
+
+        :param IDDStructure idd_structure: The IDD structure describing this object
+        :return: This object, so binding can be chained with get or set
+        :raises ProcessingException: if the IDD does not describe this object type with fields
+        """
+        idd_object = idd_structure.get_object_by_type(self.object_name)
+        if idd_object is None or isinstance(idd_object, str):
+            raise ProcessingException("Cannot bind an object to an IDD without fields for its type",
+                                      object_name=self.object_name)
+        self._idd_object = idd_object
+        return self
+
+    def _bound_field_index(self, field_name):
+        """
+        Internal worker that resolves a field name through the bound IDD object.
+        """
+        if self._idd_object is None:
+            raise ProcessingException("Object must be bound to an IDD before accessing fields by name",
+                                      object_name=self.object_name)
+        index = self._idd_object.field_index(field_name)
+        if index is None:
+            raise ProcessingException("Field \"{}\" is not in the IDD object".format(field_name),
+                                      object_name=self.object_name)
+        return index
+
+    def get(self, field_name):
+        """
+        This function returns the value of a field by name, see IDDObject.field_index for the names accepted.  The
+        object must have been bound to an IDD with bind.
+
+        :param str field_name: The field name, in any case, with spaces or underscores
+        :return: The field value, or an empty string if the object does not have that many fields
+        :raises ProcessingException: if the object is not bound or the field name is not in the IDD object
+        """
+        index = self._bound_field_index(field_name)
+        fields = self.fields
+        return fields[index] if index < len(fields) else ""
+
+    def set(self, field_name, value):
+        """
+        This function sets the value of a field by name, adding blank fields first if the object is shorter.  The
+        object must have been bound to an IDD with bind.
+
+        :param str field_name: The field name, in any case, with spaces or underscores
+        :param str value: The new field value
+        :return: None
+        :raises ProcessingException: if the object is not bound or the field name is not in the IDD object
+        """
+        index = self._bound_field_index(field_name)
+        fields = self.fields
+        if index >= len(fields):
+            fields.extend([""] * (index + 1 - len(fields)))
+        fields[index] = value
+
+    def typed_fields(self, idd_object):
+        """
+        This function returns a typed view of the fields of this object.  Fields that the IDD object marks as numeric
+        (N), including those of extensible groups past the listed fields, are parsed once with parse_numeric_field,
+        alpha (A) fields and any fields beyond the IDD definition are returned as the raw strings.  The result is
+        cached on this instance and reused until the fields are modified or a different IDD object is passed in.
+
+        :param IDDObject idd_object: The IDDObject structure that matches this IDFObject
+        :return: A tuple of typed values, one per field
+        """
+        fields = self.fields
+        cache = self._typed_cache
+        if cache is not None and cache[0] is idd_object and cache[1] == fields.revision:
+            return cache[2]
+        if idd_object is None or isinstance(idd_object, str):
+            typed = tuple(fields)
+        else:
+            field_for_index = idd_object.field_for_index
+            typed = []
+            for index, value in enumerate(fields):
+                idd_field = field_for_index(index)
+                is_numeric = idd_field is not None and idd_field.field_an_index[0] == "N"
+                typed.append(parse_numeric_field(value) if is_numeric else value)
+            typed = tuple(typed)
+        self._typed_cache = (idd_object, fields.revision, typed)
+        return typed
+
+    def typed_value(self, index, idd_object):
+        """
+        This function returns the typed value of a single field; see typed_fields for the conversions applied.
+
+        :param int index: The zero-based index of the field in this object
+        :param IDDObject idd_object: The IDDObject structure that matches this IDFObject
+        :return: The typed value of the field
+        """
+        return self.typed_fields(idd_object)[index]
+
+    def canonical_hash(self):
+        """
+        This function returns a stable hash of the content of this object, which ignores the case of the object type,
+        whitespace around field values and trailing blank fields, so "ZONE,Z1, 0,;" and "Zone,Z1,0;" hash the same.
+        The hash is computed once and cached until the fields or object type change, and it is stable across Python
+        processes, so it can be stored and used as a cache key.
+
+        :return: A 128 bit integer hash of the object content, or None for comment blocks
+        """
+        if self.comment:
+            return None
+        fields = self.fields
+        cache = self._hash_cache
+        if cache is not None and cache[0] == fields.revision and cache[1] == self.object_name:
+            return cache[2]
+        values = [f.strip() for f in fields]
+        while values and values[-1] == "":
+            values.pop()
+        values.insert(0, self.object_name.strip().upper())
+        digest = hashlib.blake2b("\x1f".join(values).encode("utf-8"), digest_size=16).digest()
+        object_hash = int.from_bytes(digest, "big")
+        self._hash_cache = (fields.revision, self.object_name, object_hash)
+        return object_hash
+
     def object_string(self, idd_object=None):
         """
         This function creates an intelligently formed IDF object.  If the current instance is comment data, it simply
@@ -114,29 +371,27 @@ class IDFObject(object):
                 field_token_string = ",".join([field for field in self.fields])
                 s = self.object_name + ',' + field_token_string + ';\n'
             else:
-                idd_fields = idd_object.fields
                 s = self.object_name + ",\n"
                 padding_size = 25
-                for index, idf_idd_fields in enumerate(zip(self.fields, idd_fields)):
-                    idf_field, idd_field = idf_idd_fields
+                for index, idf_field in enumerate(self.fields):
+                    idd_field = idd_object.field_for_index(index)
                     if index == len(self.fields) - 1:
                         terminator = ";"
                     else:
                         terminator = ","
-                    if "\\units" in idd_field.meta_data:
+                    if idd_field is not None and "\\units" in idd_field.meta_data:
                         units_string = " {" + idd_field.meta_data["\\units"][0] + "}"
                     else:
                         units_string = ""
-                    if idd_field.field_name is None:  # pragma no cover  - our files don't have an object like this yet
-                        idd_field.field_name = ""
+                    field_name = idd_object.field_name_for_index(index) or ""
                     s += "  " + (str(idf_field) + terminator).ljust(
-                        padding_size) + "!- " + idd_field.field_name + units_string + "\n"
+                        padding_size) + "!- " + field_name + units_string + "\n"
             return s
 
     def validate(self, idd_object):
         """
         This function validates the current IDF object instance against standard IDD field tags such as minimum and
-        maximum, etc.
+        maximum, the keys of choice fields, etc.
 
         :param IDDObject idd_object: The IDDObject structure that matches this IDFObject
         :return: A list of ValidationIssue instances, each describing an issue encountered
@@ -150,84 +405,102 @@ class IDFObject(object):
         if isinstance(idd_object, str):
             # we have a single-line string-only idd object, just leave
             return issues
+        num_listed_fields = len(idd_object.fields)
         if "\\min-fields" in idd_object.meta_data:
             minimum_required_fields = int(idd_object.meta_data["\\min-fields"][0])
             actual_num_fields = len(self.fields)
             for i in range(minimum_required_fields):
+                # \min-fields often reaches into the extensible groups, such as the first vertices of a surface
+                idd_field = idd_object.field_for_index(i)
+                if idd_field is None:
+                    break
                 if i < actual_num_fields:  # if the item is there
                     if not self.fields[i]:  # if it's blank
-                        if "\\default" in idd_object.fields[i].meta_data:  # if it's blank but has a default value
-                            self.fields[i] = idd_object.fields[i].meta_data["\\default"][0]  # fill with default
+                        if "\\default" in idd_field.meta_data:  # if it's blank but has a default value
+                            self.fields[i] = idd_field.meta_data["\\default"][0]  # fill with default
                             # if it doesn't have a default, just leave it blank, later checks will catch it
                 else:  # if the item isn't even there
-                    if "\\default" in idd_object.fields[i].meta_data:  # if it has a default value
-                        self.fields.append(idd_object.fields[i].meta_data["\\default"][0])  # fill with default
+                    if "\\default" in idd_field.meta_data:  # if it has a default value
+                        self.fields.append(idd_field.meta_data["\\default"][0])  # fill with default
                     else:  # or if it doesn't have a default
                         self.fields.append("")  # make sure it does have an entry (blank) and it will be caught later
+                        field_name = idd_field.field_name if i < num_listed_fields else \
+                            idd_object.field_name_for_index(i)
                         issues.append(ValidationIssue(idd_object.name, ValidationIssue.WARNING,
-                                                      "Field within \\min-fields missing and no default",
-                                                      idd_object.fields[i].field_name))
-        for idf, idd in zip(self.fields, idd_object.fields):
+                                                      "Field within \\min-fields missing and no default", field_name))
+        for index, (idf, value) in enumerate(zip(self.fields, self.typed_fields(idd_object))):
+            idd = idd_object.field_for_index(index)
+            if idd is None:
+                break
+            field_name = idd.field_name if index < num_listed_fields else idd_object.field_name_for_index(index)
             if "\\required-field" in idd.meta_data:
                 if idf == "":
                     issues.append(ValidationIssue(idd_object.name, ValidationIssue.WARNING,
-                                                  "Blank required field found", idd.field_name))
+                                                  "Blank required field found", field_name))
                     continue
+            choice_keys = idd.choice_keys()
+            if choice_keys is not None and idf != "" and idf.strip().casefold() not in choice_keys:
+                issues.append(ValidationIssue(idd_object.name, ValidationIssue.WARNING,
+                                              "Field value is not one of the idd-specified keys; actual={}".format(
+                                                  idf.strip()), field_name))
+                continue
             an_code = idd.field_an_index
             if an_code[0] == "N":
-                if idf.strip() != "":
-                    try:
-                        number = float(idf)
-                        if "\\maximum" in idd.meta_data:
-                            max_constraint_string = idd.meta_data["\\maximum"][0]
-                            if max_constraint_string[0] == "<":
-                                max_val = float(max_constraint_string[1:])
-                                if number >= max_val:
-                                    issues.append(ValidationIssue(
-                                        idd_object.name, ValidationIssue.WARNING,
-                                        "Field value higher than idd-specified maximum>; actual={}, max={}".format(
-                                            number, max_val), idd.field_name))
-                            else:
-                                max_val = float(max_constraint_string)
-                                if number > max_val:
-                                    issues.append(ValidationIssue(
-                                        idd_object.name, ValidationIssue.WARNING,
-                                        "Field value higher than idd-specified maximum; actual={}, max={}".format(
-                                            number, max_val), idd.field_name))
-                        if "\\minimum" in idd.meta_data:
-                            min_constraint_string = idd.meta_data["\\minimum"][0]
-                            if min_constraint_string[0] == ">":
-                                min_val = float(min_constraint_string[1:])
-                                if number <= min_val:
-                                    issues.append(ValidationIssue(
-                                        idd_object.name, ValidationIssue.WARNING,
-                                        "Field value lower than idd-specified minimum<; actual={}, min={}".format(
-                                            number, min_val), idd.field_name))
-                            else:
-                                min_val = float(min_constraint_string)
-                                if number < min_val:
-                                    issues.append(ValidationIssue(
-                                        idd_object.name, ValidationIssue.WARNING,
-                                        "Field value lower than idd-specified minimum; actual={}, min={}".format(
-                                            number, min_val), idd.field_name))
-                    except ValueError:
-                        if "\\autosizable" in idd.meta_data and idf.upper() == "AUTOSIZE":
-                            pass  # everything is ok
-                        elif "\\autocalculatable" in idd.meta_data and idf.upper() in ["AUTOCALCULATE", "AUTOSIZE"]:
-                            pass  # everything is ok
-                        elif idf.upper() == "AUTOSIZE":
-                            issues.append(ValidationIssue(
-                                idd_object.name, ValidationIssue.WARNING,
-                                "Autosize detected in numeric field that is _not_ listed autosizable", idd.field_name))
-                        elif idf.upper() == "AUTOCALCULATE":
-                            issues.append(ValidationIssue(
-                                idd_object.name, ValidationIssue.WARNING,
-                                "Autocalculate detected in numeric field that is _not_ listed autocalculatable",
-                                idd.field_name))
+                if value is BLANK:
+                    continue
+                elif isinstance(value, float):
+                    number = value
+                    if "\\maximum" in idd.meta_data:
+                        max_constraint_string = idd.meta_data["\\maximum"][0]
+                        if max_constraint_string[0] == "<":
+                            max_val = float(max_constraint_string[1:])
+                            if number >= max_val:
+                                issues.append(ValidationIssue(
+                                    idd_object.name, ValidationIssue.WARNING,
+                                    "Field value higher than idd-specified maximum>; actual={}, max={}".format(
+                                        number, max_val), field_name))
                         else:
-                            issues.append(ValidationIssue(
-                                idd_object.name, ValidationIssue.WARNING,
-                                "Non-numeric value in idd-specified numeric field", idd.field_name))
+                            max_val = float(max_constraint_string)
+                            if number > max_val:
+                                issues.append(ValidationIssue(
+                                    idd_object.name, ValidationIssue.WARNING,
+                                    "Field value higher than idd-specified maximum; actual={}, max={}".format(
+                                        number, max_val), field_name))
+                    if "\\minimum" in idd.meta_data:
+                        min_constraint_string = idd.meta_data["\\minimum"][0]
+                        if min_constraint_string[0] == ">":
+                            min_val = float(min_constraint_string[1:])
+                            if number <= min_val:
+                                issues.append(ValidationIssue(
+                                    idd_object.name, ValidationIssue.WARNING,
+                                    "Field value lower than idd-specified minimum<; actual={}, min={}".format(
+                                        number, min_val), field_name))
+                        else:
+                            min_val = float(min_constraint_string)
+                            if number < min_val:
+                                issues.append(ValidationIssue(
+                                    idd_object.name, ValidationIssue.WARNING,
+                                    "Field value lower than idd-specified minimum; actual={}, min={}".format(
+                                        number, min_val), field_name))
+                elif value is AUTOSIZE:
+                    if "\\autosizable" in idd.meta_data or "\\autocalculatable" in idd.meta_data:
+                        pass  # everything is ok
+                    else:
+                        issues.append(ValidationIssue(
+                            idd_object.name, ValidationIssue.WARNING,
+                            "Autosize detected in numeric field that is _not_ listed autosizable", field_name))
+                elif value is AUTOCALCULATE:
+                    if "\\autocalculatable" in idd.meta_data:
+                        pass  # everything is ok
+                    else:
+                        issues.append(ValidationIssue(
+                            idd_object.name, ValidationIssue.WARNING,
+                            "Autocalculate detected in numeric field that is _not_ listed autocalculatable",
+                            field_name))
+                else:
+                    issues.append(ValidationIssue(
+                        idd_object.name, ValidationIssue.WARNING,
+                        "Non-numeric value in idd-specified numeric field", field_name))
         return issues
 
     def write_object(self, file_object):
@@ -264,6 +537,85 @@ class IDFStructure(object):
         self.version_float = None
         self.objects = None
 
+    def __reduce__(self):
+        """
+        Pickles this structure in the flat binary snapshot form (see idf_snapshot.snapshot_bytes): a table of distinct
+        strings and arrays of integers, instead of one pickled object, field list and dictionary per IDF object.
+        Bindings to an IDD (see bind) and cached hashes are not pickled.  Structures holding NUL characters, which
+        snapshots cannot store, fall back to a list of plain field lists.
+        """
+        from energyplus_iddidf.idf_snapshot import snapshot_bytes
+        state = (self.file_path, self.version_string, self.version_float)
+        if self.objects is None:
+            return _restore_idf_structure, state + (None, None)
+        try:
+            return _restore_idf_structure, state + (snapshot_bytes(self), None)
+        except ProcessingException:
+            objects = [(o.comment, o.object_name, list(o.fields)) for o in self.objects]
+            return _restore_idf_structure, state + (None, objects)
+
+    def fingerprint(self):
+        """
+        This function returns a fingerprint of the model content, combining the canonical hash of every object (see
+        IDFObject.canonical_hash) so that it ignores comment blocks, whitespace, the case of object types, trailing
+        blank fields and also the order of the objects.  The object hashes are summed, so the fingerprint changes if
+        an object is repeated, and since object hashes are cached, recomputing it after a few edits is cheap.
+
+        :return: A 32 character hexadecimal string
+        """
+        total = 0
+        for idf_object in self.objects:
+            if not idf_object.comment:
+                total += idf_object.canonical_hash()
+        return "{:032x}".format(total % (1 << 128))
+
+    def hash_difference(self, other):
+        """
+        This function finds the objects whose content differs between this structure and another one, by comparing
+        canonical object hashes.  Moving objects around or reformatting them does not count as a difference, and an
+        edited object shows up once on each side.
+
+        :param IDFStructure other: The structure to compare against, typically a newer version of the same model
+        :return: A tuple of two lists, the objects of this structure not found in the other, and the objects of the
+                 other structure not found in this one, each in their original order
+        """
+        mine = Counter(o.canonical_hash() for o in self.objects if not o.comment)
+        theirs = Counter(o.canonical_hash() for o in other.objects if not o.comment)
+        only_mine = mine - theirs
+        only_theirs = theirs - mine
+        return self._objects_with_hashes(only_mine), other._objects_with_hashes(only_theirs)
+
+    def _objects_with_hashes(self, hash_counts):
+        """
+        Internal worker that returns the objects whose canonical hashes are in a multiset of hashes, taking each hash
+        as many times as it is counted, in object order.
+        """
+        remaining = Counter(hash_counts)
+        found = []
+        for idf_object in self.objects:
+            if idf_object.comment:
+                continue
+            object_hash = idf_object.canonical_hash()
+            if remaining[object_hash] > 0:
+                remaining[object_hash] -= 1
+                found.append(idf_object)
+        return found
+
+    def bind(self, idd_structure):
+        """
+        This function binds every object of this structure whose type the IDD describes, see IDFObject.bind.  Comment
+        blocks and objects of unknown types are left unbound.
+
+        :param IDDStructure idd_structure: The IDD structure describing this model
+        :return: None
+        """
+        for idf_object in self.objects:
+            if idf_object.comment:
+                continue
+            idd_object = idd_structure.get_object_by_type(idf_object.object_name)
+            if idd_object is not None and not isinstance(idd_object, str):
+                idf_object._idd_object = idd_object
+
     def get_idf_objects_by_type(self, type_to_get):
         """
         This function returns all objects of a given type found in this IDF structure instance
@@ -271,7 +623,45 @@ class IDFStructure(object):
         :param str type_to_get: A case-insensitive object type to retrieve
         :return: A list of all objects of the given type
         """
-        return [i for i in self.objects if i.object_name.upper() == type_to_get.upper()]
+        upper_type = type_to_get.upper()
+        return [i for i in self.objects if i.object_name.upper() == upper_type]
+
+    def get_idf_object_by_name(self, name_to_get, type_to_get=None):
+        """
+        This function returns the first object whose name (first field) matches the given name.  Only the start of
+        each object is inspected, so lazily processed objects are not split into fields by this search.
+
+        :param str name_to_get: A case-insensitive object name to search for
+        :param str type_to_get: An optional case-insensitive object type to limit the search to
+        :return: The first matching IDFObject, or None if no object matches
+        """
+        upper_name = name_to_get.upper()
+        upper_type = type_to_get.upper() if type_to_get is not None else None
+        for idf_object in self.objects:
+            if idf_object.comment:
+                continue
+            if upper_type is not None and idf_object.object_name.upper() != upper_type:
+                continue
+            if idf_object.instance_name.upper() == upper_name:
+                return idf_object
+        return None
+
+    def count_objects_by_type(self):
+        """
+        This function counts the objects of each type in this IDF structure instance, skipping comment blocks.  Only
+        object types are inspected, so lazily processed objects are not split into fields.
+
+        :return: A dictionary of object type (as spelled in the first occurrence) to number of instances
+        """
+        counts = {}
+        spellings = {}
+        for idf_object in self.objects:
+            if idf_object.comment:
+                continue
+            upper_type = idf_object.object_name.upper()
+            spelling = spellings.setdefault(upper_type, idf_object.object_name)
+            counts[spelling] = counts.get(spelling, 0) + 1
+        return counts
 
     def whole_idf_string(self, idd_structure=None):
         """
@@ -341,3 +731,22 @@ class IDFStructure(object):
                 for i, idf_field in enumerate(idf_object.fields):
                     if idf_field.upper() in upper_case_swaps:
                         idf_object.fields[i] = upper_case_swaps[idf_field.upper()]
+
+
+def _restore_idf_structure(file_path, version_string, version_float, snapshot, objects):
+    """
+    Internal worker that rebuilds an IDF structure pickled by IDFStructure.__reduce__.
+    """
+    if snapshot is not None:
+        from energyplus_iddidf.idf_snapshot import structure_from_snapshot
+        idf_structure = structure_from_snapshot(snapshot, file_path)
+    else:
+        idf_structure = IDFStructure(file_path)
+        if objects is not None:
+            idf_structure.objects = [
+                IDFObject(fields, True) if comment else IDFObject([object_name] + fields)
+                for comment, object_name, fields in objects
+            ]
+    idf_structure.version_string = version_string
+    idf_structure.version_float = version_float
+    return idf_structure
@@ -1,28 +1,77 @@
-from io import StringIO
+from io import BytesIO, StringIO, TextIOWrapper
 import logging
 import os
+import sys
 
 from energyplus_iddidf import exceptions
 from energyplus_iddidf.idf_objects import IDFObject, IDFStructure
+from energyplus_iddidf.idf_snapshot import IDFSnapshotCache
 
 module_logger = logging.getLogger("eptransition.idd.processor")
 
+# field tokens up to this length are interned when token interning is enabled; short tokens such as "Yes", "No",
+# "autosize" or "Until: 24:00" repeat many thousands of times in large models while long ones rarely repeat
+INTERN_TOKEN_MAX_LENGTH = 24
+
 
 class IDFProcessor:
     """
     The core IDF Processor class.  Given an IDF via stream or path, this class has workers to robustly process the IDF
     into a rich IDFStructure instance.
 
-    The constructor takes no arguments but sets up instance variables. Relevant "public" members are listed here:
+    Relevant "public" members are listed here:
 
     :ivar IDFStructure idf: The resulting IDFStructure instance after processing the IDF file/stream
     :ivar str file_path: A file path for this IDF, although it may be just a simple descriptor
+
+    Constructor parameters:
+
+    :param IDDStructure idd_structure: An optional IDD structure; if given, object types are replaced by the single
+                                       canonical string from the IDD, so every object of a type shares one name string
+    :param bool intern_tokens: If True, short field tokens are interned while parsing so repeated values share memory
+    :param bool lazy: If True, objects keep their raw text and are only split into fields when the fields are first
+                      accessed, which makes queries by object type or name much cheaper on large files.  Field tokens
+                      of lazy objects are not interned.
+    :param IDFSnapshotCache snapshot_cache: An optional snapshot cache; if given, process_file_given_file_path returns
+                                            the cached parse when the file contents are unchanged, and stores a
+                                            snapshot of each new parse.  Structures that go through the cache are
+                                            always fully split, even in lazy mode.
     """
 
-    def __init__(self):
+    def __init__(self, idd_structure=None, intern_tokens=False, lazy=False, snapshot_cache=None):
         self.idf = None
         self.file_path = None
         self.input_file_stream = None
+        self.idd_structure = idd_structure
+        self.intern_tokens = intern_tokens
+        self.lazy = lazy
+        self.snapshot_cache = snapshot_cache
+
+    def _shared_object_name(self, object_type):
+        """
+        Internal worker that returns a shared string instance for an object type, using the IDD spelling if possible
+
+        :param str object_type: The stripped object type as found in the IDF
+        :return: The canonical IDD spelling if the IDD is available and knows the type, otherwise the interned type
+        """
+        if self.idd_structure is not None:
+            canonical_name = self.idd_structure.get_canonical_object_name(object_type)
+            if canonical_name is not None:
+                return canonical_name
+        return sys.intern(object_type)
+
+    def _intern_object_tokens(self, tokens):
+        """
+        Internal worker that replaces the object type and, optionally, short field tokens with shared string instances
+
+        :param [str] tokens: The stripped tokens of a single object, the first of which is the object type
+        :return: None, the list is modified in place
+        """
+        tokens[0] = self._shared_object_name(tokens[0])
+        if self.intern_tokens:
+            for i in range(1, len(tokens)):
+                if len(tokens[i]) <= INTERN_TOKEN_MAX_LENGTH:
+                    tokens[i] = sys.intern(tokens[i])
 
     def process_file_given_file_path(self, file_path):
         """
@@ -34,9 +83,37 @@ class IDFProcessor:
         """
         if not os.path.exists(file_path):
             raise exceptions.ProcessingException("Input file not found=\"" + file_path + "\"")
-        self.input_file_stream = open(file_path, "r")
         self.file_path = file_path
-        return self.process_file()
+        if self.snapshot_cache is not None:
+            return self._process_file_with_snapshot_cache()
+        with open(file_path, "r") as self.input_file_stream:
+            return self.process_file()
+
+    def _process_file_with_snapshot_cache(self):
+        """
+        Internal worker that processes the current file path through the snapshot cache.  The file is read once, as
+        bytes, to compute the cache key; on a miss the same bytes are parsed as text and the result is stored.  A
+        structure that cannot be stored, such as one holding NUL characters, is logged and returned all the same.
+
+        :return: An IDFStructure instance, either loaded from the cache or created from processing the IDF file
+        """
+        with open(self.file_path, "rb") as f:
+            data = f.read()
+        key = IDFSnapshotCache.key_for_bytes(data)
+        self.idf = self.snapshot_cache.load(
+            key, self.file_path, object_name_transform=self._shared_object_name, intern_strings=self.intern_tokens)
+        if self.idf is not None:
+            module_logger.debug("Loaded IDF snapshot for {} from the cache".format(self.file_path))
+            return self.idf
+        # decode the same way open(file_path, "r") would, including universal newlines
+        with TextIOWrapper(BytesIO(data)) as self.input_file_stream:
+            self.process_file()
+        try:
+            self.snapshot_cache.store(key, self.idf)
+        except (exceptions.ProcessingException, OSError) as e:
+            # the cache only speeds up later reads, so failing to write it must not fail this one
+            module_logger.warning("Could not store the IDF snapshot of {}: {}".format(self.file_path, e))
+        return self.idf
 
     def process_file_via_stream(self, idf_file_stream):
         """
@@ -63,140 +140,194 @@ class IDFProcessor:
         self.file_path = "/string/idf/snippet"
         return self.process_file()
 
-    def process_file(self):
+    def iterate_objects_given_file_path(self, file_path):
         """
-        Internal worker function that reads the IDF stream, whether it was constructed from a file path, stream or
-        string.  This processor then processes the file line by line looking for IDF objects and comment blocks, and
-        parsing them into a meaningful structure
+        This worker streams the objects of an IDF file at a specific path on disk, one at a time, without building an
+        IDFStructure.  Only the object currently being read is held in memory, so this is suitable for very large files.
+        The file is closed when the iteration finishes.
 
-        :return: An IDF structure describing the IDF contents
-        :raises ProcessingException: for any issues encountered during the processing of the idf
+        :param file_path: The path to an IDF file on disk.
+        :return: A generator of IDFObject instances, including comment blocks, in file order
+        :raises ProcessingException: if the specified file does not exist
         """
-        self.idf = IDFStructure(self.file_path)
-        # phase 0: read in lines of file
-        lines = self.input_file_stream.readlines()
-
-        class Blob:
-            COMMENT = 1
-            OBJECT = 2
-
-            def __init__(self, blob_type, blob_lines=None):
-                self.blob_type = blob_type
-                if blob_lines is None:
-                    blob_lines = []
-                self.lines = blob_lines
-
-        # should there maybe be 3 "state as of last line" options?
-        # 1. reading comment block
-        # 2. reading IDF block
-
-        # so let's try keeping the idf in blobs of either comment data or object data
-        current_blob = None
-        initial_blobs = []
+        if not os.path.exists(file_path):
+            raise exceptions.ProcessingException("Input file not found=\"" + file_path + "\"")
+        self.file_path = file_path
+        with open(file_path, "r") as self.input_file_stream:
+            yield from self.iterate_objects()
+
+    def iterate_objects_via_stream(self, idf_file_stream):
+        """
+        This worker streams the objects of an IDF from a file-like object, one at a time, without building an
+        IDFStructure.
+
+        :param file-like-object idf_file_stream: An IDF stream that can be iterated line by line
+        :return: A generator of IDFObject instances, including comment blocks, in file order
+        """
+        self.input_file_stream = idf_file_stream
+        self.file_path = "/streamed/idf"
+        return self.iterate_objects()
+
+    @staticmethod
+    def _iterate_blobs(lines):
+        """
+        Internal worker that groups IDF lines into blobs of either comment data or object data.  Comment lines found
+        inside an object are dropped, and object lines have any trailing comment removed.
+
+        :param lines: An iterable of raw IDF lines
+        :return: A generator of (is_comment, lines) tuples, where lines is a list of stripped line strings
+        """
+        comment_lines = None
+        object_lines = None
         for line in lines:
             line_text = line.strip()
             if len(line_text) == 0:
                 continue
             elif line_text.startswith("!"):
-                if current_blob is None:
-                    current_blob = Blob(Blob.COMMENT)
-                    current_blob.lines.append(line_text)
-                elif current_blob.blob_type == Blob.COMMENT:
-                    # just add to the lines and carry on
-                    current_blob.lines.append(line_text)
-                elif current_blob.blob_type == Blob.OBJECT:
+                if object_lines is not None:
                     # ignore it, we are still trying to read the object..
                     continue
+                if comment_lines is None:
+                    comment_lines = []
+                comment_lines.append(line_text)
             else:
-                if current_blob is None:
-                    # then this blob is fresh and is the start of a new object, but it could also be the end (one-liner)
-                    current_blob = Blob(Blob.OBJECT)
-                    actual_line = line_text
-                    if "!" in line_text:
-                        actual_line = line_text[:line_text.find("!")]
-                    if ";" in actual_line:
-                        # we end this object blob
-                        current_blob.lines.append(line_text)
-                        initial_blobs.append(current_blob)
-                        current_blob = None
-                    else:
-                        current_blob.lines.append(line_text)
-                elif current_blob.blob_type == Blob.OBJECT:
-                    # then we should append this line to the current blob, but we also need to check if it is the end
-                    current_blob.lines.append(line_text)
-                    actual_line = line_text
-                    if "!" in line_text:
-                        actual_line = line_text[:line_text.find("!")]
-                    if ";" in actual_line:
-                        # we end this object blob
-                        initial_blobs.append(current_blob)
-                        current_blob = None
-                elif current_blob.blob_type == Blob.COMMENT:
-                    # then we need to package up the previous comment blob, and create this new one, but again..1-liner?
-                    initial_blobs.append(current_blob)
-                    current_blob = Blob(Blob.OBJECT)
-                    current_blob.lines.append(line_text)
-                    actual_line = line_text
-                    if "!" in line_text:
-                        actual_line = line_text[:line_text.find("!")]
-                    if ";" in actual_line:
-                        # we end this object blob
-                        initial_blobs.append(current_blob)
-                        current_blob = None
-        if current_blob is not None:
-            initial_blobs.append(current_blob)
-
-        # next let's go blob by blob and clean up any trailing comments and such
-        idf_objects = []
-        for initial_blob in initial_blobs:
-            if initial_blob.blob_type == Blob.COMMENT:
-                idf_objects.append(IDFObject(initial_blob.lines, True))
+                if comment_lines is not None:
+                    # then we need to package up the previous comment blob before starting this object
+                    yield True, comment_lines
+                    comment_lines = None
+                exclamation = line_text.find("!")
+                if exclamation != -1:
+                    line_text = line_text[:exclamation].rstrip()
+                if object_lines is None:
+                    object_lines = []
+                object_lines.append(line_text)
+                if line_text.endswith(";"):
+                    # we end this object blob, although it may hold more than one object; a semicolon in the middle
+                    # of the line only ends an earlier object on the same line, so it doesn't end the blob
+                    yield False, object_lines
+                    object_lines = None
+        if comment_lines is not None:
+            yield True, comment_lines
+        if object_lines is not None:
+            yield False, object_lines
+
+    def _objects_from_object_lines(self, object_lines):
+        """
+        Internal worker that converts the comment-free lines of an object blob into IDF objects.  There is usually a
+        single object, but several objects may be written on one line.
+
+        :param [str] object_lines: The stripped, comment-free lines of an object blob
+        :return: A generator of IDFObject instances
+        :raises ProcessingException: if a line does not end with a comma or semicolon
+        """
+        # check these object lines for malformed idf syntax
+        for li in object_lines:
+            if not (li.endswith(",") or li.endswith(";")):
+                raise exceptions.ProcessingException(
+                    "IDF line doesn't end with comma/semicolon\nline:\"" + li + "\"")
+        # intermediate: join entire array and re-split by semicolon
+        idf_data_joined = "".join(object_lines)
+        idf_object_strings = idf_data_joined.split(";")
+        # inspect each object and its fields
+        for obj in idf_object_strings:
+            if self.lazy:
+                comma = obj.find(",")
+                object_type = (obj if comma == -1 else obj[:comma]).strip()
+                if comma == -1 and object_type == "":
+                    continue
+                yield IDFObject.from_raw_text(self._shared_object_name(object_type), obj)
+                continue
+            tokens = obj.split(",")
+            nice_object = [t.strip() for t in tokens]
+            if len(nice_object) == 1:
+                if nice_object[0] == "":
+                    continue
+            self._intern_object_tokens(nice_object)
+            yield IDFObject(nice_object)
+
+    def iterate_objects(self):
+        """
+        Internal worker function that streams the IDF objects from the current input stream, whether it was
+        constructed from a file path, stream or string.  The stream is read line by line and each object or comment
+        block is yielded as soon as it is complete.
+
+        :return: A generator of IDFObject instances, including comment blocks, in file order
+        :raises ProcessingException: for any issues encountered during the processing of the idf
+        """
+        for is_comment, blob_lines in self._iterate_blobs(self.input_file_stream):
+            if is_comment:
+                yield IDFObject(blob_lines, True)
             else:
-                out_lines = []
-                for line in initial_blob.lines:
-                    line_text = line.strip()
-                    this_line = ""
-                    if len(line_text) > 0:
-                        exclamation = line_text.find("!")
-                        if exclamation == -1:
-                            this_line = line_text
-                        elif exclamation > 0:
-                            this_line = line_text[:exclamation]
-                        if not this_line == "":
-                            out_lines.append(this_line.strip())
-                # check these object lines for malformed idf syntax
-                for li in out_lines:
-                    if not (li.endswith(",") or li.endswith(";")):
-                        raise exceptions.ProcessingException(
-                            "IDF line doesn't end with comma/semicolon\nline:\"" + li + "\"")
-                # intermediate: join entire array and re-split by semicolon
-                idf_data_joined = "".join(out_lines)
-                idf_object_strings = idf_data_joined.split(";")
-                # phase 3: inspect each object and its fields
-                for obj in idf_object_strings:
-                    tokens = obj.split(",")
-                    nice_object = [t.strip() for t in tokens]
-                    if len(nice_object) == 1:
-                        if nice_object[0] == "":
-                            continue
-                    idf_objects.append(IDFObject(nice_object))
+                yield from self._objects_from_object_lines(blob_lines)
+
+    def process_file(self):
+        """
+        Internal worker function that reads the IDF stream, whether it was constructed from a file path, stream or
+        string.  This processor then processes the file line by line looking for IDF objects and comment blocks, and
+        parsing them into a meaningful structure
 
+        :return: An IDF structure describing the IDF contents
+        :raises ProcessingException: for any issues encountered during the processing of the idf
+        """
+        self.idf = IDFStructure(self.file_path)
+        idf_objects = []
+        version_object = None
+        for idf_object in self.iterate_objects():
+            idf_objects.append(idf_object)
+            if version_object is None and not idf_object.comment and idf_object.object_name.upper() == "VERSION":
+                version_object = idf_object
         self.idf.objects = idf_objects
+        self.idf.version_string, self.idf.version_float = self.version_from_object(version_object)
+        return self.idf
 
+    @staticmethod
+    def version_from_object(version_object):
+        """
+        This worker interprets the Version object of an IDF.
+
+        :param IDFObject version_object: The Version object, or None if the IDF does not have one
+        :return: A tuple of the version string and its floating point representation (for 8.6.0 it is 8.6, and a version
+                 without a minor part such as 22 is read as 22.0, as IDDRegistry.find does); if there is no usable
+                 Version object this is ('UNKNOWN VERSION', 0.0)
+        :raises ProcessingException: if the version string cannot be coerced into a floating point number
+        """
+        if version_object is None or len(version_object.fields) == 0:
+            return 'UNKNOWN VERSION', 0.0
+        version_string = version_object.fields[0]
         try:
-            self.idf.version_string = self.idf.get_idf_objects_by_type("Version")[0].fields[0]
-            parse_version = True
-        except IndexError:
-            self.idf.version_string = 'UNKNOWN VERSION'
-            parse_version = False
-        if parse_version:
-            try:
-                version_tokens = self.idf.version_string.split(".")
-                tmp_string = "{}.{}".format(version_tokens[0], version_tokens[1])
-                self.idf.version_float = float(tmp_string)
-            except ValueError:
-                raise exceptions.ProcessingException(
-                    "Found IDF version, but could not coerce into floating point representation")
+            version_tokens = version_string.split(".")
+            if not version_tokens[0].strip():
+                raise ValueError("The version has no major part")
+            tmp_string = "{}.{}".format(version_tokens[0], version_tokens[1] if len(version_tokens) > 1 else "0")
+            return version_string, float(tmp_string)
+        except ValueError:
+            raise exceptions.ProcessingException(
+                "Found IDF version, but could not coerce into floating point representation")
+
+    @staticmethod
+    def peek_version(path_or_stream):
+        """
+        This worker finds the version of an IDF without processing the whole file.  The IDF is read only until the
+        Version object has been found, skipping comments and handling objects that span several lines, which makes it
+        cheap enough to route files to the matching IDD before fully processing them.
+
+        :param path_or_stream: Either the path to an IDF file on disk or a file-like object that can be iterated line by
+                               line; a stream is read from its current position and left open.
+        :return: A tuple of the version string and its floating point representation (for 8.6.0 it is 8.6), which are
+                 the same values process_file stores in version_string and version_float
+        :raises ProcessingException: if the file does not exist or the version cannot be coerced into a float
+        """
+        processor = IDFProcessor(lazy=True)
+        if isinstance(path_or_stream, (str, os.PathLike)):
+            objects = processor.iterate_objects_given_file_path(str(path_or_stream))
         else:
-            self.idf.version_float = 0.0
-        return self.idf
+            objects = processor.iterate_objects_via_stream(path_or_stream)
+        version_object = None
+        try:
+            for idf_object in objects:
+                if not idf_object.comment and idf_object.object_name.upper() == "VERSION":
+                    version_object = idf_object
+                    break
+        finally:
+            objects.close()
+        return IDFProcessor.version_from_object(version_object)
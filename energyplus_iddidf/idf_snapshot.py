@@ -0,0 +1,245 @@
+from array import array
+import hashlib
+import logging
+import os
+import struct
+import sys
+import tempfile
+
+from energyplus_iddidf import exceptions
+from energyplus_iddidf.idf_objects import IDFObject, IDFStructure
+
+module_logger = logging.getLogger("eptransition.idf.snapshot")
+
+SNAPSHOT_MAGIC = b"EPIDFSNP"
+# bumped whenever the layout changes; snapshots with another format version are rejected, and caches treat them as
+# misses so they are simply rewritten
+SNAPSHOT_FORMAT_VERSION = 1
+
+# magic, format version, version float, version string id (or -1), number of strings, number of objects, number of
+# field ids, length in bytes of the string blob
+_HEADER = struct.Struct("<8sHdiIIIQ")
+
+
+def _little_endian_bytes(values):
+    if sys.byteorder == "big":  # pragma: no cover
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _array_from_bytes(typecode, data, start, count):
+    values = array(typecode)
+    end = start + count * values.itemsize
+    values.frombytes(data[start:end])
+    if sys.byteorder == "big":  # pragma: no cover
+        values.byteswap()
+    return values, end
+
+
+def snapshot_bytes(idf_structure):
+    """
+    This function encodes an IDFStructure into the binary snapshot format.  Every distinct string in the model (object
+    types, field values, comment lines) is stored once in a string table, and each object is stored as a type id, a
+    comment flag and a run of string ids, with one offset per object into the run of all field ids.  Loading a
+    snapshot therefore decodes the text once and never re-tokenizes it.
+
+    Lazily processed objects are split into fields in order to be stored.
+
+    :param IDFStructure idf_structure: The IDF structure to encode
+    :return: The snapshot bytes
+    :raises ProcessingException: if a string contains a NUL character, which the string table uses as its separator
+    """
+    string_ids = {}
+    object_types = array("I")
+    comment_flags = array("B")
+    offsets = array("I", [0])
+    field_ids = array("I")
+    for idf_object in idf_structure.objects:
+        object_types.append(string_ids.setdefault(idf_object.object_name, len(string_ids)))
+        comment_flags.append(1 if idf_object.comment else 0)
+        field_ids.extend([string_ids.setdefault(f, len(string_ids)) for f in idf_object.fields])
+        offsets.append(len(field_ids))
+    if idf_structure.version_string is None:
+        version_id = -1
+    else:
+        version_id = string_ids.setdefault(idf_structure.version_string, len(string_ids))
+    blob_text = "\0".join(string_ids)
+    if blob_text.count("\0") != max(len(string_ids) - 1, 0):
+        raise exceptions.ProcessingException("IDF snapshot strings cannot contain NUL characters")
+    string_blob = blob_text.encode("utf-8")
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, idf_structure.version_float or 0.0, version_id, len(string_ids),
+        len(object_types), len(field_ids), len(string_blob)
+    )
+    return b"".join([
+        header, string_blob, _little_endian_bytes(object_types), comment_flags.tobytes(),
+        _little_endian_bytes(offsets), _little_endian_bytes(field_ids)
+    ])
+
+
+def structure_from_snapshot(data, file_path="/snapshot/idf", object_name_transform=None, intern_strings=False):
+    """
+    This function rebuilds an IDFStructure from snapshot bytes.  Equal field values share a single string instance, as
+    the snapshot stores each distinct string only once.
+
+    :param bytes data: The snapshot bytes, as returned from snapshot_bytes()
+    :param str file_path: The file path to record on the resulting structure
+    :param object_name_transform: An optional function applied once to each distinct object type, such as replacing it
+                                  with the canonical IDD spelling
+    :param bool intern_strings: If True, every distinct string is also interned, so values are shared across models
+    :return: An IDFStructure instance with fully split objects
+    :raises ProcessingException: if the data is not a snapshot, has another format version, is truncated or corrupt
+    """
+    try:
+        magic, format_version, version_float, version_id, num_strings, num_objects, num_field_ids, blob_length = \
+            _HEADER.unpack_from(data)
+    except struct.error:
+        raise exceptions.ProcessingException("IDF snapshot is truncated or is not a snapshot")
+    if magic != SNAPSHOT_MAGIC:
+        raise exceptions.ProcessingException("Data is not an IDF snapshot")
+    if format_version != SNAPSHOT_FORMAT_VERSION:
+        raise exceptions.ProcessingException("Unsupported IDF snapshot format version {}".format(format_version))
+    position = _HEADER.size
+    expected_length = position + blob_length + num_objects * 9 + 4 + num_field_ids * 4
+    if len(data) != expected_length:
+        raise exceptions.ProcessingException("IDF snapshot is truncated or has unexpected trailing data")
+    try:
+        strings = bytes(data[position:position + blob_length]).decode("utf-8").split("\0") if num_strings else []
+    except UnicodeDecodeError:
+        raise exceptions.ProcessingException("IDF snapshot string table is not valid UTF-8")
+    if len(strings) != num_strings or version_id < -1:
+        raise exceptions.ProcessingException("IDF snapshot string table is corrupt")
+    position += blob_length
+    if intern_strings:
+        strings = [sys.intern(s) for s in strings]
+    try:
+        object_types, position = _array_from_bytes("I", data, position, num_objects)
+        comment_flags, position = _array_from_bytes("B", data, position, num_objects)
+        offsets, position = _array_from_bytes("I", data, position, num_objects + 1)
+        field_ids, position = _array_from_bytes("I", data, position, num_field_ids)
+    except ValueError:
+        raise exceptions.ProcessingException("IDF snapshot object tables are corrupt")
+    if offsets[0] != 0 or offsets[-1] != num_field_ids:
+        raise exceptions.ProcessingException("IDF snapshot object tables are corrupt")
+    object_names = {}
+    idf_objects = []
+    try:
+        for index in range(num_objects):
+            fields = [strings[i] for i in field_ids[offsets[index]:offsets[index + 1]]]
+            if comment_flags[index]:
+                idf_objects.append(IDFObject(fields, True))
+                continue
+            type_id = object_types[index]
+            object_name = object_names.get(type_id)
+            if object_name is None:
+                object_name = strings[type_id]
+                if object_name_transform is not None:
+                    object_name = object_name_transform(object_name)
+                object_names[type_id] = object_name
+            fields.insert(0, object_name)
+            idf_objects.append(IDFObject(fields))
+        idf_structure = IDFStructure(file_path)
+        idf_structure.version_string = None if version_id == -1 else strings[version_id]
+    except IndexError:
+        raise exceptions.ProcessingException("IDF snapshot refers to strings that are not in its string table")
+    idf_structure.version_float = version_float
+    idf_structure.objects = idf_objects
+    return idf_structure
+
+
+def write_snapshot_file(idf_structure, file_path):
+    """
+    This function writes an IDFStructure to a snapshot file.
+
+    :param IDFStructure idf_structure: The IDF structure to encode
+    :param str file_path: The path of the snapshot file to write
+    :return: None
+    """
+    with open(file_path, "wb") as f:
+        f.write(snapshot_bytes(idf_structure))
+
+
+def read_snapshot_file(file_path):
+    """
+    This function reads an IDFStructure back from a snapshot file.
+
+    :param str file_path: The path of the snapshot file to read
+    :return: An IDFStructure instance whose file_path is the snapshot path
+    :raises ProcessingException: if the file does not exist or is not a valid snapshot
+    """
+    if not os.path.exists(file_path):
+        raise exceptions.ProcessingException("Input snapshot file not found=\"" + file_path + "\"")
+    with open(file_path, "rb") as f:
+        return structure_from_snapshot(f.read(), file_path)
+
+
+class IDFSnapshotCache:
+    """
+    A directory of IDF snapshots keyed by the hash of the IDF file contents.  When given to an IDFProcessor, processing
+    a file whose contents have been seen before loads the snapshot instead of parsing the file again, and editing the
+    file changes its hash so a stale snapshot is never used.
+
+    Constructor parameters:
+
+    :param str cache_dir: The directory holding the snapshot files; it is created if it does not exist
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key_for_bytes(data):
+        """
+        :param bytes data: The raw contents of an IDF file
+        :return: The cache key for these contents
+        """
+        return hashlib.sha256(data).hexdigest()
+
+    def path_for_key(self, key):
+        """
+        :param str key: A cache key, as returned from key_for_bytes()
+        :return: The path of the snapshot file for this key
+        """
+        return os.path.join(self.cache_dir, key + ".idfsnap")
+
+    def load(self, key, file_path, **snapshot_options):
+        """
+        Loads the cached structure for a key.  A snapshot that cannot be read, for example one written with an older
+        snapshot format, is treated as a miss.
+
+        :param str key: A cache key, as returned from key_for_bytes()
+        :param str file_path: The file path to record on the resulting structure
+        :param snapshot_options: Additional keyword arguments for structure_from_snapshot()
+        :return: The cached IDFStructure, or None if there is no usable snapshot for the key
+        """
+        try:
+            with open(self.path_for_key(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            return structure_from_snapshot(data, file_path, **snapshot_options)
+        except exceptions.ProcessingException as e:
+            module_logger.debug("Ignoring unusable IDF snapshot for key {}: {}".format(key, e))
+            return None
+
+    def store(self, key, idf_structure):
+        """
+        Stores the snapshot of a structure under a key.  The snapshot is written to a temporary file first and then
+        moved into place, so concurrent readers never see a partially written snapshot.
+
+        :param str key: A cache key, as returned from key_for_bytes()
+        :param IDFStructure idf_structure: The structure to store
+        :return: None
+        """
+        data = snapshot_bytes(idf_structure)
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.path_for_key(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
@@ -0,0 +1,304 @@
+import sqlite3
+
+from energyplus_iddidf import exceptions
+from energyplus_iddidf.epjson import epjson_extensible_field_name, epjson_field_name
+
+FILES_TABLE = "idf_files"
+UNKNOWN_OBJECTS_TABLE = "idf_unknown_objects"
+# the columns every object type table starts with, ahead of the columns for the IDD fields
+KEY_COLUMNS = ["file_id", "object_index"]
+EXTRA_FIELDS_COLUMN = "extra_fields"
+
+
+def quote_identifier(identifier):
+    """
+    Quotes a table or column name for use in SQL, so IDD object types such as BuildingSurface:Detailed can be used
+    directly as table names.
+
+    :param str identifier: The name to quote
+    :return: The quoted name
+    """
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _column_type(idd_field):
+    if idd_field.field_an_index[0] == "A":
+        return "TEXT"
+    elif idd_field.meta_data.get("\\type", [""])[0] == "integer":
+        return "INTEGER"
+    return "REAL"
+
+
+def _unique_column_names(base_names, reserved_names):
+    used_names = set(reserved_names)
+    column_names = []
+    for index, base_name in enumerate(base_names):
+        base_name = base_name or "field_{}".format(index + 1)
+        column_name = base_name
+        suffix = 2
+        while column_name in used_names:
+            column_name = "{}_{}".format(base_name, suffix)
+            suffix += 1
+        used_names.add(column_name)
+        column_names.append(column_name)
+    return column_names
+
+
+def _insert_sql(table_name, column_names):
+    return "INSERT INTO {} ({}) VALUES ({})".format(
+        quote_identifier(table_name), ", ".join(quote_identifier(c) for c in column_names),
+        ", ".join("?" * len(column_names))
+    )
+
+
+class IDFObjectTable:
+    """
+    The SQLite table layout for one IDD object type.  The table holds one row per IDF object, keyed by the file id and
+    the position of the object in its file, followed by one column per IDD field.  Column names are the epJSON-style
+    property names of the fields (Vertex 1 X-coordinate becomes vertex_1_x_coordinate), and column types follow the
+    A/N index, INTEGER for integer fields.  Values that SQLite cannot store as numbers, such as autosize, are kept as
+    text, and blank fields are NULL.
+
+    Extensible objects can have thousands of fields, more than SQLite allows columns, so their extensible groups are
+    stored in a second table named <type>__extensions, with one row per group keyed by the file id, object index and
+    group index.  Fields of non-extensible objects beyond those listed in the IDD are joined into an extra_fields
+    column.
+
+    :ivar str table_name: The table name, which is the IDD object type
+    :ivar [str] column_names: The names of the field columns, in IDD order
+    :ivar [str] column_types: The SQLite types of the field columns
+    :ivar str name_column: The column holding the instance name if the type is named, otherwise None
+    :ivar str extension_table_name: The name of the extensible group table, or None if the type is not extensible
+    :ivar [str] extension_column_names: The names of the columns for the fields of one extensible group
+    :ivar [str] extension_column_types: The SQLite types of the extensible group columns
+
+    Constructor parameters:
+
+    :param IDDObject idd_object: The IDD object to build the table layout for
+    """
+
+    def __init__(self, idd_object):
+        self.table_name = idd_object.name
+        group_size = idd_object.extensible_group_size()
+        first_extensible = idd_object.first_extensible_field_index()
+        regular_fields = idd_object.fields if first_extensible is None else idd_object.fields[:first_extensible]
+        self.column_names = _unique_column_names(
+            [epjson_field_name(f.field_name) for f in regular_fields], KEY_COLUMNS + [EXTRA_FIELDS_COLUMN])
+        self.column_types = [_column_type(f) for f in regular_fields]
+        self.name_column = self.column_names[0] if idd_object.has_name_field() and self.column_names else None
+        self.insert_sql = _insert_sql(self.table_name, KEY_COLUMNS + self.column_names + [EXTRA_FIELDS_COLUMN])
+        if group_size and first_extensible is not None:
+            group_fields = idd_object.fields[first_extensible:first_extensible + group_size]
+            self.extension_table_name = self.table_name + "__extensions"
+            self.extension_column_names = _unique_column_names(
+                [epjson_extensible_field_name(f.field_name) for f in group_fields], KEY_COLUMNS + ["group_index"])
+            self.extension_column_types = [_column_type(f) for f in group_fields]
+            self.extension_insert_sql = _insert_sql(
+                self.extension_table_name, KEY_COLUMNS + ["group_index"] + self.extension_column_names)
+        else:
+            self.extension_table_name = None
+            self.extension_column_names = []
+            self.extension_column_types = []
+            self.extension_insert_sql = None
+
+    def create_statements(self):
+        """
+        :return: A list of SQL statements that create the tables and indexes if they do not already exist
+        """
+        table = quote_identifier(self.table_name)
+        key_columns = [
+            "file_id INTEGER NOT NULL REFERENCES {}(file_id)".format(FILES_TABLE), "object_index INTEGER NOT NULL"
+        ]
+        columns = key_columns + [
+            "{} {}".format(quote_identifier(n), t) for n, t in zip(self.column_names, self.column_types)
+        ]
+        columns.append("{} TEXT".format(EXTRA_FIELDS_COLUMN))
+        statements = [
+            "CREATE TABLE IF NOT EXISTS {} ({}, PRIMARY KEY (file_id, object_index))".format(table, ", ".join(columns))
+        ]
+        if self.name_column is not None:
+            statements.append("CREATE INDEX IF NOT EXISTS {} ON {} ({} COLLATE NOCASE)".format(
+                quote_identifier(self.table_name + "__name"), table, quote_identifier(self.name_column)))
+        if self.extension_table_name is not None:
+            columns = key_columns + ["group_index INTEGER NOT NULL"] + [
+                "{} {}".format(quote_identifier(n), t)
+                for n, t in zip(self.extension_column_names, self.extension_column_types)
+            ]
+            statements.append("CREATE TABLE IF NOT EXISTS {} ({}, PRIMARY KEY (file_id, object_index, group_index))"
+                              .format(quote_identifier(self.extension_table_name), ", ".join(columns)))
+        return statements
+
+    def rows(self, file_id, object_index, fields):
+        """
+        Builds the rows to insert for one IDF object.
+
+        :param int file_id: The id of the file the object belongs to
+        :param int object_index: The zero-based position of the object in its file, counting comment blocks
+        :param [str] fields: The fields of the object, not including the object type
+        :return: A tuple of the row for the object table and a list of rows for the extensible group table
+        """
+        num_columns = len(self.column_names)
+        values = [f if f != "" else None for f in fields[:num_columns]]
+        values.extend([None] * (num_columns - len(values)))
+        extra_fields = fields[num_columns:]
+        extension_rows = []
+        if self.extension_table_name is not None:
+            group_size = len(self.extension_column_names)
+            for group_index, start in enumerate(range(0, len(extra_fields), group_size)):
+                group = [f if f != "" else None for f in extra_fields[start:start + group_size]]
+                group.extend([None] * (group_size - len(group)))
+                extension_rows.append([file_id, object_index, group_index] + group)
+            extra_fields = None
+        row = [file_id, object_index] + values + [",".join(extra_fields) if extra_fields else None]
+        return row, extension_rows
+
+
+class IDFSQLiteDatabase:
+    """
+    A SQLite database holding the objects of one or many IDF files, so a whole corpus of models can be queried with SQL
+    without parsing the files again.  Each IDD object type found in the files gets its own table (see IDFObjectTable),
+    objects of types the IDD does not know go into a generic idf_unknown_objects table, and the idf_files table lists
+    every file with its version.  Comment blocks are not stored.
+
+    All files in a database should be described by the same IDD, as the table layouts come from it.  Opening an
+    existing database appends to it.
+
+    Constructor parameters:
+
+    :param str database_path: The path of the SQLite database file, or ":memory:" for an in-memory database
+    :param IDDStructure idd_structure: The IDD structure describing the IDF files to add
+    """
+
+    def __init__(self, database_path, idd_structure):
+        self.database_path = database_path
+        self.idd_structure = idd_structure
+        self.connection = sqlite3.connect(database_path)
+        self._tables = {}
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS {files} (
+                file_id INTEGER PRIMARY KEY, file_path TEXT, version_string TEXT, version_float REAL
+            );
+            CREATE TABLE IF NOT EXISTS {unknown} (
+                file_id INTEGER NOT NULL REFERENCES {files}(file_id), object_index INTEGER NOT NULL,
+                object_type TEXT, fields TEXT, PRIMARY KEY (file_id, object_index)
+            );
+        """.format(files=FILES_TABLE, unknown=UNKNOWN_OBJECTS_TABLE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Closes the database connection.
+
+        :return: None
+        """
+        self.connection.close()
+
+    def table_for_type(self, object_type):
+        """
+        Returns the table layout used for an object type, which gives the column names to use in queries.  The table is
+        created the first time the type is seen.
+
+        :param str object_type: A case-insensitive IDD object type
+        :return: The IDFObjectTable for the type, or None if the IDD does not know the type
+        """
+        key = object_type.upper()
+        if key not in self._tables:
+            idd_object = self.idd_structure.get_object_by_type(object_type)
+            if idd_object is None or isinstance(idd_object, str):
+                self._tables[key] = None
+            else:
+                table = IDFObjectTable(idd_object)
+                for statement in table.create_statements():
+                    self.connection.execute(statement)
+                self._tables[key] = table
+        return self._tables[key]
+
+    def add_structures(self, idf_structures):
+        """
+        Adds IDF structures to the database.  All inserts happen in one transaction, so either every structure is
+        added or, if anything fails, none of them are.
+
+        :param idf_structures: An iterable of IDFStructure instances; lazily processed structures work as well
+        :return: A list of the file ids assigned to the structures, in order
+        :raises ProcessingException: if the database cannot be written
+        """
+        file_ids = []
+        try:
+            with self.connection:
+                for idf_structure in idf_structures:
+                    file_ids.append(self._insert_structure(idf_structure))
+        except sqlite3.Error as e:
+            # tables created inside the failed transaction were rolled back as well
+            self._tables = {}
+            raise exceptions.ProcessingException("Could not write IDF objects to SQLite database: {}".format(e))
+        return file_ids
+
+    def add_structure(self, idf_structure):
+        """
+        Adds a single IDF structure to the database, see add_structures().
+
+        :param IDFStructure idf_structure: The structure to add
+        :return: The file id assigned to the structure
+        """
+        return self.add_structures([idf_structure])[0]
+
+    def _insert_structure(self, idf_structure):
+        """
+        Internal worker that inserts one structure, grouping rows by table so each table gets a single executemany.
+        """
+        cursor = self.connection.execute(
+            "INSERT INTO {} (file_path, version_string, version_float) VALUES (?, ?, ?)".format(FILES_TABLE),
+            (idf_structure.file_path, idf_structure.version_string, idf_structure.version_float)
+        )
+        file_id = cursor.lastrowid
+        rows_by_sql = {}
+        unknown_rows = []
+        for object_index, idf_object in enumerate(idf_structure.objects):
+            if idf_object.comment:
+                continue
+            table = self.table_for_type(idf_object.object_name)
+            if table is None:
+                unknown_rows.append((file_id, object_index, idf_object.object_name, ",".join(idf_object.fields)))
+                continue
+            row, extension_rows = table.rows(file_id, object_index, idf_object.fields)
+            rows_by_sql.setdefault(table.insert_sql, []).append(row)
+            if extension_rows:
+                rows_by_sql.setdefault(table.extension_insert_sql, []).extend(extension_rows)
+        for insert_sql, rows in rows_by_sql.items():
+            self.connection.executemany(insert_sql, rows)
+        if unknown_rows:
+            self.connection.executemany(
+                "INSERT INTO {} VALUES (?, ?, ?, ?)".format(UNKNOWN_OBJECTS_TABLE), unknown_rows)
+        return file_id
+
+    def query(self, sql, parameters=()):
+        """
+        Runs a SQL query against the database.
+
+        :param str sql: The SQL query; object type tables must be quoted when their names contain colons
+        :param parameters: Optional query parameters
+        :return: A list of result rows, each a tuple
+        :raises ProcessingException: if the query fails
+        """
+        try:
+            return self.connection.execute(sql, parameters).fetchall()
+        except sqlite3.Error as e:
+            raise exceptions.ProcessingException("SQLite query failed: {}".format(e))
+
+
+def export_idf_structures_to_sqlite(idf_structures, database_path, idd_structure):
+    """
+    Writes IDF structures into a SQLite database in a single transaction, see IDFSQLiteDatabase.
+
+    :param idf_structures: An iterable of IDFStructure instances
+    :param str database_path: The path of the SQLite database file; an existing database is appended to
+    :param IDDStructure idd_structure: The IDD structure describing the IDF files
+    :return: A list of the file ids assigned to the structures, in order
+    """
+    with IDFSQLiteDatabase(database_path, idd_structure) as database:
+        return database.add_structures(idf_structures)
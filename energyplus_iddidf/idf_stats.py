@@ -0,0 +1,175 @@
+import heapq
+import logging
+import os
+import time
+
+from energyplus_iddidf import exceptions
+from energyplus_iddidf.idf_processor import IDFProcessor
+
+module_logger = logging.getLogger("eptransition.idf.stats")
+
+# the group reported for object types the IDD does not know
+UNKNOWN_GROUP = "(not in IDD)"
+
+
+class IDFStats:
+    """
+    The statistics of one IDF file, as gathered by IDFStatsCollector.
+
+    :ivar str file_path: The path of the IDF, or a descriptor for streams
+    :ivar int file_size: The size of the file in bytes, or None for streams
+    :ivar str version_string: The version from the first Version object, or None if there is none
+    :ivar str idd_version_string: The version of the IDD used for the groups, or None if no IDD was used
+    :ivar int num_objects: The number of objects, not counting comment blocks
+    :ivar int num_fields: The number of fields of all objects
+    :ivar int num_comment_blocks: The number of comment blocks
+    :ivar int num_comment_lines: The number of lines in all comment blocks
+    :ivar dict objects_by_type: Object type to a dictionary with the number of objects and fields of that type
+    :ivar dict objects_by_group: IDD group name to the number of objects in it, or None if no IDD was used
+    :ivar list largest_objects: Dictionaries describing the objects with the most fields, largest first, each with the
+                               type, the name, the number of fields and the object number (counting from 1 in file
+                               order, not counting comment blocks)
+    :ivar float parse_seconds: The time taken by the pass over the file
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.file_size = None
+        self.version_string = None
+        self.idd_version_string = None
+        self.num_objects = 0
+        self.num_fields = 0
+        self.num_comment_blocks = 0
+        self.num_comment_lines = 0
+        self.objects_by_type = {}
+        self.objects_by_group = None
+        self.largest_objects = []
+        self.parse_seconds = 0.0
+
+    def to_dict(self):
+        """
+        :return: A JSON serializable dictionary of the statistics, with types and groups ordered by object count
+        """
+        megabytes_per_second = None
+        if self.file_size is not None and self.parse_seconds > 0:
+            megabytes_per_second = round(self.file_size / 1e6 / self.parse_seconds, 2)
+        result = {
+            'file': self.file_path,
+            'file_size_bytes': self.file_size,
+            'version': self.version_string,
+            'idd_version': self.idd_version_string,
+            'num_objects': self.num_objects,
+            'num_object_types': len(self.objects_by_type),
+            'num_fields': self.num_fields,
+            'num_comment_blocks': self.num_comment_blocks,
+            'num_comment_lines': self.num_comment_lines,
+            'parse_seconds': round(self.parse_seconds, 4),
+            'megabytes_per_second': megabytes_per_second,
+            'objects_by_type': dict(sorted(self.objects_by_type.items(), key=lambda kv: (-kv[1]['objects'], kv[0]))),
+            'largest_objects': self.largest_objects,
+        }
+        if self.objects_by_group is not None:
+            result['objects_by_group'] = dict(sorted(self.objects_by_group.items(), key=lambda kv: (-kv[1], kv[0])))
+        return result
+
+
+class IDFStatsCollector:
+    """
+    This class gathers the statistics of an IDF in a single streaming pass (see IDFProcessor.iterate_objects), without
+    building an IDFStructure or splitting objects into fields, so memory use does not grow with the size of the file:
+    only the object currently being read, one counter per object type and the list of largest objects are kept.  This
+    makes it cheap to profile very large generated models.
+
+    Constructor parameters:
+
+    :param IDDStructure idd_structure: An optional IDD structure; if given, object types are reported with their IDD
+                                       spelling and objects are also counted by IDD group
+    :param int num_largest: The number of largest objects to report
+    """
+
+    def __init__(self, idd_structure=None, num_largest=10):
+        self.idd_structure = idd_structure
+        self.num_largest = num_largest
+        self._group_names = None
+        if idd_structure is not None:
+            self._group_names = {}
+            for group in idd_structure.groups:
+                if group is None:
+                    continue
+                for idd_object in group.objects:
+                    self._group_names.setdefault(idd_object.name.upper(), group.name)
+
+    def collect_given_file_path(self, file_path):
+        """
+        Gathers the statistics of an IDF file on disk.
+
+        :param str file_path: The path to an IDF file
+        :return: An IDFStats instance
+        :raises ProcessingException: if the file does not exist or is not a valid IDF
+        """
+        if not os.path.exists(file_path):
+            raise exceptions.ProcessingException("Input file not found=\"" + file_path + "\"")
+        processor = IDFProcessor(self.idd_structure, lazy=True)
+        stats = self._collect(processor.iterate_objects_given_file_path(file_path), file_path)
+        stats.file_size = os.path.getsize(file_path)
+        return stats
+
+    def collect_via_stream(self, idf_file_stream):
+        """
+        Gathers the statistics of an IDF from a file-like object.
+
+        :param file-like-object idf_file_stream: An IDF stream that can be iterated line by line
+        :return: An IDFStats instance
+        :raises ProcessingException: if the stream does not hold a valid IDF
+        """
+        processor = IDFProcessor(self.idd_structure, lazy=True)
+        return self._collect(processor.iterate_objects_via_stream(idf_file_stream), "/streamed/idf")
+
+    def _collect(self, idf_objects, file_path):
+        """
+        Internal worker that runs the pass over a stream of objects.
+        """
+        stats = IDFStats(file_path)
+        if self.idd_structure is not None:
+            stats.idd_version_string = self.idd_structure.version_string
+            stats.objects_by_group = {}
+        # upper case type to [reported type, objects, fields]
+        type_counts = {}
+        # a heap of (number of fields, negative object number, type, name), so ties keep the object that came first
+        largest = []
+        start = time.perf_counter()
+        for idf_object in idf_objects:
+            num_fields = idf_object.num_fields
+            if idf_object.comment:
+                stats.num_comment_blocks += 1
+                stats.num_comment_lines += num_fields
+                continue
+            stats.num_objects += 1
+            stats.num_fields += num_fields
+            object_type = idf_object.object_name
+            key = object_type.upper()
+            counts = type_counts.get(key)
+            if counts is None:
+                counts = type_counts[key] = [object_type, 0, 0]
+                if stats.objects_by_group is not None:
+                    counts.append(self._group_names.get(key, UNKNOWN_GROUP))
+            counts[1] += 1
+            counts[2] += num_fields
+            if stats.version_string is None and key == "VERSION":
+                stats.version_string = idf_object.instance_name
+            if self.num_largest and (len(largest) < self.num_largest or num_fields > largest[0][0]):
+                entry = (num_fields, -stats.num_objects, object_type, idf_object.instance_name)
+                if len(largest) < self.num_largest:
+                    heapq.heappush(largest, entry)
+                else:
+                    heapq.heapreplace(largest, entry)
+        stats.parse_seconds = time.perf_counter() - start
+        for object_type, num_objects, num_fields, *group in type_counts.values():
+            stats.objects_by_type[object_type] = {'objects': num_objects, 'fields': num_fields}
+            if group:
+                stats.objects_by_group[group[0]] = stats.objects_by_group.get(group[0], 0) + num_objects
+        stats.largest_objects = [
+            {'type': object_type, 'name': name, 'num_fields': num_fields, 'object_number': -negative_number}
+            for num_fields, negative_number, object_type, name in sorted(largest, reverse=True)
+        ]
+        return stats
@@ -0,0 +1,296 @@
+from io import StringIO
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from energyplus_iddidf.cli_service import (
+    Actions, CLIService, ExitCodes, expand_batch_inputs, run_batch, send_request, serve_stream, serve_unix_socket
+)
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_shared import publish_idd
+
+IDD_STRING = """
+!IDD_Version 12.9.0
+!IDD_BUILD abcdef1016
+\\group Simulation
+Version,
+  A1;  \\field Version Identifier
+
+Zone,
+  A1,  \\field Name
+  N1;  \\field Multiplier
+       \\minimum 1
+"""
+
+
+class OverlapCountingService(CLIService):
+    """
+    A service that records how many IDD checks run at the same time.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.running = 0
+        self.most_running = 0
+
+    def _idd_check(self, request):
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        time.sleep(0.02)
+        self.running -= 1
+        return super()._idd_check(request)
+
+
+class TestCLIService(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.idd_path = os.path.join(self.temp_dir, "Energy+.idd")
+        with open(self.idd_path, "w") as f:
+            f.write(IDD_STRING)
+        self.idf_path = os.path.join(self.temp_dir, "in.idf")
+        with open(self.idf_path, "w") as f:
+            f.write("Version,12.9;\nZone,Z1,0;\n")
+        self.service = CLIService()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_idd_actions_reuse_the_processed_idd(self):
+        result = self.service.handle({'action': Actions.IDDCheck, 'filename': self.idd_path})
+        self.assertEqual(ExitCodes.OK, result['exit_code'])
+        self.assertEqual(2, result['content']['num_objects'])
+        idd = self.service.idd_structure(self.idd_path)
+        result = self.service.handle({'action': Actions.FindIDDObjectsMatching, 'filename': self.idd_path,
+                                      'pattern': 'Z*'})
+        self.assertEqual(['Zone'], result['content']['matching_objects'])
+        self.assertIs(idd, self.service.idd_structure(self.idd_path))
+        result = self.service.handle({'action': Actions.SummarizeIDDObject, 'filename': self.idd_path,
+                                      'object_name': 'zone'})
+        self.assertEqual(["A1 : Name", "N1 : Multiplier"], result['content']['field'])
+
+    def test_summarize_uses_the_first_match(self):
+        result = self.service.handle({'action': Actions.SummarizeIDDObject, 'filename': self.idd_path,
+                                      'object_name': '*'})
+        self.assertEqual(["A1 : Version Identifier"], result['content']['field'])
+        result = self.service.handle({'action': Actions.SummarizeIDDObject, 'filename': self.idd_path,
+                                      'object_name': 'Site*'})
+        self.assertEqual(ExitCodes.BadArguments, result['exit_code'])
+
+    def test_search_idd(self):
+        index_dir = os.path.join(self.temp_dir, "indexes")
+        result = self.service.handle({'action': Actions.SearchIDD, 'filename': self.idd_path, 'query': 'multiplier',
+                                      'index_dir': index_dir})
+        self.assertEqual(ExitCodes.OK, result['exit_code'])
+        self.assertEqual([{'object': 'Zone', 'field': 'Multiplier', 'kind': 'field', 'text': 'Multiplier',
+                           'score': 10.0}], result['content']['hits'])
+        self.assertEqual(1, len(os.listdir(index_dir)))
+        # a new service finds the saved index, so the matching names come without processing the IDD
+        service = CLIService()
+        result = service.handle({'action': Actions.FindIDDObjectsMatching, 'filename': self.idd_path, 'pattern': 'V*',
+                                 'index_dir': index_dir})
+        self.assertEqual(['Version'], result['content']['matching_objects'])
+        self.assertEqual([], service.handle({'action': Actions.Ping})['content']['loaded_idd_files'])
+        result = service.handle({'action': Actions.SearchIDD, 'filename': self.idd_path, 'query': '[',
+                                 'mode': 'regex'})
+        self.assertEqual(ExitCodes.BadArguments, result['exit_code'])
+
+    def test_idf_actions(self):
+        result = self.service.handle({'action': Actions.ValidateIDF, 'filename': self.idf_path,
+                                      'idd': self.idd_path})
+        self.assertEqual(1, result['content']['num_issues'])
+        output_path = os.path.join(self.temp_dir, "out.epJSON")
+        result = self.service.handle({'action': Actions.Convert, 'filename': self.idf_path, 'idd': self.idd_path,
+                                      'output_file': output_path})
+        self.assertEqual(ExitCodes.OK, result['exit_code'])
+        with open(output_path) as f:
+            self.assertEqual({"Z1": {"multiplier": 0.0}}, json.load(f)["Zone"])
+
+    def test_idf_stats(self):
+        result = self.service.handle({'action': Actions.IDFStats, 'filename': self.idf_path, 'idd': self.idd_path})
+        self.assertEqual(ExitCodes.OK, result['exit_code'])
+        stats = result['content']['files'][0]
+        self.assertEqual(2, stats['num_objects'])
+        self.assertEqual({'Simulation': 2}, stats['objects_by_group'])
+        result = self.service.handle({'action': Actions.IDFStats, 'filename': self.temp_dir})
+        self.assertEqual(1, result['content']['num_files'])
+        self.assertNotIn('objects_by_group', result['content']['files'][0])
+
+    def test_bad_requests(self):
+        self.assertEqual(ExitCodes.BadArguments, self.service.handle({'action': 'fly'})['exit_code'])
+        result = self.service.handle({'action': Actions.IDDCheck, 'filename': os.path.join(self.temp_dir, 'no.idd')})
+        self.assertEqual(ExitCodes.BadArguments, result['exit_code'])
+        result = self.service.handle({'action': Actions.FindIDDObjectsMatching, 'filename': self.idd_path})
+        self.assertEqual(ExitCodes.BadArguments, result['exit_code'])
+        result = self.service.handle({'action': Actions.Convert, 'filename': self.idd_path, 'idd': self.idd_path,
+                                      'output_file': 'x'})
+        self.assertEqual(ExitCodes.BadArguments, result['exit_code'])
+        self.assertEqual(ExitCodes.BadArguments, json.loads(self.service.handle_line("[1]"))['exit_code'])
+
+    def test_serve_stream(self):
+        requests = "\n".join([
+            json.dumps({'id': 'a', 'action': Actions.IDDCheck, 'filename': self.idd_path}),
+            "",
+            json.dumps({'action': Actions.Shutdown}),
+            json.dumps({'id': 'never', 'action': Actions.Ping}),
+        ])
+        output = StringIO()
+        serve_stream(self.service, StringIO(requests), output)
+        responses = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(['a', None], [r.get('id') for r in responses])
+        self.assertEqual("Shutting down", responses[1]['message'])
+
+    def test_serve_stream_survives_bad_requests(self):
+        requests = "\n".join([
+            json.dumps({'id': 1, 'action': Actions.IDDCheck, 'filename': self.temp_dir}),
+            json.dumps({'id': 2, 'action': Actions.IDDCheck, 'filename': 5}),
+            json.dumps({'id': 3, 'action': Actions.Ping}),
+        ])
+        output = StringIO()
+        serve_stream(self.service, StringIO(requests), output)
+        responses = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([1, 2, 3], [r['id'] for r in responses])
+        self.assertEqual([ExitCodes.ProcessingError, ExitCodes.ProcessingError, ExitCodes.OK],
+                         [r['exit_code'] for r in responses])
+        self.assertTrue(responses[0]['message'].startswith("Request for idd_check failed"))
+
+    def test_serve_unix_socket(self):
+        socket_path = os.path.join(self.temp_dir, "server.sock")
+        server_thread = threading.Thread(target=serve_unix_socket, args=(self.service, socket_path))
+        server_thread.start()
+        for _ in range(100):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.01)
+        try:
+            result = send_request(socket_path, {'action': Actions.IDDCheck, 'filename': self.idd_path}, timeout=10)
+            self.assertEqual('12.9.0', result['content']['idd_version'])
+            with self.assertRaises(ProcessingException):
+                serve_unix_socket(CLIService(), socket_path)
+        finally:
+            send_request(socket_path, {'action': Actions.Shutdown}, timeout=10)
+            server_thread.join(10)
+        self.assertFalse(server_thread.is_alive())
+        self.assertFalse(os.path.exists(socket_path))
+        with self.assertRaises(ProcessingException):
+            send_request(socket_path, {'action': Actions.Ping})
+
+    def test_serve_unix_socket_runs_one_request_at_a_time(self):
+        service = OverlapCountingService()
+        socket_path = os.path.join(self.temp_dir, "server.sock")
+        server_thread = threading.Thread(target=serve_unix_socket, args=(service, socket_path))
+        server_thread.start()
+        for _ in range(100):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.01)
+        results = []
+
+        def client():
+            results.append(send_request(socket_path, {'action': Actions.IDDCheck, 'filename': self.idd_path}, 10))
+
+        try:
+            clients = [threading.Thread(target=client) for _ in range(6)]
+            for client_thread in clients:
+                client_thread.start()
+            for client_thread in clients:
+                client_thread.join(10)
+        finally:
+            send_request(socket_path, {'action': Actions.Shutdown}, timeout=10)
+            server_thread.join(10)
+        self.assertEqual([ExitCodes.OK] * 6, [r['exit_code'] for r in results])
+        self.assertEqual(1, service.most_running)
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.idd_path = os.path.join(self.temp_dir, "Energy+.idd")
+        with open(self.idd_path, "w") as f:
+            f.write(IDD_STRING)
+        self.model_dir = os.path.join(self.temp_dir, "models")
+        os.makedirs(os.path.join(self.model_dir, "nested"))
+        self.idf_paths = []
+        for name, zone in [("a.idf", "Z1,1"), ("b.idf", "Z2,0"), (os.path.join("nested", "c.idf"), "Z3,2")]:
+            path = os.path.join(self.model_dir, name)
+            with open(path, "w") as f:
+                f.write("Version,12.9;\nZone,{};\n".format(zone))
+            self.idf_paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_expand_batch_inputs(self):
+        a, b, c = self.idf_paths
+        self.assertEqual([a, b], expand_batch_inputs([self.model_dir]))
+        self.assertEqual([a, b, c], expand_batch_inputs([os.path.join(self.model_dir, "**", "*.idf")]))
+        manifest_path = os.path.join(self.model_dir, "manifest.txt")
+        with open(manifest_path, "w") as f:
+            f.write("# the nested model first\n\nnested/c.idf\n*.idf\nmissing.idf\n")
+        missing = os.path.join(self.model_dir, "missing.idf")
+        self.assertEqual([c, a, b, missing], expand_batch_inputs(["@" + manifest_path, a]))
+
+    def test_run_batch_in_process(self):
+        requests = [{'action': Actions.ValidateIDF, 'filename': path, 'idd': self.idd_path} for path in self.idf_paths]
+        requests.append({'action': Actions.ValidateIDF, 'filename': os.path.join(self.temp_dir, "missing.idf")})
+        output = StringIO()
+        self.assertEqual(ExitCodes.BadArguments, run_batch(requests, output))
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(5, len(records))
+        self.assertEqual([0, 1, 2, 3], [r['index'] for r in records[:4]])
+        self.assertEqual(self.idf_paths[1], records[1]['file'])
+        self.assertEqual(1, records[1]['content']['num_issues'])
+        self.assertEqual(0, records[0]['content']['num_issues'])
+        self.assertEqual(ExitCodes.BadArguments, records[3]['exit_code'])
+        summary = records[4]['summary']
+        self.assertEqual(Actions.ValidateIDF, summary['action'])
+        self.assertEqual(4, summary['num_requests'])
+        self.assertEqual(3, summary['num_ok'])
+        self.assertEqual(1, summary['num_failed'])
+        self.assertEqual(ExitCodes.BadArguments, summary['exit_code'])
+        self.assertGreaterEqual(summary['elapsed_seconds'], summary['request_seconds']['max'])
+
+    def test_run_batch_with_workers_and_a_shared_idd(self):
+        segment = publish_idd(CLIService().idd_structure(self.idd_path))
+        try:
+            requests = [
+                {'action': Actions.ValidateIDF, 'filename': path, 'idd': self.idd_path} for path in self.idf_paths
+            ]
+            output = StringIO()
+            self.assertEqual(ExitCodes.OK, run_batch(requests, output, jobs=2, shared_idd_names=[segment.name]))
+        finally:
+            segment.close()
+            segment.unlink()
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([0, 1, 2], sorted(r['index'] for r in records[:3]))
+        issues = {r['file']: r['content']['num_issues'] for r in records[:3]}
+        self.assertEqual({self.idf_paths[0]: 0, self.idf_paths[1]: 1, self.idf_paths[2]: 0}, issues)
+        self.assertEqual(2, records[3]['summary']['jobs'])
+        self.assertEqual(0, records[3]['summary']['num_failed'])
+
+    def test_run_batch_reports_unreadable_inputs(self):
+        idd_directory = os.path.join(self.temp_dir, "x.idd")
+        os.makedirs(idd_directory)
+        binary_path = os.path.join(self.model_dir, "e.idf")
+        with open(binary_path, "wb") as f:
+            f.write(b"Version,12.9;\nZone,Z\xff\xfe,1;\n")
+        requests = [
+            {'action': Actions.ValidateIDF, 'filename': self.idf_paths[0], 'idd': self.idd_path},
+            {'action': Actions.ValidateIDF, 'filename': binary_path, 'idd': self.idd_path},
+            {'action': Actions.IDDCheck, 'filename': idd_directory},
+        ]
+        for jobs in (1, 2):
+            output = StringIO()
+            self.assertEqual(ExitCodes.ProcessingError, run_batch(requests, output, jobs=jobs))
+            records = [json.loads(line) for line in output.getvalue().splitlines()]
+            codes = {r['index']: r['exit_code'] for r in records[:3]}
+            self.assertEqual({0: ExitCodes.OK, 1: ExitCodes.ProcessingError, 2: ExitCodes.ProcessingError}, codes)
+            summary = records[3]['summary']
+            self.assertEqual(3, summary['num_requests'])
+            self.assertEqual(2, summary['num_failed'])
+            self.assertEqual(ExitCodes.ProcessingError, summary['exit_code'])
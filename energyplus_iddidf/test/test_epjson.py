@@ -0,0 +1,223 @@
+from io import StringIO
+import json
+import os
+import tempfile
+import unittest
+
+from energyplus_iddidf.epjson import (
+    EpJSONObjectMapping, EpJSONProcessor, EpJSONWriter, convert_epjson_to_idf, convert_idf_to_epjson,
+    epjson_extensible_field_name, epjson_field_name, extension_names_from_schema
+)
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idf_objects import parse_numeric_field
+from energyplus_iddidf.idf_processor import IDFProcessor
+
+
+IDD_STRING = """
+!IDD_Version 15.1.0
+!IDD_BUILD abcdef3000
+\\group MyGroup
+Version,
+  A1;  \\field Version Identifier
+
+Zone,
+  A1,  \\field Name
+       \\required-field
+  N1,  \\field Direction of Relative North
+       \\units deg
+  N2,  \\field Multiplier
+       \\type integer
+  N3;  \\field Ceiling Height
+       \\autocalculatable
+
+Shape,
+  \\extensible:2
+  A1,  \\field Name
+  A2,  \\field Zone Name
+  N1,  \\field Vertex 1 X-coordinate
+       \\begin-extensible
+  N2;  \\field Vertex 1 Y-coordinate
+
+Output:Variable,
+  A1,  \\field Key Value
+  A2;  \\field Variable Name
+"""
+
+IDF_STRING = """
+Version,15.1;
+! a comment that epJSON will not keep
+Zone,Zone One,0.5,2,autocalculate;
+Zone,Zone Two,,,3.0;
+Shape,Shape One,Zone One,1,2,3,4,5,6;
+Output:Variable,*,Site Outdoor Air Drybulb Temperature;
+Output:Variable,*,Zone Mean Air Temperature;
+"""
+
+
+class TestEpJSONNames(unittest.TestCase):
+
+    def test_field_names(self):
+        self.assertEqual("vertex_1_x_coordinate", epjson_field_name("Vertex 1 X-coordinate"))
+        self.assertEqual("direction_of_relative_north", epjson_field_name("Direction of Relative North"))
+        self.assertEqual("vertex_x_coordinate", epjson_extensible_field_name("Vertex 1 X-coordinate"))
+        self.assertEqual("field", epjson_extensible_field_name("Field 1"))
+        self.assertEqual("", epjson_field_name(None))
+
+
+class TestEpJSONConversion(unittest.TestCase):
+
+    def setUp(self):
+        self.idd_structure = IDDProcessor().process_file_via_string(IDD_STRING)
+        self.idf_structure = IDFProcessor().process_file_via_string(IDF_STRING)
+
+    def test_mapping(self):
+        mapping = EpJSONObjectMapping(self.idd_structure.get_object_by_type("Shape"))
+        self.assertTrue(mapping.named)
+        self.assertEqual("extensions", mapping.extension_name)
+        self.assertEqual(["vertex_x_coordinate", "vertex_y_coordinate"], mapping.extension_property_names)
+        self.assertFalse(EpJSONObjectMapping(self.idd_structure.get_object_by_type("Output:Variable")).named)
+
+    def test_write_epjson(self):
+        document = json.loads(EpJSONWriter(self.idd_structure).epjson_string(self.idf_structure))
+        self.assertEqual({"Version 1": {"version_identifier": "15.1"}}, document["Version"])
+        self.assertEqual(
+            {"direction_of_relative_north": 0.5, "multiplier": 2, "ceiling_height": "Autocalculate"},
+            document["Zone"]["Zone One"]
+        )
+        self.assertEqual({"ceiling_height": 3.0}, document["Zone"]["Zone Two"])
+        self.assertEqual(
+            [{"vertex_x_coordinate": 1, "vertex_y_coordinate": 2}, {"vertex_x_coordinate": 3, "vertex_y_coordinate": 4},
+             {"vertex_x_coordinate": 5, "vertex_y_coordinate": 6}],
+            document["Shape"]["Shape One"]["extensions"]
+        )
+        self.assertEqual(["Output:Variable 1", "Output:Variable 2"], list(document["Output:Variable"].keys()))
+
+    def test_round_trip(self):
+        epjson_string = EpJSONWriter(self.idd_structure).epjson_string(self.idf_structure)
+        idf_structure = EpJSONProcessor(self.idd_structure).process_file_via_string(epjson_string)
+        self.assertEqual(15.1, idf_structure.version_float)
+        original = [o for o in self.idf_structure.objects if not o.comment]
+        self.assertEqual(len(original), len(idf_structure.objects))
+        for before, after in zip(original, idf_structure.objects):
+            self.assertEqual(before.object_name, after.object_name)
+            self.assertEqual(len(before.fields), len(after.fields))
+            for a, b in zip(before.fields, after.fields):
+                self.assertEqual(parse_numeric_field(a), parse_numeric_field(b))
+
+    def test_streaming_small_chunks(self):
+        epjson_string = EpJSONWriter(self.idd_structure).epjson_string(self.idf_structure)
+        processor = EpJSONProcessor(self.idd_structure, chunk_size=7)
+        objects = list(processor.iterate_objects_via_stream(StringIO(epjson_string)))
+        self.assertEqual(6, len(objects))
+        self.assertEqual(["Shape One", "Zone One", "1", "2", "3", "4", "5", "6"], objects[3].fields)
+
+    def test_empty_documents(self):
+        processor = EpJSONProcessor(self.idd_structure)
+        self.assertEqual([], processor.process_file_via_string("{}").objects)
+        idf_structure = processor.process_file_via_string('{"Zone": {}, "Version": {"V": {}}}')
+        self.assertEqual(["Version"], [o.object_name for o in idf_structure.objects])
+        self.assertEqual(0.0, idf_structure.version_float)
+
+    def test_malformed_documents(self):
+        processor = EpJSONProcessor(self.idd_structure)
+        for bad in ['[]', '{"Zone": {"Z1": {}', '{"Zone": {"Z1": 3}}', '{"Zone": {"Z1": {}} "Version"',
+                    '{"Zone": {"Z1": {} "Z2": {}}}', '{"Unknown": {"U1": {}}}']:
+            with self.assertRaises(ProcessingException):
+                processor.process_file_via_string(bad)
+
+    def test_write_errors(self):
+        writer = EpJSONWriter(self.idd_structure)
+        for bad_idf in ["Zone,Z1;Zone,z1;", "Unknown,U1;", "Output:Variable,*,Var,Extra;"]:
+            with self.assertRaises(ProcessingException):
+                writer.epjson_string(IDFProcessor().process_file_via_string(bad_idf))
+
+    def test_file_conversions(self):
+        temp_dir = tempfile.mkdtemp()
+        idf_path = os.path.join(temp_dir, "in.idf")
+        epjson_path = os.path.join(temp_dir, "out.epJSON")
+        round_trip_path = os.path.join(temp_dir, "round_trip.idf")
+        with open(idf_path, "w") as f:
+            f.write(IDF_STRING)
+        self.assertEqual(6, convert_idf_to_epjson(idf_path, epjson_path, self.idd_structure))
+        self.assertEqual(6, convert_epjson_to_idf(epjson_path, round_trip_path, self.idd_structure))
+        idf_structure = IDFProcessor().process_file_given_file_path(round_trip_path)
+        self.assertEqual(["Zone One", "0.5", "2", "Autocalculate"], idf_structure.objects[1].fields)
+        epjson_structure = EpJSONProcessor(self.idd_structure).process_file_given_file_path(epjson_path)
+        self.assertEqual(6, len(epjson_structure.objects))
+        EpJSONWriter(self.idd_structure).write_epjson(epjson_structure, epjson_path)
+        with self.assertRaises(ProcessingException):
+            EpJSONProcessor(self.idd_structure).process_file_given_file_path(os.path.join(temp_dir, "missing"))
+        with self.assertRaises(ProcessingException):
+            convert_epjson_to_idf(os.path.join(temp_dir, "missing"), round_trip_path, self.idd_structure)
+
+    def test_failed_conversions_keep_existing_output(self):
+        temp_dir = tempfile.mkdtemp()
+        output_path = os.path.join(temp_dir, "precious")
+        with open(output_path, "w") as f:
+            f.write("precious")
+        bad_idf_path = os.path.join(temp_dir, "bad.idf")
+        with open(bad_idf_path, "w") as f:
+            f.write("Zone,Z1;Zone,z1;")
+        bad_epjson_path = os.path.join(temp_dir, "bad.epJSON")
+        with open(bad_epjson_path, "w") as f:
+            f.write('{"Zone": {"Z1": {}}, "Unknown": {"U1": {}}}')
+        for convert, input_path in [
+            (convert_idf_to_epjson, os.path.join(temp_dir, "missing.idf")), (convert_idf_to_epjson, bad_idf_path),
+            (convert_epjson_to_idf, os.path.join(temp_dir, "missing.epJSON")), (convert_epjson_to_idf, bad_epjson_path),
+        ]:
+            with self.assertRaises(ProcessingException):
+                convert(input_path, output_path, self.idd_structure)
+            with open(output_path) as f:
+                self.assertEqual("precious", f.read())
+        self.assertEqual(["bad.epJSON", "bad.idf", "precious"], sorted(os.listdir(temp_dir)))
+
+    def test_extension_names_from_schema(self):
+        temp_dir = tempfile.mkdtemp()
+        schema_path = os.path.join(temp_dir, "Energy+.schema.epJSON")
+        with open(schema_path, "w") as f:
+            json.dump({"properties": {
+                "Shape": {"legacy_idd": {"fields": ["name"], "extension": "corners"}},
+                "Zone": {"legacy_idd": {"fields": ["name"]}},
+            }}, f)
+        extension_names = extension_names_from_schema(schema_path)
+        self.assertEqual({"SHAPE": "corners"}, extension_names)
+        writer = EpJSONWriter(self.idd_structure, extension_names)
+        document = json.loads(writer.epjson_string(IDFProcessor().process_file_via_string("Shape,S1,Z1,1,2;")))
+        self.assertEqual([{"vertex_x_coordinate": 1, "vertex_y_coordinate": 2}], document["Shape"]["S1"]["corners"])
+        with self.assertRaises(ProcessingException):
+            extension_names_from_schema(os.path.join(temp_dir, "missing"))
+        with open(schema_path, "w") as f:
+            f.write("[]")
+        with self.assertRaises(ProcessingException):
+            extension_names_from_schema(schema_path)
+
+
+class TestEpJSONFullIDD(unittest.TestCase):
+
+    def test_round_trip_real_file(self):
+        support_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "support_files")
+        idd_structure = IDDProcessor().process_file_given_file_path(os.path.join(support_dir, "Energy+.idd"))
+        idf_structure = IDFProcessor().process_file_given_file_path(os.path.join(support_dir, "1ZoneEvapCooler.idf"))
+        epjson_string = EpJSONWriter(idd_structure).epjson_string(idf_structure)
+        document = json.loads(epjson_string)
+        self.assertIn("vertices", document["BuildingSurface:Detailed"]["Zn001:Wall001"])
+        round_trip = EpJSONProcessor(idd_structure).process_file_via_string(epjson_string)
+        self.assertEqual(idf_structure.version_string, round_trip.version_string)
+        self.assertEqual(len([o for o in idf_structure.objects if not o.comment]), len(round_trip.objects))
+        # objects as EnergyPlus itself writes them, with the extensible group lists named per object
+        energyplus_epjson = {
+            "Version": {"Version 1": {"version_identifier": "8.6"}},
+            "Branch": {"Cooling Supply Inlet Branch": {"components": [{
+                "component_object_type": "Pump:VariableSpeed", "component_name": "Cooling Pump",
+                "component_inlet_node_name": "Cooling Supply Inlet Node",
+                "component_outlet_node_name": "Cooling Pump Outlet Node"
+            }]}},
+            "NodeList": {"Zone Inlet Nodes": {"nodes": [{"node_name": "Node 1"}, {"node_name": "Node 2"}]}},
+        }
+        structure = EpJSONProcessor(idd_structure).process_file_via_string(json.dumps(energyplus_epjson))
+        self.assertEqual(
+            ["Cooling Supply Inlet Branch", "", "Pump:VariableSpeed", "Cooling Pump", "Cooling Supply Inlet Node",
+             "Cooling Pump Outlet Node"], structure.objects[1].fields)
+        self.assertEqual(["Zone Inlet Nodes", "Node 1", "Node 2"], structure.objects[2].fields)
+        self.assertEqual(energyplus_epjson, json.loads(EpJSONWriter(idd_structure).epjson_string(structure)))
@@ -0,0 +1,104 @@
+import os
+import time
+import unittest
+
+from energyplus_iddidf.idd_diff import IDDDiffer, object_signature
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idd_schema import IDDSchemaProcessor, IDDSchemaWriter
+
+OLD_IDD = """
+!IDD_Version 9.1.0
+!IDD_BUILD abcdef3600
+\\group MyGroup
+Version,
+  A1;  \\field Version Identifier
+
+Zone,
+  \\min-fields 2
+  A1,  \\field Name
+  N1,  \\field Multiplier
+       \\default 1
+  N2;  \\field Ceiling Height
+
+Removed:Object,
+  A1;  \\field Name
+
+Lead Input;
+"""
+
+NEW_IDD = """
+!IDD_Version 9.2.0
+!IDD_BUILD abcdef3601
+\\group MyGroup
+Version,
+  A1;  \\field Version Identifier
+
+Zone,
+  \\min-fields 3
+  A1,  \\field Name
+  A2,  \\field Space Type
+  N1,  \\field Multiplier
+       \\default 2
+       \\minimum 1
+  N2;  \\field Zone Ceiling Height
+
+\\group NewGroup
+Added:Object,
+  A1;  \\field Name
+
+Simulation Data;
+"""
+
+
+class TestIDDDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.old = IDDProcessor().process_file_via_string(OLD_IDD)
+        self.new = IDDProcessor().process_file_via_string(NEW_IDD)
+
+    def test_signatures(self):
+        old_version = self.old.get_object_by_type("Version")
+        new_version = self.new.get_object_by_type("Version")
+        self.assertEqual(object_signature(old_version, "MyGroup"), object_signature(new_version, "MyGroup"))
+        self.assertNotEqual(object_signature(old_version, "MyGroup"), object_signature(new_version, "Other"))
+
+    def test_object_changes(self):
+        result = IDDDiffer().diff(self.old, self.new).to_dict()
+        self.assertEqual("9.1.0", result['old_version'])
+        self.assertEqual({'added_objects': 2, 'removed_objects': 2, 'changed_objects': 1}, result['summary'])
+        self.assertEqual(["Added:Object", "Simulation Data"], result['added_objects'])
+        self.assertEqual(["Removed:Object", "Lead Input"], result['removed_objects'])
+
+    def test_field_changes(self):
+        zone = IDDDiffer().diff(self.old, self.new).changed_objects[0]
+        self.assertEqual("Zone", zone.name)
+        self.assertEqual({'\\min-fields': {'old': ['2'], 'new': ['3']}}, zone.meta_data_changes)
+        self.assertEqual([{'index': 1, 'an_index': 'A2', 'field_name': 'Space Type'}], zone.added_fields)
+        self.assertEqual([], zone.removed_fields)
+        self.assertEqual([{'an_index': 'N2', 'old_name': 'Ceiling Height', 'new_name': 'Zone Ceiling Height'}],
+                         zone.renamed_fields)
+        self.assertEqual([{'field_name': 'Multiplier', 'old_index': 1, 'new_index': 2},
+                          {'field_name': 'Zone Ceiling Height', 'old_index': 2, 'new_index': 3}], zone.moved_fields)
+        self.assertEqual([{'field_name': 'Multiplier', 'changes': {
+            '\\default': {'old': ['1'], 'new': ['2']}, '\\minimum': {'old': None, 'new': ['1']}
+        }}], zone.field_changes)
+
+    def test_identical(self):
+        result = IDDDiffer().diff(self.old, self.old)
+        self.assertEqual([], result.added_objects + result.removed_objects + result.changed_objects)
+
+
+class TestIDDDiffFullIDD(unittest.TestCase):
+
+    def test_full_idd_diff_speed(self):
+        idd_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "support_files", "Energy+.idd")
+        old = IDDProcessor().process_file_given_file_path(idd_path)
+        # an independent copy of the same IDD to modify
+        new = IDDSchemaProcessor().process_file_via_string(IDDSchemaWriter().schema_string(old))
+        new.get_object_by_type("Zone").fields[1].meta_data["\\default"] = ["15"]
+        new.groups[0].objects.pop()
+        start = time.perf_counter()
+        result = IDDDiffer().diff(old, new)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(1, len(result.removed_objects))
+        self.assertEqual(["Zone"], [o.name for o in result.changed_objects])
@@ -1,6 +1,8 @@
+import pickle
 from unittest import TestCase
 
-from energyplus_iddidf.idd_objects import IDDGroup, IDDObject, IDDField
+from energyplus_iddidf.idd_objects import IDDGroup, IDDObject, IDDField, IDDStructure, normalize_field_name
+from energyplus_iddidf.idd_processor import IDDProcessor
 
 
 class TestIDDObjectRepresentations(TestCase):
@@ -11,3 +13,131 @@ class TestIDDObjectRepresentations(TestCase):
         self.assertIsInstance(str(o), str)
         f = IDDField("field_name")
         self.assertIsInstance(str(f), str)
+
+    def test_canonical_object_name(self):
+        idd = IDDStructure("/dummy/path")
+        g = IDDGroup("group_name")
+        g.objects.append(IDDObject("Zone:Thing"))
+        idd.groups.append(g)
+        idd.single_line_objects.append("Lead Input")
+        self.assertEqual("Zone:Thing", idd.get_canonical_object_name("ZONE:THING"))
+        self.assertEqual("Lead Input", idd.get_canonical_object_name("lead input"))
+        self.assertIsNone(idd.get_canonical_object_name("Missing"))
+        # objects added after a lookup are still found
+        g.objects.append(IDDObject("Zone:Other"))
+        self.assertEqual("Zone:Other", idd.get_canonical_object_name("zone:other"))
+        # objects replaced without changing the number of objects are found too
+        g.objects[1] = IDDObject("Zone:Replaced")
+        self.assertIsNone(idd.get_object_by_type("Zone:Other"))
+        self.assertIs(g.objects[1], idd.get_object_by_type("zone:replaced"))
+        other_group = IDDGroup("other_group")
+        other_group.objects = [IDDObject("Zone:Thing2"), IDDObject("Zone:Other")]
+        idd.groups = [other_group]
+        self.assertIsNone(idd.get_object_by_type("Zone:Thing"))
+        self.assertEqual("Zone:Thing2", idd.get_canonical_object_name("zone:thing2"))
+        other_group.objects = [IDDObject("Zone:Thing3"), IDDObject("Zone:Other")]
+        self.assertIsNone(idd.get_object_by_type("Zone:Thing2"))
+        self.assertEqual("Zone:Thing3", idd.get_canonical_object_name("zone:thing3"))
+
+    def test_extensible_and_name_helpers(self):
+        idd_string = """
+!IDD_Version 1.3.0
+!IDD_BUILD abcdef3001
+\\group MyGroup
+Shape,
+  \\extensible:2 - repeat the last two fields
+  A1,  \\field Name
+  N1,  \\field Vertex 1 X
+       \\begin-extensible
+  N2;  \\field Vertex 1 Y
+
+Unmarked,
+  \\extensible:1
+  A1,  \\field Key
+       \\reference KeyNames
+  A2;  \\field Value 1
+
+Meter,
+  A1,  \\field Name
+       \\type external-list
+  A2;  \\field Frequency
+
+Plain,
+  N1;  \\field Value
+"""
+        idd = IDDProcessor().process_file_via_string(idd_string)
+        shape = idd.get_object_by_type("Shape")
+        self.assertEqual(2, shape.extensible_group_size())
+        self.assertEqual(1, shape.first_extensible_field_index())
+        self.assertTrue(shape.has_name_field())
+        unmarked = idd.get_object_by_type("Unmarked")
+        # without \\begin-extensible the start of the group is not guessed
+        self.assertIsNone(unmarked.first_extensible_field_index())
+        self.assertIsNone(unmarked.field_for_index(2))
+        self.assertTrue(unmarked.has_name_field())
+        self.assertFalse(idd.get_object_by_type("Meter").has_name_field())
+        plain = idd.get_object_by_type("Plain")
+        self.assertEqual(0, plain.extensible_group_size())
+        self.assertIsNone(plain.first_extensible_field_index())
+        self.assertFalse(plain.has_name_field())
+        self.assertFalse(IDDObject("Empty").has_name_field())
+        # fields past the listed ones resolve onto the first extensible group
+        self.assertIs(shape.fields[1], shape.field_for_index(1))
+        self.assertIs(shape.fields[1], shape.field_for_index(5))
+        self.assertIs(shape.fields[2], shape.field_for_index(500))
+        self.assertEqual("Vertex 1 Y", shape.field_name_for_index(2))
+        self.assertEqual("Vertex 3 X", shape.field_name_for_index(5))
+        self.assertEqual("Vertex 250 Y", shape.field_name_for_index(500))
+        self.assertIsNone(unmarked.field_name_for_index(7))
+        self.assertIsNone(plain.field_for_index(1))
+        self.assertIsNone(plain.field_name_for_index(1))
+
+    def test_field_index_by_name(self):
+        idd_string = """
+!IDD_Version 1.3.0
+!IDD_BUILD abcdef3002
+\\group MyGroup
+Shape,
+  \\extensible:2
+  A1,  \\field Name
+  N1,  \\field Vertex 1 X-coordinate
+       \\begin-extensible
+  N2;  \\field Vertex 1 Y-coordinate
+"""
+        shape = IDDProcessor().process_file_via_string(idd_string).get_object_by_type("Shape")
+        self.assertEqual("vertex_1_x_coordinate", normalize_field_name(" Vertex 1 X-coordinate"))
+        self.assertEqual(0, shape.field_index("NAME"))
+        self.assertEqual(2, shape.field_index("vertex_1_y_coordinate"))
+        self.assertEqual(199, shape.field_index("Vertex 100 X-coordinate"))
+        self.assertEqual(199, shape.field_index("VERTEX 100 X COORDINATE"))
+        self.assertEqual("Vertex 100 X-coordinate", shape.field_name_for_index(199))
+        self.assertIsNone(shape.field_index("Vertex 0 X-coordinate"))
+        self.assertIsNone(shape.field_index("Missing"))
+
+    def test_pickle_round_trip(self):
+        idd_string = """
+!IDD_Version 1.3.0
+!IDD_BUILD abcdef3003
+Lead Input;
+\\group MyGroup
+Shape,
+  \\memo A shape
+  \\extensible:1
+  A1,  \\field Name
+  N1;  \\field Vertex 1
+       \\begin-extensible
+       \\units m
+"""
+        idd = IDDProcessor().process_file_via_string(idd_string)
+        idd.get_object_by_type("Shape").field_index("Name")  # caches are not pickled
+        restored = pickle.loads(pickle.dumps(idd))
+        self.assertIsInstance(restored, IDDStructure)
+        for attribute in ["file_path", "version_string", "build_string", "version_float", "single_line_objects"]:
+            self.assertEqual(getattr(idd, attribute), getattr(restored, attribute))
+        self.assertEqual([None if g is None else g.name for g in idd.groups],
+                         [None if g is None else g.name for g in restored.groups])
+        shape = restored.get_object_by_type("shape")
+        self.assertEqual({"\\memo": ["A shape"], "\\extensible": [":1"]}, shape.meta_data)
+        self.assertEqual([("A1", "Name", {}), ("N1", "Vertex 1", {"\\begin-extensible": [""], "\\units": ["m"]})],
+                         [(f.field_an_index, f.field_name, f.meta_data) for f in shape.fields])
+        self.assertEqual(5, shape.field_index("Vertex 5"))
@@ -0,0 +1,131 @@
+from io import StringIO
+import os
+import shutil
+import tempfile
+import unittest
+
+from energyplus_iddidf import idd_processor
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idd_registry import IDDRegistry
+
+
+IDD_TEMPLATE = """!IDD_Version {version}
+!IDD_BUILD {build}
+\\group MyGroup
+Version,
+  A1;  \\field VersionID
+
+MyObject,
+  N1;  \\field Value
+       \\maximum {maximum}
+"""
+
+
+class TestIDDHeaderPeeking(unittest.TestCase):
+
+    def test_peek_header_stream(self):
+        idd_string = IDD_TEMPLATE.format(version="3.4.0", build="abcdef2000", maximum=1)
+        self.assertEqual(("3.4.0", "abcdef2000"), IDDProcessor.peek_header(StringIO(idd_string)))
+
+    def test_peek_header_stops_at_content(self):
+        idd_string = "!IDD_Version 3.4.0\n\\group MyGroup\n!IDD_BUILD abcdef2001\n"
+        self.assertEqual(("3.4.0", None), IDDProcessor.peek_header(StringIO(idd_string)))
+
+    def test_peek_header_missing_file(self):
+        with self.assertRaises(ProcessingException):
+            IDDProcessor.peek_header("/not/really/there.idd")
+
+
+class TestIDDRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for version, build, maximum in [("21.1.0", "abcdef2010", 1), ("21.2.0", "abcdef2011", 2),
+                                        ("22.1.0", "abcdef2012", 3)]:
+            with open(os.path.join(self.temp_dir, f"V{version}.idd"), "w") as f:
+                f.write(IDD_TEMPLATE.format(version=version, build=build, maximum=maximum))
+        self.idf_paths = []
+        for version in ["21.1", "21.2", "22.1", "21.1"]:
+            idf_path = os.path.join(self.temp_dir, f"model_{len(self.idf_paths)}.idf")
+            with open(idf_path, "w") as f:
+                f.write(f"Version,{version};\nMyObject,2.5;\n")
+            self.idf_paths.append(idf_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_directory_indexed_without_processing(self):
+        registry = IDDRegistry()
+        entries = registry.add_idd_directory(self.temp_dir)
+        self.assertEqual(3, len(entries))
+        self.assertEqual(["21.1.0", "21.2.0", "22.1.0"], [e.version_string for e in registry.registered])
+        self.assertEqual([], registry.loaded_versions)
+        self.assertIsInstance(str(entries[0]), str)
+
+    def test_find_by_version(self):
+        registry = IDDRegistry()
+        registry.add_idd_directory(self.temp_dir)
+        self.assertEqual("21.2.0", registry.find("21.2.0").version_string)
+        self.assertEqual("21.2.0", registry.find("21.2").version_string)
+        self.assertEqual("21.2.0", registry.find(21.2).version_string)
+        self.assertIsNone(registry.find("9.9"))
+        self.assertIsNone(registry.find("UNKNOWN VERSION"))
+        with self.assertRaises(ProcessingException):
+            registry.get_idd_for_version("9.9")
+
+    def test_loaded_idds_are_bounded(self):
+        registry = IDDRegistry(max_loaded=2)
+        registry.add_idd_directory(self.temp_dir)
+        first = registry.get_idd_for_version("21.1")
+        self.assertIs(first, registry.get_idd_for_version("21.1.0"))
+        registry.get_idd_for_version("21.2")
+        registry.get_idd_for_version("21.1")
+        registry.get_idd_for_version("22.1")
+        self.assertEqual(["21.1.0", "22.1.0"], registry.loaded_versions)
+        self.assertNotIn("21.2.0__abcdef2011", idd_processor.IDD_CACHE)
+
+    def test_idd_for_idf(self):
+        registry = IDDRegistry()
+        registry.add_idd_directory(self.temp_dir)
+        self.assertEqual("22.1.0", registry.get_idd_for_idf(self.idf_paths[2]).version_string)
+        self.assertEqual(["22.1.0"], registry.loaded_versions)
+
+    def test_validate_mixed_versions(self):
+        registry = IDDRegistry(max_loaded=1)
+        registry.add_idd_directory(self.temp_dir)
+        results = list(registry.validate_idf_files(self.idf_paths))
+        self.assertEqual(["21.1", "21.2", "22.1", "21.1"], [r[1] for r in results])
+        # the value of 2.5 is only above the maximum of the first two IDD versions
+        self.assertEqual([1, 1, 0, 1], [len(r[2]) for r in results])
+
+    def test_bad_registrations(self):
+        with self.assertRaises(ValueError):
+            IDDRegistry(max_loaded=0)
+        bad_idd = os.path.join(self.temp_dir, "bad.idd")
+        with open(bad_idd, "w") as f:
+            f.write("\\group NoHeaders\n")
+        with self.assertRaises(ProcessingException):
+            IDDRegistry().add_idd_path(bad_idd)
+
+    def test_same_minor_version_collisions(self):
+        patch_dir = os.path.join(self.temp_dir, "patches")
+        os.makedirs(patch_dir)
+        for name, version, build in [("a.idd", "21.2.1", "abcdef2013"), ("z.idd", "21.2.0", "abcdef2011")]:
+            with open(os.path.join(patch_dir, name), "w") as f:
+                f.write(IDD_TEMPLATE.format(version=version, build=build, maximum=2))
+        # the highest patch wins for major.minor lookups, whichever directory is registered first
+        for directories in [[self.temp_dir, patch_dir], [patch_dir, self.temp_dir]]:
+            registry = IDDRegistry()
+            for directory in directories:
+                registry.add_idd_directory(directory)
+            self.assertEqual("21.2.1", registry.find("21.2").version_string)
+            self.assertEqual("21.2.0", registry.find("21.2.0").version_string)
+            self.assertEqual(4, len(registry.registered))
+        # a second build of the same version is ambiguous
+        with open(os.path.join(patch_dir, "other_build.idd"), "w") as f:
+            f.write(IDD_TEMPLATE.format(version="21.2.0", build="abcdef2014", maximum=2))
+        registry = IDDRegistry()
+        registry.add_idd_directory(self.temp_dir)
+        with self.assertRaises(ProcessingException):
+            registry.add_idd_directory(patch_dir)
@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idd_schema import IDDSchemaProcessor, IDDSchemaWriter
+
+
+IDD_STRING = """
+!IDD_Version 16.2.0
+!IDD_BUILD abcdef3100
+\\group MyGroup
+Version,
+  \\unique-object
+  \\required-object
+  A1;  \\field Version Identifier
+
+Zone,
+  \\memo A zone
+  \\memo on two lines
+  \\min-fields 2
+  A1,  \\field Name
+       \\required-field
+       \\reference ZoneNames
+  N1,  \\field Multiplier
+       \\type integer
+       \\minimum> 0
+       \\maximum 100
+       \\default 1
+  N2,  \\field Volume
+       \\autocalculatable
+       \\default autocalculate
+  A2;  \\field Kind
+       \\type choice
+       \\key Normal
+       \\key Plenum
+
+\\group OtherGroup
+Shape,
+  \\extensible:2
+  A1,  \\field Name
+  A2,  \\field Zone Name
+       \\object-list ZoneNames
+  N1,  \\field Vertex 1 X-coordinate
+       \\begin-extensible
+       \\units m
+  N2;  \\field Vertex 1 Y-coordinate
+
+Lead Input;
+"""
+
+
+def assert_equivalent_idd(test_case, expected, actual):
+    test_case.assertEqual(expected.version_string, actual.version_string)
+    test_case.assertEqual(expected.version_float, actual.version_float)
+    test_case.assertEqual(expected.build_string, actual.build_string)
+    test_case.assertEqual(expected.single_line_objects, actual.single_line_objects)
+    test_case.assertEqual(len(expected.groups), len(actual.groups))
+    for expected_group, actual_group in zip(expected.groups, actual.groups):
+        test_case.assertEqual(expected_group.name, actual_group.name)
+        test_case.assertEqual([o.name for o in expected_group.objects], [o.name for o in actual_group.objects])
+        for expected_object, actual_object in zip(expected_group.objects, actual_group.objects):
+            test_case.assertEqual(expected_object.meta_data, actual_object.meta_data)
+            test_case.assertEqual(
+                [(f.field_an_index, f.field_name, f.meta_data) for f in expected_object.fields],
+                [(f.field_an_index, f.field_name, f.meta_data) for f in actual_object.fields]
+            )
+
+
+class TestIDDSchemaExport(unittest.TestCase):
+
+    def setUp(self):
+        self.idd_structure = IDDProcessor().process_file_via_string(IDD_STRING)
+        self.schema = IDDSchemaWriter().schema(self.idd_structure)
+
+    def test_object_properties(self):
+        self.assertEqual("16.2.0", self.schema["epJSON_schema_version"])
+        zone = self.schema["properties"]["Zone"]
+        self.assertEqual("MyGroup", zone["group"])
+        self.assertEqual("A zone on two lines", zone["memo"])
+        self.assertEqual(2, zone["min_fields"])
+        self.assertEqual({"type": "string", "reference": ["ZoneNames"], "is_required": True}, zone["name"])
+        fields = zone["patternProperties"]["^.*\\S.*$"]["properties"]
+        self.assertEqual(["multiplier", "volume", "kind"], list(fields.keys()))
+        self.assertEqual({"type": "integer", "exclusiveMinimum": 0, "maximum": 100, "default": 1},
+                         fields["multiplier"])
+        self.assertEqual({"anyOf": [{"type": "number"}, {"type": "string", "enum": ["Autocalculate"]}],
+                          "default": "autocalculate"}, fields["volume"])
+        self.assertEqual(["Normal", "Plenum"], fields["kind"]["enum"])
+        self.assertEqual(["name", "multiplier", "volume", "kind"], zone["legacy_idd"]["fields"])
+
+    def test_unique_and_extensible_objects(self):
+        version = self.schema["properties"]["Version"]
+        self.assertEqual(1, version["maxProperties"])
+        self.assertEqual(1, version["minProperties"])
+        self.assertIn(".*", version["patternProperties"])
+        shape = self.schema["properties"]["Shape"]
+        shape_fields = shape["patternProperties"]["^.*\\S.*$"]["properties"]
+        self.assertEqual({"type": "string", "data_type": "object_list", "object_list": ["ZoneNames"]},
+                         shape_fields["zone_name"])
+        vertex_fields = shape_fields["extensions"]["items"]["properties"]
+        self.assertEqual({"type": "number", "units": "m"}, vertex_fields["vertex_x_coordinate"])
+        self.assertEqual(["vertex_x_coordinate", "vertex_y_coordinate"], shape["legacy_idd"]["extensibles"])
+        self.assertEqual(["Lead Input"], self.schema["legacy_idd"]["single_line_objects"])
+
+    def test_round_trip_parity(self):
+        schema_string = IDDSchemaWriter().schema_string(self.idd_structure)
+        reloaded = IDDSchemaProcessor().process_file_via_string(schema_string)
+        assert_equivalent_idd(self, self.idd_structure, reloaded)
+        self.assertEqual("Zone", reloaded.get_object_by_type("ZONE").name)
+
+    def test_file_round_trip(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            schema_path = os.path.join(temp_dir, "idd.schema.epJSON")
+            IDDSchemaWriter().write_schema(self.idd_structure, schema_path)
+            reloaded = IDDSchemaProcessor().process_file_given_file_path(schema_path)
+            self.assertEqual(schema_path, reloaded.file_path)
+            assert_equivalent_idd(self, self.idd_structure, reloaded)
+            with self.assertRaises(ProcessingException):
+                IDDSchemaProcessor().process_file_given_file_path(os.path.join(temp_dir, "missing"))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_bad_schemas(self):
+        processor = IDDSchemaProcessor()
+        for bad in ['{', '{}', '{"legacy_idd": {"format": 99}}', json.dumps({
+            "epJSON_schema_version": "bad", "epJSON_schema_build": "x", "properties": {},
+            "legacy_idd": {"format": 1, "groups": [], "single_line_objects": []}
+        })]:
+            with self.assertRaises(ProcessingException):
+                processor.process_file_via_string(bad)
+
+
+class TestIDDSchemaFullIDD(unittest.TestCase):
+
+    def test_parity_and_speed_with_real_idd(self):
+        idd_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "support_files", "Energy+.idd")
+        idd_structure = IDDProcessor().process_file_given_file_path(idd_path)
+        schema_string = IDDSchemaWriter().schema_string(idd_structure)
+        start = time.perf_counter()
+        reloaded = IDDSchemaProcessor().process_file_via_string(schema_string)
+        load_time = time.perf_counter() - start
+        assert_equivalent_idd(self, idd_structure, reloaded)
+        # processing the text IDD takes several seconds; loading the schema should only take a fraction of one
+        self.assertLess(load_time, 2.0)
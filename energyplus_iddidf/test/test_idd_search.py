@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idd_search import IDDSearchIndex, IDDSearchIndexCache, SearchKinds, search_tokens
+
+IDD_STRING = """
+!IDD_Version 12.9.0
+!IDD_BUILD abcdef1017
+\\group Simulation
+Version,
+  A1;  \\field Version Identifier
+
+Zone,
+  \\memo Defines a thermal zone of the building.
+  A1,  \\field Name
+       \\reference ZoneNames
+  N1;  \\field Multiplier
+       \\note Multiplies the loads of the zone
+       \\default 1
+
+OutdoorAir:Node,
+  A1,  \\field Name
+  A2;  \\field Wind Angle Type
+       \\type choice
+       \\key Absolute
+       \\key RelativeToZone
+
+People,
+  A1,  \\field Name
+  A2;  \\field Zone Name
+       \\object-list ZoneNames
+
+\\group Schedules
+Schedule:Compact,
+  \\extensible:1
+  A1,  \\field Name
+  A2,  \\field Field 1
+       \\begin-extensible
+  A3,  \\field Field 2
+  A4;  \\field Field 3
+"""
+
+
+class TestIDDSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.idd_structure = IDDProcessor().process_file_via_string(IDD_STRING)
+        self.index = IDDSearchIndex.from_idd(self.idd_structure)
+
+    def test_search_tokens(self):
+        self.assertEqual(["vertex", "1", "x", "coordinate"], search_tokens("Vertex 1 X-coordinate"))
+        self.assertEqual(["air", "loop", "hvac", "outdoor", "air"], search_tokens("AirLoopHVAC:OutdoorAir"))
+
+    def test_contents(self):
+        self.assertEqual("12.9.0", self.index.version_string)
+        self.assertEqual(["Version", "Zone", "OutdoorAir:Node", "People", "Schedule:Compact"], self.index.object_names)
+        # only the first extensible group is indexed
+        self.assertEqual(["Name", "Field 1"], self.index.field_names("schedule:compact"))
+        self.assertIsNone(self.index.field_names("Nothing"))
+        self.assertEqual(["Zone"], self.index.match_object_names("Z*"))
+        self.assertEqual(["Schedule:Compact"], self.index.match_object_names("*:Compact"))
+
+    def test_words_and_ranking(self):
+        hits = self.index.search("zone")
+        self.assertEqual(("Zone", None, SearchKinds.Object), (hits[0].object_name, hits[0].field_name, hits[0].kind))
+        self.assertEqual(
+            [("People", "Zone Name", SearchKinds.Field)], [(h.object_name, h.field_name, h.kind) for h in hits[1:2]]
+        )
+        self.assertEqual(sorted(hits, key=lambda h: -h.score), hits)
+        kinds = {h.kind for h in hits}
+        self.assertIn(SearchKinds.Memo, kinds)
+        self.assertIn(SearchKinds.Note, kinds)
+        self.assertEqual("OutdoorAir:Node", self.index.search("outdoor air node")[0].object_name)
+        self.assertEqual("OutdoorAir:Node", self.index.search("OUTDOORAIR")[0].object_name)
+        self.assertEqual([], self.index.search("zones"))
+        self.assertEqual([], self.index.search(" - "))
+
+    def test_kinds_and_limit(self):
+        hits = self.index.search("ZoneNames", kinds=[SearchKinds.Reference, SearchKinds.ObjectList])
+        self.assertEqual(
+            [("Zone", "Name", SearchKinds.Reference), ("People", "Zone Name", SearchKinds.ObjectList)],
+            [(h.object_name, h.field_name, h.kind) for h in hits]
+        )
+        hits = self.index.search("relative", kinds=[SearchKinds.Key])
+        self.assertEqual(["RelativeToZone"], [h.text for h in hits])
+        self.assertEqual(1, len(self.index.search("name", limit=1)))
+        with self.assertRaises(ProcessingException):
+            self.index.search("zone", kinds=["bogus"])
+
+    def test_prefix_glob_and_regex(self):
+        hits = self.index.search("sched comp", mode="prefix")
+        self.assertEqual(["Schedule:Compact"], [h.object_name for h in hits])
+        hits = self.index.search("field ?", mode="glob")
+        self.assertEqual([("Schedule:Compact", "Field 1")], [(h.object_name, h.field_name) for h in hits])
+        hits = self.index.search("zone*", mode="glob", kinds=[SearchKinds.Object, SearchKinds.Field])
+        self.assertEqual(["Zone", "Zone Name"], [h.text for h in hits])
+        hits = self.index.search(r"^wind \w+ type$", mode="regex")
+        self.assertEqual([("OutdoorAir:Node", "Wind Angle Type")], [(h.object_name, h.field_name) for h in hits])
+        with self.assertRaises(ProcessingException):
+            self.index.search("(", mode="regex")
+        with self.assertRaises(ProcessingException):
+            self.index.search("zone", mode="fuzzy")
+
+    def test_round_trip(self):
+        loaded = IDDSearchIndex.from_bytes(self.index.to_bytes())
+        self.assertEqual(self.index.object_names, loaded.object_names)
+        self.assertEqual(self.index.num_entries, loaded.num_entries)
+        for query, mode in [("zone", "words"), ("sched", "prefix"), ("*name", "glob")]:
+            self.assertEqual(
+                [h.to_dict() for h in self.index.search(query, mode)], [h.to_dict() for h in loaded.search(query, mode)]
+            )
+        with self.assertRaises(ProcessingException):
+            IDDSearchIndex.from_bytes(b"EPIDDIDX")
+        with self.assertRaises(ProcessingException):
+            IDDSearchIndex.from_bytes(b"NOTANIDX" + bytes(10))
+        with self.assertRaises(ProcessingException):
+            IDDSearchIndex.from_bytes(self.index.to_bytes()[:20])
+
+
+class TestIDDSearchIndexCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.idd_path = os.path.join(self.temp_dir, "Energy+.idd")
+        with open(self.idd_path, "w") as f:
+            f.write(IDD_STRING)
+        self.processed = []
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _process(self, idd_path):
+        self.processed.append(idd_path)
+        return IDDProcessor().process_file_given_file_path(idd_path)
+
+    def test_index_is_built_once_per_idd_contents(self):
+        cache = IDDSearchIndexCache(os.path.join(self.temp_dir, "cache"))
+        first = cache.index_for_idd_file(self.idd_path, self._process)
+        second = cache.index_for_idd_file(self.idd_path, self._process)
+        self.assertEqual(1, len(self.processed))
+        self.assertEqual(first.object_names, second.object_names)
+        # a new build, since the IDD processor keeps the IDDs it has read by version and build
+        with open(self.idd_path, "w") as f:
+            f.write(IDD_STRING.replace("abcdef1017", "abcdef1018") + "\nSite:Location,\n  A1;  \\field Name\n")
+        third = cache.index_for_idd_file(self.idd_path, self._process)
+        self.assertEqual(2, len(self.processed))
+        self.assertIn("Site:Location", third.object_names)
+
+    def test_unusable_entries_are_misses(self):
+        cache = IDDSearchIndexCache(os.path.join(self.temp_dir, "cache"))
+        with open(self.idd_path, "rb") as f:
+            key = cache.key_for_bytes(f.read())
+        with open(cache.path_for_key(key), "wb") as f:
+            f.write(b"garbage")
+        self.assertIsNone(cache.load(key))
+        cache.index_for_idd_file(self.idd_path, self._process)
+        self.assertEqual(1, len(self.processed))
+        self.assertIsNotNone(cache.load(key))
+        with self.assertRaises(ProcessingException):
+            cache.index_for_idd_file(os.path.join(self.temp_dir, "missing.idd"), self._process)
+
+    def test_save_and_load(self):
+        index = IDDSearchIndex.from_idd(self._process(self.idd_path))
+        index_path = os.path.join(self.temp_dir, "saved.iddidx")
+        index.save(index_path)
+        self.assertEqual(index.object_names, IDDSearchIndex.load(index_path).object_names)
+        with self.assertRaises(ProcessingException):
+            IDDSearchIndex.load(os.path.join(self.temp_dir, "missing.iddidx"))
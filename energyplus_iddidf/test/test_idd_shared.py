@@ -0,0 +1,92 @@
+import multiprocessing
+import unittest
+
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idd_shared import SharedIDDStructure, attach_idd, detach_idd, encode_idd, publish_idd
+
+IDD_STRING = """
+!IDD_Version 12.9.0
+!IDD_BUILD abcdef1015
+Lead Input;
+\\group Simulation
+Version,
+  \\unique-object
+  \\required-object
+  A1;  \\field Version Identifier
+
+Zone,
+  \\memo A thermal zone
+  A1,  \\field Name
+       \\reference ZoneNames
+  N1;  \\field Multiplier
+       \\default 1
+
+\\group Schedules
+Schedule:Compact,
+  \\extensible:1
+  A1,  \\field Name
+  A2;  \\field Field 1
+       \\begin-extensible
+"""
+
+
+def _zone_field_names(segment_name):
+    idd = attach_idd(segment_name)
+    return [f.field_name for f in idd.get_object_by_type("ZONE").fields], idd.num_decoded_objects
+
+
+class TestSharedIDD(unittest.TestCase):
+
+    def setUp(self):
+        self.idd_structure = IDDProcessor().process_file_via_string(IDD_STRING)
+
+    def test_lazy_view(self):
+        view = SharedIDDStructure(encode_idd(self.idd_structure))
+        self.assertEqual("12.9.0", view.version_string)
+        self.assertEqual(12.9, view.version_float)
+        self.assertEqual("abcdef1015", view.build_string)
+        self.assertEqual("Schedule:Compact", view.get_canonical_object_name("schedule:compact"))
+        self.assertEqual("Lead Input", view.get_object_by_type("LEAD INPUT"))
+        self.assertIsNone(view.get_object_by_type("Missing"))
+        self.assertEqual(0, view.num_decoded_objects)
+        zone = view.get_object_by_type("zone")
+        self.assertIs(zone, view.get_object_by_type("Zone"))
+        self.assertEqual(["A thermal zone"], zone.meta_data["\\memo"])
+        self.assertEqual(["1"], zone.fields[1].meta_data["\\default"])
+        self.assertEqual(1, view.num_decoded_objects)
+        self.assertEqual(["Version"], [o.name for o in view.get_objects_with_meta_data("\\required-object")])
+        self.assertEqual(2, view.num_decoded_objects)
+        schedule = view.get_object_by_type("Schedule:Compact")
+        self.assertIs(schedule.fields[1], schedule.field_for_index(5))
+
+    def test_groups_match_the_original(self):
+        view = SharedIDDStructure(encode_idd(self.idd_structure))
+        self.assertEqual([None if g is None else g.name for g in self.idd_structure.groups],
+                         [None if g is None else g.name for g in view.groups])
+        for original, shared in zip(self.idd_structure.groups, view.groups):
+            if original is None:
+                continue
+            for original_object, shared_object in zip(original.objects, shared.objects):
+                self.assertEqual(original_object.name, shared_object.name)
+                self.assertEqual(original_object.meta_data, shared_object.meta_data)
+                self.assertEqual([(f.field_an_index, f.field_name, f.meta_data) for f in original_object.fields],
+                                 [(f.field_an_index, f.field_name, f.meta_data) for f in shared_object.fields])
+
+    def test_bad_buffer(self):
+        with self.assertRaises(ProcessingException):
+            SharedIDDStructure(b"short")
+        with self.assertRaises(ProcessingException):
+            SharedIDDStructure(b"NOTANIDD" + bytes(20))
+
+    def test_publish_and_attach_from_workers(self):
+        segment = publish_idd(self.idd_structure)
+        try:
+            self.assertIs(attach_idd(segment.name), attach_idd(segment.name))
+            with multiprocessing.Pool(2) as pool:
+                results = pool.map(_zone_field_names, [segment.name] * 4)
+            self.assertEqual([(["Name", "Multiplier"], 1)] * 4, results)
+            detach_idd(segment.name)
+        finally:
+            segment.close()
+            segment.unlink()
@@ -0,0 +1,99 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idf_accessors import AccessorFactory, IDFAccessor, accessor_class_name, write_accessor_module
+from energyplus_iddidf.idf_objects import AUTOSIZE, BLANK
+from energyplus_iddidf.idf_processor import IDFProcessor
+
+IDD_STRING = """
+!IDD_Version 12.9.0
+!IDD_BUILD abcdef1014
+\\group MyGroup
+Version,
+  A1;  \\field VersionID
+
+Surface:Shape,
+  \\extensible:2
+  A1,  \\field Name
+  N1,  \\field Tilt
+       \\autosizable
+  A2,  \\field Class
+  A3,  \\field Class
+  N2,  \\field Vertex 1 X
+       \\begin-extensible
+  N3,  \\field Vertex 1 Y
+  N4,  \\field Vertex 2 X
+  N5;  \\field Vertex 2 Y
+"""
+
+
+class TestAccessors(unittest.TestCase):
+
+    def setUp(self):
+        self.idd_structure = IDDProcessor().process_file_via_string(IDD_STRING)
+        idf_string = "Version,12.9;Surface:Shape,S1,autosize,Wall,,1,2,3,4,5,6;Surface:Shape,S2;"
+        self.idf_structure = IDFProcessor().process_file_via_string(idf_string)
+        self.factory = AccessorFactory(self.idd_structure, max_extensible_groups=2)
+
+    def test_typed_reads(self):
+        s1, s2 = self.factory.wrap_objects(self.idf_structure.objects[1:])
+        self.assertEqual("Surface_Shape", type(s1).__name__)
+        self.assertIs(type(s1), type(s2))
+        self.assertEqual("S1", s1.name)
+        self.assertIs(AUTOSIZE, s1.tilt)
+        self.assertEqual("Wall", s1.field_class)
+        self.assertEqual("", s1.field_class_2)
+        self.assertEqual(3.0, s1.vertex_2_x)
+        self.assertEqual([(1.0, 2.0), (3.0, 4.0), (5.0, 6.0)], s1.extensible_groups())
+        self.assertIs(BLANK, s2.tilt)
+        self.assertEqual("", s2.field_class)
+        self.assertEqual([], s2.extensible_groups())
+        self.assertFalse(hasattr(s1, "vertex_3_x"))
+
+    def test_reads_share_the_typed_view(self):
+        idf_object = self.idf_structure.objects[1]
+        surface = self.factory.wrap(idf_object)
+        self.assertIs(self.idd_structure.get_object_by_type("Surface:Shape"), surface.idd_object)
+        self.assertEqual(1.0, surface.vertex_1_x)
+        self.assertIs(idf_object.typed_fields(surface.idd_object), idf_object.typed_fields(surface.idd_object))
+        idf_object.fields[4] = "9"
+        self.assertEqual(9.0, surface.vertex_1_x)
+
+    def test_writes_share_the_field_list(self):
+        idf_object = self.idf_structure.objects[2]
+        surface = self.factory.wrap(idf_object)
+        surface.tilt = 30.5
+        surface.vertex_1_y = 7
+        surface.field_class = "Roof"
+        self.assertEqual(["S2", "30.5", "Roof", "", "", "7"], idf_object.fields)
+        surface.tilt = AUTOSIZE
+        idf_object.fields[0] = "Renamed"
+        self.assertEqual("Autosize", idf_object.fields[1])
+        self.assertEqual("Renamed", surface.name)
+        with self.assertRaises(AttributeError):
+            surface.color = "Red"
+
+    def test_unknown_types(self):
+        self.assertEqual("Object_3D_Thing", accessor_class_name("3D:Thing"))
+        with self.assertRaises(ProcessingException):
+            self.factory.class_for_type("Missing")
+
+    def test_written_module(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            module_path = os.path.join(temp_dir, "accessors_12_9.py")
+            write_accessor_module(self.idd_structure, module_path, max_extensible_groups=1)
+            spec = importlib.util.spec_from_file_location("accessors_12_9", module_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        self.assertEqual("12.9.0", module.IDD_VERSION)
+        self.assertEqual({"VERSION", "SURFACE:SHAPE"}, set(module.ACCESSOR_CLASSES))
+        surface = module.wrap(self.idf_structure.objects[1])
+        self.assertIsInstance(surface, IDFAccessor)
+        self.assertEqual(1.0, surface.vertex_1_x)
+        self.assertIs(AUTOSIZE, surface.tilt)
+        self.assertEqual([(1.0, 2.0), (3.0, 4.0), (5.0, 6.0)], surface.extensible_groups())
+        self.assertFalse(hasattr(surface, "vertex_2_x"))
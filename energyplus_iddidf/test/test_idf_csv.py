@@ -0,0 +1,102 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idf_csv import IDFCSVExporter, csv_file_name, export_idf_files_to_csv
+
+IDD_STRING = """
+!IDD_Version 8.6.0
+!IDD_BUILD abcdef3400
+\\group MyGroup
+Version,
+  A1;  \\field Version Identifier
+
+Material,
+  A1,  \\field Name
+  N1;  \\field Thickness
+
+Output:Variable,
+  A1,  \\field Key Value
+  A2;  \\field Variable Name
+"""
+
+IDF_ONE = """
+Version,8.6;
+! comments are not exported
+MATERIAL,Brick,0.1;
+Output:Variable,*,Zone Mean Air Temperature;
+Mystery,a,b,c;
+"""
+
+IDF_TWO = """
+Version,8.6;
+Material,Insulation Board,0.05;
+Output:Variable,*,Site Outdoor Air Drybulb Temperature;
+"""
+
+
+def read_csv(file_path):
+    with open(file_path, newline="") as f:
+        return list(csv.reader(f))
+
+
+class TestIDFCSVExport(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.temp_dir, "csv")
+        self.idd_structure = IDDProcessor().process_file_via_string(IDD_STRING)
+        self.idf_paths = []
+        for index, idf_string in enumerate([IDF_ONE, IDF_TWO]):
+            idf_path = os.path.join(self.temp_dir, "model_{}.idf".format(index))
+            with open(idf_path, "w") as f:
+                f.write(idf_string)
+            self.idf_paths.append(idf_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_file_names(self):
+        self.assertEqual("Output_Variable.csv", csv_file_name("Output:Variable"))
+        self.assertEqual("Coil_Cooling_DX.csv", csv_file_name("Coil:Cooling:DX"))
+
+    def test_export_across_files(self):
+        row_counts = export_idf_files_to_csv(self.idf_paths, self.output_dir, self.idd_structure)
+        self.assertEqual({"Version": 2, "Material": 2, "Output:Variable": 2, "Mystery": 1}, row_counts)
+        self.assertEqual(
+            [["source_file", "Name", "Thickness"], [self.idf_paths[0], "Brick", "0.1"],
+             [self.idf_paths[1], "Insulation Board", "0.05"]],
+            read_csv(os.path.join(self.output_dir, "Material.csv"))
+        )
+        self.assertEqual(
+            [["source_file", "Field 1", "Field 2", "Field 3"], [self.idf_paths[0], "a", "b", "c"]],
+            read_csv(os.path.join(self.output_dir, "Mystery.csv"))
+        )
+
+    def test_bounded_open_files(self):
+        with IDFCSVExporter(self.output_dir, self.idd_structure, max_open_files=1) as exporter:
+            self.assertEqual(7, exporter.export_files(self.idf_paths))
+            self.assertEqual(1, len(exporter._open_files))
+            paths = exporter.file_paths
+        rows = read_csv(paths["Output:Variable"])
+        self.assertEqual(["source_file", "Key Value", "Variable Name"], rows[0])
+        self.assertEqual(["Zone Mean Air Temperature", "Site Outdoor Air Drybulb Temperature"],
+                         [r[2] for r in rows[1:]])
+        # a second export into the same directory replaces the earlier files
+        export_idf_files_to_csv(self.idf_paths[1:], self.output_dir, self.idd_structure)
+        self.assertEqual(2, len(read_csv(paths["Output:Variable"])))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            IDFCSVExporter(self.output_dir, self.idd_structure, max_open_files=0)
+        with IDFCSVExporter(self.output_dir, self.idd_structure) as exporter:
+            with self.assertRaises(ProcessingException):
+                exporter.export_file(os.path.join(self.temp_dir, "missing.idf"))
+            with open(self.idf_paths[0], "w") as f:
+                f.write("A:B,1;\nA_B,2;\n")
+            with self.assertRaises(ProcessingException):
+                exporter.export_file(self.idf_paths[0])
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idf_diff import IDFDiffer
+from energyplus_iddidf.idf_processor import IDFProcessor
+
+IDD_STRING = """
+!IDD_Version 8.6.0
+!IDD_BUILD abcdef3500
+\\group MyGroup
+Version,
+  A1;  \\field Version Identifier
+
+Zone,
+  A1,  \\field Name
+  N1,  \\field Direction of Relative North
+  N2;  \\field Multiplier
+
+Output:Variable,
+  A1,  \\field Key Value
+  A2;  \\field Variable Name
+"""
+
+OLD_IDF = """
+Version,8.6;
+Zone,Z1,0,1;
+Zone,Z2,0,1;
+Zone,Z3,0,1;
+Output:Variable,*,Zone Mean Air Temperature;
+Output:Variable,*,Site Outdoor Air Drybulb Temperature;
+"""
+
+NEW_IDF = """
+! reformatted and reordered, which is not a change
+Version,8.6;
+ZONE, Z2 ,0,1,,;
+Zone,Z1,90,
+  1;
+Zone,Z4,0,1;
+Output:Variable,*,Zone Mean Air Temperature;
+Output:Variable,Z1,Site Outdoor Air Drybulb Temperature;
+"""
+
+
+class TestIDFDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.old = IDFProcessor().process_file_via_string(OLD_IDF)
+        self.new = IDFProcessor().process_file_via_string(NEW_IDF)
+        self.idd_structure = IDDProcessor().process_file_via_string(IDD_STRING)
+
+    def test_diff_with_idd(self):
+        result = IDFDiffer(self.idd_structure).diff(self.old, self.new)
+        self.assertFalse(result.is_empty)
+        as_dict = result.to_dict()
+        self.assertEqual({'added': 1, 'removed': 1, 'changed': 2}, as_dict['summary'])
+        self.assertEqual([{'type': 'Zone', 'fields': ['Z4', '0', '1']}], as_dict['added'])
+        self.assertEqual([{'type': 'Zone', 'fields': ['Z3', '0', '1']}], as_dict['removed'])
+        self.assertEqual([
+            {'type': 'Zone', 'name': 'Z1', 'fields': [
+                {'index': 1, 'field_name': 'Direction of Relative North', 'old': '0', 'new': '90'}
+            ]},
+            {'type': 'Output:Variable', 'name': None, 'fields': [
+                {'index': 0, 'field_name': 'Key Value', 'old': '*', 'new': 'Z1'}
+            ]},
+        ], as_dict['changed'])
+
+    def test_diff_without_idd(self):
+        # without an IDD the output variables are matched on their first field, so the edited one is added/removed
+        result = IDFDiffer().diff(self.old, self.new)
+        self.assertEqual({'added': 2, 'removed': 2, 'changed': 1}, result.to_dict()['summary'])
+        self.assertIsNone(result.changed[0].field_changes[0].field_name)
+
+    def test_identical_and_repeated_objects(self):
+        self.assertTrue(IDFDiffer().diff(self.old, self.old).is_empty)
+        repeated = IDFProcessor().process_file_via_string(OLD_IDF + "Zone,Z1,0,1;\n")
+        result = IDFDiffer().diff(self.old, repeated)
+        self.assertEqual([['Z1', '0', '1']], [list(o.fields) for o in result.added])
+        self.assertEqual([], result.changed)
+        shorter = IDFProcessor().process_file_via_string(OLD_IDF.replace("Zone,Z2,0,1;", "Zone,Z2;"))
+        changes = IDFDiffer().diff(self.old, shorter).changed[0].field_changes
+        self.assertEqual([(1, '0', ''), (2, '1', '')], [(c.index, c.old_value, c.new_value) for c in changes])
+
+    def test_diff_files(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            paths = []
+            for name, content in [("old.idf", OLD_IDF), ("new.idf", NEW_IDF)]:
+                paths.append(os.path.join(temp_dir, name))
+                with open(paths[-1], "w") as f:
+                    f.write(content)
+            result = IDFDiffer(self.idd_structure).diff_files(*paths)
+            self.assertEqual(2, len(result.changed))
+            with self.assertRaises(ProcessingException):
+                IDFDiffer().diff_files(paths[0], os.path.join(temp_dir, "missing.idf"))
+        finally:
+            shutil.rmtree(temp_dir)
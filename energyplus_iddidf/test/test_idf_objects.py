@@ -1,9 +1,13 @@
 from io import StringIO
+import pickle
 import tempfile
 import unittest
 
+from energyplus_iddidf.exceptions import ProcessingException
 from energyplus_iddidf.idd_processor import IDDProcessor
-from energyplus_iddidf.idf_objects import IDFObject, ValidationIssue
+from energyplus_iddidf.idf_objects import (
+    AUTOCALCULATE, AUTOSIZE, BLANK, FieldList, IDFObject, IDFStructure, ValidationIssue, parse_numeric_field
+)
 from energyplus_iddidf.idf_processor import IDFProcessor
 
 
@@ -30,6 +34,14 @@ class TestIDFObject(unittest.TestCase):
         obj.write_object(s)
         self.assertIsInstance(str(obj), str)
 
+    def test_num_fields(self):
+        lazy = IDFObject.from_raw_text("Zone", "Zone, Z1, 0,")
+        self.assertEqual(3, lazy.num_fields)
+        self.assertFalse(lazy.is_split)
+        self.assertEqual(0, IDFObject.from_raw_text("Lead Input", "Lead Input").num_fields)
+        self.assertEqual(2, IDFObject(["Zone", "Z1", "0"]).num_fields)
+        self.assertEqual(2, IDFObject(["! one", "! two"], True).num_fields)
+
 
 class TestSingleLineIDFValidation(unittest.TestCase):
     def test_valid_single_token_object_no_idd(self):
@@ -197,6 +209,155 @@ MyObject,
         self.assertEqual(len(issues), 2)
 
 
+class TestIDFChoiceValidation(unittest.TestCase):
+    def setUp(self):
+        idd_string = """
+!IDD_Version 12.9.0
+!IDD_BUILD abcdef1011
+\\group MyGroup
+Version,
+  A1;  \\field VersionID
+
+MyObject,
+  A1,  \\field Name
+  A2,  \\field Terrain
+       \\type choice
+       \\key Country
+       \\key City
+  A3;  \\field Free Text
+        """
+        self.idd_structure = IDDProcessor().process_file_via_string(idd_string)
+        self.idd_object = self.idd_structure.get_object_by_type('MyObject')
+
+    def test_valid_key_any_case(self):
+        for idf_string in ["Version,12.9;MyObject,A,City,x;", "Version,12.9;MyObject,A, cOUNTRY ,x;",
+                           "Version,12.9;MyObject,A,,x;", "Version,12.9;MyObject,A;"]:
+            idf_object = IDFProcessor().process_file_via_string(idf_string).get_idf_objects_by_type('MyObject')[0]
+            self.assertEqual(0, len(idf_object.validate(self.idd_object)))
+
+    def test_invalid_key(self):
+        idf_string = "Version,12.9;MyObject,A,Ocean,Ocean;"
+        idf_object = IDFProcessor().process_file_via_string(idf_string).get_idf_objects_by_type('MyObject')[0]
+        issues = idf_object.validate(self.idd_object)
+        self.assertEqual(1, len(issues))
+        self.assertEqual("Terrain", issues[0].field_name)
+        self.assertIn("Ocean", issues[0].message)
+
+    def test_keys_compiled_once(self):
+        terrain = self.idd_object.fields[1]
+        self.assertEqual(frozenset(["country", "city"]), terrain.choice_keys())
+        self.assertIs(terrain.choice_keys(), terrain.choice_keys())
+        self.assertIsNone(self.idd_object.fields[2].choice_keys())
+
+
+class TestExtensibleFieldValidation(unittest.TestCase):
+    def setUp(self):
+        idd_string = """
+!IDD_Version 12.9.0
+!IDD_BUILD abcdef1012
+\\group MyGroup
+Version,
+  A1;  \\field VersionID
+
+Shape,
+  \\extensible:2
+  A1,  \\field Name
+  N1,  \\field Vertex 1 X
+       \\begin-extensible
+       \\units m
+  N2,  \\field Vertex 1 Y
+       \\minimum 0
+       \\units m
+  N3,  \\field Vertex 2 X
+       \\units m
+  N4;  \\field Vertex 2 Y
+       \\minimum 0
+       \\units m
+        """
+        self.idd_structure = IDDProcessor().process_file_via_string(idd_string)
+        self.idd_object = self.idd_structure.get_object_by_type('Shape')
+        vertices = ["{},{}".format(i, i) for i in range(200)]
+        vertices[150] = "3,-1"
+        idf_string = "Version,12.9;Shape,S,{};".format(",".join(vertices))
+        self.idf_object = IDFProcessor().process_file_via_string(idf_string).get_idf_objects_by_type('Shape')[0]
+
+    def test_fields_past_the_idd_are_validated(self):
+        issues = self.idf_object.validate(self.idd_object)
+        self.assertEqual(1, len(issues))
+        self.assertEqual("Vertex 151 Y", issues[0].field_name)
+        self.assertEqual(151.0, self.idf_object.typed_value(303, self.idd_object))
+
+    def test_fields_past_the_idd_are_annotated(self):
+        lines = self.idf_object.object_string(self.idd_object).splitlines()
+        self.assertEqual(402, len(lines))
+        self.assertTrue(lines[-1].endswith("!- Vertex 200 Y {m}"))
+
+    def test_min_fields_reach_into_extensible_groups(self):
+        idd_string = """
+!IDD_Version 12.9.0
+!IDD_BUILD abcdef1022
+\\group MyGroup
+Version,
+  A1;  \\field VersionID
+
+Polygon,
+  \\extensible:2
+  \\min-fields 7
+  A1,  \\field Name
+  N1,  \\field Vertex 1 X
+       \\begin-extensible
+  N2,  \\field Vertex 1 Y
+       \\default 0
+  N3,  \\field Vertex 2 X
+  N4;  \\field Vertex 2 Y
+       \\default 0
+        """
+        idd_object = IDDProcessor().process_file_via_string(idd_string).get_object_by_type('Polygon')
+        idf_object = IDFObject(["Polygon", "P", "1", "", "2"])
+        issues = idf_object.validate(idd_object)
+        self.assertEqual(["P", "1", "0", "2", "0", "", "0"], idf_object.fields)
+        self.assertEqual(["Vertex 3 X"], [i.field_name for i in issues])
+
+
+class TestNamedFieldAccess(unittest.TestCase):
+    def setUp(self):
+        idd_string = """
+!IDD_Version 12.9.0
+!IDD_BUILD abcdef1013
+\\group MyGroup
+Version,
+  A1;  \\field VersionID
+
+Shape,
+  \\extensible:2
+  A1,  \\field Name
+  N1,  \\field Vertex 1 X
+       \\begin-extensible
+  N2;  \\field Vertex 1 Y
+        """
+        self.idd_structure = IDDProcessor().process_file_via_string(idd_string)
+        self.idf_structure = IDFProcessor().process_file_via_string("Version,12.9;! comment\nShape,S,1,2,3,4;")
+
+    def test_get_and_set(self):
+        self.idf_structure.bind(self.idd_structure)
+        shape = self.idf_structure.get_idf_objects_by_type("Shape")[0]
+        self.assertEqual("S", shape.get("name"))
+        self.assertEqual("4", shape.get("Vertex 2 Y"))
+        self.assertEqual("", shape.get("vertex_3_x"))
+        shape.set("Vertex 1 X", "10")
+        shape.set("Vertex 4 Y", "8")
+        self.assertEqual(["S", "10", "2", "3", "4", "", "", "", "8"], shape.fields)
+
+    def test_unbound_and_unknown(self):
+        shape = self.idf_structure.get_idf_objects_by_type("Shape")[0]
+        with self.assertRaises(ProcessingException):
+            shape.get("Name")
+        with self.assertRaises(ProcessingException):
+            shape.bind(self.idd_structure).set("Color", "Red")
+        with self.assertRaises(ProcessingException):
+            IDFObject(["Unknown", "x"]).bind(self.idd_structure)
+
+
 class TestIDFObjectValidation(unittest.TestCase):
     def setUp(self):
         idd_string = """
@@ -396,6 +557,126 @@ class TestGlobalSwap(unittest.TestCase):
         self.assertIn("MySecondKey", idf_object.fields)
 
 
+class TestTypedFields(unittest.TestCase):
+    def setUp(self):
+        idd_string = """
+!IDD_Version 14.1.0
+!IDD_BUILD abcdef1021
+\\group MyGroup
+MyObject,
+  A1,  \\field Name
+  N1,  \\field Value
+  N2,  \\field Size
+       \\autosizable
+  N3,  \\field Calc
+       \\autocalculatable
+  N4;  \\field Other
+"""
+        self.idd_structure = IDDProcessor().process_file_via_string(idd_string)
+        self.idd_object = self.idd_structure.get_object_by_type('MyObject')
+
+    def test_parse_numeric_field(self):
+        self.assertEqual(1.5, parse_numeric_field("1.5"))
+        self.assertIs(BLANK, parse_numeric_field(" "))
+        self.assertIs(AUTOSIZE, parse_numeric_field("AutoSize"))
+        self.assertIs(AUTOCALCULATE, parse_numeric_field("autocalculate"))
+        self.assertEqual("abc", parse_numeric_field("abc"))
+        self.assertEqual("AUTOSIZE", repr(AUTOSIZE))
+
+    def test_typed_fields(self):
+        obj = IDFObject(["MyObject", "1.0", "2.5", "Autosize", "AutoCalculate", "", "extra"])
+        typed = obj.typed_fields(self.idd_object)
+        self.assertEqual(("1.0", 2.5, AUTOSIZE, AUTOCALCULATE, BLANK, "extra"), typed)
+        self.assertEqual(2.5, obj.typed_value(1, self.idd_object))
+        self.assertEqual(tuple(obj.fields), obj.typed_fields(None))
+
+    def test_typed_fields_cached(self):
+        obj = IDFObject(["MyObject", "A", "2.5"])
+        self.assertIs(obj.typed_fields(self.idd_object), obj.typed_fields(self.idd_object))
+
+    def test_cache_invalidated_on_assignment(self):
+        obj = IDFObject(["MyObject", "A", "2.5"])
+        self.assertEqual(2.5, obj.typed_value(1, self.idd_object))
+        obj.fields[1] = "3.5"
+        self.assertEqual(3.5, obj.typed_value(1, self.idd_object))
+        obj.fields.append("autosize")
+        self.assertIs(AUTOSIZE, obj.typed_value(2, self.idd_object))
+        obj.fields = ["A", "4.5"]
+        self.assertIsInstance(obj.fields, FieldList)
+        self.assertEqual(4.5, obj.typed_value(1, self.idd_object))
+
+    def test_field_list_revision(self):
+        fields = FieldList(["a", "b"])
+        self.assertEqual(0, fields.revision)
+        fields[0] = "c"
+        del fields[0]
+        fields += ["d"]
+        fields *= 1
+        fields.extend(["e"])
+        fields.insert(0, "f")
+        fields.pop()
+        fields.remove("f")
+        fields.sort()
+        fields.reverse()
+        fields.clear()
+        self.assertEqual(11, fields.revision)
+        self.assertEqual([], fields)
+
+    def test_pickle_round_trip(self):
+        obj = IDFObject(["MyObject", "A", "2.5"])
+        obj.fields[1] = "3.5"
+        self.assertEqual(3.5, obj.typed_value(1, self.idd_object))
+        restored = pickle.loads(pickle.dumps(obj))
+        self.assertEqual(["A", "3.5"], restored.fields)
+        self.assertIsInstance(restored.fields, FieldList)
+        self.assertEqual(3.5, restored.typed_value(1, self.idd_object))
+        idf_structure = IDFProcessor().process_file_via_string("Version,14.1;\nMyObject,A,2.5;")
+        restored_structure = pickle.loads(pickle.dumps(idf_structure))
+        self.assertEqual(["A", "2.5"], restored_structure.objects[1].fields)
+
+
+class TestCanonicalHashing(unittest.TestCase):
+
+    def test_object_hash_ignores_formatting(self):
+        reference = IDFObject(["Zone", "Z1", "0"]).canonical_hash()
+        self.assertEqual(reference, IDFObject(["ZONE", "Z1", " 0 ", "", ""]).canonical_hash())
+        self.assertEqual(reference, IDFObject.from_raw_text("zone", "zone, Z1 ,0,").canonical_hash())
+        self.assertNotEqual(reference, IDFObject(["Zone", "z1", "0"]).canonical_hash())
+        self.assertNotEqual(reference, IDFObject(["Zone", "Z1", "", "0"]).canonical_hash())
+        self.assertIsNone(IDFObject(["! a comment"], True).canonical_hash())
+
+    def test_object_hash_invalidated_on_change(self):
+        obj = IDFObject(["Zone", "Z1", "0"])
+        original = obj.canonical_hash()
+        obj.fields[1] = "90"
+        changed = obj.canonical_hash()
+        self.assertNotEqual(original, changed)
+        obj.object_name = "Space"
+        self.assertNotEqual(changed, obj.canonical_hash())
+        obj.object_name = "Zone"
+        obj.fields = ["Z1", "0"]
+        self.assertEqual(original, obj.canonical_hash())
+
+    def test_fingerprint(self):
+        base = IDFProcessor().process_file_via_string("Version,8.6;\nZone,Z1,0;\nZone,Z2,0;\n")
+        reordered = IDFProcessor().process_file_via_string(
+            "! a new comment\nZONE,Z2,0,;\nVersion,8.6;\n  Zone, Z1,\n    0;  ! trailing\n")
+        self.assertEqual(32, len(base.fingerprint()))
+        self.assertEqual(base.fingerprint(), reordered.fingerprint())
+        duplicated = IDFProcessor().process_file_via_string("Version,8.6;\nZone,Z1,0;\nZone,Z2,0;\nZone,Z2,0;\n")
+        self.assertNotEqual(base.fingerprint(), duplicated.fingerprint())
+        base.objects[1].fields[1] = "45"
+        self.assertNotEqual(base.fingerprint(), reordered.fingerprint())
+
+    def test_hash_difference(self):
+        old = IDFProcessor().process_file_via_string("Version,8.6;\nZone,Z1,0;\nZone,Z2,0;\nZone,Z2,0;\n")
+        new = IDFProcessor().process_file_via_string("Version,8.6;\nZone,Z2,0;\nZone,Z1,90;\nZone,Z3,0;\n")
+        removed, added = old.hash_difference(new)
+        self.assertEqual([["Z1", "0"], ["Z2", "0"]], [list(o.fields) for o in removed])
+        self.assertEqual([["Z1", "90"], ["Z3", "0"]], [list(o.fields) for o in added])
+        self.assertEqual(([], []), old.hash_difference(old))
+
+
 class TestValidationIssue(unittest.TestCase):
 
     def test_validation_issue_info(self):
@@ -414,3 +695,31 @@ class TestValidationIssue(unittest.TestCase):
     def test_validation_issue_string(self):
         s = str(ValidationIssue("MyObject", ValidationIssue.ERROR, "Some message", "this field"))
         s += ""
+
+
+class TestPickling(unittest.TestCase):
+    def test_structure_round_trip(self):
+        idf_structure = IDFProcessor().process_file_via_string("! header\nVersion,12.9;\nZone,Z1,0;Zone,Z2,,1;")
+        restored = pickle.loads(pickle.dumps(idf_structure))
+        self.assertEqual(idf_structure.file_path, restored.file_path)
+        self.assertEqual("12.9", restored.version_string)
+        self.assertEqual(12.9, restored.version_float)
+        self.assertEqual([(o.comment, o.object_name, list(o.fields)) for o in idf_structure.objects],
+                         [(o.comment, o.object_name, list(o.fields)) for o in restored.objects])
+        self.assertEqual(idf_structure.fingerprint(), restored.fingerprint())
+
+    def test_structure_fallbacks(self):
+        empty = pickle.loads(pickle.dumps(IDFStructure("/dummy")))
+        self.assertIsNone(empty.objects)
+        idf_structure = IDFProcessor().process_file_via_string("Version,12.9;Zone,Z\0,0;")
+        restored = pickle.loads(pickle.dumps(idf_structure))
+        self.assertEqual(["Z\0", "0"], restored.objects[1].fields)
+
+    def test_objects_and_field_lists(self):
+        idf_object = IDFObject(["Zone", "Z1", "0"])
+        idf_object.fields[1] = "1"
+        restored = pickle.loads(pickle.dumps(idf_object))
+        self.assertEqual(["Z1", "1"], restored.fields)
+        self.assertIsInstance(restored.fields, FieldList)
+        restored.fields.append("2")
+        self.assertEqual(1, restored.fields.revision)
@@ -159,3 +159,153 @@ class TestIDFProcessingViaFile(unittest.TestCase):
 
         # import filecmp
         # filecmp.cmp(idf_path, out_idf_file_path)
+
+
+class TestIDFProcessingInterning(unittest.TestCase):
+
+    def setUp(self):
+        idd_string = """
+!IDD_Version 1.1.0
+!IDD_BUILD abcdef1020
+\\group MyGroup
+Version,
+  A1;  \\field VersionID
+
+ObjectType,
+  A1,  \\field Name
+  A2;  \\field Flag
+"""
+        self.idd_structure = IDDProcessor().process_file_via_string(idd_string)
+        self.idf_string = "Version,1.1;OBJECTTYPE,First,Yes;objecttype,Second,Yes;UnknownType,Third;"
+
+    def test_object_names_interned_against_idd(self):
+        idf_structure = IDFProcessor(idd_structure=self.idd_structure).process_file_via_string(self.idf_string)
+        first, second = idf_structure.get_idf_objects_by_type("ObjectType")
+        self.assertEqual("ObjectType", first.object_name)
+        self.assertIs(first.object_name, second.object_name)
+        self.assertEqual("UnknownType", idf_structure.get_idf_objects_by_type("UnknownType")[0].object_name)
+
+    def test_object_names_kept_without_idd(self):
+        idf_structure = IDFProcessor().process_file_via_string(self.idf_string)
+        first, second = idf_structure.get_idf_objects_by_type("ObjectType")
+        self.assertEqual("OBJECTTYPE", first.object_name)
+        self.assertEqual("objecttype", second.object_name)
+
+    def test_field_tokens_interned(self):
+        idf_structure = IDFProcessor(intern_tokens=True).process_file_via_string(self.idf_string)
+        first, second = idf_structure.get_idf_objects_by_type("ObjectType")
+        self.assertIs(first.fields[1], second.fields[1])
+
+    def test_objects_do_not_accept_new_attributes(self):
+        idf_structure = IDFProcessor().process_file_via_string(self.idf_string)
+        with self.assertRaises(AttributeError):
+            idf_structure.objects[0].some_new_attribute = 1
+
+
+class TestIDFProcessingLazy(unittest.TestCase):
+
+    def setUp(self):
+        self.idf_string = """
+Version,1.1;
+! a comment block
+Zone,
+  Zone One,  !- Name
+  0;         !- Direction
+Zone,Zone Two,90;
+Material,Brick,Rough;
+SingleLineObject;
+"""
+
+    def test_lazy_objects_match_full_parse(self):
+        lazy_structure = IDFProcessor(lazy=True).process_file_via_string(self.idf_string)
+        full_structure = IDFProcessor().process_file_via_string(self.idf_string)
+        self.assertEqual(len(full_structure.objects), len(lazy_structure.objects))
+        self.assertEqual(1.1, lazy_structure.version_float)
+        for lazy_object, full_object in zip(lazy_structure.objects, full_structure.objects):
+            self.assertEqual(full_object.object_name, lazy_object.object_name)
+            self.assertEqual(full_object.fields, lazy_object.fields)
+
+    def test_queries_do_not_split_fields(self):
+        idf_structure = IDFProcessor(lazy=True).process_file_via_string(self.idf_string)
+        self.assertEqual(
+            {'Version': 1, 'Zone': 2, 'Material': 1, 'SingleLineObject': 1}, idf_structure.count_objects_by_type()
+        )
+        zone = idf_structure.get_idf_object_by_name("zone two", "ZONE")
+        self.assertEqual("Zone Two", zone.instance_name)
+        self.assertIsNone(idf_structure.get_idf_object_by_name("zone two", "Material"))
+        self.assertEqual("", idf_structure.get_idf_objects_by_type("SingleLineObject")[0].instance_name)
+        self.assertIsNone(idf_structure.objects[1].instance_name)
+        # only the version object, which is read for the version number, and the comment have been split
+        self.assertEqual(2, sum(1 for o in idf_structure.objects if o.is_split))
+
+    def test_lazy_object_split_on_access(self):
+        idf_structure = IDFProcessor(lazy=True).process_file_via_string(self.idf_string)
+        zone = idf_structure.get_idf_objects_by_type("Zone")[0]
+        self.assertFalse(zone.is_split)
+        self.assertEqual(["Zone One", "0"], zone.fields)
+        self.assertTrue(zone.is_split)
+        self.assertEqual("Zone One", zone.instance_name)
+        zone.fields[0] = "Renamed"
+        self.assertEqual("Renamed", zone.instance_name)
+
+
+class TestIDFVersionPeeking(unittest.TestCase):
+
+    def setUp(self):
+        cur_dir = os.path.dirname(os.path.realpath(__file__))
+        self.support_file_dir = os.path.join(cur_dir, "", "support_files")
+
+    def test_peek_version_from_file(self):
+        idf_path = os.path.join(self.support_file_dir, "1ZoneEvapCooler.idf")
+        version_string, version_float = IDFProcessor.peek_version(idf_path)
+        idf_structure = IDFProcessor().process_file_given_file_path(idf_path)
+        self.assertEqual(idf_structure.version_string, version_string)
+        self.assertEqual(idf_structure.version_float, version_float)
+
+    def test_peek_version_multi_line_with_comments(self):
+        idf_string = """
+! Version,1.0;  a commented out version object
+Zone,Z1,  ! Version,2.0;
+  0;
+  VERSION,   ! the real one
+  ! a comment inside the object
+    22.2.0;  !- Version Identifier
+"""
+        self.assertEqual(("22.2.0", 22.2), IDFProcessor.peek_version(StringIO(idf_string)))
+
+    def test_peek_version_stops_reading(self):
+        def lines():
+            yield "Version,9.4;\n"
+            raise AssertionError("Read past the version object")  # pragma: no cover
+        self.assertEqual(("9.4", 9.4), IDFProcessor.peek_version(lines()))
+
+    def test_peek_version_missing(self):
+        self.assertEqual(("UNKNOWN VERSION", 0.0), IDFProcessor.peek_version(StringIO("Zone,Z1;")))
+        with self.assertRaises(ProcessingException):
+            IDFProcessor.peek_version(StringIO("Version,A.B;"))
+        for bad_version in ["", ".5", "A"]:
+            with self.assertRaises(ProcessingException):
+                IDFProcessor.peek_version(StringIO("Version,{};".format(bad_version)))
+        with self.assertRaises(ProcessingException):
+            IDFProcessor.peek_version(os.path.join(self.support_file_dir, "NotReallyThere.idf"))
+
+    def test_version_without_minor_part(self):
+        self.assertEqual(("22", 22.0), IDFProcessor.peek_version(StringIO("Version,22;")))
+        self.assertEqual(("8", 8.0), IDFProcessor.peek_version(StringIO("Version,8;")))
+        idf_structure = IDFProcessor().process_file_via_string("Version,22;Zone,Z1;")
+        self.assertEqual(22.0, idf_structure.version_float)
+
+
+class TestIDFObjectIteration(unittest.TestCase):
+
+    def test_iterate_objects_via_stream(self):
+        idf_string = "! comment\nVersion,1.1;Zone,Z1,\n 0;\n! trailing comment"
+        objects = list(IDFProcessor().iterate_objects_via_stream(StringIO(idf_string)))
+        self.assertEqual(["COMMENT", "Version", "Zone", "COMMENT"], [o.object_name for o in objects])
+        self.assertEqual(["Z1", "0"], objects[2].fields)
+
+    def test_iterate_objects_given_file_path(self):
+        cur_dir = os.path.dirname(os.path.realpath(__file__))
+        idf_path = os.path.join(cur_dir, "support_files", "1ZoneEvapCooler.idf")
+        num_objects = sum(1 for _ in IDFProcessor().iterate_objects_given_file_path(idf_path))
+        self.assertEqual(80, num_objects)
@@ -0,0 +1,166 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idf_processor import IDFProcessor
+from energyplus_iddidf.idf_snapshot import (
+    IDFSnapshotCache, read_snapshot_file, snapshot_bytes, structure_from_snapshot, write_snapshot_file
+)
+
+IDF_STRING = """
+! a leading comment
+! on two lines
+Version,8.6;
+zone,Zone One,0,autosize;  ! trailing comment
+Zone,Zone Two,0,
+  autosize;
+Construction,Wall, Ü material;
+"""
+
+IDD_STRING = """
+!IDD_Version 8.6.0
+!IDD_BUILD abcdef3200
+\\group MyGroup
+Version,
+  A1;  \\field Version Identifier
+
+Zone,
+  A1,  \\field Name
+  N1,  \\field Direction
+  N2;  \\field Ceiling Height
+"""
+
+
+def object_tuples(idf_structure):
+    return [(o.comment, o.object_name, list(o.fields)) for o in idf_structure.objects]
+
+
+class TestIDFSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.idf_structure = IDFProcessor().process_file_via_string(IDF_STRING)
+
+    def test_round_trip(self):
+        loaded = structure_from_snapshot(snapshot_bytes(self.idf_structure), "/my/path")
+        self.assertEqual("/my/path", loaded.file_path)
+        self.assertEqual("8.6", loaded.version_string)
+        self.assertEqual(8.6, loaded.version_float)
+        self.assertEqual(object_tuples(self.idf_structure), object_tuples(loaded))
+        # the repeated values share a single string instance after loading
+        self.assertIs(loaded.objects[2].fields[2], loaded.objects[3].fields[2])
+
+    def test_lazy_and_empty_structures(self):
+        lazy_structure = IDFProcessor(lazy=True).process_file_via_string(IDF_STRING)
+        loaded = structure_from_snapshot(snapshot_bytes(lazy_structure))
+        self.assertEqual(object_tuples(self.idf_structure), object_tuples(loaded))
+        empty = IDFProcessor().process_file_via_string("")
+        loaded = structure_from_snapshot(snapshot_bytes(empty))
+        self.assertEqual([], loaded.objects)
+        self.assertEqual("UNKNOWN VERSION", loaded.version_string)
+
+    def test_name_transform(self):
+        idd_structure = IDDProcessor().process_file_via_string(IDD_STRING)
+        loaded = structure_from_snapshot(
+            snapshot_bytes(self.idf_structure),
+            object_name_transform=lambda name: idd_structure.get_canonical_object_name(name) or name
+        )
+        self.assertEqual(["Zone", "Zone"], [o.object_name for o in loaded.get_idf_objects_by_type("ZONE")])
+
+    def test_bad_snapshots(self):
+        data = snapshot_bytes(self.idf_structure)
+        for bad in [b"", b"NOTASNAPSHOT" * 10, data[:8] + b"\x09\x00" + data[10:], data[:-1], data + b"\x00"]:
+            with self.assertRaises(ProcessingException):
+                structure_from_snapshot(bad)
+        corrupt_text = bytearray(data)
+        corrupt_text[data.index("Ü".encode("utf-8"))] ^= 0xff
+        corrupt_offsets = bytearray(data)
+        last_offset = len(data) - 4 * sum(len(o.fields) for o in self.idf_structure.objects) - 4
+        corrupt_offsets[last_offset] ^= 0xff
+        for corrupt in [corrupt_text, corrupt_offsets]:
+            with self.assertRaises(ProcessingException):
+                structure_from_snapshot(bytes(corrupt))
+        self.idf_structure.objects[1].fields[0] = "bad\0name"
+        with self.assertRaises(ProcessingException):
+            snapshot_bytes(self.idf_structure)
+
+    def test_files(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            snapshot_path = os.path.join(temp_dir, "model.idfsnap")
+            write_snapshot_file(self.idf_structure, snapshot_path)
+            self.assertEqual(object_tuples(self.idf_structure), object_tuples(read_snapshot_file(snapshot_path)))
+            with self.assertRaises(ProcessingException):
+                read_snapshot_file(os.path.join(temp_dir, "missing"))
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+class TestIDFSnapshotCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = IDFSnapshotCache(os.path.join(self.temp_dir, "cache"))
+        self.idf_path = os.path.join(self.temp_dir, "model.idf")
+        with open(self.idf_path, "w") as f:
+            f.write(IDF_STRING)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_processor_uses_cache(self):
+        first = IDFProcessor(snapshot_cache=self.cache).process_file_given_file_path(self.idf_path)
+        self.assertEqual(1, len(os.listdir(self.cache.cache_dir)))
+        second = IDFProcessor(snapshot_cache=self.cache).process_file_given_file_path(self.idf_path)
+        self.assertIsNot(first, second)
+        self.assertEqual(self.idf_path, second.file_path)
+        self.assertEqual(object_tuples(first), object_tuples(second))
+        self.assertEqual(object_tuples(IDFProcessor().process_file_given_file_path(self.idf_path)),
+                         object_tuples(second))
+
+    def test_changed_file_is_reparsed(self):
+        IDFProcessor(snapshot_cache=self.cache).process_file_given_file_path(self.idf_path)
+        with open(self.idf_path, "a") as f:
+            f.write("Zone,Zone Three;\n")
+        idf_structure = IDFProcessor(snapshot_cache=self.cache).process_file_given_file_path(self.idf_path)
+        self.assertEqual(3, len(idf_structure.get_idf_objects_by_type("Zone")))
+        self.assertEqual(2, len(os.listdir(self.cache.cache_dir)))
+
+    def test_unusable_snapshot_is_a_miss(self):
+        with open(self.idf_path, "rb") as f:
+            key = IDFSnapshotCache.key_for_bytes(f.read())
+        self.assertIsNone(self.cache.load(key, self.idf_path))
+        with open(self.cache.path_for_key(key), "wb") as f:
+            f.write(b"garbage")
+        idf_structure = IDFProcessor(snapshot_cache=self.cache).process_file_given_file_path(self.idf_path)
+        self.assertEqual(2, len(idf_structure.get_idf_objects_by_type("Zone")))
+        self.assertIsNotNone(self.cache.load(key, self.idf_path))
+
+    def test_corrupt_snapshot_is_a_miss(self):
+        IDFProcessor(snapshot_cache=self.cache).process_file_given_file_path(self.idf_path)
+        snapshot_path = os.path.join(self.cache.cache_dir, os.listdir(self.cache.cache_dir)[0])
+        with open(snapshot_path, "rb") as f:
+            data = bytearray(f.read())
+        # flip one byte of the string table, so it is no longer valid UTF-8
+        data[data.index("Ü".encode("utf-8"))] ^= 0xff
+        with open(snapshot_path, "wb") as f:
+            f.write(bytes(data))
+        idf_structure = IDFProcessor(snapshot_cache=self.cache).process_file_given_file_path(self.idf_path)
+        self.assertEqual(2, len(idf_structure.get_idf_objects_by_type("Zone")))
+
+    def test_unstorable_structure_is_still_returned(self):
+        with open(self.idf_path, "w") as f:
+            f.write("Version,12.9;\nZone,Zone\0One;\n")
+        with self.assertLogs("eptransition.idd.processor", level="WARNING"):
+            idf_structure = IDFProcessor(snapshot_cache=self.cache).process_file_given_file_path(self.idf_path)
+        self.assertEqual(["Zone\0One"], idf_structure.get_idf_objects_by_type("Zone")[0].fields)
+        self.assertEqual([], os.listdir(self.cache.cache_dir))
+
+    def test_cache_with_idd(self):
+        idd_structure = IDDProcessor().process_file_via_string(IDD_STRING)
+        IDFProcessor(snapshot_cache=self.cache).process_file_given_file_path(self.idf_path)
+        processor = IDFProcessor(idd_structure=idd_structure, intern_tokens=True, snapshot_cache=self.cache)
+        idf_structure = processor.process_file_given_file_path(self.idf_path)
+        self.assertEqual(["Zone", "Zone"], [o.object_name for o in idf_structure.get_idf_objects_by_type("zone")])
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idf_processor import IDFProcessor
+from energyplus_iddidf.idf_sqlite import IDFObjectTable, IDFSQLiteDatabase, export_idf_structures_to_sqlite
+
+IDD_STRING = """
+!IDD_Version 8.6.0
+!IDD_BUILD abcdef3300
+\\group MyGroup
+Version,
+  A1;  \\field Version Identifier
+
+Zone,
+  A1,  \\field Name
+       \\reference ZoneNames
+  N1,  \\field Multiplier
+       \\type integer
+  N2,  \\field Ceiling Height
+       \\autocalculatable
+  N3;  \\field Ceiling Height
+
+Shape,
+  \\extensible:1
+  A1,  \\field Name
+  N1;  \\field Value 1
+       \\begin-extensible
+"""
+
+IDF_ONE = """
+Version,8.6;
+! a comment
+Zone,Zone One,2,3.5;
+Zone,Zone Two,,autocalculate;
+Shape,Shape One,1,2,3;
+Mystery,Field A,Field B;
+"""
+
+IDF_TWO = """
+Version,8.6;
+ZONE,zone three,1,4.0;
+"""
+
+
+class TestIDFSQLiteExport(unittest.TestCase):
+
+    def setUp(self):
+        self.idd_structure = IDDProcessor().process_file_via_string(IDD_STRING)
+        self.idf_structures = [IDFProcessor().process_file_via_string(s) for s in [IDF_ONE, IDF_TWO]]
+
+    def test_table_layout(self):
+        table = IDFObjectTable(self.idd_structure.get_object_by_type("Zone"))
+        self.assertEqual("Zone", table.table_name)
+        self.assertEqual(["name", "multiplier", "ceiling_height", "ceiling_height_2"], table.column_names)
+        self.assertEqual(["TEXT", "INTEGER", "REAL", "REAL"], table.column_types)
+        self.assertEqual("name", table.name_column)
+        self.assertEqual(([1, 4, "Z", None, None, None, "a,b"], []), table.rows(1, 4, ["Z", "", "", "", "a", "b"]))
+        table = IDFObjectTable(self.idd_structure.get_object_by_type("Shape"))
+        self.assertEqual(["name"], table.column_names)
+        self.assertEqual("Shape__extensions", table.extension_table_name)
+        self.assertEqual(["value"], table.extension_column_names)
+        self.assertEqual(([1, 0, "S", None], [[1, 0, 0, "1"], [1, 0, 1, None], [1, 0, 2, "3"]]),
+                         table.rows(1, 0, ["S", "1", "", "3"]))
+
+    def test_export_and_query(self):
+        with IDFSQLiteDatabase(":memory:", self.idd_structure) as database:
+            self.assertEqual([1, 2], database.add_structures(self.idf_structures))
+            self.assertEqual([(1, "8.6"), (2, "8.6")], database.query("SELECT file_id, version_string FROM idf_files"))
+            rows = database.query('SELECT file_id, object_index, name, multiplier, ceiling_height FROM "Zone" '
+                                  'ORDER BY file_id, object_index')
+            self.assertEqual([(1, 2, "Zone One", 2, 3.5), (1, 3, "Zone Two", None, "autocalculate"),
+                              (2, 1, "zone three", 1, 4.0)], rows)
+            self.assertEqual([("Shape One", None)], database.query("SELECT name, extra_fields FROM Shape"))
+            self.assertEqual([(0, 1.0), (1, 2.0), (2, 3.0)],
+                             database.query("SELECT group_index, value FROM Shape__extensions ORDER BY group_index"))
+            self.assertEqual([("Mystery", "Field A,Field B")],
+                             database.query("SELECT object_type, fields FROM idf_unknown_objects"))
+            self.assertEqual([(2,)], database.query('SELECT file_id FROM Zone WHERE name = ? COLLATE NOCASE',
+                                                    ("ZONE THREE",)))
+            self.assertEqual("name", database.table_for_type("ZONE").name_column)
+            self.assertIsNone(database.table_for_type("Mystery"))
+            with self.assertRaises(ProcessingException):
+                database.query("SELECT * FROM NotATable")
+
+    def test_append_to_existing_file(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            database_path = os.path.join(temp_dir, "corpus.sqlite")
+            self.assertEqual([1], export_idf_structures_to_sqlite(self.idf_structures[:1], database_path,
+                                                                  self.idd_structure))
+            self.assertEqual([2], export_idf_structures_to_sqlite(self.idf_structures[1:], database_path,
+                                                                  self.idd_structure))
+            with IDFSQLiteDatabase(database_path, self.idd_structure) as database:
+                self.assertEqual([(3,)], database.query("SELECT COUNT(*) FROM Zone"))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_failed_export_is_rolled_back(self):
+        with IDFSQLiteDatabase(":memory:", self.idd_structure) as database:
+            # a clashing Shape table that rejects every row makes the export fail part way through
+            database.connection.executescript(
+                "CREATE TABLE Shape (file_id INTEGER, object_index INTEGER, name TEXT, extra_fields TEXT, "
+                "CHECK (name IS NULL));")
+            with self.assertRaises(ProcessingException):
+                database.add_structures(self.idf_structures)
+            self.assertEqual([(0,)], database.query("SELECT COUNT(*) FROM idf_files"))
+            self.assertEqual([], database.query("SELECT name FROM sqlite_master WHERE name = 'Zone'"))
+            database.connection.execute("DROP TABLE Shape")
+            self.assertEqual([1, 2], database.add_structures(self.idf_structures))
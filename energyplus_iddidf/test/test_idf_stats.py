@@ -0,0 +1,96 @@
+from io import StringIO
+import os
+import tempfile
+import unittest
+
+from energyplus_iddidf.exceptions import ProcessingException
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idf_stats import UNKNOWN_GROUP, IDFStatsCollector
+
+IDD_STRING = """
+!IDD_Version 12.9.0
+!IDD_BUILD abcdef1019
+\\group Simulation
+Version,
+  A1;  \\field Version Identifier
+
+\\group Thermal Zones
+Zone,
+  A1,  \\field Name
+  N1;  \\field Multiplier
+
+BuildingSurface:Detailed,
+  \\extensible:3
+  A1,  \\field Name
+  N1,  \\field Vertex 1 X-coordinate
+       \\begin-extensible
+  N2,  \\field Vertex 1 Y-coordinate
+  N3;  \\field Vertex 1 Z-coordinate
+"""
+
+IDF_STRING = """! a model
+! with a two line header
+Version,12.9;
+zone,Z1,1;
+Zone,Z2,  ! the second zone
+  2;
+BuildingSurface:Detailed,Wall,0,0,0,1,0,0,1,0,1,0,0,1;
+! trailing comment
+Output:Surfaces:Drawing,DXF;  Zone,Z3,1;
+"""
+
+
+class TestIDFStatsCollector(unittest.TestCase):
+
+    def test_stats_without_idd(self):
+        stats = IDFStatsCollector(num_largest=2).collect_via_stream(StringIO(IDF_STRING))
+        self.assertEqual("12.9", stats.version_string)
+        self.assertIsNone(stats.idd_version_string)
+        self.assertIsNone(stats.file_size)
+        self.assertEqual(6, stats.num_objects)
+        self.assertEqual(1 + 2 * 3 + 13 + 1, stats.num_fields)
+        self.assertEqual(2, stats.num_comment_blocks)
+        self.assertEqual(3, stats.num_comment_lines)
+        # types are counted without regard to case, under the first spelling found
+        self.assertEqual({'objects': 3, 'fields': 6}, stats.objects_by_type["zone"])
+        self.assertNotIn("Zone", stats.objects_by_type)
+        self.assertEqual(
+            [("BuildingSurface:Detailed", "Wall", 13, 4), ("zone", "Z1", 2, 2)],
+            [(o['type'], o['name'], o['num_fields'], o['object_number']) for o in stats.largest_objects]
+        )
+        summary = stats.to_dict()
+        self.assertNotIn('objects_by_group', summary)
+        self.assertEqual(["zone", "BuildingSurface:Detailed", "Output:Surfaces:Drawing", "Version"],
+                         list(summary['objects_by_type']))
+        self.assertEqual(4, summary['num_object_types'])
+
+    def test_stats_with_idd(self):
+        idd = IDDProcessor().process_file_via_string(IDD_STRING)
+        stats = IDFStatsCollector(idd).collect_via_stream(StringIO(IDF_STRING))
+        self.assertEqual("12.9.0", stats.idd_version_string)
+        self.assertIn("Zone", stats.objects_by_type)
+        self.assertEqual({"Thermal Zones": 4, "Simulation": 1, UNKNOWN_GROUP: 1}, stats.objects_by_group)
+        self.assertEqual(["Thermal Zones", UNKNOWN_GROUP, "Simulation"], list(stats.to_dict()["objects_by_group"]))
+
+    def test_file_and_limits(self):
+        handle, file_path = tempfile.mkstemp(suffix=".idf")
+        try:
+            with os.fdopen(handle, "w") as f:
+                f.write(IDF_STRING)
+            stats = IDFStatsCollector(num_largest=0).collect_given_file_path(file_path)
+            self.assertEqual(os.path.getsize(file_path), stats.file_size)
+            self.assertEqual([], stats.largest_objects)
+            self.assertGreaterEqual(stats.parse_seconds, 0.0)
+        finally:
+            os.remove(file_path)
+        with self.assertRaises(ProcessingException):
+            IDFStatsCollector().collect_given_file_path(file_path)
+        with self.assertRaises(ProcessingException):
+            IDFStatsCollector().collect_via_stream(StringIO("Zone,Z1\nZone,Z2;\n"))
+
+    def test_empty_input(self):
+        stats = IDFStatsCollector().collect_via_stream(StringIO(""))
+        self.assertIsNone(stats.version_string)
+        self.assertEqual(0, stats.num_objects)
+        self.assertEqual([], stats.largest_objects)
+        self.assertIsNone(stats.to_dict()['megabytes_per_second'])
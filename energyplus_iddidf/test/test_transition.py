@@ -0,0 +1,216 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from energyplus_iddidf.exceptions import (
+    FileAccessException, FileTypeException, ManagerProcessingException, ProcessingException
+)
+from energyplus_iddidf.idd_processor import IDDProcessor
+from energyplus_iddidf.idf_processor import IDFProcessor
+from energyplus_iddidf.transition import ObjectTransitionRule, TransitionEngine
+
+OLD_IDD = """
+!IDD_Version 9.1.0
+!IDD_BUILD abcdef3700
+\\group MyGroup
+Version,
+  A1;  \\field Version Identifier
+
+Zone,
+  A1,  \\field Name
+  N1,  \\field Direction of Relative North
+  A2,  \\field Type
+       \\type choice
+       \\key Normal
+       \\key Plenum
+  N2,  \\field Multiplier
+       \\default 1
+  N3;  \\field Ceiling Height
+
+Schedule:Compact,
+  \\extensible:1
+  A1,  \\field Name
+  A2;  \\field Field 1
+       \\begin-extensible
+
+Material,
+  A1,  \\field Name
+  N1;  \\field Thickness
+
+Old:Object,
+  A1;  \\field Name
+
+Construction,
+  A1,  \\field Name
+  A2;  \\field Outside Layer
+"""
+
+NEW_IDD = """
+!IDD_Version 9.2.0
+!IDD_BUILD abcdef3701
+\\group MyGroup
+Version,
+  A1;  \\field Version Identifier
+
+Space,
+  A1,  \\field Name
+  A2,  \\field Space Kind
+       \\type choice
+       \\key Regular
+       \\key Plenum
+  A3,  \\field Space Type
+  N1,  \\field Multiplier
+       \\default 2
+  N2;  \\field Zone Ceiling Height
+
+Schedule:Compact,
+  \\extensible:1
+  A1,  \\field Name
+  A2,  \\field Schedule Type Limits Name
+  A3;  \\field Field 1
+       \\begin-extensible
+
+Material,
+  A1,  \\field Name
+  N1,  \\field Thickness
+  N2;  \\field Roughness Factor
+
+Construction,
+  A1,  \\field Name
+  A2;  \\field Layer 1
+"""
+
+OLD_IDF = """! header comment
+Version,9.1;
+Zone,Z1,0,normal,,3.0;
+Zone,Z2,15,Plenum,4;
+Schedule:Compact,Always On,Through: 12/31,For: AllDays,Until: 24:00,1;
+Material,Brick,0.1;
+Old:Object,Leftover;
+"""
+
+
+def zone_rule():
+    return ObjectTransitionRule("Zone").rename_object("Space") \
+        .delete_field("Direction of Relative North") \
+        .rename_field("Type", "Space Kind") \
+        .rename_field("Ceiling Height", "Zone Ceiling Height") \
+        .insert_field("Space Type", "General") \
+        .remap_values("Space Kind", {"Normal": "Regular"}) \
+        .keep_old_default("Multiplier")
+
+
+class TestTransitionRules(unittest.TestCase):
+
+    def setUp(self):
+        self.old_idd = IDDProcessor().process_file_via_string(OLD_IDD)
+        self.new_idd = IDDProcessor().process_file_via_string(NEW_IDD)
+
+    def test_compiled_rule(self):
+        transition = zone_rule().compile(self.old_idd, self.new_idd)
+        self.assertEqual(["Z1", "Regular", "General", "1", "3.0"], transition(["Z1", "0", "normal", "", "3.0"]))
+        self.assertEqual(["Z2", "Plenum", "General", "4"], transition(["Z2", "15", "Plenum", "4"]))
+        self.assertEqual(["Z3", "", "General", "1"], transition(["Z3"]))
+
+    def test_custom_step_and_extensible_fields(self):
+        rule = ObjectTransitionRule("Schedule:Compact") \
+            .insert_field("Schedule Type Limits Name", "Any Number") \
+            .apply(lambda fields: [f.replace("Until: ", "Until:") for f in fields])
+        transition = rule.compile(self.old_idd, self.new_idd)
+        self.assertEqual(["S", "Any Number", "Through: 12/31", "Until:24:00", "1"],
+                         transition(["S", "Through: 12/31", "Until: 24:00", "1"]))
+
+    def test_bad_rules(self):
+        bad_rules = [
+            ObjectTransitionRule("Missing"),
+            ObjectTransitionRule("Zone").rename_object("Space"),  # drops fields without deleting them
+            zone_rule().delete_field("No Such Field"),
+            zone_rule().insert_field(99, "x"),
+            zone_rule().keep_old_default("Space Type"),
+            ObjectTransitionRule("Schedule:Compact").insert_field("Field 1", "x"),  # extensible fields are copied
+            ObjectTransitionRule("Schedule:Compact").remap_values(3, {"a": "b"}),
+        ]
+        for rule in bad_rules:
+            with self.assertRaises(ManagerProcessingException):
+                rule.compile(self.old_idd, self.new_idd)
+        with self.assertRaises(ManagerProcessingException) as context:
+            TransitionEngine(self.old_idd, self.new_idd, bad_rules)
+        self.assertEqual(len(bad_rules), len(context.exception.issues))
+
+
+class TestTransitionEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.old_idd = IDDProcessor().process_file_via_string(OLD_IDD)
+        self.new_idd = IDDProcessor().process_file_via_string(NEW_IDD)
+        self.engine = TransitionEngine(self.old_idd, self.new_idd, [
+            zone_rule(), ObjectTransitionRule("Schedule:Compact").insert_field("Schedule Type Limits Name", "Any")
+        ])
+        self.temp_dir = tempfile.mkdtemp()
+        self.original_path = os.path.join(self.temp_dir, "original.idf")
+        self.updated_path = os.path.join(self.temp_dir, "updated.idf")
+        with open(self.original_path, "w") as f:
+            f.write(OLD_IDF)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_transition_file(self):
+        self.assertEqual(6, self.engine.transition_file(self.original_path, self.updated_path))
+        updated = IDFProcessor().process_file_given_file_path(self.updated_path)
+        self.assertEqual("9.2", updated.version_string)
+        self.assertTrue(updated.objects[0].comment)
+        self.assertEqual([["Z1", "Regular", "General", "1", "3.0"], ["Z2", "Plenum", "General", "4"]],
+                         [list(o.fields) for o in updated.get_idf_objects_by_type("Space")])
+        self.assertEqual(["Always On", "Any", "Through: 12/31", "For: AllDays", "Until: 24:00", "1"],
+                         updated.get_idf_objects_by_type("Schedule:Compact")[0].fields)
+        # material only gained a field at the end, so it is carried over by name without a rule
+        self.assertEqual(["Brick", "0.1"], updated.get_idf_objects_by_type("Material")[0].fields)
+        self.assertEqual(["Leftover"], updated.get_idf_objects_by_type("Old:Object")[0].fields)
+        self.assertEqual(["Old:Object"], [i.object_name for i in self.engine.issues])
+
+    def test_file_problems(self):
+        with self.assertRaises(FileAccessException):
+            self.engine.transition_file(os.path.join(self.temp_dir, "missing.idf"), self.updated_path)
+        with open(self.updated_path, "w") as f:
+            f.write("exists")
+        with self.assertRaises(FileAccessException):
+            self.engine.transition_file(self.original_path, self.updated_path)
+        self.engine.transition_file(self.original_path, self.updated_path, overwrite=True)
+        epjson_path = os.path.join(self.temp_dir, "original.epJSON")
+        with open(epjson_path, "w") as f:
+            f.write("{}")
+        with self.assertRaises(FileTypeException):
+            self.engine.transition_file(epjson_path, self.updated_path, overwrite=True)
+        newer_path = os.path.join(self.temp_dir, "newer.idf")
+        with open(newer_path, "w") as f:
+            f.write("Version,9.2;\n")
+        with self.assertRaises(FileTypeException):
+            self.engine.transition_file(newer_path, self.updated_path, overwrite=True)
+
+    def test_implicit_rule_failure_removes_output(self):
+        # the construction layer field was renamed, which cannot be matched without a rule
+        with open(self.original_path, "a") as f:
+            f.write("Construction,Wall,Brick;\n")
+        with self.assertRaises(ManagerProcessingException):
+            self.engine.transition_file(self.original_path, self.updated_path)
+        self.assertFalse(os.path.exists(self.updated_path))
+
+    def test_parse_failure_removes_output(self):
+        with open(self.original_path, "a") as f:
+            f.write("Material,Broken,0.2\n")
+        with self.assertRaises(ProcessingException):
+            self.engine.transition_file(self.original_path, self.updated_path)
+        self.assertFalse(os.path.exists(self.updated_path))
+
+    def test_issues_per_file(self):
+        second_path = os.path.join(self.temp_dir, "second.idf")
+        with open(second_path, "w") as f:
+            f.write("Version,9.1;\nOld:Object,First;\nOld:Object,Second;\n")
+        self.engine.transition_file(self.original_path, self.updated_path)
+        self.engine.transition_file(second_path, os.path.join(self.temp_dir, "second_updated.idf"))
+        self.assertEqual(2, len(self.engine.issues))
+        self.assertIn("First", self.engine.issues[0].message)
+        self.assertEqual([1, 2], [len(self.engine.issues_by_file[p]) for p in [self.original_path, second_path]])
+        self.assertIs(self.engine.issues, self.engine.issues_by_file[second_path])
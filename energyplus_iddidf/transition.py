@@ -0,0 +1,404 @@
+import logging
+import os
+
+from energyplus_iddidf import exceptions
+from energyplus_iddidf.idf_objects import IDFObject, ValidationIssue
+from energyplus_iddidf.idf_processor import IDFProcessor
+
+module_logger = logging.getLogger("eptransition.transition")
+
+
+def _normalized_name(name):
+    return (name or "").strip().upper()
+
+
+def _regular_field_count(idd_object):
+    first_extensible = idd_object.first_extensible_field_index()
+    return len(idd_object.fields) if first_extensible is None else first_extensible
+
+
+def _field_index(idd_object, field, nickname):
+    """
+    Internal worker that resolves a field reference, either a zero-based index or a case-insensitive IDD field name,
+    into an index of the regular (not extensible) fields of the given IDD object.  Extensible groups are carried over
+    as they are, so a rule referring to one of their fields is an error rather than being silently ignored.
+    """
+    num_regular = _regular_field_count(idd_object)
+    index = None
+    if isinstance(field, int):
+        if 0 <= field < len(idd_object.fields):
+            index = field
+    else:
+        wanted = _normalized_name(field)
+        for field_index, idd_field in enumerate(idd_object.fields):
+            if _normalized_name(idd_field.field_name) == wanted:
+                index = field_index
+                break
+    if index is None:
+        raise exceptions.ManagerProcessingException(
+            "Transition rule refers to field \"{}\" which is not in the {} IDD object {}".format(
+                field, nickname, idd_object.name))
+    if index >= num_regular:
+        raise exceptions.ManagerProcessingException(
+            "Transition rule refers to field \"{}\" in the extensible group of the {} IDD object {}; extensible "
+            "fields are carried over as they are, use apply to change them".format(field, nickname, idd_object.name))
+    return index
+
+
+class ObjectTransitionRule:
+    """
+    The declared changes to one object type between an old and a new IDD.  The methods record changes and return the
+    rule itself so they can be chained, for example::
+
+        ObjectTransitionRule("Zone").delete_field("Part of Total Floor Area").insert_field("Space Type", "General")
+
+    Fields of the old object are carried over to the new object by matching IDD field names, so a rule only needs to
+    describe what does not match by name.  Fields are referred to by case-insensitive IDD field name or by zero-based
+    index; fields of the old object use the old IDD, fields of the new object use the new IDD.  Extensible groups are
+    carried over as they are after the regular fields, so the named methods only accept regular fields; use apply for
+    changes to extensible fields.
+
+    Rules are compiled once, by compile(), into a single function per object type that converts a list of old field
+    values into the list of new field values.
+
+    Constructor parameters:
+
+    :param str old_type: The object type in the old IDD
+    """
+
+    def __init__(self, old_type):
+        self.old_type = old_type
+        self.new_type = old_type
+        self.deleted_fields = []
+        self.renamed_fields = []
+        self.inserted_fields = []
+        self.value_remaps = []
+        self.old_default_fields = []
+        self.functions = []
+
+    def rename_object(self, new_type):
+        """
+        Changes the object type.
+
+        :param str new_type: The object type in the new IDD
+        :return: This rule
+        """
+        self.new_type = new_type
+        return self
+
+    def delete_field(self, old_field):
+        """
+        Drops a field of the old object.
+
+        :param old_field: The old IDD field name or index
+        :return: This rule
+        """
+        self.deleted_fields.append(old_field)
+        return self
+
+    def rename_field(self, old_field, new_field):
+        """
+        Moves the value of a field of the old object into a field of the new object with a different name.
+
+        :param old_field: The old IDD field name or index
+        :param new_field: The new IDD field name or index
+        :return: This rule
+        """
+        self.renamed_fields.append((old_field, new_field))
+        return self
+
+    def insert_field(self, new_field, value=""):
+        """
+        Sets a field of the new object, usually one that did not exist before, to a constant value.
+
+        :param new_field: The new IDD field name or index
+        :param str value: The value of the field
+        :return: This rule
+        """
+        self.inserted_fields.append((new_field, value))
+        return self
+
+    def remap_values(self, new_field, mapping):
+        """
+        Replaces values of a field, such as choice keys that were renamed.  Values are matched case-insensitively and
+        values not in the mapping are kept.
+
+        :param new_field: The new IDD field name or index
+        :param dict mapping: A dictionary of old value to new value
+        :return: This rule
+        """
+        self.value_remaps.append((new_field, mapping))
+        return self
+
+    def keep_old_default(self, new_field):
+        """
+        Writes out the old IDD default of a field wherever the field is blank, for fields whose default changed, so
+        the transitioned file behaves as before.
+
+        :param new_field: The new IDD field name or index; the old default is taken from the matching old field
+        :return: This rule
+        """
+        self.old_default_fields.append(new_field)
+        return self
+
+    def apply(self, function):
+        """
+        Adds a custom step for anything the other methods cannot describe.  Custom steps run last, in order.
+
+        :param function: A function taking the list of new field values and returning the modified list
+        :return: This rule
+        """
+        self.functions.append(function)
+        return self
+
+    def compile(self, old_idd, new_idd):
+        """
+        Compiles this rule into a function for one object type.  All field references are resolved here, so applying
+        the function to an object only involves list indexing and dictionary lookups.
+
+        :param IDDStructure old_idd: The old IDD structure
+        :param IDDStructure new_idd: The new IDD structure
+        :return: A function that takes the old field values and returns the new field values
+        :raises ManagerProcessingException: if the rule refers to unknown objects or fields, or if a field of the old
+                                            object would be dropped without being deleted by the rule
+        """
+        old_object = old_idd.get_object_by_type(self.old_type)
+        new_object = new_idd.get_object_by_type(self.new_type)
+        for idd_object, object_type, nickname in [(old_object, self.old_type, "old"),
+                                                  (new_object, self.new_type, "new")]:
+            if idd_object is None or isinstance(idd_object, str):
+                raise exceptions.ManagerProcessingException(
+                    "Transition rule refers to object \"{}\" which is not a full object in the {} IDD".format(
+                        object_type, nickname))
+        num_old_regular = _regular_field_count(old_object)
+        num_new_regular = _regular_field_count(new_object)
+        deleted = {_field_index(old_object, f, "old") for f in self.deleted_fields}
+        sources = {}
+        constants = {}
+        for old_field, new_field in self.renamed_fields:
+            sources[_field_index(new_object, new_field, "new")] = _field_index(old_object, old_field, "old")
+        for new_field, value in self.inserted_fields:
+            constants[_field_index(new_object, new_field, "new")] = value
+        old_by_name = {}
+        for index in range(num_old_regular):
+            old_by_name.setdefault(_normalized_name(old_object.fields[index].field_name), index)
+        # each new field takes a constant, an explicitly renamed field, or the old field with the same name
+        layout = []
+        for index in range(num_new_regular):
+            if index in constants:
+                layout.append((None, constants[index]))
+            elif index in sources:
+                layout.append((sources[index], ""))
+            else:
+                old_index = old_by_name.get(_normalized_name(new_object.fields[index].field_name))
+                layout.append((None, "") if old_index is None or old_index in deleted else (old_index, ""))
+        used = {old_index for old_index, _ in layout if old_index is not None}
+        dropped = [old_object.fields[i].field_name for i in range(num_old_regular) if i not in used | deleted]
+        if dropped:
+            raise exceptions.ManagerProcessingException(
+                "Transition of {} would drop old fields without a rule deleting them: {}".format(
+                    self.old_type, ", ".join(dropped)))
+        remaps = [
+            (_field_index(new_object, f, "new"), {k.upper(): v for k, v in mapping.items()})
+            for f, mapping in self.value_remaps
+        ]
+        old_defaults = []
+        for new_field in self.old_default_fields:
+            new_index = _field_index(new_object, new_field, "new")
+            old_index = layout[new_index][0]
+            if old_index is None or "\\default" not in old_object.fields[old_index].meta_data:
+                raise exceptions.ManagerProcessingException(
+                    "Cannot keep the old default of {} field \"{}\", there is no old default".format(
+                        self.new_type, new_field))
+            old_defaults.append((new_index, old_object.fields[old_index].meta_data["\\default"][0]))
+        functions = list(self.functions)
+        extensible = new_object.extensible_group_size() > 0
+        return _compiled_transition(layout, num_old_regular, extensible, remaps, old_defaults, functions)
+
+
+def _compiled_transition(layout, num_old_regular, extensible, remaps, old_defaults, functions):
+    """
+    Internal worker that builds the function applying a compiled rule.  Everything the function needs is resolved into
+    local lists up front.
+    """
+    def transition_fields(fields):
+        num_fields = len(fields)
+        new_fields = [
+            (fields[old_index] if old_index < num_fields else "") if old_index is not None else constant
+            for old_index, constant in layout
+        ]
+        if num_fields > num_old_regular and extensible:
+            new_fields.extend(fields[num_old_regular:])
+        for index, mapping in remaps:
+            value = new_fields[index]
+            new_value = mapping.get(value.upper())
+            if new_value is not None:
+                new_fields[index] = new_value
+        for index, default in old_defaults:
+            if new_fields[index] == "":
+                new_fields[index] = default
+        for function in functions:
+            new_fields = function(new_fields)
+        while new_fields and new_fields[-1] == "":
+            new_fields.pop()
+        return new_fields
+    return transition_fields
+
+
+def _remove_partial_file(file_path):
+    """
+    Internal worker that removes a partially written output file after a failure, if it exists.
+    """
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+
+class TransitionEngine:
+    """
+    This class upgrades IDF files from the version of one IDD to the version of another in a single streaming pass.
+    The rules are compiled once, when the engine is built, into one function per object type, and each object read
+    from the input is converted by a single dictionary lookup and a call to its function, then written straight to the
+    output.  An engine can be reused for any number of files.
+
+    Object types without a rule are carried over by field name: unchanged types are copied as they are, and types
+    whose fields differ get an implicit rule the first time they are seen.  That fails if an old field has no match in
+    the new IDD, which means an explicit rule is needed.  The Version object is always updated to the new version, and
+    objects whose type is not in the new IDD are copied and reported as issues, one per object.
+
+    :ivar list issues: The ValidationIssue instances of the most recent file, or of all objects converted with
+                       transition_objects since then
+    :ivar dict issues_by_file: The issues of each file transitioned by this engine, keyed by the original file path
+
+    Constructor parameters:
+
+    :param IDDStructure old_idd: The IDD structure of the version being upgraded from
+    :param IDDStructure new_idd: The IDD structure of the version being upgraded to
+    :param rules: An iterable of ObjectTransitionRule instances
+    :raises ManagerProcessingException: if any rule cannot be compiled, with every problem listed in the issues
+    """
+
+    def __init__(self, old_idd, new_idd, rules=()):
+        self.old_idd = old_idd
+        self.new_idd = new_idd
+        self.issues = []
+        self.issues_by_file = {}
+        self.new_version = "{}.{}".format(*new_idd.version_string.split(".")[:2])
+        self._transitions = {}
+        problems = []
+        for rule in rules:
+            try:
+                self._transitions[rule.old_type.upper()] = (
+                    new_idd.get_canonical_object_name(rule.new_type) or rule.new_type, rule.compile(old_idd, new_idd),
+                    True
+                )
+            except exceptions.ManagerProcessingException as e:
+                problems.append(e.message)
+        if problems:
+            raise exceptions.ManagerProcessingException("Transition rules could not be compiled", issues=problems)
+
+    def _transition_for_type(self, object_type):
+        """
+        Internal worker that returns the (new type, function, known) triple for an object type, setting up the implicit
+        rule the first time a type without an explicit rule is seen.  The function is None if the fields are unchanged,
+        and known is False if the type is not in the new IDD.
+        """
+        key = object_type.upper()
+        transition = self._transitions.get(key)
+        if transition is not None:
+            return transition
+        old_object = self.old_idd.get_object_by_type(object_type)
+        new_object = self.new_idd.get_object_by_type(object_type)
+        if new_object is None:
+            transition = (object_type, None, False)
+        elif old_object is None or isinstance(old_object, str) or isinstance(new_object, str) or \
+                [f.field_name for f in old_object.fields] == [f.field_name for f in new_object.fields]:
+            transition = (self.new_idd.get_canonical_object_name(object_type), None, True)
+        else:
+            transition = (new_object.name, ObjectTransitionRule(object_type).compile(self.old_idd, self.new_idd), True)
+        self._transitions[key] = transition
+        return transition
+
+    def transition_objects(self, idf_objects):
+        """
+        This worker converts a stream of IDF objects.
+
+        :param idf_objects: An iterable of IDFObject instances, such as the IDF object iterator of an IDFProcessor
+        :return: A generator of converted IDFObject instances; comment blocks are passed through
+        :raises ManagerProcessingException: if an object type without an explicit rule cannot be carried over by name
+        """
+        for idf_object in idf_objects:
+            if idf_object.comment:
+                yield idf_object
+                continue
+            if idf_object.object_name.upper() == "VERSION":
+                yield IDFObject(["Version", self.new_version])
+                continue
+            new_type, function, known = self._transition_for_type(idf_object.object_name)
+            fields = idf_object.fields
+            if not known:
+                self.issues.append(ValidationIssue(
+                    new_type, ValidationIssue.WARNING, "Object type is not in the new IDD, copied as it is: {}".format(
+                        fields[0] if fields else "(no fields)")))
+            yield IDFObject([new_type] + (function(list(fields)) if function is not None else list(fields)))
+
+    def transition_file(self, original_path, updated_path, overwrite=False):
+        """
+        This worker upgrades one IDF file, streaming objects from the original file to the updated file.  The issues
+        of the file are stored in the issues attribute, replacing those of any earlier file, and in issues_by_file.  If
+        the upgrade fails part way, the partial updated file is removed.
+
+        :param str original_path: The path to the IDF file to upgrade
+        :param str updated_path: The path to write the upgraded IDF file to
+        :param bool overwrite: If True an existing updated file is replaced, otherwise it is an error
+        :return: The number of objects written, not counting comment blocks
+        :raises FileAccessException: if the original file is missing or the updated file exists or cannot be written
+        :raises FileTypeException: if the original file is not an IDF of the old IDD version
+        :raises ManagerProcessingException: if an object cannot be converted
+        """
+        if not os.path.exists(original_path):
+            raise exceptions.FileAccessException(
+                original_path, exceptions.FileAccessException.CANNOT_FIND_FILE,
+                exceptions.FileAccessException.ORIGINAL_INPUT_FILE)
+        if not original_path.lower().endswith(".idf"):
+            raise exceptions.FileTypeException(
+                original_path, exceptions.FileTypeException.ORIGINAL_INPUT_FILE, "Only IDF files can be transitioned")
+        if os.path.exists(updated_path) and not overwrite:
+            raise exceptions.FileAccessException(
+                updated_path, exceptions.FileAccessException.FILE_EXISTS_MUST_DELETE,
+                exceptions.FileAccessException.UPDATED_INPUT_FILE)
+        try:
+            _, version_float = IDFProcessor.peek_version(original_path)
+        except exceptions.ProcessingException as e:
+            raise exceptions.FileTypeException(
+                original_path, exceptions.FileTypeException.ORIGINAL_INPUT_FILE, str(e))
+        if version_float != self.old_idd.version_float:
+            raise exceptions.FileTypeException(
+                original_path, exceptions.FileTypeException.ORIGINAL_INPUT_FILE,
+                "IDF version {} does not match the old IDD version {}".format(
+                    version_float, self.old_idd.version_string))
+        self.issues = []
+        self.issues_by_file[original_path] = self.issues
+        num_objects = 0
+        try:
+            with open(updated_path, "w") as f:
+                idf_objects = IDFProcessor(idd_structure=self.old_idd).iterate_objects_given_file_path(original_path)
+                for idf_object in self.transition_objects(idf_objects):
+                    idd_object = None
+                    if not idf_object.comment:
+                        num_objects += 1
+                        idd_object = self.new_idd.get_object_by_type(idf_object.object_name)
+                        if isinstance(idd_object, str):
+                            idd_object = None
+                    f.write(idf_object.object_string(idd_object) + "\n")
+        except OSError as e:
+            _remove_partial_file(updated_path)
+            raise exceptions.FileAccessException(
+                updated_path, exceptions.FileAccessException.CANNOT_WRITE_TO_FILE,
+                exceptions.FileAccessException.UPDATED_INPUT_FILE, str(e))
+        except BaseException:
+            _remove_partial_file(updated_path)
+            raise
+        module_logger.debug("Transitioned {} objects from {} to {}".format(num_objects, original_path, updated_path))
+        return num_objects